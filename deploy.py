@@ -8,48 +8,76 @@ This module provides packaged deploys that can be run individually:
 
 Each deployment operation is implemented as a separate module under
 the resinkit_byoc.deploys package.
+
+deploy_all runs independent stages concurrently, as declared by their
+@stage dependencies. Set RESINKIT_DEPLOY_CONCURRENCY=1 to run it serially.
+
+Set RESINKIT_TRACE_DIR to record per-operation timings (see resinkit_byoc.core.timing).
 """
 
-from resinkit_byoc.deploys.install_core import (
-    install_01_core,
-    install_011_core_jupyter,
-    install_012_core_resinkit_api,
-    install_02_core_su,
-    install_03_flink,
-)
-from resinkit_byoc.deploys.install_extras import install_admin_tools, install_mariadb
-from resinkit_byoc.deploys.post_install import post_install
-from resinkit_byoc.deploys.pre_install import install_00_prep
-from resinkit_byoc.deploys.start_service import start_service
+import os
+
+from resinkit_byoc.deploys import DEPLOY_MODULES, load_deploy
 
 # Export all deploy functions for direct access
 __all__ = [
     "install_00_prep",
+    "install_bundle",
     "install_01_core",
     "install_011_core_jupyter",
     "install_012_core_resinkit_api",
     "install_02_core_su",
     "install_03_flink",
     "post_install",
+    "install_appcds",
     "install_mariadb",
     "install_admin_tools",
+    "install_mount_s3",
     "start_service",
+    "build_bundle",
+]
+
+# Stages run by deploy_all
+DEPLOY_ALL_STAGES = [
+    "install_00_prep",
+    "install_bundle",
+    "install_01_core",
+    "install_011_core_jupyter",
+    "install_012_core_resinkit_api",
+    "install_02_core_su",
+    "install_03_flink",
+    "post_install",
+    "install_appcds",
 ]
 
 
+def __getattr__(name: str):
+    # Deploy modules (and pyinfra) are only imported when a deploy is looked up
+    if name in DEPLOY_MODULES:
+        return load_deploy(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _run_stages(names):
+    from resinkit_byoc.core.scheduler import run_stages
+
+    run_stages([load_deploy(name) for name in names])
+
+
 def deploy_all():
     """Deploy all components."""
-    install_00_prep()
-    install_01_core()
-    install_011_core_jupyter()
-    install_012_core_resinkit_api()
-    install_02_core_su()
-    install_03_flink()
-    post_install()
+    _run_stages(DEPLOY_ALL_STAGES)
+
+
+def run_selected():
+    """Deploy the stages named in RESINKIT_STAGES (comma separated), as set by ``resinkit-byoc deploy``."""
+    names = [name.strip() for name in os.getenv("RESINKIT_STAGES", "").split(",")]
+    _run_stages([name for name in names if name])
+
 
 def start():
     """Start service."""
-    start_service()
+    load_deploy("start_service")()
 
 
 def all_in_one():
@@ -0,0 +1,272 @@
+"""
+``resinkit-byoc`` command line entry point.
+
+Startup is kept cheap because other automation calls this entry point many
+times per rollout: only the standard library is imported up front, and
+pyinfra and the deploy modules are imported when a deploy actually runs.
+
+    resinkit-byoc stages
+    resinkit-byoc deploy @docker/node1 install_01_core install_03_flink --dry
+    resinkit-byoc fleet --hosts-file fleet.txt --waves 1,25%,100%
+    resinkit-byoc timing compare --history .deploy-traces/history.jsonl
+    resinkit-byoc kafka-bench compare --baseline kafka-baseline.json
+    resinkit-byoc import-budget --budget-ms 100
+"""
+
+import argparse
+import os
+import sys
+from typing import List, Optional, Tuple
+
+# Time the resinkit_byoc modules may take to import, in milliseconds
+DEFAULT_IMPORT_BUDGET_MS = 100
+
+# Modules that must not be imported before a command needs them
+HEAVY_MODULES = ["pyinfra", "pyinfra_cli", "gevent", "dotenv"]
+
+# Packaged deploys in deploy.py that are not stages
+DEPLOY_ENTRYPOINTS = ["deploy_all", "start", "all_in_one"]
+
+
+def _project_root() -> str:
+    """Resolve the project root once and hand it to child processes through the environment."""
+    from resinkit_byoc.core.find_root import find_project_root
+
+    root = str(find_project_root())
+    # find_project_root checks RESINKIT_API_PATH first, so children skip the lookup
+    os.environ.setdefault("RESINKIT_API_PATH", root)
+    return root
+
+
+def cmd_stages(args: argparse.Namespace) -> int:
+    from resinkit_byoc.deploys import DEPLOY_MODULES
+
+    for name in DEPLOY_ENTRYPOINTS:
+        print(f"{name:32} deploy.py")
+    for name, module in DEPLOY_MODULES.items():
+        print(f"{name:32} {module}")
+    return 0
+
+
+def cmd_deploy(args: argparse.Namespace) -> int:
+    from resinkit_byoc.deploys import DEPLOY_MODULES
+
+    unknown = [
+        name
+        for name in args.stages
+        if name not in DEPLOY_MODULES and name not in DEPLOY_ENTRYPOINTS
+    ]
+    if unknown:
+        print(
+            f"Error: unknown stages: {', '.join(unknown)} (see 'resinkit-byoc stages')"
+        )
+        return 2
+
+    if len(args.stages) == 1:
+        target = f"deploy.{args.stages[0]}"
+    else:
+        if any(name in DEPLOY_ENTRYPOINTS for name in args.stages):
+            print(
+                f"Error: {', '.join(DEPLOY_ENTRYPOINTS)} cannot be combined with stages"
+            )
+            return 2
+        os.environ["RESINKIT_STAGES"] = ",".join(args.stages)
+        target = "deploy.run_selected"
+
+    # Deploys reference resources relative to the project root
+    os.chdir(_project_root())
+
+    pyinfra_args = list(args.pyinfra_args)
+    if args.dry:
+        pyinfra_args.append("--dry")
+    if args.yes:
+        pyinfra_args.append("-y")
+
+    from pyinfra_cli.main import main as pyinfra_main
+
+    sys.argv = ["pyinfra", *pyinfra_args, args.target, target]
+    try:
+        pyinfra_main()
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code)
+        return 1
+    return 0
+
+
+def cmd_fleet(args: argparse.Namespace) -> int:
+    _project_root()
+    from resinkit_byoc.core.fleet import main as fleet_main
+
+    return fleet_main(args.args)
+
+
+def cmd_timing(args: argparse.Namespace) -> int:
+    from resinkit_byoc.core.timing import main as timing_main
+
+    return timing_main(args.args)
+
+
+def cmd_kafka_bench(args: argparse.Namespace) -> int:
+    from resinkit_byoc.core.kafka_bench import main as kafka_bench_main
+
+    return kafka_bench_main(args.args)
+
+
+def measure_startup(argv: List[str], runs: int) -> float:
+    """Return the best wall time in milliseconds of running ``resinkit-byoc <argv>``."""
+    import subprocess
+    import time
+
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "resinkit_byoc.cli", *argv],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best
+
+
+def measure_imports(module: str) -> List[Tuple[int, int, str]]:
+    """Return ``(cumulative_us, depth, module)`` for every import made by importing ``module``."""
+    import subprocess
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        try:
+            cumulative_us = int(cumulative.strip())
+        except ValueError:
+            continue
+        # Nested imports are indented by two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((cumulative_us, depth, name.strip()))
+    return imports
+
+
+def cmd_import_budget(args: argparse.Namespace) -> int:
+    baseline = measure_startup(["--version"], args.runs)
+    help_ms = measure_startup(["--help"], args.runs)
+    imports = measure_imports("resinkit_byoc.cli")
+
+    heavy = sorted(
+        {name for _, _, name in imports if name.split(".")[0] in args.forbid}
+    )
+    own_us = sum(
+        us
+        for us, depth, name in imports
+        if depth == 0 and name.split(".")[0] == "resinkit_byoc"
+    )
+
+    print(
+        f"[RESINKIT] 'resinkit-byoc --version': {baseline:.0f} ms (best of {args.runs})"
+    )
+    print(
+        f"[RESINKIT] 'resinkit-byoc --help':    {help_ms:.0f} ms (best of {args.runs})"
+    )
+    print(
+        f"[RESINKIT] import resinkit_byoc.cli:  {own_us / 1000:.1f} ms (budget {args.budget_ms} ms)"
+    )
+    slowest = sorted(imports, reverse=True)[: args.top]
+    for us, _, name in slowest:
+        print(f"    {us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if heavy:
+        print(f"[RESINKIT] Error: imported at startup: {', '.join(heavy)}")
+        failed = True
+    if own_us / 1000 > args.budget_ms:
+        print("[RESINKIT] Error: import time over budget")
+        failed = True
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from resinkit_byoc.__about__ import __version__
+
+    parser = argparse.ArgumentParser(
+        prog="resinkit-byoc",
+        description="Deploy resinkit-byoc stages with pyinfra.",
+    )
+    parser.add_argument("--version", action="version", version=__version__)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("stages", help="list the packaged deploys")
+    p.set_defaults(func=cmd_stages)
+
+    p = sub.add_parser("deploy", help="run deploy stages on a pyinfra target")
+    p.add_argument(
+        "target", help="pyinfra target, e.g. @local, @docker/node1 or an inventory file"
+    )
+    p.add_argument(
+        "stages", nargs="+", help="stages to run, scheduled by their dependencies"
+    )
+    p.add_argument("--dry", action="store_true", help="only show the changes")
+    p.add_argument(
+        "-y", "--yes", action="store_true", help="do not ask for confirmation"
+    )
+    p.add_argument(
+        "--pyinfra-args",
+        type=lambda value: value.split(),
+        default=[],
+        help='extra pyinfra arguments, e.g. --pyinfra-args="-v --sudo"',
+    )
+    p.set_defaults(func=cmd_deploy)
+
+    p = sub.add_parser(
+        "fleet", help="roll deploys out across hosts (resinkit_byoc.core.fleet)"
+    )
+    p.add_argument("args", nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_fleet)
+
+    p = sub.add_parser(
+        "timing", help="inspect deploy timing traces (resinkit_byoc.core.timing)"
+    )
+    p.add_argument("args", nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_timing)
+
+    p = sub.add_parser(
+        "kafka-bench",
+        help="benchmark the local Kafka broker (resinkit_byoc.core.kafka_bench)",
+    )
+    p.add_argument("args", nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_kafka_bench)
+
+    p = sub.add_parser(
+        "import-budget", help="check the startup time of this entry point"
+    )
+    p.add_argument("--budget-ms", type=float, default=DEFAULT_IMPORT_BUDGET_MS)
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument(
+        "--top", type=int, default=5, help="number of slowest imports to show"
+    )
+    p.add_argument(
+        "--forbid",
+        action="append",
+        default=list(HEAVY_MODULES),
+        help="top-level package that must not be imported at startup (repeatable)",
+    )
+    p.set_defaults(func=cmd_import_budget)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,13 @@
-"""Core utilities for resinkit_byoc."""
+"""
+Core utilities for resinkit_byoc.
+
+``artifacts``, ``cdc_fanout``, ``cdc_planner``, ``checkpoint_gc``, ``connectors``,
+``flink_config``, ``hardware``, ``kafka_bench``, ``kafka_config``, ``metrics``,
+``num_utils``, ``ownership`` and ``supervisor`` run on the target host with the
+system python3, so they only use the standard library (plus python3-yaml for
+``flink_config``, ``connectors``, ``cdc_planner`` and ``cdc_fanout``):
+
+    PYTHONPATH=/opt/resinkit-byoc python3 -m resinkit_byoc.core.<module> --help
+
+The other modules run with pyinfra on the deploying machine.
+"""
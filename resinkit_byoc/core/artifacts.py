@@ -0,0 +1,524 @@
+"""Content-addressed artifact cache for Flink connector jars and other downloads."""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .num_utils import RateLimiter
+
+DEFAULT_CACHE_DIR = "/opt/resinkit/artifact-cache"
+DEFAULT_MAX_WORKERS = 8
+
+# Checksum files tried next to each artifact, strongest first
+CHECKSUM_ALGORITHMS = ("sha512", "sha256", "sha1")
+
+# URL prefixes rewritten when a Maven mirror is configured
+MAVEN_CENTRAL_PREFIXES = (
+    "https://repo1.maven.org/maven2",
+    "https://repo.maven.apache.org/maven2",
+)
+
+CHUNK_SIZE = 1024 * 1024
+
+_RATE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+class ArtifactError(Exception):
+    """Raised when an artifact cannot be downloaded, verified or installed."""
+
+
+class ArtifactNotFound(ArtifactError):
+    """Raised when the artifact URL does not exist (HTTP 404)."""
+
+
+@dataclass(frozen=True)
+class Artifact:
+    """A downloadable file and the install group it belongs to."""
+
+    url: str
+    group: str = "default"
+
+    @property
+    def filename(self) -> str:
+        return self.url.rstrip("/").rsplit("/", 1)[-1]
+
+
+def parse_artifact_list(lines: Iterable[str]) -> List[Artifact]:
+    """
+    Parse ``[group] url`` lines, as printed by ``download.sh --list``.
+
+    Blank lines and lines starting with ``#`` are ignored.
+    """
+    artifacts = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = line.split()
+        if len(parts) == 1:
+            artifacts.append(Artifact(url=parts[0]))
+        elif len(parts) == 2:
+            artifacts.append(Artifact(url=parts[1], group=parts[0]))
+        else:
+            raise ArtifactError(f"Invalid artifact line: {line!r}")
+    return artifacts
+
+
+def parse_rate(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a download rate such as ``500K`` or ``20M`` (bytes per second).
+
+    Uses the same suffixes as ``wget --limit-rate``. Empty values mean no limit.
+    """
+    if not value:
+        return None
+    value = value.strip().upper()
+    number, unit = (value[:-1], value[-1]) if value[-1] in _RATE_UNITS else (value, "")
+    try:
+        rate = float(number) * _RATE_UNITS[unit]
+    except ValueError:
+        raise ArtifactError(f"Invalid download rate: {value!r}") from None
+    return rate if rate > 0 else None
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def link_file(src: Path, dest: Path) -> str:
+    """
+    Place ``src`` at ``dest`` without copying data when possible.
+
+    Tries a hardlink first, then a reflink (``cp --reflink=always``), and
+    falls back to a plain copy.
+
+    Returns:
+        How the file was placed: "present", "hardlink", "reflink" or "copy".
+    """
+    if dest.exists():
+        if os.path.samefile(src, dest):
+            return "present"
+        dest.unlink()
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dest)
+        return "hardlink"
+    except OSError:
+        pass
+
+    result = subprocess.run(
+        ["cp", "--reflink=always", str(src), str(dest)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    if result.returncode == 0:
+        return "reflink"
+
+    shutil.copy2(src, dest)
+    return "copy"
+
+
+class ArtifactCache:
+    """
+    Shared on-disk artifact cache keyed by content hash.
+
+    Layout under ``cache_dir``:
+        objects/sha256/<digest>   verified file contents
+        index/<sha1(url)>.json    url -> digest and size
+        partial/<sha1(url)>.part  interrupted downloads, resumed on the next fetch
+
+    Args:
+        cache_dir: Cache root (defaults to RESINKIT_ARTIFACT_CACHE or /opt/resinkit/artifact-cache)
+        mirror: Base URL replacing Maven Central (defaults to RESINKIT_MAVEN_MIRROR)
+        max_workers: Maximum number of concurrent downloads
+        retries: Attempts per artifact before giving up
+        timeout: Socket timeout in seconds
+        require_checksum: Fail artifacts that publish no checksum file
+        verify_signatures: Also verify the ``.asc`` signature with gpg
+        rate_limit: Combined download rate for all workers, e.g. "20M"
+            (defaults to RESINKIT_DOWNLOAD_RATE_LIMIT; unset means unlimited)
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        mirror: Optional[str] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        retries: int = 3,
+        timeout: float = 60,
+        require_checksum: bool = False,
+        verify_signatures: bool = False,
+        rate_limit: Optional[str] = None,
+    ):
+        self.cache_dir = Path(
+            cache_dir or os.getenv("RESINKIT_ARTIFACT_CACHE", DEFAULT_CACHE_DIR)
+        )
+        mirror = mirror or os.getenv("RESINKIT_MAVEN_MIRROR")
+        self.mirror = mirror.rstrip("/") if mirror else None
+        self.max_workers = max(1, max_workers)
+        self.retries = max(1, retries)
+        self.timeout = timeout
+        self.require_checksum = require_checksum
+        self.verify_signatures = verify_signatures
+        rate = parse_rate(rate_limit or os.getenv("RESINKIT_DOWNLOAD_RATE_LIMIT"))
+        self.rate_limiter = RateLimiter(rate) if rate else None
+
+    # Paths
+
+    def object_path(self, digest: str) -> Path:
+        return self.cache_dir / "objects" / "sha256" / digest
+
+    def _index_path(self, url: str) -> Path:
+        return self.cache_dir / "index" / f"{_url_key(url)}.json"
+
+    def _partial_path(self, url: str) -> Path:
+        return self.cache_dir / "partial" / f"{_url_key(url)}.part"
+
+    def resolve_url(self, url: str) -> str:
+        """Rewrite Maven Central URLs to the configured mirror."""
+        if self.mirror:
+            for prefix in MAVEN_CENTRAL_PREFIXES:
+                if url.startswith(prefix):
+                    return self.mirror + url[len(prefix) :]
+        return url
+
+    # Lookup
+
+    def lookup(self, url: str) -> Optional[Path]:
+        """Return the cached object for ``url``, or None if it is not cached."""
+        index_path = self._index_path(url)
+        try:
+            entry = json.loads(index_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+        path = self.object_path(entry["sha256"])
+        try:
+            if path.stat().st_size == entry["size"]:
+                return path
+        except OSError:
+            pass
+        return None
+
+    # Download
+
+    def _open(self, url: str, offset: int = 0):
+        request = urllib.request.Request(url)
+        if offset:
+            request.add_header("Range", f"bytes={offset}-")
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def _fetch_text(self, url: str) -> Optional[str]:
+        try:
+            with self._open(url) as response:
+                return response.read().decode("utf-8", errors="replace")
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+    def _published_checksum(self, url: str) -> Optional[Tuple[str, str]]:
+        for algorithm in CHECKSUM_ALGORITHMS:
+            text = self._fetch_text(f"{url}.{algorithm}")
+            if text and text.split():
+                return algorithm, text.split()[0].lower()
+        return None
+
+    def _download(self, url: str, part: Path) -> None:
+        """Download ``url`` into ``part``, resuming from its current size."""
+        part.parent.mkdir(parents=True, exist_ok=True)
+        offset = part.stat().st_size if part.exists() else 0
+        try:
+            response = self._open(url, offset)
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                raise ArtifactNotFound(f"Not found: {url}") from None
+            if e.code == 416 and offset:
+                # Range not satisfiable: the partial file is stale, start over
+                part.unlink()
+                response = self._open(url)
+                offset = 0
+            else:
+                raise
+
+        with response:
+            # A server that ignores Range sends the whole file again
+            mode = "ab" if offset and response.status == 206 else "wb"
+            with open(part, mode) as f:
+                if self.rate_limiter is None:
+                    shutil.copyfileobj(response, f, CHUNK_SIZE)
+                    return
+                # Small reads keep throttled downloads smooth
+                for chunk in iter(lambda: response.read(64 * 1024), b""):
+                    self.rate_limiter.acquire(len(chunk))
+                    f.write(chunk)
+
+    def _verify_signature(self, url: str, path: Path) -> None:
+        signature = self._fetch_text(f"{url}.asc")
+        if signature is None:
+            raise ArtifactError(f"No signature published for {url}")
+        with tempfile.NamedTemporaryFile("w", suffix=".asc") as sig:
+            sig.write(signature)
+            sig.flush()
+            result = subprocess.run(
+                ["gpg", "--batch", "--verify", sig.name, str(path)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        if result.returncode != 0:
+            raise ArtifactError(f"GPG verification failed for {url}")
+
+    def _store(self, url: str, part: Path) -> Path:
+        digest = hashlib.sha256()
+        size = 0
+        with open(part, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                size += len(chunk)
+
+        path = self.object_path(digest.hexdigest())
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            part.unlink()
+        else:
+            os.chmod(part, 0o644)
+            os.replace(part, path)
+
+        entry = {"url": url, "sha256": digest.hexdigest(), "size": size}
+        _write_atomic(self._index_path(url), json.dumps(entry).encode("utf-8"))
+        return path
+
+    def fetch(self, url: str) -> Path:
+        """
+        Return the cached object for ``url``, downloading and verifying it if needed.
+
+        Raises:
+            ArtifactNotFound: If the URL does not exist.
+            ArtifactError: If the download fails or the checksum does not match.
+        """
+        cached = self.lookup(url)
+        if cached is not None:
+            return cached
+
+        source = self.resolve_url(url)
+        part = self._partial_path(url)
+
+        last_error: Optional[Exception] = None
+        for attempt in range(1, self.retries + 1):
+            try:
+                self._download(source, part)
+                break
+            except ArtifactNotFound:
+                raise
+            except (OSError, urllib.error.URLError) as e:
+                last_error = e
+                if attempt < self.retries:
+                    time.sleep(min(2**attempt, 10))
+        else:
+            raise ArtifactError(f"Failed to download {url}: {last_error}")
+
+        checksum = self._published_checksum(source)
+        if checksum is None:
+            if self.require_checksum:
+                part.unlink()
+                raise ArtifactError(f"No checksum published for {url}")
+            print(f"Warning: no checksum published for {url}, skipping verification")
+        else:
+            algorithm, expected = checksum
+            actual = hashlib.new(algorithm)
+            with open(part, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    actual.update(chunk)
+            if actual.hexdigest() != expected:
+                part.unlink()
+                raise ArtifactError(
+                    f"{algorithm} mismatch for {url}: expected {expected}, got {actual.hexdigest()}"
+                )
+
+        if self.verify_signatures:
+            self._verify_signature(source, part)
+
+        return self._store(url, part)
+
+    def fetch_all(
+        self, urls: Iterable[str]
+    ) -> Tuple[Dict[str, Path], Dict[str, ArtifactError]]:
+        """
+        Fetch ``urls`` concurrently.
+
+        Returns:
+            A tuple of (url -> cached object path, url -> error) for the
+            artifacts that succeeded and failed.
+        """
+        unique = list(dict.fromkeys(urls))
+        fetched: Dict[str, Path] = {}
+        failed: Dict[str, ArtifactError] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.fetch, url): url for url in unique}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    fetched[url] = future.result()
+                except ArtifactError as e:
+                    failed[url] = e
+                except Exception as e:
+                    failed[url] = ArtifactError(f"Failed to fetch {url}: {e}")
+        return fetched, failed
+
+    def install(
+        self,
+        artifacts: Iterable[Artifact],
+        dests: Dict[str, str],
+        allow_missing: bool = False,
+    ) -> Dict[str, int]:
+        """
+        Fetch ``artifacts`` and link them into the directory of their group.
+
+        Args:
+            artifacts: Artifacts to install; groups without a destination are skipped
+            dests: Mapping of group name to install directory
+            allow_missing: Only warn about artifacts that do not exist upstream
+
+        Returns:
+            Count of files per placement method ("present", "hardlink", ...).
+
+        Raises:
+            ArtifactError: If any artifact failed (other than allowed missing ones).
+        """
+        selected = [a for a in artifacts if a.group in dests]
+        fetched, failed = self.fetch_all(a.url for a in selected)
+
+        errors = []
+        for url, error in sorted(failed.items()):
+            if allow_missing and isinstance(error, ArtifactNotFound):
+                print(f"Warning: {error}")
+            else:
+                errors.append(str(error))
+        if errors:
+            raise ArtifactError("\n".join(errors))
+
+        counts: Dict[str, int] = {}
+        for artifact in selected:
+            if artifact.url not in fetched:
+                continue
+            dest = Path(dests[artifact.group]) / artifact.filename
+            method = link_file(fetched[artifact.url], dest)
+            counts[method] = counts.get(method, 0) + 1
+        return counts
+
+
+def _parse_dest(value: str) -> Tuple[str, str]:
+    group, sep, path = value.partition("=")
+    if not sep or not group or not path:
+        raise argparse.ArgumentTypeError(f"expected GROUP=DIR, got {value!r}")
+    return group, path
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python3 -m resinkit_byoc.core.artifacts",
+        description="Download, verify and install artifacts through a shared content-addressed cache.",
+    )
+    parser.add_argument("--cache-dir", help="cache root directory")
+    parser.add_argument("--mirror", help="base URL replacing Maven Central")
+    parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument("--require-checksum", action="store_true")
+    parser.add_argument("--verify-signatures", action="store_true")
+    parser.add_argument(
+        "--rate-limit",
+        help="combined download rate, e.g. 20M (default: $RESINKIT_DOWNLOAD_RATE_LIMIT)",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fetch = subparsers.add_parser("fetch", help="populate the cache only")
+    fetch.add_argument(
+        "urls", nargs="?", default="-", help="artifact list file (default: stdin)"
+    )
+
+    install = subparsers.add_parser(
+        "install", help="populate the cache and link into directories"
+    )
+    install.add_argument(
+        "urls", nargs="?", default="-", help="artifact list file (default: stdin)"
+    )
+    install.add_argument(
+        "--dest",
+        type=_parse_dest,
+        action="append",
+        required=True,
+        help="GROUP=DIR install directory for a group (repeatable)",
+    )
+    install.add_argument(
+        "--allow-missing",
+        action="store_true",
+        help="warn instead of failing on artifacts that return 404",
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.urls == "-":
+        artifacts = parse_artifact_list(sys.stdin)
+    else:
+        with open(args.urls) as f:
+            artifacts = parse_artifact_list(f)
+
+    cache = ArtifactCache(
+        cache_dir=args.cache_dir,
+        mirror=args.mirror,
+        max_workers=args.jobs,
+        require_checksum=args.require_checksum,
+        verify_signatures=args.verify_signatures,
+        rate_limit=args.rate_limit,
+    )
+
+    started = time.monotonic()
+    try:
+        if args.command == "fetch":
+            fetched, failed = cache.fetch_all(a.url for a in artifacts)
+            for error in failed.values():
+                print(f"Error: {error}")
+            print(f"[RESINKIT] Cached {len(fetched)} artifacts, {len(failed)} failed")
+            return 1 if failed else 0
+
+        counts = cache.install(
+            artifacts, dict(args.dest), allow_missing=args.allow_missing
+        )
+    except ArtifactError as e:
+        print(f"Error: {e}")
+        return 1
+
+    summary = ", ".join(f"{n} {method}" for method, n in sorted(counts.items()))
+    elapsed = time.monotonic() - started
+    print(f"[RESINKIT] Installed artifacts ({summary or 'none'}) in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,491 @@
+"""Shared binlog reader for CDC pipelines that capture the same MySQL source."""
+
+import argparse
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .cdc_planner import CdcPlanError, parse_table_patterns, run_query
+
+DEFAULT_BOOTSTRAP = "localhost:9092"
+DEFAULT_TOPIC_PREFIX = "resinkit_cdc"
+
+# Sink types a derived Flink SQL job can write
+SUPPORTED_SINKS = ("doris", "kafka")
+
+_LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+
+class FanoutError(Exception):
+    """Raised when pipelines cannot be merged or their jobs derived."""
+
+
+@dataclass
+class Pipeline:
+    path: Path
+    config: Dict[str, Any]
+
+    @property
+    def name(self) -> str:
+        return self.path.stem
+
+    @property
+    def source(self) -> Dict[str, Any]:
+        return self.config.get("source") or {}
+
+    @property
+    def sink(self) -> Dict[str, Any]:
+        return self.config.get("sink") or {}
+
+
+@dataclass
+class Column:
+    name: str
+    type: str
+    nullable: bool = True
+    # Position in the table's primary key, 0 when not part of it
+    key: int = 0
+
+
+def primary_key(columns: List[Column]) -> List[str]:
+    return [c.name for c in sorted(columns, key=lambda c: c.key) if c.key]
+
+
+@dataclass
+class SourceGroup:
+    """Pipelines reading the same source, and the tables they capture."""
+
+    key: str
+    pipelines: List[Pipeline]
+    tables: Dict[Tuple[str, str], List[Column]] = field(default_factory=dict)
+
+    @property
+    def slug(self) -> str:
+        return re.sub(r"[^\w.-]+", "_", self.key.split("://", 1)[-1])
+
+
+def source_key(source: Dict[str, Any]) -> str:
+    """Identity of a source: pipelines with equal keys read the same binlog."""
+    host = str(source.get("hostname", "localhost"))
+    if host in _LOCAL_HOSTS:
+        host = "localhost"
+    return f"{source.get('type', 'mysql')}://{host}:{source.get('port', 3306)}"
+
+
+def group_by_source(pipelines: List[Pipeline]) -> List[SourceGroup]:
+    groups: Dict[str, SourceGroup] = {}
+    for pipeline in pipelines:
+        key = source_key(pipeline.source)
+        groups.setdefault(key, SourceGroup(key, [])).pipelines.append(pipeline)
+    return list(groups.values())
+
+
+def internal_topic(prefix: str, schema: str, table: str) -> str:
+    return f"{prefix}_{schema}.{table}"
+
+
+# Schemas
+
+
+def columns_query(schemas: List[str]) -> str:
+    for schema in schemas:
+        if not re.fullmatch(r"[\w$]+", schema):
+            raise FanoutError(f"Unsupported database name {schema!r}")
+    names = ", ".join(f"'{schema}'" for schema in schemas)
+    return (
+        "SELECT c.TABLE_SCHEMA, c.TABLE_NAME, c.COLUMN_NAME, c.DATA_TYPE,"
+        " c.COLUMN_TYPE, c.IS_NULLABLE, COALESCE(c.NUMERIC_PRECISION, 0),"
+        " COALESCE(c.NUMERIC_SCALE, 0), COALESCE(c.DATETIME_PRECISION, 0),"
+        " COALESCE(k.ORDINAL_POSITION, 0)"
+        " FROM information_schema.COLUMNS c JOIN information_schema.TABLES t"
+        " ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME"
+        " LEFT JOIN information_schema.KEY_COLUMN_USAGE k"
+        " ON k.TABLE_SCHEMA = c.TABLE_SCHEMA AND k.TABLE_NAME = c.TABLE_NAME"
+        " AND k.COLUMN_NAME = c.COLUMN_NAME AND k.CONSTRAINT_NAME = 'PRIMARY'"
+        f" WHERE t.TABLE_TYPE = 'BASE TABLE' AND c.TABLE_SCHEMA IN ({names})"
+        " ORDER BY c.TABLE_SCHEMA, c.TABLE_NAME, c.ORDINAL_POSITION"
+    )
+
+
+def flink_type(
+    data_type: str, column_type: str, precision: int, scale: int, fraction: int
+) -> str:
+    """Flink SQL type of a MySQL column, as Flink CDC maps it."""
+    data_type = data_type.lower()
+    unsigned = "unsigned" in column_type.lower()
+    if data_type == "tinyint":
+        if column_type.lower().startswith("tinyint(1)"):
+            return "BOOLEAN"
+        return "SMALLINT" if unsigned else "TINYINT"
+    if data_type == "smallint":
+        return "INT" if unsigned else "SMALLINT"
+    if data_type in ("mediumint", "int", "integer"):
+        return "BIGINT" if unsigned else "INT"
+    if data_type == "bigint":
+        return "DECIMAL(20, 0)" if unsigned else "BIGINT"
+    if data_type in ("decimal", "numeric"):
+        return f"DECIMAL({min(precision, 38)}, {min(scale, 38)})"
+    if data_type == "float":
+        return "FLOAT"
+    if data_type in ("double", "real"):
+        return "DOUBLE"
+    if data_type in ("bool", "boolean"):
+        return "BOOLEAN"
+    if data_type == "bit":
+        return "BOOLEAN" if column_type.lower() in ("bit", "bit(1)") else "BYTES"
+    if data_type in ("datetime", "timestamp"):
+        return f"TIMESTAMP({fraction})"
+    if data_type == "date":
+        return "DATE"
+    if data_type == "time":
+        return f"TIME({fraction})"
+    if data_type == "year":
+        return "INT"
+    if data_type in ("binary", "varbinary") or data_type.endswith("blob"):
+        return "BYTES"
+    # char, varchar, text, enum, set, json, ...
+    return "STRING"
+
+
+def parse_columns(text: str) -> Dict[Tuple[str, str], List[Column]]:
+    """
+    Parse the tab-separated result of the columns query. Lines without the
+    primary key position (from older queries) leave the tables unkeyed.
+    """
+    tables: Dict[Tuple[str, str], List[Column]] = {}
+    for line in text.splitlines():
+        fields = line.split("\t")
+        if not line.strip() or fields[0] == "TABLE_SCHEMA":
+            continue
+        if len(fields) < 9:
+            raise FanoutError(f"Unexpected columns line {line!r}")
+        schema, table, name, data_type, column_type, nullable = fields[:6]
+        precision, scale, fraction = (int(value) for value in fields[6:9])
+        key = int(fields[9]) if len(fields) > 9 else 0
+        tables.setdefault((schema, table), []).append(
+            Column(
+                name,
+                flink_type(data_type, column_type, precision, scale, fraction),
+                nullable == "YES",
+                key,
+            )
+        )
+    return tables
+
+
+def captured_tables(
+    pipeline: Pipeline, tables: Dict[Tuple[str, str], List[Column]]
+) -> List[Tuple[str, str]]:
+    patterns = parse_table_patterns(str(pipeline.source.get("tables", "")))
+    return [
+        (schema, table)
+        for schema, table in tables
+        if any(schema == s and p.fullmatch(table) for s, p in patterns)
+    ]
+
+
+# Plans
+
+
+def _server_id_start(source: Dict[str, Any]) -> int:
+    match = re.match(r"\s*(\d+)", str(source.get("server-id", "")))
+    return int(match.group(1)) if match else 5400
+
+
+def reader_pipeline(group: SourceGroup, bootstrap: str, prefix: str) -> Dict[str, Any]:
+    """The pipeline reading the group's source into the internal topics."""
+    first = group.pipelines[0]
+    parallelism = max(
+        int((p.config.get("pipeline") or {}).get("parallelism", 1))
+        for p in group.pipelines
+    )
+    source = dict(first.source)
+    # Patterns of all pipelines; Flink CDC captures the union
+    patterns: List[str] = []
+    for pipeline in group.pipelines:
+        for pattern in str(pipeline.source.get("tables", "")).split(","):
+            if pattern.strip() and pattern.strip() not in patterns:
+                patterns.append(pattern.strip())
+    source["tables"] = ",".join(patterns)
+    start = _server_id_start(first.source)
+    source["server-id"] = (
+        f"{start}-{start + parallelism - 1}" if parallelism > 1 else str(start)
+    )
+    # Sources starting at different offsets cannot share a reader; the earliest wins
+    modes = {str(p.source.get("scan.startup.mode", "initial")) for p in group.pipelines}
+    if len(modes) > 1:
+        source["scan.startup.mode"] = "initial"
+
+    schemas = sorted({schema for schema, _ in group.tables})
+    return {
+        "source": source,
+        "sink": {
+            "type": "kafka",
+            "name": "Shared binlog topics",
+            "properties.bootstrap.servers": bootstrap,
+            "value.format": "debezium-json",
+        },
+        "route": [
+            {
+                "source-table": f"{schema}.\\.*",
+                "sink-table": internal_topic(prefix, schema, "<>"),
+                "replace-symbol": "<>",
+            }
+            for schema in schemas
+        ],
+        "pipeline": {
+            "name": f"Shared binlog reader ({group.key})",
+            "parallelism": parallelism,
+        },
+    }
+
+
+def _sql_string(value: Any) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _with(options: Dict[str, Any]) -> str:
+    body = ",\n".join(
+        f"  {_sql_string(k)} = {_sql_string(v)}" for k, v in options.items()
+    )
+    return f"WITH (\n{body}\n)"
+
+
+def _columns(columns: List[Column]) -> str:
+    lines = [
+        f"  `{c.name}` {c.type}{'' if c.nullable else ' NOT NULL'}" for c in columns
+    ]
+    key = primary_key(columns)
+    if key:
+        names = ", ".join(f"`{name}`" for name in key)
+        lines.append(f"  PRIMARY KEY ({names}) NOT ENFORCED")
+    return ",\n".join(lines)
+
+
+def sink_options(
+    pipeline: Pipeline, schema: str, table: str, key: Sequence[str] = ()
+) -> Dict[str, Any]:
+    """
+    Flink SQL connector options writing one table to the pipeline's sink.
+
+    Kafka records are keyed by the primary key columns ``key``, so the changes of
+    a row stay in one partition and in order.
+    """
+    sink = pipeline.sink
+    if sink.get("type") == "doris":
+        options = {
+            "connector": "doris",
+            "fenodes": sink.get("fenodes"),
+            "table.identifier": f"{schema}.{table}",
+            "username": sink.get("username", "root"),
+            "password": sink.get("password", ""),
+            "sink.label-prefix": f"{pipeline.name}_{schema}_{table}",
+            "sink.enable-delete": "true",
+        }
+        if sink.get("benodes"):
+            options["benodes"] = sink["benodes"]
+        # Batching planned for the pipeline applies to the derived job as well
+        for key in (
+            "sink.enable.batch-mode",
+            "sink.buffer-flush.max-rows",
+            "sink.buffer-flush.max-bytes",
+            "sink.buffer-flush.interval",
+            "sink.flush.queue-size",
+        ):
+            if key in sink:
+                options[key] = (
+                    str(sink[key]).lower() if isinstance(sink[key], bool) else sink[key]
+                )
+        return options
+    if sink.get("type") == "kafka":
+        options = {
+            "connector": "kafka",
+            "topic": sink.get("topic", f"{schema}.{table}"),
+            "format": sink.get("value.format", "debezium-json"),
+        }
+        if key:
+            options["key.format"] = "json"
+            options["key.fields"] = ";".join(key)
+        options.update(
+            {key: value for key, value in sink.items() if key.startswith("properties.")}
+        )
+        return options
+    raise FanoutError(
+        f"{pipeline.path}: sink type {sink.get('type')!r} cannot be derived"
+        f" (supported: {', '.join(SUPPORTED_SINKS)})"
+    )
+
+
+def derived_job(
+    pipeline: Pipeline,
+    group: SourceGroup,
+    bootstrap: str,
+    prefix: str,
+) -> str:
+    """Flink SQL job that replays the internal topics into the pipeline's sink."""
+    tables = captured_tables(pipeline, group.tables)
+    if not tables:
+        raise FanoutError(f"{pipeline.path}: no source table matches its tables")
+    lines = [
+        f"-- Generated by resinkit_byoc.core.cdc_fanout from {pipeline.path}",
+        f"-- Replaces the pipeline's own binlog reader of {group.key}",
+        f"SET 'pipeline.name' = {_sql_string(pipeline.name + ' (fan-out)')};",
+        "",
+    ]
+    inserts = []
+    for schema, table in tables:
+        columns = group.tables[(schema, table)]
+        key = primary_key(columns)
+        if not key:
+            lines.append(
+                f"-- {schema}.{table} has no primary key; its changes are not keyed"
+            )
+        source_name = f"`src_{schema}_{table}`"
+        sink_name = f"`sink_{schema}_{table}`"
+        source_options = {
+            "connector": "kafka",
+            "topic": internal_topic(prefix, schema, table),
+            "properties.bootstrap.servers": bootstrap,
+            "properties.group.id": f"resinkit-fanout-{pipeline.name}",
+            "scan.startup.mode": "group-offsets",
+            "properties.auto.offset.reset": "earliest",
+            "format": "debezium-json",
+        }
+        lines += [
+            f"CREATE TEMPORARY TABLE {source_name} (\n{_columns(columns)}\n)"
+            f" {_with(source_options)};",
+            "",
+            f"CREATE TEMPORARY TABLE {sink_name} (\n{_columns(columns)}\n)"
+            f" {_with(sink_options(pipeline, schema, table, key))};",
+            "",
+        ]
+        inserts.append(f"  INSERT INTO {sink_name} SELECT * FROM {source_name};")
+    lines += ["EXECUTE STATEMENT SET", "BEGIN", *inserts, "END;", ""]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python3 -m resinkit_byoc.core.cdc_fanout",
+        description="Share one binlog reader between CDC pipelines of the same source.",
+    )
+    parser.add_argument("pipelines", nargs="+", type=Path, help="pipeline YAML files")
+    parser.add_argument("--output-dir", "-o", type=Path, help="directory for the plan")
+    parser.add_argument(
+        "--bootstrap-server",
+        default=DEFAULT_BOOTSTRAP,
+        help="broker of the internal topics (default: the local one)",
+    )
+    parser.add_argument("--topic-prefix", default=DEFAULT_TOPIC_PREFIX)
+    parser.add_argument(
+        "--columns", type=Path, help="tab-separated result of the columns query"
+    )
+    parser.add_argument(
+        "--print-query", action="store_true", help="print the columns query"
+    )
+    parser.add_argument("--explain", action="store_true", help="print the plan")
+    args = parser.parse_args(argv)
+
+    try:
+        import yaml
+    except ImportError:
+        print(
+            "Error: PyYAML is required. Install with: apt-get install python3-yaml"
+            " (or pip install pyyaml)"
+        )
+        return 1
+    from .flink_config import dump_config
+
+    try:
+        pipelines = [
+            Pipeline(path, yaml.safe_load(path.read_text()) or {})
+            for path in args.pipelines
+        ]
+        groups = [g for g in group_by_source(pipelines) if len(g.pipelines) > 1]
+        if args.print_query:
+            schemas = {
+                schema
+                for g in groups
+                for p in g.pipelines
+                for schema, _ in parse_table_patterns(str(p.source.get("tables", "")))
+            }
+            print(columns_query(sorted(schemas)))
+            return 0
+        if not groups:
+            print("[RESINKIT] No two pipelines share a source, nothing to fan out")
+            return 0
+        if args.output_dir is None:
+            parser.error("--output-dir is required")
+
+        files: Dict[str, str] = {}
+        summary = []
+        for group in groups:
+            schemas = sorted(
+                {
+                    schema
+                    for p in group.pipelines
+                    for schema, _ in parse_table_patterns(
+                        str(p.source.get("tables", ""))
+                    )
+                }
+            )
+            text = (
+                args.columns.read_text()
+                if args.columns
+                else run_query(group.pipelines[0].source, columns_query(schemas))
+            )
+            all_tables = parse_columns(text)
+            captured = {
+                key for p in group.pipelines for key in captured_tables(p, all_tables)
+            }
+            group.tables = {key: all_tables[key] for key in sorted(captured)}
+
+            reader = f"{group.slug}-reader.yaml"
+            header = "Generated by resinkit_byoc.core.cdc_fanout from " + ", ".join(
+                str(p.path) for p in group.pipelines
+            )
+            files[reader] = dump_config(
+                reader_pipeline(group, args.bootstrap_server, args.topic_prefix), header
+            )
+            for pipeline in group.pipelines:
+                files[f"{pipeline.name}.sql"] = derived_job(
+                    pipeline, group, args.bootstrap_server, args.topic_prefix
+                )
+            summary.append(
+                {
+                    "source": group.key,
+                    "reader": reader,
+                    "pipelines": [str(p.path) for p in group.pipelines],
+                    "jobs": [f"{p.name}.sql" for p in group.pipelines],
+                    "topics": [
+                        internal_topic(args.topic_prefix, schema, table)
+                        for schema, table in group.tables
+                    ],
+                }
+            )
+    except (CdcPlanError, FanoutError, OSError, ValueError, yaml.YAMLError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    files["fanout.json"] = json.dumps(summary, indent=2) + "\n"
+    for name, text in files.items():
+        (args.output_dir / name).write_text(text)
+        print(f"[RESINKIT] Wrote {args.output_dir / name}")
+
+    if args.explain:
+        for entry in summary:
+            print(
+                f"[RESINKIT] CDC {entry['source']}: one reader ({entry['reader']})"
+                f" instead of {len(entry['pipelines'])}, {len(entry['topics'])} topic(s)"
+            )
+            for pipeline, job in zip(entry["pipelines"], entry["jobs"]):
+                print(f"[RESINKIT] CDC   {pipeline} -> {job}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,466 @@
+"""Flink CDC pipeline planning from source table statistics."""
+
+import argparse
+import math
+import os
+import re
+import shutil
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .hardware import MB, detect_resources, parse_size
+from .num_utils import bounded
+
+GB = 1024 * MB
+
+# Snapshot data one source subtask should read
+DEFAULT_BYTES_PER_SUBTASK = 2 * GB
+# Tables at least this large get their own pipeline
+DEFAULT_SPLIT_SIZE = 50 * GB
+DEFAULT_SERVER_ID_BASE = 5401
+
+# A snapshot chunk is read into memory together with the binlog events that
+# overlap it; aim for chunks of this size, within Flink CDC's default of 8096
+# rows and an upper bound
+CHUNK_BYTES = 32 * MB
+MIN_CHUNK_ROWS = 8096
+MAX_CHUNK_ROWS = 1_000_000
+# Split metadata of every chunk is kept in the JobManager's state
+MAX_CHUNKS_PER_TABLE = 100_000
+FETCH_BYTES = 8 * MB
+MIN_FETCH_ROWS = 1024
+
+# InnoDB reports 16 KB average rows for nearly empty tables
+MIN_ROWS_FOR_ROW_SIZE = 1000
+
+
+class CdcPlanError(Exception):
+    """Raised when the source statistics cannot be read or a pipeline planned."""
+
+
+@dataclass
+class TableStats:
+    schema: str
+    name: str
+    rows: int
+    data_bytes: int
+    has_primary_key: bool = True
+
+    @property
+    def qualified(self) -> str:
+        return f"{self.schema}.{self.name}"
+
+
+@dataclass
+class PipelinePlan:
+    """Sized settings of one pipeline with the tables they were derived from."""
+
+    name: str
+    tables: List[TableStats]
+    source: Dict[str, Any] = field(default_factory=dict)
+    sink: Dict[str, Any] = field(default_factory=dict)
+    parallelism: int = 1
+    # Whether the pipeline holds a table split off from the others
+    split: bool = False
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def data_bytes(self) -> int:
+        return sum(t.data_bytes for t in self.tables)
+
+    def describe(self) -> str:
+        rows = sum(t.rows for t in self.tables)
+        lines = [
+            f"{self.name}: {len(self.tables)} table(s), {rows:,} rows,"
+            f" {self.data_bytes / GB:.1f} GB, parallelism {self.parallelism}"
+        ]
+        lines += [f"source.{key}={value}" for key, value in self.source.items()]
+        lines += [f"sink.{key}={value}" for key, value in self.sink.items()]
+        lines += [f"warning: {warning}" for warning in self.warnings]
+        return "\n".join(lines)
+
+
+def row_size(tables: List[TableStats]) -> int:
+    """
+    Bytes per row to size chunks and batches for: the widest table with enough
+    rows for its average to be meaningful, so no chunk exceeds its budget.
+    """
+    sized = [t for t in tables if t.rows >= MIN_ROWS_FOR_ROW_SIZE]
+    if sized:
+        return max(1, max(t.data_bytes // t.rows for t in sized))
+    rows = sum(t.rows for t in tables)
+    return max(1, sum(t.data_bytes for t in tables) // rows) if rows else 1024
+
+
+def sink_settings(sink_type: str, data_bytes: int, parallelism: int, row_bytes: int):
+    """
+    Batching of the sink. Doris stream loads grow with the data each subtask
+    writes, since every load creates a tablet version Doris has to compact;
+    Kafka producer batches grow with it too.
+    """
+    per_subtask = data_bytes / parallelism
+    if sink_type == "doris":
+        batch = bounded(per_subtask / 200, 16 * MB, 256 * MB) // MB * MB
+        return {
+            "sink.enable.batch-mode": True,
+            "sink.buffer-flush.max-bytes": batch,
+            "sink.buffer-flush.max-rows": bounded(batch / row_bytes, 50_000, 5_000_000),
+            "sink.buffer-flush.interval": "10s" if batch < 128 * MB else "30s",
+            "sink.flush.queue-size": 2 if batch < 128 * MB else 4,
+        }
+    if sink_type == "kafka":
+        batch = 1024 * 1024 if per_subtask >= GB else 256 * 1024
+        return {
+            "properties.batch.size": batch,
+            "properties.linger.ms": 50 if per_subtask >= GB else 20,
+            "properties.compression.type": "lz4",
+            "properties.buffer.memory": 64 * MB if per_subtask >= GB else 32 * MB,
+        }
+    return {}
+
+
+def plan_pipeline(
+    name: str,
+    tables: List[TableStats],
+    sink_type: str,
+    max_parallelism: int,
+    bytes_per_subtask: int,
+    server_id_start: int,
+) -> PipelinePlan:
+    plan = PipelinePlan(name=name, tables=tables)
+    data_bytes = plan.data_bytes
+    plan.parallelism = bounded(
+        math.ceil(data_bytes / bytes_per_subtask), 1, max_parallelism
+    )
+    if data_bytes / plan.parallelism > 2 * bytes_per_subtask:
+        plan.warnings.append(
+            f"{data_bytes / plan.parallelism / GB:.1f} GB per subtask at the"
+            f" maximum parallelism of {max_parallelism}"
+        )
+
+    row_bytes = row_size(tables)
+    largest = max((t.rows for t in tables), default=0)
+    chunk_rows = max(
+        bounded(CHUNK_BYTES / row_bytes, MIN_CHUNK_ROWS, MAX_CHUNK_ROWS),
+        math.ceil(largest / MAX_CHUNKS_PER_TABLE),
+    )
+    fetch_rows = bounded(FETCH_BYTES / row_bytes, MIN_FETCH_ROWS, chunk_rows)
+    plan.source = {
+        "server-id": (
+            f"{server_id_start}-{server_id_start + plan.parallelism - 1}"
+            if plan.parallelism > 1
+            else str(server_id_start)
+        ),
+        "scan.incremental.snapshot.chunk.size": chunk_rows,
+        "scan.snapshot.fetch.size": fetch_rows,
+        # Every subtask holds a connection while reading chunks
+        "connection.pool.size": max(20, 2 * plan.parallelism),
+    }
+    plan.sink = sink_settings(sink_type, data_bytes, plan.parallelism, row_bytes)
+    for table in tables:
+        if not table.has_primary_key:
+            plan.warnings.append(
+                f"{table.qualified} has no primary key; set"
+                " scan.incremental.snapshot.chunk.key-column for it"
+            )
+    return plan
+
+
+def plan_pipelines(
+    name: str,
+    tables: List[TableStats],
+    sink_type: str,
+    max_parallelism: int,
+    bytes_per_subtask: int = DEFAULT_BYTES_PER_SUBTASK,
+    split_size: int = DEFAULT_SPLIT_SIZE,
+    split_tables: Tuple[str, ...] = (),
+    server_id_base: int = DEFAULT_SERVER_ID_BASE,
+) -> List[PipelinePlan]:
+    """
+    Plan the pipeline for ``tables``, with tables of ``split_size`` or more (or
+    named in ``split_tables``) moved to pipelines of their own. Server id ranges
+    of the pipelines do not overlap.
+    """
+    if not tables:
+        raise CdcPlanError("No source tables match the pipeline's tables pattern")
+    split = [
+        t for t in tables if t.data_bytes >= split_size or t.qualified in split_tables
+    ]
+    rest = [t for t in tables if t not in split]
+    groups = ([(name, rest, False)] if rest else []) + [
+        (f"{name} ({t.qualified})", [t], True) for t in split
+    ]
+
+    plans = []
+    server_id = server_id_base
+    for group_name, group, is_split in groups:
+        plan = plan_pipeline(
+            group_name,
+            group,
+            sink_type,
+            max_parallelism,
+            bytes_per_subtask,
+            server_id,
+        )
+        plan.split = is_split
+        server_id += plan.parallelism
+        plans.append(plan)
+    return plans
+
+
+# Statistics
+
+
+def parse_table_patterns(tables: str) -> List[Tuple[str, "re.Pattern[str]"]]:
+    """
+    Parse a Flink CDC ``tables`` option (``db.table`` regexes, comma-separated;
+    ``\\.`` is a regex dot, an unescaped dot separates database and table).
+    """
+    patterns = []
+    for item in tables.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        match = re.match(r"((?:[^.\\]|\\.)*)\.(.*)$", item)
+        if not match:
+            raise CdcPlanError(f"Cannot parse table pattern {item!r}")
+        schema, table = (part.replace("\\.", ".") for part in match.groups())
+        patterns.append((schema, re.compile(table)))
+    return patterns
+
+
+def stats_query(schemas: List[str]) -> str:
+    for schema in schemas:
+        if not re.fullmatch(r"[\w$]+", schema):
+            raise CdcPlanError(f"Unsupported database name {schema!r}")
+    names = ", ".join(f"'{schema}'" for schema in schemas)
+    return (
+        "SELECT t.TABLE_SCHEMA, t.TABLE_NAME, COALESCE(t.TABLE_ROWS, 0),"
+        " COALESCE(t.DATA_LENGTH, 0),"
+        " EXISTS (SELECT 1 FROM information_schema.TABLE_CONSTRAINTS c"
+        " WHERE c.TABLE_SCHEMA = t.TABLE_SCHEMA AND c.TABLE_NAME = t.TABLE_NAME"
+        " AND c.CONSTRAINT_TYPE = 'PRIMARY KEY')"
+        " FROM information_schema.TABLES t"
+        f" WHERE t.TABLE_TYPE = 'BASE TABLE' AND t.TABLE_SCHEMA IN ({names})"
+        " ORDER BY t.TABLE_SCHEMA, t.TABLE_NAME"
+    )
+
+
+def parse_stats(text: str) -> List[TableStats]:
+    """Parse the tab-separated result of the statistics query."""
+    stats = []
+    for line in text.splitlines():
+        fields = line.split("\t")
+        if not line.strip() or fields[0] == "TABLE_SCHEMA":
+            continue
+        if len(fields) < 4:
+            raise CdcPlanError(f"Unexpected statistics line {line!r}")
+        stats.append(
+            TableStats(
+                schema=fields[0],
+                name=fields[1],
+                rows=int(fields[2]),
+                data_bytes=int(fields[3]),
+                has_primary_key=len(fields) < 5 or fields[4].strip() == "1",
+            )
+        )
+    return stats
+
+
+def run_query(source: Dict[str, Any], query: str) -> str:
+    """Run ``query`` against a pipeline's MySQL source; returns tab-separated rows."""
+    client = shutil.which("mysql") or shutil.which("mariadb")
+    if client is None:
+        raise CdcPlanError("No mysql client found (apt-get install mariadb-client)")
+    env = dict(os.environ, MYSQL_PWD=str(source.get("password") or ""))
+    command = [
+        client,
+        "--batch",
+        "--skip-column-names",
+        f"--host={source['hostname']}",
+        f"--port={source.get('port', 3306)}",
+        f"--user={source['username']}",
+        "-e",
+        query,
+    ]
+    try:
+        result = subprocess.run(
+            command, capture_output=True, text=True, env=env, timeout=120, check=False
+        )
+    except subprocess.TimeoutExpired as e:
+        raise CdcPlanError("Timed out querying the source") from e
+    if result.returncode != 0:
+        raise CdcPlanError(f"Querying the source failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def select_tables(
+    stats: List[TableStats], patterns: List[Tuple[str, "re.Pattern[str]"]]
+) -> List[TableStats]:
+    return [
+        t
+        for t in stats
+        if any(t.schema == s and p.fullmatch(t.name) for s, p in patterns)
+    ]
+
+
+# Rendering
+
+
+def render_pipeline(
+    base: Dict[str, Any], plan: PipelinePlan, keep_tables: bool
+) -> Dict[str, Any]:
+    """The base pipeline with the plan's settings."""
+    config = {
+        key: dict(value) if isinstance(value, dict) else value
+        for key, value in base.items()
+    }
+    source = config.setdefault("source", {})
+    if not keep_tables:
+        source["tables"] = ",".join(
+            f"{t.schema}.{re.escape(t.name)}" for t in plan.tables
+        )
+    source.update(plan.source)
+    config.setdefault("sink", {}).update(plan.sink)
+    pipeline = config.setdefault("pipeline", {})
+    pipeline["name"] = plan.name
+    pipeline["parallelism"] = plan.parallelism
+    return config
+
+
+def _file_name(stem: str, plan: PipelinePlan) -> str:
+    if not plan.split:
+        return f"{stem}.yaml"
+    table = re.sub(r"[^\w.-]", "_", plan.tables[0].qualified)
+    return f"{stem}-{table}.yaml"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python3 -m resinkit_byoc.core.cdc_planner",
+        description="Size Flink CDC pipelines from the source's table statistics.",
+    )
+    parser.add_argument(
+        "--base", type=Path, required=True, help="pipeline YAML to plan"
+    )
+    parser.add_argument(
+        "--output-dir",
+        "-o",
+        default="-",
+        help="directory for the planned pipelines, - for stdout",
+    )
+    parser.add_argument("--host", help="source host (default: the pipeline's hostname)")
+    parser.add_argument("--port", type=int, help="source port")
+    parser.add_argument("--user", help="source user")
+    parser.add_argument(
+        "--password", help="source password (default: MYSQL_PWD or the pipeline's)"
+    )
+    parser.add_argument(
+        "--stats", type=Path, help="tab-separated statistics to plan from"
+    )
+    parser.add_argument(
+        "--print-query", action="store_true", help="print the statistics query"
+    )
+    parser.add_argument(
+        "--max-parallelism",
+        type=int,
+        help="highest parallelism of a pipeline (default: the host's cores)",
+    )
+    parser.add_argument(
+        "--bytes-per-subtask",
+        default=str(DEFAULT_BYTES_PER_SUBTASK),
+        help="snapshot data per source subtask (default: 2g)",
+    )
+    parser.add_argument(
+        "--split-size",
+        default=str(DEFAULT_SPLIT_SIZE),
+        help="tables at least this large get their own pipeline (default: 50g)",
+    )
+    parser.add_argument(
+        "--split-table",
+        action="append",
+        default=[],
+        metavar="DB.TABLE",
+        help="give a table its own pipeline (repeatable)",
+    )
+    parser.add_argument("--server-id-base", type=int, default=DEFAULT_SERVER_ID_BASE)
+    parser.add_argument("--explain", action="store_true", help="print the plans")
+    args = parser.parse_args(argv)
+
+    try:
+        import yaml
+    except ImportError:
+        print(
+            "Error: PyYAML is required. Install with: apt-get install python3-yaml"
+            " (or pip install pyyaml)"
+        )
+        return 1
+    from .flink_config import dump_config
+
+    try:
+        base = yaml.safe_load(args.base.read_text()) or {}
+        source = dict(base.get("source") or {})
+        for key, value in (
+            ("hostname", args.host),
+            ("port", args.port),
+            ("username", args.user),
+            ("password", args.password or os.getenv("MYSQL_PWD")),
+        ):
+            if value is not None:
+                source[key] = value
+        patterns = parse_table_patterns(str(source.get("tables", "")))
+        query = stats_query(sorted({schema for schema, _ in patterns}))
+        if args.print_query:
+            print(query)
+            return 0
+
+        text = args.stats.read_text() if args.stats else run_query(source, query)
+        tables = select_tables(parse_stats(text), patterns)
+        sink_type = str((base.get("sink") or {}).get("type", ""))
+        plans = plan_pipelines(
+            str((base.get("pipeline") or {}).get("name") or args.base.stem),
+            tables,
+            sink_type,
+            args.max_parallelism or max(1, int(detect_resources().cpus)),
+            parse_size(args.bytes_per_subtask),
+            parse_size(args.split_size),
+            tuple(args.split_table),
+            args.server_id_base,
+        )
+    except (CdcPlanError, OSError, ValueError, yaml.YAMLError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    documents = []
+    for plan in plans:
+        # A pipeline keeps the base's table pattern unless tables were split off
+        config = render_pipeline(base, plan, keep_tables=len(plans) == 1)
+        header = (
+            f"Generated by resinkit_byoc.core.cdc_planner from {args.base}\n"
+            + plan.describe().splitlines()[0]
+        )
+        documents.append((plan, dump_config(config, header)))
+
+    if args.output_dir == "-":
+        sys.stdout.write("---\n".join(text for _, text in documents))
+    else:
+        output_dir = Path(args.output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for plan, text in documents:
+            path = output_dir / _file_name(args.base.stem, plan)
+            path.write_text(text)
+            print(f"[RESINKIT] Wrote {path}")
+
+    if args.explain:
+        out = sys.stderr if args.output_dir == "-" else sys.stdout
+        for plan in plans:
+            for line in plan.describe().splitlines():
+                print(f"[RESINKIT] CDC {line}", file=out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
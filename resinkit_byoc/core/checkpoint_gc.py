@@ -0,0 +1,355 @@
+"""Retention for Flink checkpoint and savepoint directories."""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import time
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from .flink_config import CHECKPOINTS_DIR, SAVEPOINTS_DIR
+
+FLINK_URL = "http://localhost:8081"
+
+# Job states in which a job no longer writes checkpoints
+TERMINAL_STATES = {"FINISHED", "CANCELED", "FAILED"}
+
+# In-progress savepoints are younger than this
+INCOMPLETE_GRACE = 3600
+
+JOB_DIR = re.compile(r"^[0-9a-f]{32}$")
+CHECKPOINT_DIR = re.compile(r"^chk-(\d+)$")
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+class CheckpointGcError(Exception):
+    """Raised when the directories to prune cannot be determined."""
+
+
+def parse_duration(value: str) -> float:
+    """Parse a duration such as ``90s``, ``12h`` or ``7d`` into seconds."""
+    text = str(value).strip().lower()
+    unit = text[-1:] if text[-1:] in _DURATION_UNITS else "s"
+    number = text[:-1] if text[-1:] in _DURATION_UNITS else text
+    try:
+        return float(number) * _DURATION_UNITS[unit]
+    except ValueError:
+        raise CheckpointGcError(f"Invalid duration: {value!r}") from None
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("b", "k", "m", "g"):
+        if abs(size) < 1024:
+            return f"{size:.0f}{unit}" if unit == "b" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}t"
+
+
+def format_age(seconds: float) -> str:
+    if seconds >= 86400:
+        return f"{seconds / 86400:.1f}d"
+    if seconds >= 3600:
+        return f"{seconds / 3600:.1f}h"
+    return f"{seconds / 60:.0f}m"
+
+
+def local_path(uri: str) -> Path:
+    """The local path of a ``file://`` URI or plain path."""
+    parsed = urlparse(uri)
+    if parsed.scheme not in ("", "file"):
+        raise CheckpointGcError(f"Only local directories can be pruned, got {uri}")
+    return Path(parsed.path)
+
+
+def dir_stats(path: Path) -> Tuple[int, float]:
+    """Total size in bytes and the newest modification time below ``path``."""
+    size = 0
+    newest = path.lstat().st_mtime
+    for root, dirs, names in os.walk(path):
+        for name in dirs + names:
+            try:
+                st = os.lstat(os.path.join(root, name))
+            except OSError:
+                continue
+            newest = max(newest, st.st_mtime)
+            if name in names:
+                size += st.st_size
+    return size, newest
+
+
+@dataclass
+class Candidate:
+    """A directory to remove and why."""
+
+    path: Path
+    kind: str
+    size: int
+    age: float
+    reason: str
+
+
+def active_jobs(base_url: str = FLINK_URL, timeout: float = 10.0) -> Set[str]:
+    """IDs of the jobs known to the JobManager that may still write checkpoints."""
+    try:
+        with urllib.request.urlopen(
+            f"{base_url}/jobs/overview", timeout=timeout
+        ) as response:
+            jobs = json.load(response)["jobs"]
+    except (OSError, ValueError, KeyError) as e:
+        raise CheckpointGcError(
+            f"Cannot list jobs from {base_url} ({e}); use --offline to prune by age only"
+        ) from None
+    return {job["jid"] for job in jobs if job["state"] not in TERMINAL_STATES}
+
+
+def _checkpoints(job_dir: Path) -> Tuple[Dict[int, Path], Dict[int, Path]]:
+    """Completed and incomplete ``chk-N`` directories of a job, by N."""
+    complete: Dict[int, Path] = {}
+    incomplete: Dict[int, Path] = {}
+    for entry in job_dir.iterdir():
+        match = CHECKPOINT_DIR.match(entry.name)
+        if match and entry.is_dir():
+            target = complete if (entry / "_metadata").exists() else incomplete
+            target[int(match.group(1))] = entry
+    return complete, incomplete
+
+
+def _referenced_jobs(job_dir: Path, job_ids: Set[str]) -> Set[str]:
+    """Other jobs whose files the latest completed checkpoint of ``job_dir`` uses."""
+    complete, _ = _checkpoints(job_dir)
+    if not complete:
+        return set()
+    try:
+        metadata = (complete[max(complete)] / "_metadata").read_bytes()
+    except OSError:
+        return set()
+    return {
+        job_id
+        for job_id in job_ids
+        if job_id != job_dir.name and job_id.encode() in metadata
+    }
+
+
+def plan_checkpoints(
+    root: Path,
+    active: Optional[Set[str]],
+    max_age: float,
+    now: Optional[float] = None,
+) -> Tuple[List[Candidate], int]:
+    """
+    Checkpoint directories to remove below ``root``, and the bytes kept.
+
+    Args:
+        root: Checkpoint directory holding one directory per job
+        active: IDs of the jobs that may still write checkpoints; ``None`` when
+            unknown, which limits pruning to whole job directories by age
+        max_age: Seconds since the last write after which an inactive job
+            directory is removed
+        now: Current time (default: ``time.time()``)
+    """
+    now = time.time() if now is None else now
+    if not root.is_dir():
+        return [], 0
+    jobs = {entry.name: entry for entry in root.iterdir() if entry.is_dir()}
+    jobs = {job_id: path for job_id, path in jobs.items() if JOB_DIR.match(job_id)}
+    stats = {job_id: dir_stats(path) for job_id, path in jobs.items()}
+
+    expired = {
+        job_id
+        for job_id, (_, newest) in stats.items()
+        if now - newest > max_age and (active is None or job_id not in active)
+    }
+    # Keep the jobs the retained ones restored from, until nothing changes
+    kept = set(jobs) - expired
+    pending = set(kept)
+    while pending:
+        referenced = set()
+        for job_id in pending:
+            referenced |= _referenced_jobs(jobs[job_id], expired)
+        expired -= referenced
+        kept |= referenced
+        pending = referenced
+
+    candidates: List[Candidate] = []
+    kept_bytes = 0
+    for job_id in sorted(jobs):
+        size, newest = stats[job_id]
+        if job_id in expired:
+            candidates.append(
+                Candidate(jobs[job_id], "job", size, now - newest, "job not running")
+            )
+            continue
+        kept_bytes += size
+        if active is None or job_id in active:
+            continue
+        complete, incomplete = _checkpoints(jobs[job_id])
+        latest = max(complete) if complete else None
+        dead = [(n, path, "incomplete") for n, path in incomplete.items()]
+        dead += [
+            (n, path, f"superseded by chk-{latest}")
+            for n, path in complete.items()
+            if n != latest
+        ]
+        for _, path, reason in sorted(dead, key=lambda item: item[0]):
+            size, newest = dir_stats(path)
+            kept_bytes -= size
+            candidates.append(Candidate(path, "checkpoint", size, now - newest, reason))
+    return candidates, kept_bytes
+
+
+def plan_savepoints(
+    root: Path,
+    max_age: Optional[float],
+    keep: int,
+    now: Optional[float] = None,
+) -> Tuple[List[Candidate], int]:
+    """
+    Savepoint directories to remove below ``root``, and the bytes kept.
+
+    Incomplete savepoints are removed once older than an hour. Completed ones are
+    only removed when ``max_age`` is given, leaving the ``keep`` newest in place.
+    """
+    now = time.time() if now is None else now
+    if not root.is_dir():
+        return [], 0
+    complete = []
+    candidates: List[Candidate] = []
+    kept_bytes = 0
+    for entry in sorted(root.iterdir()):
+        if not entry.is_dir() or not entry.name.startswith("savepoint-"):
+            continue
+        size, newest = dir_stats(entry)
+        age = now - newest
+        if (entry / "_metadata").exists():
+            complete.append((newest, entry, size))
+        elif age > INCOMPLETE_GRACE:
+            candidates.append(Candidate(entry, "savepoint", size, age, "incomplete"))
+        else:
+            kept_bytes += size
+    complete.sort(reverse=True)
+    for index, (newest, entry, size) in enumerate(complete):
+        age = now - newest
+        if max_age is not None and index >= keep and age > max_age:
+            candidates.append(
+                Candidate(
+                    entry,
+                    "savepoint",
+                    size,
+                    age,
+                    f"older than {format_age(max_age)}, {keep} newer kept",
+                )
+            )
+        else:
+            kept_bytes += size
+    return candidates, kept_bytes
+
+
+def remove(candidates: List[Candidate]) -> Tuple[int, List[str]]:
+    """Delete the candidate directories; returns the bytes freed and the errors."""
+    freed = 0
+    errors = []
+    for candidate in candidates:
+        try:
+            shutil.rmtree(candidate.path)
+            freed += candidate.size
+        except OSError as e:
+            errors.append(f"{candidate.path}: {e}")
+    return freed, errors
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python3 -m resinkit_byoc.core.checkpoint_gc",
+        description="Prune orphaned Flink checkpoint and savepoint directories.",
+    )
+    parser.add_argument(
+        "--checkpoints-dir",
+        default=os.getenv("FLINK_CHECKPOINTS_DIR") or CHECKPOINTS_DIR,
+        help="checkpoint directory (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--savepoints-dir",
+        default=os.getenv("FLINK_SAVEPOINTS_DIR") or SAVEPOINTS_DIR,
+        help="savepoint directory (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--max-age",
+        default=os.getenv("FLINK_CHECKPOINT_RETENTION") or "7d",
+        help="remove job directories of stopped jobs not written for this long (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--savepoint-max-age",
+        help="also remove completed savepoints older than this, e.g. 30d",
+    )
+    parser.add_argument(
+        "--keep-savepoints",
+        type=int,
+        default=3,
+        help="completed savepoints always kept (default: %(default)s)",
+    )
+    parser.add_argument("--flink-url", default=FLINK_URL)
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="do not ask Flink for running jobs; prune job directories by age only",
+    )
+    parser.add_argument(
+        "--delete", action="store_true", help="remove the directories (default: report)"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        max_age = parse_duration(args.max_age)
+        savepoint_max_age = (
+            parse_duration(args.savepoint_max_age) if args.savepoint_max_age else None
+        )
+        checkpoints = local_path(args.checkpoints_dir)
+        savepoints = local_path(args.savepoints_dir)
+        active = None if args.offline else active_jobs(args.flink_url)
+        candidates, kept = plan_checkpoints(checkpoints, active, max_age)
+        savepoint_candidates, savepoints_kept = plan_savepoints(
+            savepoints, savepoint_max_age, args.keep_savepoints
+        )
+    except (CheckpointGcError, OSError) as e:
+        print(f"Error: {e}")
+        return 1
+    candidates += savepoint_candidates
+    kept += savepoints_kept
+
+    for c in candidates:
+        print(
+            f"{format_bytes(c.size):>8}  {format_age(c.age):>6}  {c.kind:<10}"
+            f"  {c.path}  ({c.reason})"
+        )
+    total = sum(c.size for c in candidates)
+    verb = "Removing" if args.delete else "Would remove"
+    print(
+        f"[RESINKIT] {verb} {len(candidates)} directories ({format_bytes(total)}),"
+        f" keeping {format_bytes(kept)}"
+    )
+    if not args.delete or not candidates:
+        return 0
+
+    freed, errors = remove(candidates)
+    for error in errors:
+        print(f"Error: {error}")
+    for directory in dict.fromkeys((checkpoints, savepoints)):
+        if directory.is_dir():
+            usage = shutil.disk_usage(directory)
+            print(
+                f"[RESINKIT] {directory}: {format_bytes(usage.free)} free of"
+                f" {format_bytes(usage.total)}"
+            )
+    print(f"[RESINKIT] Freed {format_bytes(freed)}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
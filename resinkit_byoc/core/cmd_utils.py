@@ -3,12 +3,16 @@
 import functools
 import os
 from pathlib import Path
-from typing import Callable, Optional, Union
+from typing import Callable, Iterable, Optional, Union
+
+from .fingerprint import compute_fingerprint, is_forced
 
 
 def idempotent_by(
     file_path: Optional[Union[str, Path]] = None,
     func: Optional[Callable[[], bool]] = None,
+    inputs: Optional[Iterable[Union[str, Path]]] = None,
+    envs: Optional[Iterable[str]] = None,
 ) -> Callable:
     """
     Decorator that prevents a method from being called based on conditions.
@@ -17,9 +21,16 @@ def idempotent_by(
     - A file path: if the file exists, the decorated function won't be called
     - A function: if the function returns True, the decorated function won't be called
 
+    When ``inputs`` or ``envs`` are given with a file path, the state file stores a
+    fingerprint of those inputs instead, and the function is skipped only while the
+    fingerprint still matches. Changing any input file or variable reruns it.
+    Setting RESINKIT_FORCE=1 always reruns it.
+
     Args:
         file_path: Path to a file. If exists, prevents function execution.
         func: Function that returns bool. If True, prevents function execution.
+        inputs: Files or directories whose content the function depends on.
+        envs: Names of environment variables the function depends on.
 
     Usage:
         @idempotent_by('/opt/setup/.flink_install_state')
@@ -32,8 +43,14 @@ def idempotent_by(
             # This will only run if flink_installed() returns False
             pass
 
+        @idempotent_by('/opt/setup/.flink_conf', inputs=['resources/flink/conf'], envs=['FLINK_VER_MINOR'])
+        def install_flink_conf():
+            # This will only run again if the conf files or FLINK_VER_MINOR changed
+            pass
+
     Raises:
-        ValueError: If neither file_path nor func is provided, or if both are provided.
+        ValueError: If neither file_path nor func is provided, if both are provided,
+            or if inputs/envs are given without a file_path.
     """
     if file_path is None and func is None:
         raise ValueError("Either file_path or func must be provided")
@@ -41,11 +58,32 @@ def idempotent_by(
     if file_path is not None and func is not None:
         raise ValueError("Only one of file_path or func should be provided")
 
+    fingerprinted = inputs is not None or envs is not None
+    if fingerprinted and file_path is None:
+        raise ValueError("inputs and envs require a file_path")
+
+    inputs = list(inputs or [])
+    envs = list(envs or [])
+
+    def current_fingerprint() -> str:
+        env_map = {name: os.getenv(name, "") for name in envs}
+        return compute_fingerprint(files=inputs, env=env_map)
+
     def decorator(wrapped_func: Callable) -> Callable:
         @functools.wraps(wrapped_func)
         def wrapper(*args, **kwargs):
+            fingerprint = current_fingerprint() if fingerprinted else None
+
+            # Check fingerprint-based condition
+            if fingerprint is not None:
+                if not is_forced() and _read_state(file_path) == fingerprint:
+                    print(
+                        f"Skipping {wrapped_func.__name__} - inputs unchanged: {file_path}"
+                    )
+                    return None
+
             # Check file-based condition
-            if file_path is not None:
+            elif file_path is not None:
                 if os.path.exists(file_path):
                     print(
                         f"Skipping {wrapped_func.__name__} - state file exists: {file_path}"
@@ -73,7 +111,10 @@ def idempotent_by(
 
                     # Create the state file
                     with open(file_path, "w") as f:
-                        f.write(f"Completed: {wrapped_func.__name__}\n")
+                        if fingerprint is not None:
+                            f.write(f"{fingerprint}\n")
+                        else:
+                            f.write(f"Completed: {wrapped_func.__name__}\n")
 
                 return result
             except Exception:
@@ -83,3 +124,12 @@ def idempotent_by(
         return wrapper
 
     return decorator
+
+
+def _read_state(file_path: Union[str, Path]) -> Optional[str]:
+    """Return the fingerprint stored in a state file, or None if there is none."""
+    try:
+        with open(file_path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
@@ -0,0 +1,310 @@
+"""Connector manifest resolution for Flink and Flink CDC jars."""
+
+import argparse
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .artifacts import Artifact, ArtifactCache, ArtifactError
+
+DEFAULT_PROFILE = "full"
+
+# Install directory for each manifest group
+DEFAULT_DESTS = {
+    "flink": "/opt/flink/lib",
+    "cdc": "/opt/flink-cdc/lib",
+}
+
+_VAR_RE = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)\}")
+_SQL_CONNECTOR_RE = re.compile(
+    r"""['"](?:connector|type)['"]\s*=\s*['"]([A-Za-z0-9_.-]+)['"]""", re.IGNORECASE
+)
+
+
+class ManifestError(Exception):
+    """Raised for invalid manifests, unknown profiles or unknown connectors."""
+
+
+def default_manifest_path() -> Path:
+    """Return the manifest in ROOT_DIR if set, otherwise next to this package."""
+    root = os.getenv("ROOT_DIR")
+    base = Path(root) if root else Path(__file__).resolve().parents[2]
+    return base / "resources" / "flink" / "lib" / "connectors.yaml"
+
+
+class ConnectorManifest:
+    """
+    Parsed connector manifest with ``${VAR}`` expansion.
+
+    Args:
+        data: Parsed manifest content
+        env: Variables overriding the manifest (defaults to os.environ)
+    """
+
+    def __init__(self, data: dict, env: Optional[Dict[str, str]] = None):
+        self.connectors: Dict[str, dict] = data.get("connectors") or {}
+        self.profiles: Dict[str, List[str]] = data.get("profiles") or {}
+
+        env = dict(os.environ if env is None else env)
+        variables = {k: str(v) for k, v in (data.get("defaults") or {}).items()}
+        major = env.get("FLINK_VER_MAJOR", variables.get("FLINK_VER_MAJOR"))
+        per_version = (data.get("flink_versions") or {}).get(str(major))
+        if per_version is None and data.get("flink_versions"):
+            raise ManifestError(f"No flink_versions entry for FLINK_VER_MAJOR={major}")
+        variables.update({k: str(v) for k, v in (per_version or {}).items()})
+        variables.update(env)
+        self.variables = variables
+
+        for name, connector in self.connectors.items():
+            if connector.get("group") not in DEFAULT_DESTS:
+                raise ManifestError(
+                    f"Connector {name} has an unknown group: {connector.get('group')}"
+                )
+
+    @classmethod
+    def load(
+        cls, path: Optional[Path] = None, env: Optional[Dict[str, str]] = None
+    ) -> "ConnectorManifest":
+        try:
+            import yaml
+        except ImportError:
+            raise ManifestError(
+                "PyYAML is required to read the connector manifest. "
+                "Install with: apt-get install python3-yaml (or pip install pyyaml)"
+            ) from None
+
+        path = path or default_manifest_path()
+        with open(path) as f:
+            return cls(yaml.safe_load(f) or {}, env=env)
+
+    def expand(self, value: str) -> str:
+        def substitute(match: "re.Match") -> str:
+            name = match.group(1)
+            if name not in self.variables:
+                raise ManifestError(f"Undefined variable ${{{name}}} in manifest")
+            return self.variables[name]
+
+        return _VAR_RE.sub(substitute, value)
+
+    def profile(self, name: str, _seen: Tuple[str, ...] = ()) -> List[str]:
+        """Return the connector names of a profile, expanding nested profiles."""
+        if name in _seen:
+            raise ManifestError(f"Profile {name} includes itself")
+        if name not in self.profiles:
+            raise ManifestError(
+                f"Unknown profile: {name} (available: {', '.join(sorted(self.profiles))})"
+            )
+
+        names: List[str] = []
+        for entry in self.profiles[name]:
+            if entry in self.connectors:
+                names.append(entry)
+            elif entry in self.profiles:
+                names.extend(self.profile(entry, _seen + (name,)))
+            else:
+                raise ManifestError(
+                    f"Profile {name} references unknown connector: {entry}"
+                )
+        return list(dict.fromkeys(names))
+
+    def profiles_connectors(self, profiles: Iterable[str]) -> List[str]:
+        names: List[str] = []
+        for profile in profiles:
+            names.extend(self.profile(profile))
+        return list(dict.fromkeys(names))
+
+    def artifacts(self, names: Iterable[str]) -> List[Artifact]:
+        """Return the artifacts of the given connectors, with variables expanded."""
+        artifacts: List[Artifact] = []
+        for name in names:
+            if name not in self.connectors:
+                raise ManifestError(f"Unknown connector: {name}")
+            connector = self.connectors[name]
+            for url in connector.get("jars") or []:
+                artifacts.append(
+                    Artifact(url=self.expand(url), group=connector["group"])
+                )
+        return list(dict.fromkeys(artifacts))
+
+    def providers(
+        self, kind: str, identifiers: Iterable[str]
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Map identifiers to the connectors providing them.
+
+        Args:
+            kind: "sql" or "pipeline"
+            identifiers: Connector identifiers referenced by a job
+
+        Returns:
+            A tuple of (connector names, identifiers no connector provides).
+        """
+        index: Dict[str, str] = {}
+        for name, connector in self.connectors.items():
+            for identifier in connector.get(kind) or []:
+                index.setdefault(identifier, name)
+
+        names: List[str] = []
+        unknown: List[str] = []
+        for identifier in identifiers:
+            if identifier in index:
+                names.append(index[identifier])
+            else:
+                unknown.append(identifier)
+        return list(dict.fromkeys(names)), unknown
+
+
+def referenced_identifiers(path: Path) -> Tuple[str, Set[str]]:
+    """
+    Find the connectors a job file references.
+
+    CDC pipeline YAML files reference ``source.type``/``sink.type``; SQL files
+    reference ``'connector' = '...'`` table options and ``'type' = '...'``
+    catalog options.
+
+    Returns:
+        A tuple of ("pipeline" or "sql", referenced identifiers).
+    """
+    text = path.read_text()
+    if path.suffix in (".yaml", ".yml"):
+        import yaml
+
+        data = yaml.safe_load(text) or {}
+        found = {
+            str(data[section]["type"])
+            for section in ("source", "sink")
+            if isinstance(data.get(section), dict) and "type" in data[section]
+        }
+        return "pipeline", found
+    return "sql", {m.lower() for m in _SQL_CONNECTOR_RE.findall(text)}
+
+
+def missing_artifacts(
+    artifacts: Iterable[Artifact], dests: Dict[str, str]
+) -> List[Artifact]:
+    """Return the artifacts whose jar is not yet in its group's install directory."""
+    return [a for a in artifacts if not (Path(dests[a.group]) / a.filename).exists()]
+
+
+def _parse_dest(value: str) -> Tuple[str, str]:
+    group, sep, path = value.partition("=")
+    if not sep or group not in DEFAULT_DESTS or not path:
+        raise argparse.ArgumentTypeError(
+            f"expected flink=DIR or cdc=DIR, got {value!r}"
+        )
+    return group, path
+
+
+def _split_profiles(value: str) -> List[str]:
+    return [p.strip() for p in value.split(",") if p.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python3 -m resinkit_byoc.core.connectors",
+        description="Resolve Flink connector jars from the connector manifest.",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        help="manifest path (default: $ROOT_DIR/resources/flink/lib/connectors.yaml)",
+    )
+    parser.add_argument(
+        "--dest",
+        type=_parse_dest,
+        action="append",
+        default=[],
+        help="override an install directory, e.g. flink=/opt/flink/lib (repeatable)",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_cmd = subparsers.add_parser(
+        "list", help='print "<group> <url>" for the jars of profiles'
+    )
+    list_cmd.add_argument(
+        "--profile",
+        default=os.getenv("FLINK_CONNECTOR_PROFILE", DEFAULT_PROFILE),
+        help="comma separated profiles (default: $FLINK_CONNECTOR_PROFILE or full)",
+    )
+
+    prune_cmd = subparsers.add_parser(
+        "prune", help="remove manifest jars that are not part of the profiles"
+    )
+    prune_cmd.add_argument(
+        "--profile",
+        default=os.getenv("FLINK_CONNECTOR_PROFILE", DEFAULT_PROFILE),
+        help="comma separated profiles (default: $FLINK_CONNECTOR_PROFILE or full)",
+    )
+
+    resolve_cmd = subparsers.add_parser(
+        "resolve",
+        help="find (and optionally install) connectors referenced by job files",
+    )
+    resolve_cmd.add_argument(
+        "files", nargs="+", type=Path, help="CDC pipeline YAML or SQL files"
+    )
+    resolve_cmd.add_argument(
+        "--install", action="store_true", help="download and install missing jars"
+    )
+
+    args = parser.parse_args(argv)
+    dests = dict(DEFAULT_DESTS, **dict(args.dest))
+
+    try:
+        manifest = ConnectorManifest.load(args.manifest)
+
+        if args.command == "list":
+            names = manifest.profiles_connectors(_split_profiles(args.profile))
+            for artifact in manifest.artifacts(names):
+                print(f"{artifact.group} {artifact.url}")
+            return 0
+
+        if args.command == "prune":
+            names = manifest.profiles_connectors(_split_profiles(args.profile))
+            keep = {(a.group, a.filename) for a in manifest.artifacts(names)}
+            removed = 0
+            for artifact in manifest.artifacts(manifest.connectors):
+                path = Path(dests[artifact.group]) / artifact.filename
+                if (artifact.group, artifact.filename) not in keep and path.exists():
+                    path.unlink()
+                    removed += 1
+                    print(f"Removed {path}")
+            print(f"[RESINKIT] Pruned {removed} jars not in profile {args.profile}")
+            return 0
+
+        names: List[str] = []
+        for path in args.files:
+            kind, identifiers = referenced_identifiers(path)
+            found, unknown = manifest.providers(kind, sorted(identifiers))
+            names.extend(found)
+            for identifier in unknown:
+                # Built-in connectors (datagen, print, filesystem, ...) are not in the manifest
+                print(
+                    f"{path}: no manifest connector provides {kind} type '{identifier}'"
+                )
+
+        missing = missing_artifacts(manifest.artifacts(dict.fromkeys(names)), dests)
+        for artifact in missing:
+            print(f"Missing: {artifact.group} {artifact.url}")
+        if not missing:
+            print("[RESINKIT] All referenced connectors are installed")
+            return 0
+        if not args.install:
+            return 1
+
+        counts = ArtifactCache().install(missing, dests)
+        print(f"[RESINKIT] Installed {sum(counts.values())} missing jars")
+        if any(a.group == "flink" for a in missing):
+            print(
+                "[RESINKIT] Restart the Flink cluster and SQL Gateway to load new jars in /opt/flink/lib"
+            )
+        return 0
+    except (ManifestError, ArtifactError) as e:
+        print(f"Error: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
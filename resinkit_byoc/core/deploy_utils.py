@@ -1,32 +1,188 @@
 """Deploy utilities for resinkit-byoc."""
 
+import base64
+import functools
+import hashlib
 import os
+import shlex
+from contextlib import contextmanager
+from io import StringIO
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Union
 
+from pyinfra import host
+from pyinfra.api import FileUploadCommand, StringCommand, operation
+from pyinfra.context import ctx_state
+from pyinfra.facts.server import Command
 from pyinfra.operations import server
 
 from .config import load_dotenvs
 from .find_root import find_project_root
+from .fingerprint import STATE_DIR, compute_fingerprint, is_forced, state_path
+
+# Shell helpers (state_matches/state_save) injected into every script
+STATE_LIB = "resinkit_byoc/scripts/lib/state.sh"
+
+# Run-time controls passed to every script when set; they are not stage inputs,
+# so they do not change fingerprints
+RUNTIME_ENVS = ("RESINKIT_FORCE", "RESINKIT_DOWNLOAD_RATE_LIMIT")
+
+# Scripts uploaded by batches are kept here by content hash and not sent again
+SCRIPT_CACHE_DIR = "/opt/setup/scripts"
+
+# Cached scripts not used for this many days are removed
+SCRIPT_CACHE_MAX_AGE_DAYS = 30
+
+# Payloads up to this size are passed on the command line instead of uploaded
+INLINE_PAYLOAD_MAX_BYTES = 32 * 1024
+
+
+class PendingScript(NamedTuple):
+    """A script collected by a batch or ``parallel_scripts`` for deferred execution."""
+
+    name: str
+    path: Path
+    env: Dict[str, str]
+    content: str
+    state_file: Optional[str] = None
+    fingerprint: Optional[str] = None
+
+    @property
+    def digest(self) -> str:
+        """sha256 of the script content, its name in the remote script cache."""
+        return hashlib.sha256(self.content.encode()).hexdigest()
+
+
+class PendingShell(NamedTuple):
+    """Shell commands added to a batch by ``run_shell``."""
+
+    name: str
+    commands: List[str]
+
+
+Step = Union[PendingScript, PendingShell]
+
+
+class _Batch:
+    """Consecutive steps of a host executed by one operation."""
+
+    def __init__(self):
+        self.steps: List[Step] = []
+        self.op_hash: Optional[str] = None
+        # Number of operations on the host right after the batch operation was added
+        self.position = -1
+
+
+class _Wave:
+    """Steps collected by a ``parallel_scripts`` block, grouped into jobs."""
+
+    def __init__(self):
+        self.jobs: List[List[Step]] = []
+        # Steps of the open ``parallel_job`` block, if any
+        self.job: Optional[List[Step]] = None
+        self.job_name = ""
+        # Number of operations on the host when the open job last deferred a step
+        self.position = -1
+
+
+# Steps collected while a ``parallel_scripts`` block is active
+_wave: Optional[_Wave] = None
+
+# Open batch of each host, extended while no other operation is added after it
+_batches: Dict[str, _Batch] = {}
+
+# Recorded fingerprints and cached script hashes of each host, read once per deploy
+_remote_states: Dict[str, Dict[str, str]] = {}
+_remote_scripts: Dict[str, Set[str]] = {}
+
+
+def is_batching() -> bool:
+    """Return whether consecutive steps are batched (RESINKIT_DEPLOY_BATCH, default on)."""
+    load_dotenvs()
+    return os.getenv("RESINKIT_DEPLOY_BATCH", "1").lower() not in ("0", "false", "no")
+
+
+@functools.lru_cache(maxsize=None)
+def _state_lib() -> str:
+    lib = (find_project_root() / STATE_LIB).read_text()
+    return "\n".join(line for line in lib.splitlines() if not line.startswith("#!"))
+
+
+def render_script(full_script_path: Path) -> str:
+    """
+    Return the script content with the state helpers injected after its shebang.
+    """
+    content = full_script_path.read_text()
+    lib = _state_lib()
+
+    shebang, sep, body = content.partition("\n")
+    if not shebang.startswith("#!"):
+        shebang, sep, body = "#!/bin/bash", "\n", content
+    return f"{shebang}{sep}{lib}\n{body}"
+
+
+def _load_remote_inventory() -> None:
+    """Read all recorded fingerprints and cached script hashes of the host in one command."""
+    if host.name in _remote_states:
+        return
+    # Only scripts whose content still matches their name count as cached
+    command = (
+        f"for f in {STATE_DIR}/*; do"
+        ' [ -f "$f" ] && printf "state %s %s\\n" "${f##*/}" "$(cat "$f")";'
+        f" done; cd {SCRIPT_CACHE_DIR} 2>/dev/null && sha256sum -- *.sh 2>/dev/null"
+        " | sed 's/^/script /'; true"
+    )
+    output = host.get_fact(Command, command=command) or ""
+    states: Dict[str, str] = {}
+    scripts: Set[str] = set()
+    for line in output.splitlines():
+        kind, _, rest = line.partition(" ")
+        if kind == "state":
+            key, _, value = rest.partition(" ")
+            states[key] = value.strip()
+        elif kind == "script":
+            digest, _, filename = rest.partition("  ")
+            if filename.strip() == f"{digest}.sh":
+                scripts.add(digest)
+    _remote_states[host.name] = states
+    _remote_scripts[host.name] = scripts
+
+
+def read_remote_state(key: str) -> str:
+    """Return the fingerprint recorded on the current host for ``key``, or ''."""
+    _load_remote_inventory()
+    return _remote_states[host.name].get(Path(state_path(key)).name, "")
+
+
+def save_state_command(state_file: str, fingerprint: str) -> str:
+    return f"mkdir -p {STATE_DIR} && echo {fingerprint} > {shlex.quote(state_file)}"
 
 
 def run_script(
     script_path: str,
     envs: Optional[List[str]] = None,
     name: Optional[str] = None,
+    inputs: Optional[List[str]] = None,
 ) -> None:
     """
     Create a pyinfra deployment by reading a bash script and prefixing it with environment variables.
 
+    When ``inputs`` is given the script is fingerprinted: its content, the values of
+    ``envs`` and the content of every input file are hashed, and the script is skipped
+    while the fingerprint recorded on the host matches. Set RESINKIT_FORCE=1 to rerun.
+
     Args:
         script_path: Relative path to the script from project root (e.g., 'resources/flink/lib/download.sh')
         envs: List of environment variable names to prefix the script with
         name: Optional name for the pyinfra operation (defaults to script filename)
+        inputs: Files or directories (relative to project root) the script reads; enables
+            fingerprint-based skipping. Pass [] to fingerprint the script and envs only.
 
     Example:
         run_script(
-            'resources/flink/lib/download.sh',
-            envs=['FLINK_HOME', 'FLINK_VER_MAJOR', 'FLINK_VER_MINOR', 'FLINK_CDC_VER']
+            'resinkit_byoc/scripts/install_flink.sh',
+            envs=['FLINK_HOME', 'FLINK_VER_MAJOR', 'FLINK_VER_MINOR', 'FLINK_CDC_VER'],
+            inputs=['resources/flink/conf'],
         )
     """
     if envs is None:
@@ -52,14 +208,424 @@ def run_script(
         env_value = os.getenv(env_var)
         if env_value is not None:
             env_map[env_var] = env_value
+    runtime_env = {k: os.environ[k] for k in RUNTIME_ENVS if os.getenv(k)}
+    if is_forced():
+        runtime_env["RESINKIT_FORCE"] = "1"
 
     # Generate operation name
     if name is None:
         name = f"Run script: {Path(script_path).name}"
 
+    content = render_script(full_script_path)
+
+    state_file = fingerprint = None
+    if inputs is not None:
+        key = f"stage.{full_script_path.stem}"
+        fingerprint = compute_fingerprint(
+            files=inputs,
+            env=env_map,
+            values=[content],
+            root=project_root,
+        )
+        if not is_forced() and read_remote_state(key) == fingerprint:
+            print(f"Skipping {name}: inputs unchanged (set RESINKIT_FORCE=1 to rerun)")
+            return
+        state_file = state_path(key)
+
+    env_map.update(runtime_env)
+
+    script = PendingScript(
+        name, full_script_path, env_map, content, state_file, fingerprint
+    )
+
+    if not _defer(script):
+        _add_step(script)
+
+
+def run_shell(commands: List[str], name: Optional[str] = None) -> None:
+    """
+    Run shell commands on the host, stopping at the first failing command.
+
+    Like ``server.shell``, but batched together with neighbouring ``run_script``
+    and ``run_shell`` steps when batching is enabled, and deferred like
+    ``run_script`` inside a ``parallel_scripts`` block.
+
+    Args:
+        commands: Shell commands to run in order
+        name: Optional name for the step
+    """
+    if name is None:
+        name = f"Run: {commands[0]}" if commands else "Run shell commands"
+    step = PendingShell(name, list(commands))
+    if not _defer(step):
+        _add_step(step)
+
+
+def _operation_count() -> int:
+    return len(host.op_hash_order)
+
+
+def _defer(step: Step) -> bool:
+    """Collect ``step`` when a ``parallel_scripts`` block is active."""
+    if _wave is None:
+        return False
+    if _wave.job is None:
+        _wave.jobs.append([step])
+        return True
+    _check_job_order()
+    _wave.job.append(step)
+    _wave.position = _operation_count()
+    return True
+
+
+def _check_job_order() -> None:
+    # pyinfra operations run before the wave's runner, so one added after a
+    # deferred step of the same job would run before that step
+    if _wave.job and _operation_count() != _wave.position:
+        raise RuntimeError(
+            f"{_wave.job_name} adds an operation after {_wave.job[-1].name!r}, which"
+            " would run before it in a parallel wave; use run_shell or run_script"
+            " for it, or add it before the first step"
+        )
+
+
+def _add_step(step: Step) -> None:
+    """
+    Run ``step``, batched with the previous steps when nothing else was added in between.
+
+    The batch operation is added where its first step was called, and its
+    payload is rendered when it executes, so later steps can still join it
+    and the order of all operations on the host is kept.
+    """
+    if not is_batching():
+        if isinstance(step, PendingShell):
+            server.shell(name=step.name, commands=step.commands)
+        else:
+            _run_single(step)
+        return
+
+    _load_remote_inventory()
+    batch = _batches.get(host.name)
+    if batch is not None and batch.position == len(host.op_hash_order):
+        batch.steps.append(step)
+        # Name the operation after all of its steps
+        label = ", ".join(s.name for s in batch.steps)
+        if host.current_deploy_name:
+            label = f"{host.current_deploy_name} | {label}"
+        names = ctx_state.get().get_op_meta(batch.op_hash).names
+        names.clear()
+        names.add(label)
+        return
+
+    batch = _Batch()
+    batch.steps.append(step)
+    run_payload(
+        render=lambda cached: render_batch_runner(batch.steps, cached),
+        name=step.name,
+    )
+    batch.op_hash = host.op_hash_order[-1]
+    batch.position = len(host.op_hash_order)
+    _batches[host.name] = batch
+
+
+@operation(is_idempotent=False)
+def run_payload(render: Callable[[Set[str]], str]):
+    """
+    Run a generated bash payload, uploading it only when it is too long to inline.
+
+    + render: returns the payload, given the hashes of the scripts already cached on the host
+    """
+    payload = render(_remote_scripts.get(host.name, set()))
+    if len(payload.encode()) <= INLINE_PAYLOAD_MAX_BYTES:
+        yield StringCommand("bash", "-c", shlex.quote(payload))
+        return
+
+    digest = hashlib.sha256(payload.encode()).hexdigest()
+    remote_path = host.get_temp_filename(f"resinkit-payload-{digest}")
+    yield FileUploadCommand(StringIO(payload), remote_path)
+    # Only run the payload if it arrived intact
+    yield (
+        f"echo {digest}'  '{remote_path} | sha256sum -c --quiet"
+        f" && bash {remote_path}; rc=$?; rm -f {remote_path}; exit $rc"
+    )
+
+
+def _run_single(script: PendingScript) -> None:
     # Execute the script using pyinfra
     server.script(
+        name=script.name,
+        src=StringIO(script.content),
+        _env=script.env,
+    )
+    if script.state_file:
+        server.shell(
+            name=f"Record state: {script.path.name}",
+            commands=[save_state_command(script.state_file, script.fingerprint)],
+        )
+
+
+@contextmanager
+def parallel_scripts(max_workers: int, name: Optional[str] = None) -> Iterator[None]:
+    """
+    Collect ``run_script`` and ``run_shell`` steps and execute them concurrently on the host.
+
+    Inside the block, ``run_script`` and ``run_shell`` record steps instead of
+    running them. Each ``parallel_job`` block becomes one job whose steps run in
+    order; a step outside of one is a job of its own. When the block exits, the
+    jobs are uploaded and started together by a single runner, at most
+    ``max_workers`` at a time. The runner prints each step's output and exit
+    code, and fails if any step failed.
+
+    Other pyinfra operations cannot be deferred and run before the runner, so a
+    job may only add them before its first step; later ones raise RuntimeError.
+
+    Args:
+        max_workers: Maximum number of jobs running at the same time
+        name: Optional name for the pyinfra operation
+
+    Example:
+        with parallel_scripts(3):
+            with parallel_job("install_01_core"):
+                install_01_core()
+            with parallel_job("install_012_core_resinkit_api"):
+                install_012_core_resinkit_api()
+    """
+    global _wave
+
+    if _wave is not None:
+        raise RuntimeError("parallel_scripts blocks cannot be nested")
+
+    _wave = _Wave()
+    try:
+        yield
+        jobs = _wave.jobs
+    finally:
+        _wave = None
+
+    if not jobs:
+        return
+
+    if len(jobs) == 1:
+        for step in jobs[0]:
+            _add_step(step)
+        return
+
+    if name is None:
+        name = "Run steps: " + ", ".join(
+            step.path.name if isinstance(step, PendingScript) else step.name
+            for job in jobs
+            for step in job
+        )
+
+    _load_remote_inventory()
+    run_payload(
+        render=lambda cached: render_parallel_runner(jobs, max_workers, cached),
         name=name,
-        src=full_script_path,
-        _env=env_map,
     )
+
+
+@contextmanager
+def parallel_job(name: str) -> Iterator[None]:
+    """
+    Run the steps added in the block in order, as one job of ``parallel_scripts``.
+
+    Outside of a ``parallel_scripts`` block the steps run as usual.
+
+    Args:
+        name: Name of the job in errors, e.g. the stage name
+    """
+    if _wave is None:
+        yield
+        return
+    if _wave.job is not None:
+        raise RuntimeError("parallel_job blocks cannot be nested")
+
+    _wave.job, _wave.job_name = [], name
+    try:
+        yield
+        _check_job_order()
+        job = _wave.job
+    finally:
+        _wave.job = None
+    if job:
+        _wave.jobs.append(job)
+
+
+def _cache_path(script: PendingScript) -> str:
+    return f"{SCRIPT_CACHE_DIR}/{script.digest}.sh"
+
+
+def render_script_cache(scripts: List[PendingScript], cached: Set[str]) -> List[str]:
+    """
+    Render bash lines that make ``scripts`` available in the remote script cache.
+
+    Scripts whose hash is in ``cached`` are only touched; the others are embedded,
+    checked against their sha256 and stored under their hash.
+    """
+    lines = [f"mkdir -p {SCRIPT_CACHE_DIR}"]
+    for digest in dict.fromkeys(script.digest for script in scripts):
+        script = next(s for s in scripts if s.digest == digest)
+        path = _cache_path(script)
+        if digest in cached:
+            lines.append(f"touch {path}")
+            continue
+        encoded = base64.b64encode(script.content.encode()).decode()
+        lines += [
+            f"base64 -d >{path}.tmp <<'RESINKIT_{digest}'",
+            *[encoded[i : i + 76] for i in range(0, len(encoded), 76)],
+            f"RESINKIT_{digest}",
+            f"if ! echo {digest}'  '{path}.tmp | sha256sum -c --quiet; then",
+            f'    echo "[RESINKIT] Error: checksum mismatch for {script.path.name}"',
+            "    exit 1",
+            "fi",
+            f"mv {path}.tmp {path}",
+        ]
+    lines.append(
+        f"find {SCRIPT_CACHE_DIR} -name '*.sh' -mtime +{SCRIPT_CACHE_MAX_AGE_DAYS}"
+        " -delete 2>/dev/null || true"
+    )
+    return lines
+
+
+def _step_command(step: Step) -> str:
+    """Return the bash command line running ``step`` from the script cache."""
+    if isinstance(step, PendingShell):
+        body = " && ".join(f"{{ {command}\n}}" for command in step.commands)
+        return f"bash -c {shlex.quote(body or 'true')}"
+
+    command = ["env"]
+    command += [shlex.quote(f"{key}={value}") for key, value in step.env.items()]
+    command += ["bash", _cache_path(step)]
+    if step.state_file:
+        # Record the fingerprint only if the script succeeds
+        save = save_state_command(step.state_file, step.fingerprint)
+        command = ["bash", "-c", shlex.quote(f"{' '.join(command)} && {save}")]
+    return " ".join(command)
+
+
+def render_batch_runner(steps: List[Step], cached: Set[str]) -> str:
+    """
+    Render the bash runner that executes ``steps`` in order.
+
+    Each step reports its exit code, duration and start offset in the line
+    ``resinkit_byoc.core.timing`` reads back into the deploy trace; the runner
+    stops at the first failing step and lists the steps it skipped.
+    """
+    scripts = [step for step in steps if isinstance(step, PendingScript)]
+    labels = " ".join(shlex.quote(step.name) for step in steps)
+    lines = [
+        "#!/bin/bash",
+        "# Generated by resinkit_byoc: run deploy steps in order",
+        "set -u",
+        'RUNNER_START="$(date +%s%N)"',
+        "",
+        *render_script_cache(scripts, cached),
+        "",
+        f"NAMES=({labels})",
+        "",
+        "run_step() {",
+        '    local idx="$1" start rc ms at',
+        '    start="$(date +%s%N)"',
+        "    shift",
+        '    echo "[RESINKIT] ===== ${NAMES[$idx]} ====="',
+        '    "$@"',
+        "    rc=$?",
+        "    ms=$((($(date +%s%N) - start) / 1000000))",
+        "    at=$(((start - RUNNER_START) / 1000000))",
+        "    printf '[RESINKIT] ===== %s (exit %d, %d.%03ds, at %d.%03ds) =====\\n' \\",
+        '        "${NAMES[$idx]}" "$rc" $((ms / 1000)) $((ms % 1000)) $((at / 1000)) $((at % 1000))',
+        '    if [ "$rc" -ne 0 ]; then',
+        '        for skipped in "${NAMES[@]:$((idx + 1))}"; do',
+        '            echo "[RESINKIT] ===== $skipped (skipped) ====="',
+        "        done",
+        '        exit "$rc"',
+        "    fi",
+        "}",
+        "",
+    ]
+    for idx, step in enumerate(steps):
+        lines.append(f"run_step {idx} {_step_command(step)}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def render_parallel_runner(
+    jobs: List[List[Step]], max_workers: int, cached: Set[str]
+) -> str:
+    """
+    Render the bash runner that executes ``jobs`` concurrently.
+
+    The steps of a job run in order and stop at the first failing one. The
+    output of each step is printed after all jobs have finished, under the same
+    step line as ``render_batch_runner``'s; steps a failure left out are listed
+    as skipped.
+    """
+    steps = [step for job in jobs for step in job]
+    scripts = [step for step in steps if isinstance(step, PendingScript)]
+    labels = " ".join(shlex.quote(step.name) for step in steps)
+    lines = [
+        "#!/bin/bash",
+        "# Generated by resinkit_byoc: run deploy jobs concurrently",
+        "set -u",
+        'RUNNER_START="$(date +%s%N)"',
+        "",
+        *render_script_cache(scripts, cached),
+        "",
+        f"MAX_JOBS={max(1, max_workers)}",
+        'LOG_DIR="$(mktemp -d)"',
+        f"NAMES=({labels})",
+        "",
+        "run_step() {",
+        '    local idx="$1" start rc',
+        '    start="$(date +%s%N)"',
+        "    shift",
+        '    "$@" >"$LOG_DIR/$idx.log" 2>&1',
+        "    rc=$?",
+        '    echo "$rc" >"$LOG_DIR/$idx.rc"',
+        '    echo $((($(date +%s%N) - start) / 1000000)) >"$LOG_DIR/$idx.ms"',
+        '    echo $(((start - RUNNER_START) / 1000000)) >"$LOG_DIR/$idx.at"',
+        '    return "$rc"',
+        "}",
+        "",
+        "throttle() {",
+        '    while [ "$(jobs -rp | wc -l)" -ge "$MAX_JOBS" ]; do',
+        "        wait -n",
+        "    done",
+        "}",
+        "",
+    ]
+
+    idx = 0
+    for job in jobs:
+        commands = []
+        for step in job:
+            commands.append(f"run_step {idx} {_step_command(step)}")
+            idx += 1
+        lines.append("throttle")
+        lines.append(f"{{ {' && '.join(commands)}; }} &")
+
+    lines += [
+        "wait",
+        "",
+        "failed=0",
+        'for idx in "${!NAMES[@]}"; do',
+        '    if [ ! -f "$LOG_DIR/$idx.rc" ]; then',
+        '        echo "[RESINKIT] ===== ${NAMES[$idx]} (skipped) ====="',
+        "        failed=1",
+        "        continue",
+        "    fi",
+        '    rc="$(cat "$LOG_DIR/$idx.rc")"',
+        '    ms="$(cat "$LOG_DIR/$idx.ms" 2>/dev/null || echo 0)"',
+        '    at="$(cat "$LOG_DIR/$idx.at" 2>/dev/null || echo 0)"',
+        "    printf '[RESINKIT] ===== %s (exit %d, %d.%03ds, at %d.%03ds) =====\\n' \\",
+        '        "${NAMES[$idx]}" "$rc" $((ms / 1000)) $((ms % 1000)) $((at / 1000)) $((at % 1000))',
+        '    cat "$LOG_DIR/$idx.log" 2>/dev/null || true',
+        '    if [ "$rc" -ne 0 ]; then',
+        "        failed=1",
+        "    fi",
+        "done",
+        'rm -rf "$LOG_DIR"',
+        'exit "$failed"',
+        "",
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,128 @@
+"""Input fingerprints used to skip deploy steps whose inputs have not changed."""
+
+import hashlib
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+# Remote directory holding one fingerprint file per deploy step
+STATE_DIR = "/opt/setup/state"
+
+# Skipped when git cannot list the files (e.g. a checkout exported without .git)
+_SKIPPED_DIRS = {".git", "__pycache__"}
+_SKIPPED_SUFFIXES = (".pyc", ".jar")
+
+_CHUNK = 1024 * 1024
+
+
+def _git_files(root: Path, path: Path, untracked: bool) -> Optional[List[Path]]:
+    """Tracked (and untracked, not ignored) files below ``path``; None without git."""
+    others = ["--others", "--exclude-standard"] if untracked else []
+    try:
+        output = subprocess.run(
+            ["git", "-C", str(root), "ls-files", "-z", "--cached"]
+            + others
+            + ["--", str(path)],
+            capture_output=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return [root / name for name in output.decode("utf-8").split("\0") if name]
+
+
+def list_files(path: Path, root: Path, untracked: bool = True) -> List[Path]:
+    """
+    The files below directory ``path`` that are part of the source tree.
+
+    Files ignored by git, such as downloaded connector jars, are left out, and
+    so are untracked files unless ``untracked`` is set.
+    """
+    files = _git_files(root, path, untracked)
+    if files is None:
+        files = [
+            p
+            for p in path.rglob("*")
+            if not _SKIPPED_DIRS.intersection(p.relative_to(path).parts)
+            and not p.name.endswith(_SKIPPED_SUFFIXES)
+        ]
+    return sorted(p for p in files if p.is_file())
+
+
+def _label(path: Path, root: Path) -> str:
+    try:
+        return path.relative_to(root).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def compute_fingerprint(
+    files: Iterable[Union[str, Path]] = (),
+    env: Optional[Dict[str, str]] = None,
+    values: Iterable[str] = (),
+    root: Optional[Union[str, Path]] = None,
+    untracked: bool = True,
+) -> str:
+    """
+    Hash the inputs of a deploy step into a sha256 hex digest.
+
+    Args:
+        files: Files or directories whose content is an input, relative to ``root``.
+            Directories are hashed recursively, skipping files ignored by git;
+            missing paths hash as missing.
+        env: Environment variables passed to the step
+        values: Any other input values
+        root: Directory the file names are hashed relative to (default: the
+            project root), so the digest does not depend on where the checkout is
+        untracked: Whether untracked files in directories are inputs; set it to
+            False for digests that must match across checkouts
+
+    Returns:
+        The hex digest. Any change to a file, variable or value changes it.
+    """
+    if root is None:
+        from .find_root import find_project_root
+
+        root = find_project_root()
+    root = Path(root).resolve()
+    digest = hashlib.sha256()
+
+    def update(*parts: str) -> None:
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+
+    def update_file(path: Path) -> None:
+        update("file", _label(path, root))
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK), b""):
+                digest.update(chunk)
+
+    for file_path in files:
+        path = (root / file_path).resolve()
+        if path.is_dir():
+            for child in list_files(path, root, untracked):
+                update_file(child)
+        elif path.is_file():
+            update_file(path)
+        else:
+            update("missing", _label(path, root))
+
+    for key, value in sorted((env or {}).items()):
+        update("env", key, value)
+
+    for value in values:
+        update("value", value)
+
+    return digest.hexdigest()
+
+
+def state_path(key: str) -> str:
+    """Return the remote state file holding the fingerprint for ``key``."""
+    return f"{STATE_DIR}/{key}"
+
+
+def is_forced() -> bool:
+    """Return True if RESINKIT_FORCE asks to rerun steps regardless of their fingerprint."""
+    return os.getenv("RESINKIT_FORCE", "").lower() in ("1", "true", "yes")
@@ -0,0 +1,405 @@
+"""
+Rolling fleet deploys for resinkit-byoc.
+
+Runs the packaged deploys (``deploy.deploy_all``, ``deploy.start``, ...) across
+many hosts in waves, one ``pyinfra`` process per host and deploy:
+
+    python -m resinkit_byoc.core.fleet --hosts-file fleet.txt \\
+        --waves 1,10%,100% --max-in-flight 8 --max-failures 2 \\
+        --env FLINK_VER_MINOR=1.20.2 --deploy deploy.deploy_all --deploy deploy.start
+
+The deploys run on a host in order, and a host stops at its first failed deploy.
+Each wave runs at most ``--max-in-flight`` hosts at a time. The rollout stops
+starting hosts once more than ``--max-failures`` hosts have failed. Host starts
+(``--max-starts-per-minute``) and per-host downloads (``--download-rate-limit``)
+can be capped so shared mirrors are not saturated. Targets are pyinfra
+inventory strings, so ``@local`` and ``@docker/<container>`` work as stand-ins.
+"""
+
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .find_root import find_project_root
+from .num_utils import RateLimiter
+
+DEFAULT_DEPLOYS = ["deploy.deploy_all"]
+DEFAULT_WAVES = "1,25%,100%"
+
+
+@dataclass
+class HostResult:
+    """Outcome of the deploy on one host."""
+
+    host: str
+    wave: int
+    status: str  # "ok", "failed" or "skipped"
+    returncode: Optional[int] = None
+    duration: float = 0.0
+    log: Optional[str] = None
+
+
+def parse_hosts(lines: Iterable[str]) -> List[str]:
+    """Parse one target per line, ignoring blank lines and ``#`` comments."""
+    hosts = []
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if line:
+            hosts.append(line)
+    return hosts
+
+
+def resolve_count(spec: str, total: int) -> int:
+    """Resolve an absolute count (``5``) or a percentage of ``total`` (``10%``)."""
+    spec = spec.strip()
+    try:
+        if spec.endswith("%"):
+            percent = float(spec[:-1])
+            if not 0 <= percent <= 100:
+                raise ValueError
+            # Round up so a non-zero percentage always covers at least one host
+            return int(-(-percent * total // 100))
+        count = int(spec)
+        if count < 0:
+            raise ValueError
+        return count
+    except ValueError:
+        raise ValueError(f"Invalid count: {spec!r} (expected N or N%)") from None
+
+
+def plan_rollout(hosts: List[str], waves: str) -> List[List[str]]:
+    """
+    Split ``hosts`` into waves.
+
+    Args:
+        hosts: Targets in rollout order
+        waves: Comma separated wave sizes, each a count or a percentage of all
+            hosts, e.g. ``1,10%,100%``. The last size repeats until every host
+            is covered.
+
+    Returns:
+        The hosts of each wave.
+    """
+    sizes = [resolve_count(spec, len(hosts)) for spec in waves.split(",")]
+    if not sizes or sizes[-1] < 1:
+        raise ValueError(f"The last wave size must be at least 1: {waves!r}")
+
+    plan = []
+    remaining = list(hosts)
+    index = 0
+    while remaining:
+        size = sizes[min(index, len(sizes) - 1)]
+        if size > 0:
+            plan.append(remaining[:size])
+            remaining = remaining[size:]
+        index += 1
+    return plan
+
+
+def _log_name(host: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in host) + ".log"
+
+
+class FleetRollout:
+    """
+    Deploy hosts wave by wave with bounded concurrency and a failure budget.
+
+    Args:
+        deploys: Packaged deploys to run on each host, e.g. ["deploy.deploy_all"]
+        log_dir: Directory for per-host pyinfra logs and the summary
+        max_in_flight: Maximum number of hosts deploying at the same time
+        max_failures: Failed hosts tolerated before the rollout stops
+        max_starts_per_minute: Cap on host starts, to spread load on shared mirrors
+        env: Extra environment for each pyinfra process (overrides .env files)
+        pyinfra_args: Extra pyinfra CLI arguments, e.g. ["--sudo"]
+        host_timeout: Seconds before a host's deploy is killed and counted as failed
+        pause: Seconds to wait between waves
+        cwd: Directory pyinfra runs in, where the deploys are imported from
+            (default: the project root)
+    """
+
+    def __init__(
+        self,
+        deploys: List[str],
+        log_dir: Path,
+        max_in_flight: int = 4,
+        max_failures: int = 0,
+        max_starts_per_minute: Optional[float] = None,
+        env: Optional[Dict[str, str]] = None,
+        pyinfra_args: Optional[List[str]] = None,
+        host_timeout: Optional[float] = None,
+        pause: float = 0,
+        cwd: Optional[Path] = None,
+    ):
+        self.deploys = deploys
+        self.log_dir = log_dir
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_failures = max_failures
+        self.start_limiter = (
+            RateLimiter(max_starts_per_minute / 60) if max_starts_per_minute else None
+        )
+        self.env = env or {}
+        self.pyinfra_args = pyinfra_args or []
+        self.host_timeout = host_timeout
+        self.pause = pause
+        self.cwd = cwd
+
+        self.results: List[HostResult] = []
+        self._lock = threading.Lock()
+        self._halted = threading.Event()
+        self._total = 0
+
+    @property
+    def failures(self) -> int:
+        return sum(1 for r in self.results if r.status == "failed")
+
+    def command(self, host: str, deploy: str) -> List[str]:
+        # pyinfra takes one deploy per call; further names would be its arguments
+        return [
+            sys.executable,
+            "-m",
+            "pyinfra",
+            "-y",
+            *self.pyinfra_args,
+            host,
+            deploy,
+        ]
+
+    def _deploy_host(self, host: str, wave: int) -> HostResult:
+        if self._halted.is_set():
+            return HostResult(host, wave, "skipped")
+        if self.start_limiter is not None:
+            self.start_limiter.acquire(1)
+            if self._halted.is_set():
+                return HostResult(host, wave, "skipped")
+
+        log_path = self.log_dir / _log_name(host)
+        env = dict(os.environ, **self.env)
+        cwd = self.cwd or find_project_root()
+        started = time.monotonic()
+        returncode = 0
+        with open(log_path, "w") as log:
+            for deploy in self.deploys:
+                log.write(f"[RESINKIT] Running {deploy} on {host}\n")
+                log.flush()
+                remaining = None
+                if self.host_timeout is not None:
+                    remaining = max(
+                        0.0, self.host_timeout - (time.monotonic() - started)
+                    )
+                try:
+                    returncode = subprocess.run(
+                        self.command(host, deploy),
+                        cwd=cwd,
+                        env=env,
+                        stdout=log,
+                        stderr=subprocess.STDOUT,
+                        timeout=remaining,
+                    ).returncode
+                except subprocess.TimeoutExpired:
+                    log.write(
+                        f"\n[RESINKIT] Deploy timed out after {self.host_timeout}s\n"
+                    )
+                    returncode = -1
+                if returncode != 0:
+                    log.write(f"\n[RESINKIT] {deploy} failed, skipping the rest\n")
+                    break
+        return HostResult(
+            host,
+            wave,
+            "ok" if returncode == 0 else "failed",
+            returncode=returncode,
+            duration=time.monotonic() - started,
+            log=str(log_path),
+        )
+
+    def _record(self, result: HostResult, waves: int) -> None:
+        with self._lock:
+            self.results.append(result)
+            done = sum(1 for r in self.results if r.status != "skipped")
+            if result.status == "ok":
+                detail = f"ok in {result.duration:.1f}s"
+            elif result.status == "failed":
+                detail = (
+                    f"FAILED (exit {result.returncode}) in {result.duration:.1f}s, "
+                    f"log: {result.log}"
+                )
+            else:
+                return
+            print(
+                f"[wave {result.wave}/{waves}] [{done}/{self._total}] {result.host} {detail}",
+                flush=True,
+            )
+            if self.failures > self.max_failures and not self._halted.is_set():
+                print(
+                    f"[RESINKIT] Failure budget exceeded ({self.failures} failed, "
+                    f"{self.max_failures} allowed), stopping the rollout",
+                    flush=True,
+                )
+                self._halted.set()
+
+    def run(self, plan: List[List[str]]) -> bool:
+        """Run the rollout plan. Returns True if every host deployed successfully."""
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self._total = sum(len(wave) for wave in plan)
+        started = time.monotonic()
+
+        for index, hosts in enumerate(plan, start=1):
+            if self._halted.is_set():
+                self.results.extend(HostResult(h, index, "skipped") for h in hosts)
+                continue
+            if index > 1 and self.pause:
+                print(
+                    f"[RESINKIT] Pausing {self.pause:.0f}s before wave {index}",
+                    flush=True,
+                )
+                time.sleep(self.pause)
+
+            print(
+                f"[RESINKIT] Wave {index}/{len(plan)}: {', '.join(hosts)}", flush=True
+            )
+            with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+                futures = [pool.submit(self._deploy_host, h, index) for h in hosts]
+                for future in as_completed(futures):
+                    self._record(future.result(), len(plan))
+
+        elapsed = time.monotonic() - started
+        counts = {
+            status: sum(1 for r in self.results if r.status == status)
+            for status in ("ok", "failed", "skipped")
+        }
+        summary = {
+            "deploys": self.deploys,
+            "elapsed": round(elapsed, 1),
+            "counts": counts,
+            "halted": self._halted.is_set(),
+            "hosts": [asdict(r) for r in self.results],
+        }
+        (self.log_dir / "summary.json").write_text(json.dumps(summary, indent=2))
+        print(
+            f"[RESINKIT] Rollout finished in {elapsed:.1f}s: {counts['ok']} ok, "
+            f"{counts['failed']} failed, {counts['skipped']} skipped "
+            f"(logs: {self.log_dir})"
+        )
+        return counts["failed"] == 0 and counts["skipped"] == 0
+
+
+def _parse_env(value: str) -> tuple:
+    key, sep, val = value.partition("=")
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got {value!r}")
+    return key, val
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m resinkit_byoc.core.fleet",
+        description="Roll packaged deploys out across a fleet of hosts in waves.",
+    )
+    parser.add_argument(
+        "hosts", nargs="*", help="pyinfra targets, e.g. @local or @docker/node1"
+    )
+    parser.add_argument("--hosts-file", type=Path, help="file with one target per line")
+    parser.add_argument(
+        "--deploy",
+        action="append",
+        help="packaged deploy to run, in order (repeatable, default: deploy.deploy_all)",
+    )
+    parser.add_argument(
+        "--waves",
+        default=DEFAULT_WAVES,
+        help=f"comma separated wave sizes, counts or percentages; the last one repeats (default: {DEFAULT_WAVES})",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=4,
+        help="hosts deploying at the same time (default: 4)",
+    )
+    parser.add_argument(
+        "--max-failures",
+        default="0",
+        help="failed hosts tolerated before stopping, count or percentage (default: 0)",
+    )
+    parser.add_argument(
+        "--max-starts-per-minute", type=float, help="cap on host starts per minute"
+    )
+    parser.add_argument(
+        "--download-rate-limit",
+        help="per-host download rate for jars and distributions, e.g. 20M",
+    )
+    parser.add_argument(
+        "--pause", type=float, default=0, help="seconds to wait between waves"
+    )
+    parser.add_argument(
+        "--host-timeout", type=float, help="seconds before a host deploy is killed"
+    )
+    parser.add_argument(
+        "--env",
+        type=_parse_env,
+        action="append",
+        default=[],
+        help="KEY=VALUE passed to every deploy, e.g. FLINK_VER_MINOR=1.20.2 (repeatable)",
+    )
+    parser.add_argument(
+        "--pyinfra-args",
+        default="",
+        help='extra pyinfra arguments, e.g. --pyinfra-args="--sudo --dry"',
+    )
+    parser.add_argument(
+        "--log-dir", type=Path, help="per-host logs (default: .fleet-logs/<timestamp>)"
+    )
+    parser.add_argument("--plan", action="store_true", help="print the waves and exit")
+    args = parser.parse_args(argv)
+
+    hosts = list(args.hosts)
+    if args.hosts_file:
+        with open(args.hosts_file) as f:
+            hosts += parse_hosts(f)
+    hosts = list(dict.fromkeys(hosts))
+    if not hosts:
+        parser.error("no hosts given")
+
+    try:
+        plan = plan_rollout(hosts, args.waves)
+        max_failures = resolve_count(args.max_failures, len(hosts))
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.plan:
+        for index, wave in enumerate(plan, start=1):
+            print(f"Wave {index}: {' '.join(wave)}")
+        return 0
+
+    env = dict(args.env)
+    if args.download_rate_limit:
+        env["RESINKIT_DOWNLOAD_RATE_LIMIT"] = args.download_rate_limit
+
+    log_dir = args.log_dir or (
+        find_project_root() / ".fleet-logs" / time.strftime("%Y%m%d-%H%M%S")
+    )
+    rollout = FleetRollout(
+        deploys=args.deploy or DEFAULT_DEPLOYS,
+        log_dir=log_dir,
+        max_in_flight=args.max_in_flight,
+        max_failures=max_failures,
+        max_starts_per_minute=args.max_starts_per_minute,
+        env=env,
+        pyinfra_args=shlex.split(args.pyinfra_args),
+        host_timeout=args.host_timeout,
+        pause=args.pause,
+    )
+    return 0 if rollout.run(plan) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,492 @@
+"""Hardware-aware Flink configuration."""
+
+import argparse
+import math
+import os
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .hardware import MB, Resources, detect_resources, parse_size
+from .num_utils import bounded
+
+# Flink defaults for the fixed TaskManager components, in MB
+FRAMEWORK_HEAP_MB = 128
+FRAMEWORK_OFF_HEAP_MB = 128
+
+# Smallest TaskManager that leaves room for task heap and managed memory
+MIN_TASKMANAGER_MB = 1024
+MIN_JOBMANAGER_MB = 768
+MAX_JOBMANAGER_MB = 4096
+
+# Task heap plus managed memory each slot should get at least
+MIN_SLOT_MB = 256
+
+# Memory kept for the other services on the node (Kafka, MariaDB, resinkit-api, ...):
+# 30%, at least 1.5 GB but never more than half of a small host
+DEFAULT_RESERVED_FRACTION = 0.3
+MIN_RESERVED_MB = 1536
+MAX_RESERVED_FRACTION = 0.5
+
+DEFAULT_MANAGED_FRACTION = 0.4
+
+STATE_PROFILES = ("default", "rocksdb")
+DEFAULT_STATE_PROFILE = "default"
+
+CHECKPOINTS_DIR = "file:///opt/flink/data/checkpoints"
+SAVEPOINTS_DIR = "file:///opt/flink/data/savepoints"
+LOCAL_STATE_DIR = "/opt/flink/data/local-state"
+
+
+class FlinkConfigError(Exception):
+    """Raised when the Flink configuration cannot be planned or rendered."""
+
+
+def format_mb(mb: int) -> str:
+    return f"{int(mb)}m"
+
+
+# Planning
+
+
+@dataclass
+class FlinkPlan:
+    """Sized Flink processes; all memory values in MB."""
+
+    resources: Resources
+    reserved: int
+    jobmanager_process: int
+    taskmanager_process: int
+    jvm_overhead: int
+    jvm_metaspace: int
+    network: int
+    managed: int
+    task_heap: int
+    slots: int
+    parallelism: int
+    warnings: List[str]
+    state_profile: str = DEFAULT_STATE_PROFILE
+    state: Dict[str, Any] = field(default_factory=dict)
+
+    def to_flink_config(self) -> Dict[str, Any]:
+        """Return the sized settings as flat Flink keys."""
+        return {
+            "jobmanager.memory.process.size": format_mb(self.jobmanager_process),
+            "taskmanager.memory.process.size": format_mb(self.taskmanager_process),
+            "taskmanager.memory.jvm-overhead.min": format_mb(self.jvm_overhead),
+            "taskmanager.memory.jvm-overhead.max": format_mb(self.jvm_overhead),
+            "taskmanager.memory.jvm-metaspace.size": format_mb(self.jvm_metaspace),
+            "taskmanager.memory.network.min": format_mb(self.network),
+            "taskmanager.memory.network.max": format_mb(self.network),
+            "taskmanager.memory.managed.size": format_mb(self.managed),
+            "taskmanager.numberOfTaskSlots": self.slots,
+            "parallelism.default": self.parallelism,
+        }
+
+    def describe(self) -> str:
+        r = self.resources
+        lines = [
+            f"host: {r.cpus:g} cpus, {format_mb(r.memory_mb)} memory ({r.source}),"
+            f" {format_mb(self.reserved)} reserved for other services",
+            f"jobmanager: {format_mb(self.jobmanager_process)}",
+            f"taskmanager: {format_mb(self.taskmanager_process)} = task heap"
+            f" {format_mb(self.task_heap)} + managed {format_mb(self.managed)}"
+            f" + network {format_mb(self.network)} + framework"
+            f" {format_mb(FRAMEWORK_HEAP_MB + FRAMEWORK_OFF_HEAP_MB)}"
+            f" + metaspace {format_mb(self.jvm_metaspace)}"
+            f" + jvm overhead {format_mb(self.jvm_overhead)}",
+            f"slots: {self.slots}, default parallelism: {self.parallelism}",
+            f"state profile: {self.state_profile}",
+        ]
+        lines += [f"  {key}={value}" for key, value in self.state.items()]
+        lines += [f"warning: {w}" for w in self.warnings]
+        return "\n".join(lines)
+
+
+def state_settings(
+    profile: str, resources: Resources, managed_mb: int, slots: int
+) -> Dict[str, Any]:
+    """
+    State backend and checkpoint settings of a state ``profile``.
+
+    The ``rocksdb`` profile keeps RocksDB's memtables and block cache within the
+    managed memory of each slot, and gives each RocksDB instance two background
+    threads for flushes and compactions per core of its slot (one to four).
+    """
+    if profile not in STATE_PROFILES:
+        raise FlinkConfigError(
+            f"Unknown state profile {profile!r}, expected one of:"
+            f" {', '.join(STATE_PROFILES)}"
+        )
+    if profile == "default":
+        return {}
+    if managed_mb < slots * 64:
+        raise FlinkConfigError(
+            f"managed memory {format_mb(managed_mb)} is too small for RocksDB in"
+            f" {slots} slot(s); raise the managed fraction"
+        )
+    return {
+        "state.backend.type": "rocksdb",
+        "state.backend.rocksdb.memory.managed": True,
+        "state.backend.rocksdb.memory.write-buffer-ratio": 0.5,
+        "state.backend.rocksdb.memory.high-prio-pool-ratio": 0.1,
+        "state.backend.rocksdb.thread.num": bounded(2 * resources.cpus / slots, 1, 4),
+        "execution.checkpointing.dir": CHECKPOINTS_DIR,
+        "execution.checkpointing.savepoint-dir": SAVEPOINTS_DIR,
+        "execution.checkpointing.incremental": True,
+        "execution.checkpointing.interval": "1min",
+        "execution.checkpointing.min-pause": "30s",
+        "execution.checkpointing.timeout": "15min",
+        "execution.checkpointing.tolerable-failed-checkpoints": 3,
+        "execution.checkpointing.num-retained": 2,
+        "execution.checkpointing.externalized-checkpoint-retention": (
+            "RETAIN_ON_CANCELLATION"
+        ),
+        # Unaligned checkpoints only help when channels between tasks back up
+        "execution.checkpointing.unaligned.enabled": slots > 1,
+        "execution.checkpointing.aligned-checkpoint-timeout": "30s",
+        "execution.state-recovery.from-local": True,
+        "taskmanager.state.local.root-dirs": LOCAL_STATE_DIR,
+    }
+
+
+def plan_flink(
+    resources: Resources,
+    reserved_mb: Optional[int] = None,
+    managed_fraction: float = DEFAULT_MANAGED_FRACTION,
+    jobmanager_mb: Optional[int] = None,
+    taskmanager_mb: Optional[int] = None,
+    slots: Optional[int] = None,
+    parallelism: Optional[int] = None,
+    state_profile: str = DEFAULT_STATE_PROFILE,
+) -> FlinkPlan:
+    """
+    Size a single JobManager and TaskManager for ``resources``.
+
+    The memory not reserved for other services is split between the JobManager
+    (15%, 768 MB-4 GB) and the TaskManager. The TaskManager components follow Flink's
+    memory model: 10% JVM overhead (192 MB-1 GB), metaspace, 10% of Flink memory
+    for network buffers (64 MB-1 GB), ``managed_fraction`` of Flink memory as
+    managed memory and the rest as task heap. There is one slot per core, as long
+    as each slot gets at least 256 MB of task heap and managed memory.
+
+    A plan that does not fit in the memory left after ``reserved_mb`` fails, unless
+    the process sizes are given, in which case it only warns.
+
+    Args:
+        resources: Cores and memory of the host
+        reserved_mb: Memory left to other services (default: 30%, at least 1.5 GB,
+            at most half of the host)
+        managed_fraction: Share of Flink memory used as managed memory (RocksDB, sorting)
+        jobmanager_mb: Fixed JobManager process size
+        taskmanager_mb: Fixed TaskManager process size
+        slots: Fixed number of task slots
+        parallelism: Fixed default parallelism (default: the number of slots)
+        state_profile: State backend and checkpoint profile, see ``STATE_PROFILES``
+    """
+    if not 0 <= managed_fraction < 1:
+        raise FlinkConfigError(
+            f"managed fraction must be in [0, 1), got {managed_fraction}"
+        )
+    warnings: List[str] = []
+    total = resources.memory_mb
+    if reserved_mb is None:
+        reserved_mb = min(
+            max(MIN_RESERVED_MB, int(total * DEFAULT_RESERVED_FRACTION)),
+            int(total * MAX_RESERVED_FRACTION),
+        )
+    budget = total - reserved_mb
+
+    sized = jobmanager_mb is not None or taskmanager_mb is not None
+    if jobmanager_mb is None:
+        jobmanager_mb = bounded(budget * 0.15, MIN_JOBMANAGER_MB, MAX_JOBMANAGER_MB)
+    if taskmanager_mb is None:
+        taskmanager_mb = max(budget - jobmanager_mb, MIN_TASKMANAGER_MB)
+    if jobmanager_mb + taskmanager_mb > budget:
+        message = (
+            f"Flink processes ({format_mb(jobmanager_mb + taskmanager_mb)}) exceed"
+            f" the {format_mb(max(budget, 0))} left after reserving"
+            f" {format_mb(reserved_mb)} of {format_mb(total)} for other services"
+        )
+        if not sized:
+            # The other services would be pushed out of memory by the minimum sizes
+            raise FlinkConfigError(
+                f"{message}; lower the reserved memory or set"
+                " jobmanager.memory.process.size and taskmanager.memory.process.size"
+            )
+        warnings.append(message)
+
+    jvm_overhead = bounded(taskmanager_mb * 0.1, 192, 1024)
+    jvm_metaspace = 256 if taskmanager_mb < 8192 else 512
+    flink_memory = taskmanager_mb - jvm_overhead - jvm_metaspace
+    network = bounded(flink_memory * 0.1, 64, 1024)
+    managed = int(flink_memory * managed_fraction)
+    task_heap = (
+        flink_memory - FRAMEWORK_HEAP_MB - FRAMEWORK_OFF_HEAP_MB - network - managed
+    )
+    if task_heap < 128:
+        # Give the task heap its minimum at the expense of managed memory
+        managed = max(0, managed - (128 - task_heap))
+        task_heap = (
+            flink_memory - FRAMEWORK_HEAP_MB - FRAMEWORK_OFF_HEAP_MB - network - managed
+        )
+    if task_heap <= 0:
+        raise FlinkConfigError(
+            f"TaskManager size {format_mb(taskmanager_mb)} is too small for its"
+            " fixed memory components"
+        )
+
+    if slots is None:
+        by_memory = max(1, (task_heap + managed) // MIN_SLOT_MB)
+        slots = max(1, min(math.floor(resources.cpus), by_memory))
+    if parallelism is None:
+        parallelism = slots
+
+    return FlinkPlan(
+        resources=resources,
+        reserved=reserved_mb,
+        jobmanager_process=jobmanager_mb,
+        taskmanager_process=taskmanager_mb,
+        jvm_overhead=jvm_overhead,
+        jvm_metaspace=jvm_metaspace,
+        network=network,
+        managed=managed,
+        task_heap=task_heap,
+        slots=slots,
+        parallelism=parallelism,
+        warnings=warnings,
+        state_profile=state_profile,
+        state=state_settings(state_profile, resources, managed, slots),
+    )
+
+
+# Rendering
+
+
+def parse_overrides(items: List[str]) -> Dict[str, Any]:
+    """Parse ``key=value`` overrides; values are read as YAML scalars."""
+    import yaml
+
+    overrides: Dict[str, Any] = {}
+    for item in items:
+        item = item.strip()
+        if not item:
+            continue
+        key, sep, value = item.partition("=")
+        if not sep or not key.strip():
+            raise FlinkConfigError(f"Invalid override {item!r}, expected key=value")
+        overrides[key.strip()] = yaml.safe_load(value.strip()) if value.strip() else ""
+    return overrides
+
+
+def set_key(config: Dict[str, Any], key: str, value: Any) -> None:
+    """
+    Set a dotted Flink key in a nested configuration.
+
+    The key is stored nested when its path is free; if a parent already holds a
+    value (e.g. ``state.backend`` vs ``state.backend.type``), it is stored flat.
+    """
+    node = config
+    parts = key.split(".")
+    for part in parts[:-1]:
+        child = node.get(part)
+        if child is None:
+            child = node[part] = {}
+        if not isinstance(child, dict):
+            config[key] = value
+            return
+        node = child
+    if isinstance(node.get(parts[-1]), dict):
+        config[key] = value
+        return
+    node[parts[-1]] = value
+
+
+def _option_group(key: str) -> str:
+    # "taskmanager.memory.managed.size" -> "taskmanager.memory.managed"
+    parts = key.split(".")
+    return ".".join(parts[:3]) if len(parts) > 3 else key
+
+
+def render_config(
+    base: Dict[str, Any], plan: FlinkPlan, overrides: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Apply the sized settings, the state profile and then ``overrides`` to the
+    ``base`` configuration.
+
+    A sized key is left out when an override targets the same option group, so
+    e.g. overriding ``taskmanager.memory.managed.fraction`` is not shadowed by the
+    planned ``taskmanager.memory.managed.size``.
+    """
+    config = dict(base)
+    if plan.state:
+        # Flink 1.20 reads the checkpoint directory from execution.checkpointing.dir
+        execution = config.get("execution")
+        if isinstance(execution, dict) and isinstance(
+            execution.get("checkpoints"), dict
+        ):
+            execution = config["execution"] = dict(execution)
+            execution["checkpoints"] = {
+                k: v for k, v in execution["checkpoints"].items() if k != "dir"
+            }
+            if not execution["checkpoints"]:
+                del execution["checkpoints"]
+    override_groups = {_option_group(key) for key in overrides}
+    for key, value in plan.to_flink_config().items():
+        if _option_group(key) in override_groups and key not in overrides:
+            continue
+        set_key(config, key, value)
+    for key, value in plan.state.items():
+        set_key(config, key, value)
+    for key, value in overrides.items():
+        set_key(config, key, value)
+    return config
+
+
+def dump_config(config: Dict[str, Any], header: str) -> str:
+    import yaml
+
+    class Dumper(yaml.SafeDumper):
+        pass
+
+    def represent_str(dumper, value):
+        style = "|" if "\n" in value else None
+        return dumper.represent_scalar("tag:yaml.org,2002:str", value, style=style)
+
+    Dumper.add_representer(str, represent_str)
+    body = yaml.dump(config, Dumper=Dumper, sort_keys=False, width=10000)
+    comments = "".join(f"# {line}\n" for line in header.splitlines())
+    return comments + body
+
+
+def _planned_value(overrides: Dict[str, Any], key: str, size: bool) -> Optional[int]:
+    if key not in overrides:
+        return None
+    value = overrides[key]
+    return parse_size(value) // MB if size else int(value)
+
+
+def default_base_path() -> Path:
+    return (
+        Path(__file__).resolve().parents[2]
+        / "resources"
+        / "flink"
+        / "conf"
+        / "conf.yaml"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python3 -m resinkit_byoc.core.flink_config",
+        description="Render a Flink config.yaml sized for this host.",
+    )
+    parser.add_argument(
+        "--base", type=Path, help="configuration to start from (default: conf.yaml)"
+    )
+    parser.add_argument(
+        "--output", "-o", default="-", help="file to write, - for stdout"
+    )
+    parser.add_argument(
+        "--cpus", type=float, help="cores to plan for instead of detecting"
+    )
+    parser.add_argument(
+        "--memory", help="memory to plan for instead of detecting, e.g. 16g"
+    )
+    parser.add_argument(
+        "--reserved-memory",
+        default=os.getenv("FLINK_RESERVED_MEMORY") or None,
+        help="memory left to other services (default: 30%%, at least 1.5g, at most half)",
+    )
+    parser.add_argument(
+        "--managed-fraction",
+        type=float,
+        default=float(os.getenv("FLINK_MANAGED_FRACTION") or DEFAULT_MANAGED_FRACTION),
+    )
+    parser.add_argument(
+        "--state-profile",
+        choices=STATE_PROFILES,
+        default=os.getenv("FLINK_STATE_PROFILE") or DEFAULT_STATE_PROFILE,
+        help="state backend and checkpoint profile (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="override a Flink key (repeatable); FLINK_CONF_OVERRIDES adds ';'-separated ones",
+    )
+    parser.add_argument("--explain", action="store_true", help="print the sizing plan")
+    args = parser.parse_args(argv)
+
+    try:
+        import yaml
+    except ImportError:
+        print(
+            "Error: PyYAML is required. Install with: apt-get install python3-yaml"
+            " (or pip install pyyaml)"
+        )
+        return 1
+
+    try:
+        resources = detect_resources()
+        if args.cpus:
+            resources.cpus, resources.source = args.cpus, "given"
+        if args.memory:
+            resources.memory, resources.source = parse_size(args.memory), "given"
+
+        env_overrides = os.getenv("FLINK_CONF_OVERRIDES", "").split(";")
+        overrides = parse_overrides(env_overrides + args.set)
+        plan = plan_flink(
+            resources,
+            reserved_mb=(
+                parse_size(args.reserved_memory) // MB if args.reserved_memory else None
+            ),
+            managed_fraction=float(
+                overrides.get(
+                    "taskmanager.memory.managed.fraction", args.managed_fraction
+                )
+            ),
+            jobmanager_mb=_planned_value(
+                overrides, "jobmanager.memory.process.size", size=True
+            ),
+            taskmanager_mb=_planned_value(
+                overrides, "taskmanager.memory.process.size", size=True
+            ),
+            slots=_planned_value(
+                overrides, "taskmanager.numberOfTaskSlots", size=False
+            ),
+            parallelism=_planned_value(overrides, "parallelism.default", size=False),
+            state_profile=args.state_profile,
+        )
+
+        base_path = args.base or default_base_path()
+        with open(base_path) as f:
+            base = yaml.safe_load(f) or {}
+        config = render_config(base, plan, overrides)
+    except (FlinkConfigError, OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    header = f"Generated by resinkit_byoc.core.flink_config from {base_path}\n"
+    header += plan.describe()
+    text = dump_config(config, header)
+    if args.output == "-":
+        sys.stdout.write(text)
+    else:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(text)
+
+    if args.explain or plan.warnings:
+        for line in plan.describe().splitlines():
+            print(
+                f"[RESINKIT] Flink {line}",
+                file=sys.stderr if args.output == "-" else sys.stdout,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""Host resource detection shared by the configuration generators."""
+
+import os
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+MB = 1024 * 1024
+
+_SIZE_UNITS = {
+    "": 1,
+    "b": 1,
+    "k": 1024,
+    "kb": 1024,
+    "m": MB,
+    "mb": MB,
+    "g": 1024 * MB,
+    "gb": 1024 * MB,
+    "t": 1024 * 1024 * MB,
+    "tb": 1024 * 1024 * MB,
+}
+
+
+def parse_size(value: str) -> int:
+    """Parse a memory size such as ``4096m``, ``8g`` or ``1.5GB`` into bytes."""
+    text = str(value).strip().lower().replace(" ", "")
+    number = text.rstrip("kmgtb")
+    unit = text[len(number) :]
+    if unit not in _SIZE_UNITS:
+        raise ValueError(f"Invalid memory size: {value!r}")
+    try:
+        return int(float(number) * _SIZE_UNITS[unit])
+    except ValueError:
+        raise ValueError(f"Invalid memory size: {value!r}") from None
+
+
+@dataclass
+class Resources:
+    """Cores and memory available to processes on the host."""
+
+    cpus: float
+    memory: int
+    source: str = "host"
+
+    @property
+    def memory_mb(self) -> int:
+        return self.memory // MB
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit(root: str = "/sys/fs/cgroup") -> Optional[float]:
+    """Return the CPU quota of the current cgroup in cores, or None if unlimited."""
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    value = _read(f"{root}/cpu.max")
+    if value:
+        quota, _, period = value.partition(" ")
+        if quota != "max" and period:
+            return int(quota) / int(period)
+        return None
+    # cgroup v1
+    quota = _read(f"{root}/cpu/cpu.cfs_quota_us") or _read(f"{root}/cpu.cfs_quota_us")
+    period = _read(f"{root}/cpu/cpu.cfs_period_us") or _read(
+        f"{root}/cpu.cfs_period_us"
+    )
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def cgroup_memory_limit(root: str = "/sys/fs/cgroup") -> Optional[int]:
+    """Return the memory limit of the current cgroup in bytes, or None if unlimited."""
+    value = _read(f"{root}/memory.max")
+    if value is None:
+        value = _read(f"{root}/memory/memory.limit_in_bytes") or _read(
+            f"{root}/memory.limit_in_bytes"
+        )
+    if not value or value == "max":
+        return None
+    limit = int(value)
+    # cgroup v1 reports "unlimited" as a huge page-aligned number
+    return limit if limit < 1 << 60 else None
+
+
+def host_memory() -> int:
+    """Return the physical memory of the host in bytes."""
+    meminfo = _read("/proc/meminfo") or ""
+    for line in meminfo.splitlines():
+        if line.startswith("MemTotal:"):
+            return int(line.split()[1]) * 1024
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+
+def detect_resources() -> Resources:
+    """Detect the cores and memory available, honouring CPU affinity and cgroup limits."""
+    if hasattr(os, "sched_getaffinity"):
+        cpus: float = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    memory = host_memory()
+    source = "host"
+
+    cpu_limit = cgroup_cpu_limit()
+    if cpu_limit is not None and cpu_limit < cpus:
+        cpus, source = cpu_limit, "cgroup"
+    memory_limit = cgroup_memory_limit()
+    if memory_limit is not None and memory_limit < memory:
+        memory, source = memory_limit, "cgroup"
+    return Resources(cpus=cpus, memory=memory, source=source)
+
+
+def count_devices(paths: Iterable[str]) -> int:
+    """Return the number of distinct block devices holding ``paths`` (at least 1)."""
+    devices = set()
+    for path in paths:
+        # Data directories may not exist yet; use their nearest existing parent
+        while path and not os.path.exists(path):
+            parent = os.path.dirname(path.rstrip("/"))
+            if parent == path:
+                break
+            path = parent
+        try:
+            devices.add(os.stat(path or "/").st_dev)
+        except OSError:
+            continue
+    return max(1, len(devices))
@@ -0,0 +1,492 @@
+"""Kafka producer/consumer throughput benchmark for the local broker."""
+
+import argparse
+import itertools
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+DEFAULT_BOOTSTRAP = "localhost:9092"
+DEFAULT_RECORDS = 500_000
+# Cases a sweep may expand to before it has to be confirmed with --max-cases
+DEFAULT_MAX_CASES = 64
+
+TOPIC_PREFIX = "resinkit-bench"
+
+_PRODUCER_RESULT = re.compile(
+    r"(?P<records>\d+) records sent, (?P<records_per_sec>[\d.]+) records/sec "
+    r"\((?P<mb_per_sec>[\d.]+) MB/sec\), (?P<avg_ms>[\d.]+) ms avg latency, "
+    r"(?P<max_ms>[\d.]+) ms max latency, (?P<p50_ms>\d+) ms 50th, (?P<p95_ms>\d+) ms 95th, "
+    r"(?P<p99_ms>\d+) ms 99th, (?P<p999_ms>\d+) ms 99.9th"
+)
+
+
+class BenchmarkError(Exception):
+    """Raised when a benchmark tool fails or its output cannot be parsed."""
+
+
+@dataclass(frozen=True)
+class Case:
+    """One point of the sweep."""
+
+    record_size: int
+    batch_size: int
+    linger_ms: int
+    compression: str
+    partitions: int
+    acks: str
+
+    @property
+    def key(self) -> str:
+        return (
+            f"size={self.record_size} batch={self.batch_size} linger={self.linger_ms}"
+            f" compression={self.compression} partitions={self.partitions} acks={self.acks}"
+        )
+
+
+def expand_sweep(
+    record_sizes: Iterable[int],
+    batch_sizes: Iterable[int],
+    linger_ms: Iterable[int],
+    compressions: Iterable[str],
+    partitions: Iterable[int],
+    acks: Iterable[str],
+) -> List[Case]:
+    """Return every combination of the swept parameters."""
+    return [
+        Case(*values)
+        for values in itertools.product(
+            record_sizes, batch_sizes, linger_ms, compressions, partitions, acks
+        )
+    ]
+
+
+def parse_producer_output(output: str) -> Dict[str, float]:
+    """Parse the final summary line of ``kafka-producer-perf-test.sh``."""
+    matches = list(_PRODUCER_RESULT.finditer(output))
+    if not matches:
+        raise BenchmarkError(f"No producer summary in output: {output.strip()[-300:]}")
+    return {key: float(value) for key, value in matches[-1].groupdict().items()}
+
+
+def parse_consumer_output(output: str) -> Dict[str, float]:
+    """Parse the header and result row of ``kafka-consumer-perf-test.sh``."""
+    lines = [line for line in output.splitlines() if line.strip()]
+    for i, line in enumerate(lines[:-1]):
+        if line.startswith("start.time"):
+            header = [column.strip() for column in line.split(",")]
+            row = [value.strip() for value in lines[i + 1].split(",")]
+            values = dict(zip(header, row))
+            try:
+                return {
+                    "mb_per_sec": float(values["MB.sec"]),
+                    "records_per_sec": float(values["nMsg.sec"]),
+                    "records": float(values["data.consumed.in.nMsg"]),
+                }
+            except (KeyError, ValueError) as e:
+                raise BenchmarkError(f"Unexpected consumer output: {row}") from e
+    raise BenchmarkError(f"No consumer summary in output: {output.strip()[-300:]}")
+
+
+class KafkaBench:
+    """
+    Run benchmark cases against a broker with the Kafka command line tools.
+
+    Args:
+        kafka_home: Kafka installation with the ``bin/kafka-*.sh`` tools
+        bootstrap: Bootstrap servers of the broker
+        records: Records produced (and consumed) per case
+        consume: Also measure consumer throughput
+        keep_topics: Leave the benchmark topics on the broker
+    """
+
+    def __init__(
+        self,
+        kafka_home: str,
+        bootstrap: str = DEFAULT_BOOTSTRAP,
+        records: int = DEFAULT_RECORDS,
+        consume: bool = True,
+        keep_topics: bool = False,
+    ):
+        self.kafka_home = kafka_home
+        self.bootstrap = bootstrap
+        self.records = records
+        self.consume = consume
+        self.keep_topics = keep_topics
+
+    def _tool(self, name: str, *args: str, timeout: float = 900) -> str:
+        command = [f"{self.kafka_home}/bin/{name}", *args]
+        try:
+            result = subprocess.run(
+                command, capture_output=True, text=True, timeout=timeout, check=False
+            )
+        except subprocess.TimeoutExpired as e:
+            raise BenchmarkError(f"{name} timed out after {timeout:.0f}s") from e
+        if result.returncode != 0:
+            raise BenchmarkError(
+                f"{name} failed (exit {result.returncode}): {result.stderr.strip()[-300:]}"
+            )
+        return result.stdout
+
+    def version(self) -> Optional[str]:
+        """Kafka version, from the name of the broker jar."""
+        for jar in sorted(Path(self.kafka_home, "libs").glob("kafka_*.jar")):
+            match = re.match(r"kafka_[\d.]+-([\w.]+?)\.jar$", jar.name)
+            if match:
+                return match.group(1)
+        return None
+
+    def run_case(self, case: Case, topic: str) -> dict:
+        self._tool(
+            "kafka-topics.sh",
+            "--bootstrap-server",
+            self.bootstrap,
+            "--create",
+            "--if-not-exists",
+            "--topic",
+            topic,
+            "--partitions",
+            str(case.partitions),
+            "--replication-factor",
+            "1",
+        )
+        try:
+            producer = parse_producer_output(
+                self._tool(
+                    "kafka-producer-perf-test.sh",
+                    "--topic",
+                    topic,
+                    "--num-records",
+                    str(self.records),
+                    "--record-size",
+                    str(case.record_size),
+                    "--throughput",
+                    "-1",
+                    "--producer-props",
+                    f"bootstrap.servers={self.bootstrap}",
+                    f"acks={case.acks}",
+                    f"batch.size={case.batch_size}",
+                    f"linger.ms={case.linger_ms}",
+                    f"compression.type={case.compression}",
+                )
+            )
+            consumer = None
+            if self.consume:
+                consumer = parse_consumer_output(
+                    self._tool(
+                        "kafka-consumer-perf-test.sh",
+                        "--bootstrap-server",
+                        self.bootstrap,
+                        "--topic",
+                        topic,
+                        "--messages",
+                        str(self.records),
+                        "--timeout",
+                        "60000",
+                    )
+                )
+        finally:
+            if not self.keep_topics:
+                try:
+                    self._tool(
+                        "kafka-topics.sh",
+                        "--bootstrap-server",
+                        self.bootstrap,
+                        "--delete",
+                        "--topic",
+                        topic,
+                    )
+                except BenchmarkError as e:
+                    # Do not replace the case's own result or error
+                    print(
+                        f"[RESINKIT] Warning: cannot delete topic {topic}: {e}",
+                        flush=True,
+                    )
+        return {
+            "key": case.key,
+            "case": asdict(case),
+            "producer": producer,
+            "consumer": consumer,
+        }
+
+    def run(
+        self,
+        cases: List[Case],
+        on_case: Optional[Callable[[dict], None]] = None,
+        stop_on_error: bool = False,
+    ) -> dict:
+        """
+        Run ``cases`` one after another and return the run record.
+
+        A failed case is recorded with its ``error`` instead of results, and the
+        sweep goes on unless ``stop_on_error`` is set. ``on_case`` is called
+        with the record so far after every case, and an interrupted sweep
+        returns the cases that finished.
+        """
+        started = time.time()
+        record = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+            "host": socket.gethostname(),
+            "kafka_version": self.version(),
+            "records": self.records,
+            "duration": 0.0,
+            "cases": [],
+        }
+        run_id = time.strftime("%Y%m%d%H%M%S")
+        for i, case in enumerate(cases, 1):
+            print(f"[RESINKIT] Case {i}/{len(cases)}: {case.key}", flush=True)
+            try:
+                result = self.run_case(case, f"{TOPIC_PREFIX}-{run_id}-{i}")
+            except BenchmarkError as e:
+                result = {"key": case.key, "case": asdict(case), "error": str(e)}
+            except KeyboardInterrupt:
+                print("[RESINKIT] Interrupted, keeping the finished cases", flush=True)
+                record["interrupted"] = True
+                break
+            print(f"[RESINKIT]   {format_result(result)}", flush=True)
+            record["cases"].append(result)
+            record["duration"] = round(time.time() - started, 1)
+            if on_case is not None:
+                on_case(record)
+            if "error" in result and stop_on_error:
+                print("[RESINKIT] Stopping the sweep at the failed case", flush=True)
+                break
+        record["duration"] = round(time.time() - started, 1)
+        return record
+
+
+class ResultsFile:
+    """JSON lines file of runs; the current run's line is rewritten as it grows."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._offset: Optional[int] = None
+
+    def write(self, record: dict) -> None:
+        if self._offset is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "ab") as f:
+                self._offset = f.tell()
+        with open(self.path, "r+b") as f:
+            f.seek(self._offset)
+            f.truncate()
+            f.write((json.dumps(record) + "\n").encode())
+
+
+def format_result(result: dict) -> str:
+    if "error" in result:
+        return f"Error: {result['error']}"
+    producer = result["producer"]
+    text = (
+        f"produce {producer['records_per_sec']:,.0f} rec/s {producer['mb_per_sec']:.1f} MB/s,"
+        f" p50 {producer['p50_ms']:.0f} ms, p99 {producer['p99_ms']:.0f} ms"
+    )
+    if result.get("consumer"):
+        consumer = result["consumer"]
+        text += (
+            f"; consume {consumer['records_per_sec']:,.0f} rec/s"
+            f" {consumer['mb_per_sec']:.1f} MB/s"
+        )
+    return text
+
+
+# Results and baseline
+
+
+def load_results(path: Path) -> List[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare_runs(
+    current: dict, baseline: dict, threshold: float, min_latency_ms: float
+) -> List[str]:
+    """
+    Compare the cases of ``current`` with the same cases of ``baseline``.
+
+    Throughput that dropped by more than ``threshold`` (a fraction) and p99
+    latency that grew by more than ``threshold`` and at least ``min_latency_ms``
+    are reported.
+    """
+    reference = {case["key"]: case for case in baseline["cases"]}
+    regressions: List[str] = []
+
+    def check_throughput(key: str, label: str, now: float, before: float) -> None:
+        if before and now < before * (1 - threshold):
+            regressions.append(
+                f"{key}: {label} {now:,.0f} rec/s vs {before:,.0f} baseline"
+                f" ({(now / before - 1) * 100:.0f}%)"
+            )
+
+    for case in current["cases"]:
+        base = reference.get(case["key"])
+        if base is None or "error" in case or "error" in base:
+            continue
+        key = case["key"]
+        check_throughput(
+            key,
+            "produce",
+            case["producer"]["records_per_sec"],
+            base["producer"]["records_per_sec"],
+        )
+        if case.get("consumer") and base.get("consumer"):
+            check_throughput(
+                key,
+                "consume",
+                case["consumer"]["records_per_sec"],
+                base["consumer"]["records_per_sec"],
+            )
+        now, before = case["producer"]["p99_ms"], base["producer"]["p99_ms"]
+        if now - before >= min_latency_ms and now > before * (1 + threshold):
+            regressions.append(f"{key}: p99 {now:.0f} ms vs {before:.0f} ms baseline")
+    return regressions
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _str_list(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python3 -m resinkit_byoc.core.kafka_bench",
+        description="Benchmark the local Kafka broker and compare runs with a baseline.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run a parameter sweep and record the results")
+    run.add_argument("--record-size", type=_int_list, default=[100, 1024])
+    run.add_argument("--batch-size", type=_int_list, default=[16384])
+    run.add_argument("--linger-ms", type=_int_list, default=[0, 10])
+    run.add_argument("--compression", type=_str_list, default=["none", "lz4"])
+    run.add_argument("--partitions", type=_int_list, default=[1])
+    run.add_argument("--acks", type=_str_list, default=["1"])
+    run.add_argument("--records", type=int, default=DEFAULT_RECORDS)
+    run.add_argument("--bootstrap-server", default=DEFAULT_BOOTSTRAP)
+    run.add_argument("--kafka-home", default=os.getenv("KAFKA_HOME", "/opt/kafka"))
+    run.add_argument(
+        "--max-cases",
+        type=int,
+        default=DEFAULT_MAX_CASES,
+        help="refuse sweeps with more cases than this",
+    )
+    run.add_argument(
+        "--no-consumer", action="store_true", help="only measure producing"
+    )
+    run.add_argument("--keep-topics", action="store_true")
+    run.add_argument(
+        "--stop-on-error",
+        action="store_true",
+        help="stop the sweep at the first failed case instead of going on",
+    )
+    run.add_argument(
+        "--results",
+        type=Path,
+        default=Path("kafka-bench.jsonl"),
+        help="JSON lines file the run is appended to",
+    )
+    run.add_argument("--baseline", type=Path, help="baseline to compare the run with")
+
+    baseline = sub.add_parser("baseline", help="store the latest run as the baseline")
+    baseline.add_argument("--results", type=Path, default=Path("kafka-bench.jsonl"))
+    baseline.add_argument("--output", type=Path, required=True)
+
+    compare = sub.add_parser("compare", help="compare the latest run with a baseline")
+    compare.add_argument("--results", type=Path, default=Path("kafka-bench.jsonl"))
+    compare.add_argument("--baseline", type=Path, required=True)
+
+    for p in (run, compare):
+        p.add_argument(
+            "--threshold",
+            type=float,
+            default=10,
+            help="percentage change reported as a regression (default: 10)",
+        )
+        p.add_argument(
+            "--min-latency-ms",
+            type=float,
+            default=2,
+            help="ignore p99 increases smaller than this (default: 2)",
+        )
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "baseline":
+            latest = load_results(args.results)[-1]
+            args.output.write_text(json.dumps(latest, indent=2) + "\n")
+            print(f"[RESINKIT] Stored the run of {latest['time']} as {args.output}")
+            return 0
+
+        if args.command == "run":
+            cases = expand_sweep(
+                args.record_size,
+                args.batch_size,
+                args.linger_ms,
+                args.compression,
+                args.partitions,
+                args.acks,
+            )
+            if len(cases) > args.max_cases:
+                print(
+                    f"Error: the sweep has {len(cases)} cases, more than --max-cases"
+                    f" {args.max_cases}"
+                )
+                return 2
+            bench = KafkaBench(
+                args.kafka_home,
+                args.bootstrap_server,
+                args.records,
+                consume=not args.no_consumer,
+                keep_topics=args.keep_topics,
+            )
+            results = ResultsFile(args.results)
+            current = bench.run(cases, results.write, args.stop_on_error)
+            if not current["cases"]:
+                print("Error: no case finished")
+                return 1
+            results.write(current)
+            print(f"[RESINKIT] Results appended to {args.results}")
+            failed = [c["key"] for c in current["cases"] if "error" in c]
+            if failed:
+                print(f"Error: {len(failed)} of {len(current['cases'])} cases failed")
+                return 1
+            if current.get("interrupted"):
+                return 1
+            if args.baseline is None:
+                return 0
+        else:
+            current = load_results(args.results)[-1]
+
+        reference = json.loads(args.baseline.read_text())
+    except (BenchmarkError, OSError, ValueError, IndexError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    regressions = compare_runs(
+        current, reference, args.threshold / 100, args.min_latency_ms
+    )
+    compared = len(
+        {c["key"] for c in current["cases"] if "error" not in c}
+        & {c["key"] for c in reference["cases"] if "error" not in c}
+    )
+    print(
+        f"[RESINKIT] Compared {compared} cases with the baseline of {reference['time']}"
+        f" (Kafka {reference.get('kafka_version')} -> {current.get('kafka_version')})"
+    )
+    for line in regressions:
+        print(f"[RESINKIT] Regression: {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
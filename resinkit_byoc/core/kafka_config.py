@@ -0,0 +1,292 @@
+"""Kafka broker tuning for the host and workload."""
+
+import argparse
+import math
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .hardware import MB, Resources, count_devices, detect_resources, parse_size
+from .num_utils import bounded
+
+PROFILES = ("balanced", "cdc-fanout", "ingest")
+DEFAULT_PROFILE = "balanced"
+
+KB = 1024
+
+
+class KafkaConfigError(Exception):
+    """Raised when the broker configuration cannot be planned or rendered."""
+
+
+@dataclass
+class BrokerPlan:
+    """Sized broker settings with the facts they were derived from."""
+
+    resources: Resources
+    profile: str
+    disks: int
+    settings: Dict[str, str] = field(default_factory=dict)
+
+    def describe(self) -> str:
+        r = self.resources
+        lines = [
+            f"host: {r.cpus:g} cpus, {r.memory_mb}m memory ({r.source}),"
+            f" {self.disks} data disk(s), profile {self.profile}"
+        ]
+        lines += [f"{key}={value}" for key, value in self.settings.items()]
+        return "\n".join(lines)
+
+
+def plan_broker(resources: Resources, profile: str, disks: int = 1) -> BrokerPlan:
+    """
+    Size the broker settings for ``resources`` and a workload ``profile``.
+
+    Network threads scale with cores (most for cdc-fanout, whose consumers
+    multiply response traffic), I/O threads with cores and data disks (most for
+    ingest), recovery threads per data directory with the cores per disk. Socket
+    buffers grow with memory, since larger buffers only pay off on hosts that
+    can keep them filled.
+    """
+    if profile not in PROFILES:
+        raise KafkaConfigError(
+            f"Unknown profile {profile!r}, expected one of: {', '.join(PROFILES)}"
+        )
+    cores = max(1, math.floor(resources.cpus))
+    memory_gb = resources.memory_mb / 1024
+    disks = max(1, disks)
+
+    network_divisor, network_max = {
+        "balanced": (4, 8),
+        "cdc-fanout": (2, 16),
+        "ingest": (3, 12),
+    }[profile]
+    io_per_core, io_max = {
+        "balanced": (1, 32),
+        "cdc-fanout": (1, 24),
+        "ingest": (2, 64),
+    }[profile]
+
+    # 128 KB buffers below 8 GB, 512 KB up to 32 GB, 1 MB (2 MB for ingest) above
+    if memory_gb < 8:
+        buffer = 128 * KB
+    elif memory_gb < 32:
+        buffer = 512 * KB
+    else:
+        buffer = (2 * MB) if profile == "ingest" else MB
+
+    settings = {
+        "num.network.threads": bounded(cores / network_divisor, 3, network_max),
+        "num.io.threads": bounded(
+            max(cores * io_per_core, 8 * disks), 8, max(io_max, 8 * disks)
+        ),
+        "num.recovery.threads.per.data.dir": bounded(cores / disks / 2, 1, 8),
+        "socket.send.buffer.bytes": buffer,
+        "socket.receive.buffer.bytes": buffer,
+        "socket.request.max.bytes": 100 * MB,
+        "queued.max.requests": 1000 if profile == "ingest" else 500,
+        "num.partitions": bounded(
+            cores if profile == "ingest" else cores / 2,
+            1,
+            32 if profile == "ingest" else 12,
+        ),
+    }
+
+    if profile == "cdc-fanout":
+        settings.update(
+            {
+                # Small segments let compaction and retention catch up quickly
+                "log.segment.bytes": 256 * MB,
+                # A single broker has no replicas; bound what a crash can lose
+                "log.flush.interval.messages": 10000,
+                "log.flush.interval.ms": 1000,
+                "compression.type": "lz4",
+            }
+        )
+    elif profile == "ingest":
+        settings.update(
+            {
+                # Flushing is left to the page cache for throughput
+                "log.segment.bytes": 1024 * MB,
+                "compression.type": "zstd",
+            }
+        )
+    else:
+        settings.update(
+            {
+                "log.segment.bytes": 512 * MB,
+                "log.flush.interval.ms": 5000,
+                "compression.type": "producer",
+            }
+        )
+
+    return BrokerPlan(
+        resources=resources,
+        profile=profile,
+        disks=disks,
+        settings={key: str(value) for key, value in settings.items()},
+    )
+
+
+# Rendering
+
+_PROPERTY = re.compile(r"^\s*([A-Za-z0-9_.\-]+)\s*[=:]\s*(.*)$")
+
+
+def parse_properties(text: str) -> Dict[str, str]:
+    """Return the active (uncommented) properties of ``text``."""
+    result = {}
+    for line in text.splitlines():
+        match = _PROPERTY.match(line)
+        if match and not line.lstrip().startswith(("#", "!")):
+            result[match.group(1)] = match.group(2).strip()
+    return result
+
+
+def render_properties(template: str, settings: Dict[str, str], header: str) -> str:
+    """
+    Set ``settings`` in the ``template`` properties.
+
+    Keys set in the template are changed in place, keeping their comments, and
+    keys whose default is commented out there (``#log.segment.bytes=...``) are
+    set on that line; the others are appended in a generated section.
+    """
+    lines = template.splitlines()
+    remaining = dict(settings)
+    for commented in (False, True):
+        for i, line in enumerate(lines):
+            stripped = line.lstrip()
+            if stripped.startswith(("#", "!")) != commented:
+                continue
+            match = _PROPERTY.match(stripped[1:] if commented else line)
+            if match and match.group(1) in remaining:
+                key = match.group(1)
+                lines[i] = f"{key}={remaining.pop(key)}"
+
+    out = [f"# {line}" for line in header.splitlines()] + [""] + lines
+    if remaining:
+        out += [
+            "",
+            "############################# Generated by resinkit_byoc.core.kafka_config #############################",
+            "",
+        ]
+        out += [f"{key}={value}" for key, value in remaining.items()]
+    return "\n".join(out) + "\n"
+
+
+def parse_overrides(items: List[str]) -> Dict[str, str]:
+    """Parse ``key=value`` overrides."""
+    overrides: Dict[str, str] = {}
+    for item in items:
+        item = item.strip()
+        if not item:
+            continue
+        key, sep, value = item.partition("=")
+        if not sep or not key.strip():
+            raise KafkaConfigError(f"Invalid override {item!r}, expected key=value")
+        overrides[key.strip()] = value.strip()
+    return overrides
+
+
+def default_template_path() -> Path:
+    return (
+        Path(__file__).resolve().parents[2]
+        / "resources"
+        / "kafka"
+        / "server.properties"
+    )
+
+
+def _log_dirs(template: Dict[str, str], overrides: Dict[str, str]) -> Tuple[str, ...]:
+    value = overrides.get("log.dirs") or template.get("log.dirs") or "/tmp/kafka-logs"
+    return tuple(path.strip() for path in value.split(",") if path.strip())
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python3 -m resinkit_byoc.core.kafka_config",
+        description="Render a Kafka server.properties tuned for this host and workload.",
+    )
+    parser.add_argument(
+        "--base",
+        type=Path,
+        help="properties to start from (default: resources/kafka/server.properties)",
+    )
+    parser.add_argument(
+        "--output", "-o", default="-", help="file to write, - for stdout"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILES,
+        default=os.getenv("KAFKA_TUNING_PROFILE") or DEFAULT_PROFILE,
+    )
+    parser.add_argument(
+        "--cpus", type=float, help="cores to plan for instead of detecting"
+    )
+    parser.add_argument(
+        "--memory", help="memory to plan for instead of detecting, e.g. 16g"
+    )
+    parser.add_argument(
+        "--disks",
+        type=int,
+        help="data disks to plan for instead of counting log.dirs devices",
+    )
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="override a broker property (repeatable); KAFKA_CONF_OVERRIDES adds ';'-separated ones",
+    )
+    parser.add_argument(
+        "--explain", action="store_true", help="print the sized settings"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        template_path = args.base or default_template_path()
+        template = template_path.read_text()
+        overrides = parse_overrides(
+            os.getenv("KAFKA_CONF_OVERRIDES", "").split(";") + args.set
+        )
+
+        resources = detect_resources()
+        if args.cpus:
+            resources.cpus, resources.source = args.cpus, "given"
+        if args.memory:
+            resources.memory, resources.source = parse_size(args.memory), "given"
+        disks = args.disks or count_devices(
+            _log_dirs(parse_properties(template), overrides)
+        )
+
+        plan = plan_broker(resources, args.profile, disks)
+    except (KafkaConfigError, OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    settings = {**plan.settings, **overrides}
+    header = (
+        f"Generated by resinkit_byoc.core.kafka_config from {template_path}\n"
+        + plan.describe().splitlines()[0]
+    )
+    text = render_properties(template, settings, header)
+    if args.output == "-":
+        sys.stdout.write(text)
+    else:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(text)
+
+    if args.explain:
+        out = sys.stderr if args.output == "-" else sys.stdout
+        for line in plan.describe().splitlines():
+            print(f"[RESINKIT] Kafka {line}", file=out)
+        for key, value in overrides.items():
+            print(f"[RESINKIT] Kafka {key}={value} (override)", file=out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,502 @@
+"""Prometheus exporter for the resinkit services and the host."""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .hardware import detect_resources
+from .supervisor import default_services
+
+DEFAULT_PORT = 9108
+# Seconds between polls of the Flink, SQL Gateway, process and host sources
+DEFAULT_INTERVAL = 15
+# Seconds between polls of Kafka consumer lag
+DEFAULT_KAFKA_INTERVAL = 60
+
+FLINK_URL = "http://localhost:8081"
+SQL_GATEWAY_URL = "http://localhost:8083"
+SQL_GATEWAY_PORT = 8083
+KAFKA_BOOTSTRAP = "localhost:9092"
+
+# Vertex metrics fetched per job vertex, aggregated over its subtasks
+VERTEX_METRICS = {
+    "numRecordsInPerSecond": ("resinkit_flink_vertex_records_in_per_second", "sum"),
+    "numRecordsOutPerSecond": ("resinkit_flink_vertex_records_out_per_second", "sum"),
+    "busyTimeMsPerSecond": ("resinkit_flink_vertex_busy_ms_per_second", "max"),
+    "backPressuredTimeMsPerSecond": (
+        "resinkit_flink_vertex_backpressured_ms_per_second",
+        "max",
+    ),
+}
+
+HELP = {
+    "resinkit_flink_job_up": "1 if the Flink job is RUNNING",
+    "resinkit_flink_vertex_records_in_per_second": "Records received per second, summed over subtasks",
+    "resinkit_flink_vertex_records_out_per_second": "Records emitted per second, summed over subtasks",
+    "resinkit_flink_vertex_busy_ms_per_second": "Busy time per second of the busiest subtask",
+    "resinkit_flink_vertex_backpressured_ms_per_second": "Back-pressured time per second of the most back-pressured subtask",
+    "resinkit_flink_vertex_parallelism": "Parallelism of the job vertex",
+    "resinkit_flink_checkpoints_completed_total": "Completed checkpoints of the job",
+    "resinkit_flink_checkpoints_failed_total": "Failed checkpoints of the job",
+    "resinkit_flink_checkpoint_duration_seconds": "End-to-end duration of the latest completed checkpoint",
+    "resinkit_flink_checkpoint_size_bytes": "State size of the latest completed checkpoint",
+    "resinkit_flink_sql_gateway_up": "1 if the SQL Gateway REST endpoint answers",
+    "resinkit_flink_sql_gateway_connections": "Established client connections to the SQL Gateway",
+    "resinkit_kafka_consumer_lag": "Messages between the committed offset and the log end",
+    "resinkit_process_resident_memory_bytes": "Resident memory of the processes of the service",
+    "resinkit_process_cpu_seconds_total": "CPU time of the processes of the service",
+    "resinkit_process_count": "Number of running processes of the service",
+    "resinkit_host_cpus": "Cores available to the node, cgroup limits included",
+    "resinkit_host_memory_bytes": "Memory available to the node, cgroup limits included",
+    "resinkit_host_memory_available_bytes": "MemAvailable of the host",
+    "resinkit_host_load1": "One-minute load average of the host",
+    "resinkit_exporter_source_up": "1 if the last poll of the source succeeded",
+    "resinkit_exporter_source_age_seconds": "Seconds since the last successful poll of the source",
+    "resinkit_exporter_poll_duration_seconds": "Duration of the last poll of the source",
+}
+
+COUNTERS = {
+    "resinkit_flink_checkpoints_completed_total",
+    "resinkit_flink_checkpoints_failed_total",
+    "resinkit_process_cpu_seconds_total",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Labels, float]
+
+
+def _labels(**labels: object) -> Labels:
+    return tuple((key, str(value)) for key, value in labels.items())
+
+
+def _get_json(url: str, timeout: float = 5.0):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.load(response)
+
+
+# Sources
+
+
+def poll_flink(base_url: str = FLINK_URL, max_workers: int = 8) -> List[Sample]:
+    """Job, vertex and checkpoint metrics of the jobs known to the JobManager."""
+    jobs = _get_json(f"{base_url}/jobs/overview")["jobs"]
+    samples: List[Sample] = []
+    running = []
+    for job in jobs:
+        labels = _labels(job=job["name"], job_id=job["jid"])
+        samples.append(
+            ("resinkit_flink_job_up", labels, float(job["state"] == "RUNNING"))
+        )
+        if job["state"] == "RUNNING":
+            running.append(job)
+
+    def vertex_samples(job: dict, vertex: dict) -> List[Sample]:
+        jid = job["jid"]
+        labels = _labels(job=job["name"], job_id=jid, vertex=vertex["name"][:120])
+        result: List[Sample] = [
+            ("resinkit_flink_vertex_parallelism", labels, vertex["parallelism"])
+        ]
+        metrics = _get_json(
+            f"{base_url}/jobs/{jid}/vertices/{vertex['id']}/subtasks/metrics"
+            f"?get={get}&agg={aggs}"
+        )
+        for metric in metrics:
+            metric_name, agg = VERTEX_METRICS.get(metric["id"], (None, None))
+            if metric_name and agg in metric:
+                result.append((metric_name, labels, float(metric[agg])))
+        return result
+
+    def checkpoint_samples(job: dict) -> List[Sample]:
+        jid = job["jid"]
+        checkpoints = _get_json(f"{base_url}/jobs/{jid}/checkpoints")
+        labels = _labels(job=job["name"], job_id=jid)
+        counts = checkpoints.get("counts", {})
+        result: List[Sample] = [
+            (
+                "resinkit_flink_checkpoints_completed_total",
+                labels,
+                counts.get("completed", 0),
+            ),
+            (
+                "resinkit_flink_checkpoints_failed_total",
+                labels,
+                counts.get("failed", 0),
+            ),
+        ]
+        latest = (checkpoints.get("latest") or {}).get("completed") or {}
+        if latest:
+            result.append(
+                (
+                    "resinkit_flink_checkpoint_duration_seconds",
+                    labels,
+                    latest.get("end_to_end_duration", 0) / 1000,
+                )
+            )
+            result.append(
+                (
+                    "resinkit_flink_checkpoint_size_bytes",
+                    labels,
+                    latest.get("state_size", 0),
+                )
+            )
+        return result
+
+    get = ",".join(VERTEX_METRICS)
+    aggs = ",".join(sorted({agg for _, agg in VERTEX_METRICS.values()}))
+    # Every vertex of every job is fetched concurrently, so a poll takes about
+    # as long as the slowest request rather than their sum
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        checkpoints = pool.map(checkpoint_samples, running)
+        details = pool.map(
+            lambda job: _get_json(f"{base_url}/jobs/{job['jid']}"), running
+        )
+        vertices = [
+            pool.submit(vertex_samples, job, vertex)
+            for job, detail in zip(running, details)
+            for vertex in detail.get("vertices", [])
+        ]
+        for future in vertices:
+            samples.extend(future.result())
+        for result in checkpoints:
+            samples.extend(result)
+    return samples
+
+
+def _established_connections(port: int) -> int:
+    """Established TCP connections whose local port is ``port``."""
+    count = 0
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    # local_address is HEXIP:HEXPORT, state 01 is ESTABLISHED
+                    if (
+                        int(fields[1].rsplit(":", 1)[1], 16) == port
+                        and fields[3] == "01"
+                    ):
+                        count += 1
+        except OSError:
+            continue
+    return count
+
+
+def poll_sql_gateway(base_url: str = SQL_GATEWAY_URL) -> List[Sample]:
+    """
+    Availability and client connections of the SQL Gateway.
+
+    The gateway REST API does not list open sessions, so established client
+    connections stand in for them.
+    """
+    try:
+        _get_json(f"{base_url}/info")
+        up = 1.0
+    except (OSError, ValueError):
+        up = 0.0
+    return [
+        ("resinkit_flink_sql_gateway_up", (), up),
+        (
+            "resinkit_flink_sql_gateway_connections",
+            (),
+            _established_connections(SQL_GATEWAY_PORT),
+        ),
+    ]
+
+
+def parse_consumer_groups(output: str) -> List[Sample]:
+    """Parse ``kafka-consumer-groups.sh --describe --all-groups`` into lag samples."""
+    samples: List[Sample] = []
+    columns: List[str] = []
+    for line in output.splitlines():
+        fields = line.split()
+        if not fields:
+            continue
+        if fields[0] == "GROUP":
+            columns = fields
+            continue
+        if not columns or len(fields) < len(columns) - 3:
+            continue
+        row = dict(zip(columns, fields))
+        lag = row.get("LAG", "-")
+        if not lag.isdigit():
+            continue
+        samples.append(
+            (
+                "resinkit_kafka_consumer_lag",
+                _labels(
+                    group=row["GROUP"], topic=row["TOPIC"], partition=row["PARTITION"]
+                ),
+                float(lag),
+            )
+        )
+    return samples
+
+
+def poll_kafka(bootstrap: str = KAFKA_BOOTSTRAP) -> List[Sample]:
+    """Consumer lag of every consumer group."""
+    kafka_home = os.getenv("KAFKA_HOME", "/opt/kafka")
+    result = subprocess.run(
+        [
+            f"{kafka_home}/bin/kafka-consumer-groups.sh",
+            "--bootstrap-server",
+            bootstrap,
+            "--describe",
+            "--all-groups",
+        ],
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=False,
+    )
+    if result.returncode != 0:
+        errors = result.stderr.strip().splitlines()
+        raise RuntimeError(errors[-1] if errors else f"exit {result.returncode}")
+    return parse_consumer_groups(result.stdout)
+
+
+def poll_processes() -> List[Sample]:
+    """RSS, CPU time and count of the processes of each supervised service."""
+    patterns = [
+        (service.name, re.compile(pattern))
+        for service in default_services().values()
+        for pattern in service.processes
+    ]
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    ticks = os.sysconf("SC_CLK_TCK")
+    totals = {name: [0, 0.0, 0] for name, _ in patterns}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                cmdline = f.read().replace(b"\0", b" ").decode(errors="replace")
+            name = next((n for n, regex in patterns if regex.search(cmdline)), None)
+            if name is None:
+                continue
+            with open(f"/proc/{entry}/statm") as f:
+                rss = int(f.read().split()[1]) * page_size
+            with open(f"/proc/{entry}/stat") as f:
+                # Fields after the parenthesised command name
+                stat = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError, ValueError):
+            continue
+        totals[name][0] += rss
+        totals[name][1] += (int(stat[11]) + int(stat[12])) / ticks
+        totals[name][2] += 1
+
+    samples: List[Sample] = []
+    for name, (rss, cpu, count) in totals.items():
+        labels = _labels(service=name)
+        samples.append(("resinkit_process_resident_memory_bytes", labels, rss))
+        samples.append(("resinkit_process_cpu_seconds_total", labels, cpu))
+        samples.append(("resinkit_process_count", labels, count))
+    return samples
+
+
+def poll_host() -> List[Sample]:
+    """Resources of the node and current load."""
+    resources = detect_resources()
+    samples: List[Sample] = [
+        ("resinkit_host_cpus", (), resources.cpus),
+        ("resinkit_host_memory_bytes", (), resources.memory),
+    ]
+    with open("/proc/loadavg") as f:
+        samples.append(("resinkit_host_load1", (), float(f.read().split()[0])))
+    with open("/proc/meminfo") as f:
+        for line in f:
+            if line.startswith("MemAvailable:"):
+                available = int(line.split()[1]) * 1024
+                samples.append(("resinkit_host_memory_available_bytes", (), available))
+    return samples
+
+
+# Cache and rendering
+
+
+@dataclass
+class Source:
+    """A poll function with the samples of its last successful poll."""
+
+    name: str
+    poll: Callable[[], List[Sample]]
+    interval: float
+    samples: List[Sample] = field(default_factory=list)
+    up: bool = False
+    last_success: Optional[float] = None
+    duration: float = 0.0
+    error: Optional[str] = None
+
+    def refresh(self) -> None:
+        started = time.monotonic()
+        try:
+            samples = self.poll()
+        except Exception as e:  # noqa: BLE001 - a failing source must not stop the loop
+            self.up, self.error = False, str(e)
+            # Samples of an unreachable service would be misleading, drop them
+            self.samples = []
+        else:
+            self.samples, self.up, self.error = samples, True, None
+            self.last_success = time.monotonic()
+        self.duration = time.monotonic() - started
+
+    def run_forever(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            self.refresh()
+            stop.wait(self.interval)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_sample(name: str, labels: Labels, value: float) -> str:
+    value = float(value)
+    text = str(int(value)) if value.is_integer() else repr(value)
+    if labels:
+        rendered = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+        return f"{name}{{{rendered}}} {text}"
+    return f"{name} {text}"
+
+
+def render(sources: List[Source]) -> str:
+    """Render the cached samples of ``sources`` in the Prometheus text format."""
+    now = time.monotonic()
+    families: Dict[str, List[str]] = {}
+    for source in sources:
+        # Copy the reference; the poll thread replaces the list, never mutates it
+        for name, labels, value in list(source.samples):
+            families.setdefault(name, []).append(_format_sample(name, labels, value))
+        labels = _labels(source=source.name)
+        families.setdefault("resinkit_exporter_source_up", []).append(
+            _format_sample("resinkit_exporter_source_up", labels, float(source.up))
+        )
+        if source.last_success is not None:
+            families.setdefault("resinkit_exporter_source_age_seconds", []).append(
+                _format_sample(
+                    "resinkit_exporter_source_age_seconds",
+                    labels,
+                    round(now - source.last_success, 3),
+                )
+            )
+        families.setdefault("resinkit_exporter_poll_duration_seconds", []).append(
+            _format_sample(
+                "resinkit_exporter_poll_duration_seconds",
+                labels,
+                round(source.duration, 3),
+            )
+        )
+
+    lines = []
+    for name, samples in families.items():
+        if name in HELP:
+            lines.append(f"# HELP {name} {HELP[name]}")
+        lines.append(f"# TYPE {name} {'counter' if name in COUNTERS else 'gauge'}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+def build_sources(interval: float, kafka_interval: float) -> List[Source]:
+    return [
+        Source("flink", poll_flink, interval),
+        Source("sql_gateway", poll_sql_gateway, interval),
+        Source("kafka", poll_kafka, kafka_interval),
+        Source("processes", poll_processes, interval),
+        Source("host", poll_host, interval),
+    ]
+
+
+def serve(sources: List[Source], bind: str, port: int) -> None:
+    stop = threading.Event()
+    for source in sources:
+        threading.Thread(
+            target=source.run_forever,
+            args=(stop,),
+            name=f"poll-{source.name}",
+            daemon=True,
+        ).start()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0].rstrip("/") not in ("", "/metrics"):
+                self.send_error(404)
+                return
+            body = render(sources).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer((bind, port), Handler)
+    print(f"[RESINKIT] Serving metrics on http://{bind}:{port}/metrics", flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        stop.set()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python3 -m resinkit_byoc.core.metrics",
+        description="Export Flink, SQL Gateway, Kafka and host metrics for Prometheus.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("serve", help="poll in the background and serve /metrics")
+    p.add_argument("--bind", default="127.0.0.1")
+    p.add_argument(
+        "--port",
+        type=int,
+        default=int(os.getenv("RESINKIT_METRICS_PORT") or DEFAULT_PORT),
+    )
+    sub.add_parser("dump", help="poll every source once and print the metrics")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=float(os.getenv("RESINKIT_METRICS_INTERVAL") or DEFAULT_INTERVAL),
+    )
+    parser.add_argument(
+        "--kafka-interval",
+        type=float,
+        default=float(
+            os.getenv("RESINKIT_METRICS_KAFKA_INTERVAL") or DEFAULT_KAFKA_INTERVAL
+        ),
+    )
+    args = parser.parse_args(argv)
+
+    sources = build_sources(args.interval, args.kafka_interval)
+    if args.command == "dump":
+        with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+            list(pool.map(Source.refresh, sources))
+        sys.stdout.write(render(sources))
+        for source in sources:
+            if source.error:
+                print(f"[RESINKIT] {source.name}: {source.error}", file=sys.stderr)
+        return 0
+
+    try:
+        serve(sources, args.bind, args.port)
+    except OSError as e:
+        print(f"Error: {e}")
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""Bounds, percentiles and rate limiting shared by the sizing modules and load tools."""
+
+import threading
+import time
+from typing import Sequence
+
+
+def bounded(value: float, low: int, high: int) -> int:
+    """``value`` as an int clamped to ``[low, high]``."""
+    return int(max(low, min(high, value)))
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted ``values``; 0.0 when there are none."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class RateLimiter:
+    """Spaces operations evenly at ``rate`` per second across all threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self.next = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, ops: int = 1) -> None:
+        with self.lock:
+            now = time.monotonic()
+            # Do not bank more than a second of idle time as a burst
+            start = max(self.next, now - 1.0)
+            self.next = start + ops * self.interval
+        if start > now:
+            time.sleep(start - now)
@@ -0,0 +1,227 @@
+"""Single-pass ownership and permission reconciliation for install trees."""
+
+import argparse
+import grp
+import os
+import pwd
+import stat
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+DEFAULT_MAX_WORKERS = 8
+
+
+@dataclass
+class FixCounts:
+    """Inodes scanned and changed by a reconciliation."""
+
+    scanned: int = 0
+    owner_changed: int = 0
+    mode_changed: int = 0
+    errors: int = 0
+
+    def add(self, other: "FixCounts") -> None:
+        self.scanned += other.scanned
+        self.owner_changed += other.owner_changed
+        self.mode_changed += other.mode_changed
+        self.errors += other.errors
+
+
+class OwnershipFixer:
+    """
+    Bring owner, group and minimum permissions of whole trees in line.
+
+    Args:
+        uid: Owner to set
+        gid: Group to set
+        dir_mode: Permission bits every directory must have (added, never removed)
+        file_mode: Permission bits every regular file must have (added, never removed)
+        max_workers: Maximum number of subtrees walked at the same time
+        dry_run: Only count the inodes that would change
+    """
+
+    def __init__(
+        self,
+        uid: int,
+        gid: int,
+        dir_mode: Optional[int] = None,
+        file_mode: Optional[int] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        dry_run: bool = False,
+    ):
+        self.uid = uid
+        self.gid = gid
+        self.dir_mode = dir_mode
+        self.file_mode = file_mode
+        self.max_workers = max(1, max_workers)
+        self.dry_run = dry_run
+
+    def fix_path(self, path: str, st: os.stat_result, counts: FixCounts) -> None:
+        """Fix a single inode given its lstat result."""
+        counts.scanned += 1
+        try:
+            if st.st_uid != self.uid or st.st_gid != self.gid:
+                counts.owner_changed += 1
+                if not self.dry_run:
+                    os.lchown(path, self.uid, self.gid)
+
+            if stat.S_ISDIR(st.st_mode):
+                required = self.dir_mode
+            elif stat.S_ISREG(st.st_mode):
+                required = self.file_mode
+            else:
+                # Symlink modes are meaningless, other file types are left alone
+                required = None
+            if required is not None and st.st_mode & required != required:
+                counts.mode_changed += 1
+                if not self.dry_run:
+                    os.chmod(path, stat.S_IMODE(st.st_mode) | required)
+        except OSError as e:
+            counts.errors += 1
+            print(f"Warning: {path}: {e}", file=sys.stderr)
+
+    def walk(self, root: str) -> FixCounts:
+        """Fix everything below ``root`` (not ``root`` itself), without following symlinks."""
+        counts = FixCounts()
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError as e:
+                counts.errors += 1
+                print(f"Warning: {directory}: {e}", file=sys.stderr)
+                continue
+            for entry in entries:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError as e:
+                    counts.errors += 1
+                    print(f"Warning: {entry.path}: {e}", file=sys.stderr)
+                    continue
+                # Fix directories before descending so they stay traversable
+                self.fix_path(entry.path, st, counts)
+                if stat.S_ISDIR(st.st_mode):
+                    stack.append(entry.path)
+        return counts
+
+    def fix_trees(self, roots: Iterable[str]) -> FixCounts:
+        """
+        Fix all ``roots`` and everything below them.
+
+        Nested roots are only walked once, as part of their parent. Each root's
+        top-level subdirectories are walked in parallel.
+        """
+        roots = _outermost([os.path.abspath(r) for r in roots])
+        total = FixCounts()
+        subtrees: List[str] = []
+
+        for root in roots:
+            try:
+                st = os.lstat(root)
+            except FileNotFoundError:
+                continue
+            self.fix_path(root, st, total)
+            if not stat.S_ISDIR(st.st_mode):
+                continue
+            try:
+                entries = list(os.scandir(root))
+            except OSError as e:
+                total.errors += 1
+                print(f"Warning: {root}: {e}", file=sys.stderr)
+                continue
+            for entry in entries:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError as e:
+                    total.errors += 1
+                    print(f"Warning: {entry.path}: {e}", file=sys.stderr)
+                    continue
+                self.fix_path(entry.path, st, total)
+                if stat.S_ISDIR(st.st_mode):
+                    subtrees.append(entry.path)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for counts in pool.map(self.walk, subtrees):
+                total.add(counts)
+        return total
+
+
+def _outermost(paths: List[str]) -> List[str]:
+    """Drop paths that are inside another path of the list."""
+    result: List[str] = []
+    for path in sorted(set(paths)):
+        if not any(path == p or path.startswith(p.rstrip("/") + "/") for p in result):
+            result.append(path)
+    return result
+
+
+def _parse_mode(value: str) -> int:
+    try:
+        return int(value, 8)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an octal mode, got {value!r}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python3 -m resinkit_byoc.core.ownership",
+        description="Set owner and minimum permissions of trees, changing only what differs.",
+    )
+    parser.add_argument("paths", nargs="+", help="trees to reconcile")
+    parser.add_argument("--user", required=True)
+    parser.add_argument(
+        "--group", help="group name (default: the user's primary group)"
+    )
+    parser.add_argument(
+        "--dir-mode", type=_parse_mode, help="bits every directory must have, e.g. 700"
+    )
+    parser.add_argument(
+        "--file-mode",
+        type=_parse_mode,
+        help="bits every regular file must have, e.g. 600",
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument(
+        "--create", action="store_true", help="create missing paths as directories"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="only report changes")
+    args = parser.parse_args(argv)
+
+    try:
+        user = pwd.getpwnam(args.user)
+        gid = grp.getgrnam(args.group).gr_gid if args.group else user.pw_gid
+    except KeyError as e:
+        print(f"Error: unknown user or group: {e}")
+        return 1
+
+    if args.create and not args.dry_run:
+        for path in args.paths:
+            os.makedirs(path, exist_ok=True)
+
+    fixer = OwnershipFixer(
+        uid=user.pw_uid,
+        gid=gid,
+        dir_mode=args.dir_mode,
+        file_mode=args.file_mode,
+        max_workers=args.jobs,
+        dry_run=args.dry_run,
+    )
+    started = time.monotonic()
+    counts = fixer.fix_trees(args.paths)
+    elapsed = time.monotonic() - started
+
+    verb = "would change" if args.dry_run else "changed"
+    print(
+        f"[RESINKIT] Ownership of {', '.join(args.paths)}: scanned {counts.scanned} inodes, "
+        f"{verb} owner of {counts.owner_changed} and mode of {counts.mode_changed} "
+        f"in {elapsed:.1f}s"
+    )
+    return 1 if counts.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
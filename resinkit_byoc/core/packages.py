@@ -0,0 +1,100 @@
+"""Consolidated apt package installation for resinkit-byoc deploy stages."""
+
+import os
+import shlex
+from typing import Dict, Iterable, Optional, Set
+
+from pyinfra import host
+from pyinfra.operations import apt, files, server
+
+from .config import load_dotenvs
+
+# Skip ``apt-get update`` if the package lists were refreshed within this many seconds
+APT_CACHE_TIME = 3600
+
+# Packages already planned in this deploy, per host
+_planned: Dict[str, Set[str]] = {}
+
+
+def install_packages(
+    packages: Iterable[str],
+    optional: Iterable[str] = (),
+    name: Optional[str] = None,
+) -> None:
+    """
+    Install apt packages in a single transaction, after at most one index refresh.
+
+    Packages already installed earlier in the same deploy are left out, so stages
+    run through ``run_stages`` do not install their packages a second time.
+    If RESINKIT_APT_CACHE_DIR is set, downloaded .deb files are kept there and
+    reused by later runs.
+
+    Args:
+        packages: Packages that must be installed
+        optional: Packages that may be unavailable on the distribution; the
+            available ones are installed in a second transaction and the others
+            are skipped with a message
+        name: Optional name for the pyinfra operation
+    """
+    done = _planned.setdefault(host.name, set())
+    required = [p for p in dict.fromkeys(packages) if p not in done]
+    optional = [
+        p for p in dict.fromkeys(optional) if p not in done and p not in required
+    ]
+    if not required and not optional:
+        return
+    done.update(required, optional)
+
+    load_dotenvs()
+    extra_install_args = "--no-install-recommends"
+    cache_dir = os.getenv("RESINKIT_APT_CACHE_DIR")
+    if cache_dir:
+        files.directory(
+            name="Create apt package cache directory",
+            path=f"{cache_dir.rstrip('/')}/partial",
+            present=True,
+        )
+        extra_install_args += (
+            f" -o Dir::Cache::Archives={cache_dir.rstrip('/')}/"
+            " -o APT::Keep-Downloaded-Packages=true"
+        )
+
+    name = name or "Install packages"
+    if required:
+        apt.packages(
+            name=name,
+            packages=required,
+            present=True,
+            update=True,
+            cache_time=APT_CACHE_TIME,
+            extra_install_args=extra_install_args,
+        )
+    if optional:
+        if not required:
+            apt.update(name="Update apt package lists", cache_time=APT_CACHE_TIME)
+        server.shell(
+            name=f"{name} (optional)",
+            commands=[optional_install_command(optional, extra_install_args)],
+        )
+
+
+def optional_install_command(packages: Iterable[str], extra_install_args: str) -> str:
+    """
+    Shell command installing those of ``packages`` the apt sources provide.
+
+    Availability is checked when the command runs, after the package lists were
+    refreshed. Unavailable packages are reported and skipped, so one missing
+    package does not fail the transaction of the others.
+    """
+    names = " ".join(shlex.quote(p) for p in packages)
+    return (
+        "available=''; "
+        f"for p in {names}; do "
+        'if apt-cache policy "$p" 2>/dev/null | grep -q "Candidate: [^(]"; then '
+        'available="$available $p"; '
+        'else echo "[RESINKIT] Skipping optional package $p: not available"; fi; '
+        "done; "
+        'if [ -n "$available" ]; then '
+        "DEBIAN_FRONTEND=noninteractive apt-get install -y "
+        f"{extra_install_args} $available; fi"
+    )
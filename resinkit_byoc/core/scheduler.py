@@ -0,0 +1,241 @@
+"""Stage dependency graph and parallel scheduler for resinkit-byoc deploys."""
+
+import functools
+import os
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .config import load_dotenvs
+from .deploy_utils import parallel_job, parallel_scripts
+from .packages import install_packages
+from .timing import stage_span
+
+DEFAULT_CONCURRENCY = 4
+
+
+@dataclass(frozen=True)
+class Stage:
+    """A deploy function together with the stages it depends on."""
+
+    name: str
+    func: Callable
+    requires: Tuple[str, ...] = ()
+    locks: Tuple[str, ...] = ()
+    packages: Tuple[str, ...] = ()
+    optional_packages: Tuple[str, ...] = ()
+
+    def __call__(self, *args, **kwargs):
+        with stage_span(self.name):
+            # No-op when run_stages already installed the packages of this stage
+            install_packages(
+                self.packages,
+                self.optional_packages,
+                name=f"Install packages for {self.name}",
+            )
+            return self.func(*args, **kwargs)
+
+
+# Registry of all declared stages, keyed by function name
+_stages: Dict[str, Stage] = {}
+
+
+def stage(
+    requires: Optional[Iterable[str]] = None,
+    locks: Optional[Iterable[str]] = None,
+    packages: Optional[Iterable[str]] = None,
+    optional_packages: Optional[Iterable[str]] = None,
+) -> Callable:
+    """
+    Decorator that registers a deploy function as a schedulable stage.
+
+    The decorated function can still be called directly or used as a packaged
+    pyinfra deploy; calls are timed as the stage when RESINKIT_TRACE_DIR is set.
+
+    Args:
+        requires: Names of the stages that must have completed before this one runs.
+        locks: Names of exclusive resources (e.g. "apt") the stage holds while running.
+            Two stages sharing a lock are never scheduled in the same wave.
+        packages: apt packages the stage needs. ``run_stages`` installs the packages
+            of all selected stages in one transaction before the first wave.
+        optional_packages: apt packages the stage can do without, e.g. when they
+            are not available on the distribution.
+
+    Usage:
+        @stage(requires=["install_00_prep"], packages=["nginx"])
+        def install_01_core():
+            ...
+    """
+
+    def decorator(func: Callable) -> Callable:
+        registered = Stage(
+            name=func.__name__,
+            func=func,
+            requires=tuple(requires or ()),
+            locks=tuple(locks or ()),
+            packages=tuple(packages or ()),
+            optional_packages=tuple(optional_packages or ()),
+        )
+        _stages[func.__name__] = registered
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return registered(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def get_stage(func_or_name: Union[Callable, str]) -> Stage:
+    """
+    Look up a registered stage by function or name.
+
+    Functions that were never decorated with ``@stage`` are treated as stages
+    without dependencies.
+    """
+    name = func_or_name if isinstance(func_or_name, str) else func_or_name.__name__
+    if name in _stages:
+        return _stages[name]
+    if isinstance(func_or_name, str):
+        raise KeyError(f"Unknown stage: {name}")
+    return Stage(name=name, func=func_or_name)
+
+
+def get_concurrency() -> int:
+    """Return the configured stage concurrency (RESINKIT_DEPLOY_CONCURRENCY, 1 = serial)."""
+    load_dotenvs()
+    value = os.getenv("RESINKIT_DEPLOY_CONCURRENCY", str(DEFAULT_CONCURRENCY))
+    try:
+        return max(1, int(value))
+    except ValueError:
+        raise ValueError(
+            f"RESINKIT_DEPLOY_CONCURRENCY must be an integer, got: {value!r}"
+        ) from None
+
+
+def plan_waves(stages: Sequence[Stage], max_workers: int) -> List[List[Stage]]:
+    """
+    Group stages into waves that can run at the same time.
+
+    Every stage in a wave has all of its selected dependencies in an earlier
+    wave, no two stages in a wave share a lock, and no wave holds more than
+    ``max_workers`` stages. Dependencies on stages that are not selected are
+    assumed to be satisfied already. Among ready stages, the ones heading the
+    longest remaining dependency chain are scheduled first.
+
+    Raises:
+        ValueError: If the selected stages contain a dependency cycle.
+    """
+    by_name = {s.name: s for s in stages}
+    order = {s.name: i for i, s in enumerate(stages)}
+    deps = {s.name: {r for r in s.requires if r in by_name} for s in stages}
+
+    dependents: Dict[str, List[str]] = {name: [] for name in by_name}
+    for name, reqs in deps.items():
+        for req in reqs:
+            dependents[req].append(name)
+
+    # Length of the longest chain of dependents hanging off each stage
+    depth: Dict[str, int] = {}
+
+    def chain_length(name: str, visiting: Tuple[str, ...] = ()) -> int:
+        if name in visiting:
+            cycle = " -> ".join(visiting + (name,))
+            raise ValueError(f"Dependency cycle between stages: {cycle}")
+        if name not in depth:
+            depth[name] = 1 + max(
+                (chain_length(d, visiting + (name,)) for d in dependents[name]),
+                default=0,
+            )
+        return depth[name]
+
+    for name in by_name:
+        chain_length(name)
+
+    done: set = set()
+    waves: List[List[Stage]] = []
+    while len(done) < len(stages):
+        ready = [n for n in by_name if n not in done and deps[n] <= done]
+        ready.sort(key=lambda n: (-depth[n], order[n]))
+
+        wave: List[Stage] = []
+        held: set = set()
+        for name in ready:
+            if len(wave) >= max_workers:
+                break
+            s = by_name[name]
+            if held.intersection(s.locks):
+                continue
+            wave.append(s)
+            held.update(s.locks)
+
+        # Keep the declared order inside a wave for readable output
+        wave.sort(key=lambda s: order[s.name])
+        waves.append(wave)
+        done.update(s.name for s in wave)
+
+    return waves
+
+
+def plan_packages(stages: Sequence[Stage]) -> Tuple[List[str], List[str]]:
+    """
+    Collect the apt packages of ``stages``, deduplicated in declaration order.
+
+    Returns:
+        The required packages and the optional packages that are not required
+        by another stage.
+    """
+    packages = list(dict.fromkeys(p for s in stages for p in s.packages))
+    optional = [
+        p
+        for p in dict.fromkeys(p for s in stages for p in s.optional_packages)
+        if p not in packages
+    ]
+    return packages, optional
+
+
+def run_stages(
+    stages: Sequence[Union[Callable, str]],
+    max_workers: Optional[int] = None,
+) -> None:
+    """
+    Run deploy stages, in parallel where their dependencies allow.
+
+    The apt packages of all stages are installed first, with a single index
+    refresh and install transaction. With ``max_workers`` of 1 the stages then
+    run serially in the given order.
+    Otherwise the stages are grouped by ``plan_waves`` and the stages of a wave
+    run concurrently on the target host, each running its ``run_script`` and
+    ``run_shell`` steps in order (see ``parallel_scripts``).
+
+    Args:
+        stages: Stage functions (or names) to run.
+        max_workers: Maximum number of concurrent stages; defaults to
+            RESINKIT_DEPLOY_CONCURRENCY.
+    """
+    if max_workers is None:
+        max_workers = get_concurrency()
+
+    resolved = [get_stage(s) for s in stages]
+
+    packages, optional = plan_packages(resolved)
+    with stage_span("packages"):
+        install_packages(packages, optional, name="Install packages of all stages")
+
+    if max_workers <= 1:
+        for s in resolved:
+            s()
+        return
+
+    for i, wave in enumerate(plan_waves(resolved, max_workers), start=1):
+        names = ", ".join(s.name for s in wave)
+        print(f"Stage wave {i}: {names}")
+        if len(wave) == 1:
+            wave[0]()
+            continue
+        # Scripts of the wave run in one operation, timed as the wave
+        with stage_span(f"wave {i}"):
+            with parallel_scripts(max_workers, name=f"Run stage wave {i}: {names}"):
+                for s in wave:
+                    with parallel_job(s.name):
+                        s()
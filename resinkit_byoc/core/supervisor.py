@@ -0,0 +1,371 @@
+"""Start, stop and check the resinkit services in dependency order."""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+BIN_DIR = "/home/resinkit/.local/bin"
+
+# Seconds a service may take from its start command to passing its probes
+DEFAULT_START_TIMEOUT = 180
+# Seconds a service may take to stop gracefully before it is killed
+DEFAULT_STOP_TIMEOUT = 30
+
+PROBE_INTERVAL = 0.25
+
+
+@dataclass(frozen=True)
+class Probe:
+    """
+    A readiness check: an HTTP endpoint or a TCP port.
+
+    An HTTP probe passes once the server answers below 500; a 404 still means
+    the server is up. A TCP probe passes once the port accepts a connection.
+    """
+
+    name: str
+    url: Optional[str] = None
+    port: Optional[int] = None
+    host: str = "localhost"
+
+    def check(self, timeout: float = 2.0) -> bool:
+        try:
+            if self.url:
+                with urllib.request.urlopen(self.url, timeout=timeout) as response:
+                    return response.status < 500
+            with socket.create_connection((self.host, self.port), timeout=timeout):
+                return True
+        except urllib.error.HTTPError as e:
+            return e.code < 500
+        except (OSError, ValueError):
+            return False
+
+
+@dataclass(frozen=True)
+class Service:
+    """A service controlled through its entrypoint script."""
+
+    name: str
+    entrypoint: str
+    probes: Tuple[Probe, ...]
+    # pgrep -f patterns of the service processes, killed if a graceful stop times out
+    processes: Tuple[str, ...]
+    requires: Tuple[str, ...] = ()
+
+    def ready(self) -> bool:
+        return all(probe.check() for probe in self.probes)
+
+
+def default_services() -> Dict[str, Service]:
+    """The services installed by the deploy stages, with ports taken from the environment."""
+    api_port = int(os.getenv("RESINKIT_API_SERVICE_PORT") or 8602)
+    metrics_port = int(os.getenv("RESINKIT_METRICS_PORT") or 9108)
+    jupyter_port = int(os.getenv("JUPYTER_PORT") or 8888)
+    services = [
+        Service(
+            name="flink",
+            entrypoint=f"{BIN_DIR}/flink_entrypoint.sh",
+            probes=(
+                Probe("Flink REST", url="http://localhost:8081/overview"),
+                Probe("SQL Gateway", url="http://localhost:8083/info"),
+            ),
+            processes=(
+                "org.apache.flink.table.gateway.SqlGateway",
+                "org.apache.flink.runtime.taskexecutor.TaskManagerRunner",
+                "org.apache.flink.runtime.entrypoint.StandaloneSessionClusterEntrypoint",
+            ),
+        ),
+        Service(
+            name="resinkit-api",
+            entrypoint=f"{BIN_DIR}/resinkit-api-entrypoint.sh",
+            probes=(Probe("API health", url=f"http://localhost:{api_port}/health"),),
+            processes=("uvicorn resinkit_api.main:app",),
+            # Jobs submitted through the API go to the SQL Gateway
+            requires=("flink",),
+        ),
+        Service(
+            name="jupyter",
+            entrypoint=f"{BIN_DIR}/jupyter_entrypoint.sh",
+            probes=(Probe("Jupyter", port=jupyter_port),),
+            processes=("jupyter lab",),
+        ),
+        Service(
+            name="kafka",
+            entrypoint=f"{BIN_DIR}/kafka_entrypoint.sh",
+            probes=(Probe("Zookeeper", port=2181), Probe("Kafka broker", port=9092)),
+            processes=(
+                "kafka.Kafka",
+                "org.apache.zookeeper.server.quorum.QuorumPeerMain",
+            ),
+        ),
+        Service(
+            name="metrics",
+            entrypoint=f"{BIN_DIR}/metrics_entrypoint.sh",
+            probes=(Probe("Metrics", url=f"http://localhost:{metrics_port}/metrics"),),
+            processes=("resinkit_byoc.core.metrics serve",),
+        ),
+    ]
+    return {service.name: service for service in services}
+
+
+def _pids(pattern: str) -> List[int]:
+    result = subprocess.run(
+        ["pgrep", "-f", pattern], capture_output=True, text=True, check=False
+    )
+    own = {os.getpid(), os.getppid()}
+    return [int(pid) for pid in result.stdout.split() if int(pid) not in own]
+
+
+class Supervisor:
+    """
+    Run the start, stop and status of a set of services.
+
+    Args:
+        services: Services to control, by name; requirements outside this set are ignored
+        start_timeout: Seconds each service may take to become ready
+        stop_timeout: Seconds each service may take to stop gracefully
+    """
+
+    def __init__(
+        self,
+        services: Dict[str, Service],
+        start_timeout: float = DEFAULT_START_TIMEOUT,
+        stop_timeout: float = DEFAULT_STOP_TIMEOUT,
+    ):
+        self.services = services
+        self.start_timeout = start_timeout
+        self.stop_timeout = stop_timeout
+        self._lock = threading.Lock()
+
+    def _log(self, message: str) -> None:
+        with self._lock:
+            print(f"[RESINKIT] {message}", flush=True)
+
+    def _run_entrypoint(self, service: Service, command: str, timeout: float) -> int:
+        """Run ``<entrypoint> <command>``, prefixing its output with the service name."""
+        env = dict(os.environ, RESINKIT_STOP_TIMEOUT=str(int(self.stop_timeout)))
+        proc = subprocess.Popen(
+            ["bash", service.entrypoint, command],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            env=env,
+        )
+
+        def relay() -> None:
+            for line in proc.stdout:
+                with self._lock:
+                    print(f"[{service.name}] {line.rstrip()}", flush=True)
+
+        # Daemons started by the entrypoint may keep the pipe open, so only the
+        # entrypoint itself is waited for
+        threading.Thread(target=relay, daemon=True).start()
+        try:
+            return proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            return -1
+
+    def _wait_ready(self, service: Service, deadline: float) -> bool:
+        pending = list(service.probes)
+        while pending:
+            pending = [probe for probe in pending if not probe.check()]
+            if not pending:
+                break
+            if time.monotonic() >= deadline:
+                self._log(
+                    f"Error: {service.name} not ready after {self.start_timeout:.0f}s:"
+                    f" {', '.join(probe.name for probe in pending)}"
+                )
+                return False
+            time.sleep(PROBE_INTERVAL)
+        return True
+
+    def start(self) -> bool:
+        """Start every service once its requirements are ready; return whether all became ready."""
+        started = time.monotonic()
+        done = {name: threading.Event() for name in self.services}
+        ready: Dict[str, bool] = {}
+
+        def start_one(service: Service) -> None:
+            try:
+                for name in service.requires:
+                    if name in done:
+                        done[name].wait()
+                        if not ready[name]:
+                            self._log(
+                                f"Not starting {service.name}: {name} is not ready"
+                            )
+                            ready[service.name] = False
+                            return
+                if service.ready():
+                    self._log(f"{service.name} is already running")
+                    ready[service.name] = True
+                    return
+
+                begin = time.monotonic()
+                deadline = begin + self.start_timeout
+                self._log(f"Starting {service.name}...")
+                rc = self._run_entrypoint(service, "start", self.start_timeout)
+                if rc != 0:
+                    self._log(f"Error: {service.name} start failed (exit {rc})")
+                    ready[service.name] = False
+                    return
+                ready[service.name] = self._wait_ready(service, deadline)
+                if ready[service.name]:
+                    self._log(
+                        f"{service.name} ready in {time.monotonic() - begin:.1f}s"
+                    )
+            finally:
+                ready.setdefault(service.name, False)
+                done[service.name].set()
+
+        with ThreadPoolExecutor(max_workers=max(1, len(self.services))) as pool:
+            list(pool.map(start_one, self.services.values()))
+
+        failed = [name for name, ok in ready.items() if not ok]
+        elapsed = time.monotonic() - started
+        if failed:
+            self._log(f"Error: not ready after {elapsed:.1f}s: {', '.join(failed)}")
+            return False
+        self._log(f"All services ready in {elapsed:.1f}s")
+        return True
+
+    def _kill(self, service: Service) -> None:
+        """Terminate processes left after the entrypoint stop, then kill them after the timeout."""
+        pids = [pid for pattern in service.processes for pid in _pids(pattern)]
+        if not pids:
+            return
+        self._log(f"Terminating remaining {service.name} processes: {pids}")
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            for pid in pids:
+                try:
+                    os.kill(pid, sig)
+                except ProcessLookupError:
+                    pass
+            deadline = time.monotonic() + self.stop_timeout
+            while time.monotonic() < deadline:
+                pids = [pid for pid in pids if os.path.exists(f"/proc/{pid}")]
+                if not pids:
+                    return
+                time.sleep(PROBE_INTERVAL)
+
+    def stop(self) -> None:
+        """Stop the services, each one after the services that require it."""
+        started = time.monotonic()
+        done = {name: threading.Event() for name in self.services}
+        dependents = {
+            name: [s.name for s in self.services.values() if name in s.requires]
+            for name in self.services
+        }
+
+        def stop_one(service: Service) -> None:
+            try:
+                for name in dependents[service.name]:
+                    done[name].wait()
+                self._log(f"Stopping {service.name}...")
+                # The entrypoint waits for each of its processes up to the stop timeout
+                timeout = self.stop_timeout * (len(service.processes) + 1)
+                if self._run_entrypoint(service, "stop", timeout) != 0:
+                    self._log(f"Warning: {service.name} stop did not finish cleanly")
+                self._kill(service)
+            finally:
+                done[service.name].set()
+
+        with ThreadPoolExecutor(max_workers=max(1, len(self.services))) as pool:
+            list(pool.map(stop_one, self.services.values()))
+        self._log(f"All services stopped in {time.monotonic() - started:.1f}s")
+
+    def status(self) -> bool:
+        """Print the probes of every service; return whether all pass."""
+        ok = True
+        for service in self.services.values():
+            running = any(_pids(pattern) for pattern in service.processes)
+            for probe in service.probes:
+                passed = probe.check()
+                ok = ok and passed
+                target = probe.url or f"{probe.host}:{probe.port}"
+                mark = "✅" if passed else "❌"
+                self._log(f"{mark} {service.name}: {probe.name} ({target})")
+            if not running:
+                self._log(f"❌ {service.name}: no process running")
+        return ok
+
+
+def select_services(names: Sequence[str]) -> Dict[str, Service]:
+    services = default_services()
+    unknown = [name for name in names if name not in services]
+    if unknown:
+        raise ValueError(
+            f"Unknown services: {', '.join(unknown)} (known: {', '.join(services)})"
+        )
+    return {name: services[name] for name in services if not names or name in names}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python3 -m resinkit_byoc.core.supervisor",
+        description="Start, stop and check the resinkit services with readiness probes.",
+    )
+    parser.add_argument("command", choices=["start", "stop", "status"])
+    parser.add_argument(
+        "--services",
+        default=os.getenv("RESINKIT_SERVICES", ""),
+        help="comma separated services to control (default: all)",
+    )
+    parser.add_argument(
+        "--start-timeout",
+        type=float,
+        default=float(os.getenv("RESINKIT_START_TIMEOUT") or DEFAULT_START_TIMEOUT),
+    )
+    parser.add_argument(
+        "--stop-timeout",
+        type=float,
+        default=float(os.getenv("RESINKIT_STOP_TIMEOUT") or DEFAULT_STOP_TIMEOUT),
+    )
+    parser.add_argument(
+        "--foreground",
+        action="store_true",
+        help="after starting, stay in the foreground and stop the services on SIGTERM",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        names = [name.strip() for name in args.services.split(",") if name.strip()]
+        services = select_services(names)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+
+    supervisor = Supervisor(services, args.start_timeout, args.stop_timeout)
+    if args.command == "stop":
+        supervisor.stop()
+        return 0
+    if args.command == "status":
+        return 0 if supervisor.status() else 1
+
+    if not supervisor.start():
+        return 1
+    if args.foreground:
+        stopping = threading.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: stopping.set())
+        print("[RESINKIT] Running in foreground mode, stopping services on SIGTERM")
+        while not stopping.wait(1):
+            pass
+        supervisor.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,486 @@
+"""
+Per-operation timing for resinkit-byoc deploys.
+
+When ``RESINKIT_TRACE_DIR`` is set, every pyinfra operation is timed per host
+and attributed to the deploy stage that added it. At the end of the run:
+
+- ``<dir>/trace-<timestamp>.json`` is written in Chrome trace format (open it
+  in https://ui.perfetto.dev or chrome://tracing)
+- a summary table of the slowest operations and stages is printed
+- one record per run is appended to ``<dir>/history.jsonl``
+
+Batched deploy steps (see ``resinkit_byoc.core.deploy_utils``) run as one
+pyinfra operation; the timings the batch runner prints for each step are read
+back from the operation output and recorded as spans of their own.
+
+The history can then be checked for regressions between releases:
+
+    python -m resinkit_byoc.core.timing compare --history .deploy-traces/history.jsonl
+"""
+
+import argparse
+import atexit
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from pyinfra import host
+from pyinfra.api.state import BaseStateCallback
+from pyinfra.context import ctx_state
+
+from ..__about__ import __version__
+
+# Stage name used for operations added outside of any stage
+NO_STAGE = "-"
+
+# Line printed by the batch runner after each step, see deploy_utils.render_batch_runner
+STEP_LINE = re.compile(
+    r"^\[RESINKIT\] ===== (?P<name>.*) "
+    r"\(exit (?P<rc>\d+), (?P<seconds>[\d.]+)s, at (?P<offset>[\d.]+)s\) =====$"
+)
+
+
+def parse_step_timings(lines: Iterable[str]) -> List[dict]:
+    """Return the ``name``, ``status``, ``offset`` and ``duration`` of each step a batch ran."""
+    steps = []
+    for line in lines:
+        match = STEP_LINE.match(line.strip())
+        if match:
+            steps.append(
+                {
+                    "name": match["name"],
+                    "status": "ok" if match["rc"] == "0" else "error",
+                    "offset": float(match["offset"]),
+                    "duration": float(match["seconds"]),
+                }
+            )
+    return steps
+
+
+class OperationTimer(BaseStateCallback):
+    """
+    pyinfra state callback recording operation and stage planning spans.
+
+    Spans are dicts with ``host``, ``name``, ``stage``, ``kind`` ("operation",
+    "step" or "planning"), ``start``/``end`` (epoch seconds) and ``status``.
+    Operations that ran batched steps also have ``steps``, the number of step
+    spans recorded for them.
+    """
+
+    def __init__(self):
+        self.spans: List[dict] = []
+        self.op_stages: Dict[str, str] = {}
+        self._running: Dict[tuple, float] = {}
+        self._finished: List[tuple] = []
+        self._lock = threading.Lock()
+
+    # Planning
+
+    @contextmanager
+    def stage_span(self, name: str) -> Iterator[None]:
+        """Time the planning of a stage and attribute the operations it adds to it."""
+        before = len(host.op_hash_order)
+        start = time.time()
+        try:
+            yield
+        finally:
+            for op_hash in host.op_hash_order[before:]:
+                self.op_stages.setdefault(op_hash, name)
+            self._add(host.name, name, name, "planning", start, time.time(), "ok")
+
+    # Execution callbacks
+
+    def operation_host_start(self, state, host, op_hash):
+        with self._lock:
+            self._running[(host.name, op_hash)] = time.time()
+
+    def operation_host_success(self, state, host, op_hash, retry_count=0):
+        self._finish(state, host, op_hash, "ok")
+
+    def operation_host_error(self, state, host, op_hash, retry_count=0, max_retries=0):
+        self._finish(state, host, op_hash, "error")
+
+    def _finish(self, state, host, op_hash, status: str) -> None:
+        with self._lock:
+            start = self._running.pop((host.name, op_hash), None)
+        if start is None:
+            return
+        names = state.get_op_meta(op_hash).names
+        name = ", ".join(sorted(names)) or op_hash
+        stage = self.op_stages.get(op_hash, NO_STAGE)
+        span = self._add(
+            host.name, name, stage, "operation", start, time.time(), status
+        )
+        with self._lock:
+            self._finished.append((span, state, host, op_hash))
+
+    def _add(self, host_name, name, stage, kind, start, end, status) -> dict:
+        span = {
+            "host": host_name,
+            "name": name,
+            "stage": stage,
+            "kind": kind,
+            "start": start,
+            "end": end,
+            "status": status,
+        }
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def add_step_spans(self) -> None:
+        """
+        Add a span for each step of the batched operations that have finished.
+
+        The output of an operation is only kept by pyinfra once it is complete,
+        so this runs when the trace is exported rather than from the callbacks.
+        """
+        with self._lock:
+            finished, self._finished = self._finished, []
+        for span, state, op_host, op_hash in finished:
+            try:
+                output = state.get_op_data_for_host(op_host, op_hash).operation_meta
+                steps = parse_step_timings(output.stdout_lines)
+            except Exception:
+                # Output of operations that did not complete is not available
+                continue
+            for step in steps:
+                start = span["start"] + step["offset"]
+                self._add(
+                    span["host"],
+                    step["name"],
+                    span["stage"],
+                    "step",
+                    start,
+                    start + step["duration"],
+                    step["status"],
+                )
+            if steps:
+                span["steps"] = len(steps)
+
+
+_timer: Optional[OperationTimer] = None
+
+
+def get_trace_dir() -> Optional[Path]:
+    trace_dir = os.getenv("RESINKIT_TRACE_DIR")
+    return Path(trace_dir) if trace_dir else None
+
+
+def enable_timing() -> Optional[OperationTimer]:
+    """
+    Register the operation timer with the current pyinfra state.
+
+    Does nothing unless RESINKIT_TRACE_DIR is set. Safe to call more than once.
+    """
+    global _timer
+
+    if _timer is not None or get_trace_dir() is None or not ctx_state.isset():
+        return _timer
+
+    _timer = OperationTimer()
+    ctx_state.get().add_callback_handler(_timer)
+    atexit.register(export, _timer)
+    return _timer
+
+
+@contextmanager
+def stage_span(name: str) -> Iterator[None]:
+    """Attribute operations added in this block to stage ``name`` when timing is enabled."""
+    enable_timing()
+    if _timer is None:
+        yield
+        return
+    with _timer.stage_span(name):
+        yield
+
+
+# Export
+
+
+# Trace thread of each span kind
+TRACE_THREADS = {1: "operations", 2: "planning", 3: "steps"}
+TRACE_TIDS = {"operation": 1, "planning": 2, "step": 3}
+
+
+def to_chrome_trace(spans: List[dict]) -> dict:
+    """Convert spans to Chrome trace format, one process per host."""
+    hosts = sorted({s["host"] for s in spans})
+    pids = {h: i + 1 for i, h in enumerate(hosts)}
+    origin = min((s["start"] for s in spans), default=0)
+
+    events = []
+    for h, pid in pids.items():
+        events.append(
+            {"ph": "M", "name": "process_name", "pid": pid, "args": {"name": h}}
+        )
+        for tid, label in TRACE_THREADS.items():
+            events.append(
+                {
+                    "ph": "M",
+                    "name": "thread_name",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": label},
+                }
+            )
+
+    for span in spans:
+        events.append(
+            {
+                "ph": "X",
+                "name": span["name"],
+                "cat": span["kind"],
+                "pid": pids[span["host"]],
+                "tid": TRACE_TIDS[span["kind"]],
+                "ts": round((span["start"] - origin) * 1e6),
+                "dur": round((span["end"] - span["start"]) * 1e6),
+                "args": {
+                    "stage": span["stage"],
+                    "status": span["status"],
+                    "steps": span.get("steps", 0),
+                },
+            }
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def aggregate(spans: List[dict]) -> dict:
+    """
+    Reduce operation spans to per-run durations comparable across runs.
+
+    Operations and stages report their slowest host, since that is what
+    holds up the rollout. Batched operations are reported by their steps.
+    """
+    ops = [s for s in spans if s["kind"] == "operation"]
+    per_host_stage: Dict[tuple, float] = {}
+    for span in ops:
+        key = (span["host"], span["stage"])
+        per_host_stage[key] = per_host_stage.get(key, 0) + span["end"] - span["start"]
+
+    operations: Dict[str, float] = {}
+    for span in spans:
+        if span["kind"] == "step" or (
+            span["kind"] == "operation" and not span.get("steps")
+        ):
+            duration = span["end"] - span["start"]
+            operations[span["name"]] = max(operations.get(span["name"], 0), duration)
+
+    stages: Dict[str, float] = {}
+    for (_, stage_name), duration in per_host_stage.items():
+        stages[stage_name] = max(stages.get(stage_name, 0), duration)
+
+    total = max(s["end"] for s in ops) - min(s["start"] for s in ops) if ops else 0
+    return {
+        "hosts": len({s["host"] for s in ops}),
+        "total": round(total, 3),
+        "stages": {k: round(v, 3) for k, v in stages.items()},
+        "operations": {k: round(v, 3) for k, v in operations.items()},
+        "errors": sum(1 for s in ops if s["status"] != "ok"),
+    }
+
+
+def format_summary(result: dict, limit: int = 15) -> str:
+    lines = [f"Deploy time: {result['total']:.1f}s on {result['hosts']} host(s)"]
+    lines.append(f"{'Stage':<50} {'Seconds':>9}")
+    for name, seconds in sorted(result["stages"].items(), key=lambda x: -x[1]):
+        lines.append(f"{name:<50} {seconds:>9.1f}")
+    lines.append(f"{'Slowest operations':<50} {'Seconds':>9}")
+    slowest = sorted(result["operations"].items(), key=lambda x: -x[1])[:limit]
+    for name, seconds in slowest:
+        lines.append(f"{name[:50]:<50} {seconds:>9.1f}")
+    return "\n".join(lines)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except Exception:
+        return None
+
+
+def export(timer: OperationTimer) -> None:
+    """Write the trace, print the summary and append the run to the history file."""
+    trace_dir = get_trace_dir()
+    if trace_dir is None or not timer.spans:
+        return
+
+    timer.add_step_spans()
+    trace_dir.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    trace_path = trace_dir / f"trace-{stamp}.json"
+    trace_path.write_text(json.dumps(to_chrome_trace(timer.spans)))
+
+    result = aggregate(timer.spans)
+    if not result["operations"]:
+        # Dry runs only plan operations, there is nothing to compare
+        print(f"[RESINKIT] Planning trace written to {trace_path}")
+        return
+
+    print(format_summary(result))
+    print(f"[RESINKIT] Trace written to {trace_path}")
+
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "version": __version__,
+        "commit": _git_commit(),
+        "deploy": " ".join(sys.argv[1:]),
+        **result,
+    }
+    with open(trace_dir / "history.jsonl", "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+# Regression check
+
+
+def load_history(path: Path) -> List[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def find_regressions(
+    history: List[dict], threshold: float, min_seconds: float, window: int
+) -> List[str]:
+    """
+    Compare the latest run with earlier runs of the same deploy.
+
+    The baseline is the median of the last ``window`` runs of the most recent
+    other version, or of the previous runs if every run has the same version.
+    Durations that grew by more than ``threshold`` (a fraction) and by at least
+    ``min_seconds`` are reported.
+    """
+    latest = history[-1]
+    previous = [
+        r
+        for r in history[:-1]
+        if r.get("deploy") == latest.get("deploy") and not r["errors"]
+    ]
+    other_versions = [r for r in previous if r.get("version") != latest.get("version")]
+    if other_versions:
+        last_version = other_versions[-1]["version"]
+        previous = [r for r in other_versions if r["version"] == last_version]
+    baseline = previous[-window:]
+    if not baseline:
+        return []
+
+    def check(label: str, current: Optional[float], values: List[float]) -> None:
+        if current is None or not values:
+            return
+        reference = statistics.median(values)
+        if current - reference >= min_seconds and current > reference * (1 + threshold):
+            regressions.append(
+                f"{label}: {current:.1f}s vs {reference:.1f}s baseline "
+                f"(+{(current / reference - 1) * 100 if reference else 100:.0f}%)"
+            )
+
+    regressions: List[str] = []
+    check("total", latest["total"], [r["total"] for r in baseline])
+    for section in ("stages", "operations"):
+        for name, current in latest[section].items():
+            values = [r[section][name] for r in baseline if name in r[section]]
+            check(f"{section[:-1]} {name}", current, values)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m resinkit_byoc.core.timing",
+        description="Inspect deploy timing traces and check them for regressions.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compare = subparsers.add_parser(
+        "compare", help="flag regressions of the latest run against earlier runs"
+    )
+    compare.add_argument(
+        "--history",
+        type=Path,
+        help="history file (default: $RESINKIT_TRACE_DIR/history.jsonl)",
+    )
+    compare.add_argument(
+        "--threshold",
+        type=float,
+        default=20,
+        help="percentage increase reported as a regression (default: 20)",
+    )
+    compare.add_argument(
+        "--min-seconds",
+        type=float,
+        default=2,
+        help="ignore increases smaller than this (default: 2)",
+    )
+    compare.add_argument(
+        "--window", type=int, default=5, help="baseline runs to compare against"
+    )
+
+    summary = subparsers.add_parser("summary", help="print the summary of a trace file")
+    summary.add_argument("trace", type=Path)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "summary":
+        events = json.loads(args.trace.read_text())["traceEvents"]
+        names = {
+            e["pid"]: e["args"]["name"]
+            for e in events
+            if e.get("name") == "process_name"
+        }
+        spans = [
+            {
+                "host": names[e["pid"]],
+                "name": e["name"],
+                "stage": e["args"]["stage"],
+                "kind": e["cat"],
+                "start": e["ts"] / 1e6,
+                "end": (e["ts"] + e["dur"]) / 1e6,
+                "status": e["args"]["status"],
+                "steps": e["args"].get("steps", 0),
+            }
+            for e in events
+            if e["ph"] == "X"
+        ]
+        print(format_summary(aggregate(spans)))
+        return 0
+
+    history_path = args.history
+    if history_path is None:
+        trace_dir = get_trace_dir()
+        if trace_dir is None:
+            parser.error("--history is required when RESINKIT_TRACE_DIR is not set")
+        history_path = trace_dir / "history.jsonl"
+
+    history = load_history(history_path) if history_path.exists() else []
+    if not history:
+        print(f"No runs recorded in {history_path}")
+        return 0
+
+    latest = history[-1]
+    print(
+        f"Latest run: {latest['timestamp']} version {latest['version']} "
+        f"({latest.get('commit') or 'unknown commit'}), {latest['total']:.1f}s"
+    )
+    regressions = find_regressions(
+        history, args.threshold / 100, args.min_seconds, args.window
+    )
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    if not regressions:
+        print("[RESINKIT] No regressions found")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
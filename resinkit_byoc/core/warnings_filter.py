@@ -44,7 +44,3 @@ def suppress_known_warnings():
 
     # Replace stderr with filtered version
     sys.stderr = FilteredStderr(sys.stderr)
-
-
-# Auto-apply when imported
-suppress_known_warnings()
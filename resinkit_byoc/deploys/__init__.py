@@ -3,4 +3,37 @@ PyInfra deployment operations for resinkit-byoc.
 
 This package contains individual deployment modules that can be used
 as packaged deploys with PyInfra.
+
+Deploy modules import pyinfra, so they are only imported once one of their
+deploys is looked up with ``load_deploy``.
 """
+
+import importlib
+from typing import Callable, Dict
+
+# Module defining each packaged deploy
+DEPLOY_MODULES: Dict[str, str] = {
+    "install_00_prep": "resinkit_byoc.deploys.pre_install",
+    "install_bundle": "resinkit_byoc.deploys.bundle",
+    "install_01_core": "resinkit_byoc.deploys.install_core",
+    "install_011_core_jupyter": "resinkit_byoc.deploys.install_core",
+    "install_012_core_resinkit_api": "resinkit_byoc.deploys.install_core",
+    "install_02_core_su": "resinkit_byoc.deploys.install_core",
+    "install_03_flink": "resinkit_byoc.deploys.install_core",
+    "post_install": "resinkit_byoc.deploys.post_install",
+    "install_appcds": "resinkit_byoc.deploys.post_install",
+    "install_mariadb": "resinkit_byoc.deploys.install_extras",
+    "install_admin_tools": "resinkit_byoc.deploys.install_extras",
+    "install_mount_s3": "resinkit_byoc.deploys.install_extras",
+    "start_service": "resinkit_byoc.deploys.start_service",
+    "build_bundle": "resinkit_byoc.deploys.bundle",
+}
+
+
+def load_deploy(name: str) -> Callable:
+    """Import the module of deploy ``name`` and return the deploy function."""
+    try:
+        module = DEPLOY_MODULES[name]
+    except KeyError:
+        raise KeyError(f"Unknown deploy: {name}") from None
+    return getattr(importlib.import_module(module), name)
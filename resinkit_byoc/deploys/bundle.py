@@ -0,0 +1,76 @@
+"""Golden-image bundle deployment for resinkit-byoc."""
+
+import os
+
+from resinkit_byoc.core.config import load_dotenvs
+from resinkit_byoc.core.deploy_utils import run_script
+from resinkit_byoc.core.find_root import find_project_root
+from resinkit_byoc.core.fingerprint import compute_fingerprint
+from resinkit_byoc.core.scheduler import stage
+
+# Files that shape the bundled installs besides the versions in .env.common
+BUNDLE_INPUTS = [
+    "resources/flink",
+    "resources/kafka",
+    "resinkit_byoc/scripts/install_flink.sh",
+    "resinkit_byoc/scripts/install_core.sh",
+]
+
+BUNDLE_VERSION_ENVS = [
+    "FLINK_VER_MINOR",
+    "FLINK_CDC_VER",
+    "HADOOP_VERSION",
+    "KAFKA_VERSION",
+    "KAFKA_SCALA_VERSION",
+    "FLINK_CONNECTOR_PROFILE",
+]
+
+
+def bundle_name() -> str:
+    """
+    Return the bundle name for the configured versions.
+
+    The name spells out the versions from .env.common and ends with a short hash of
+    the versions and the content of the tracked configuration files, so any change
+    selects a new bundle while every checkout of the same commit finds the same one.
+    """
+    load_dotenvs()
+    env = {name: os.getenv(name, "") for name in BUNDLE_VERSION_ENVS}
+    digest = compute_fingerprint(
+        files=BUNDLE_INPUTS, env=env, root=find_project_root(), untracked=False
+    )
+    profile = env["FLINK_CONNECTOR_PROFILE"].replace(",", "+") or "full"
+    return (
+        f"resinkit-bundle-flink-{env['FLINK_VER_MINOR']}-cdc-{env['FLINK_CDC_VER']}"
+        f"-hadoop-{env['HADOOP_VERSION']}-kafka-{env['KAFKA_VERSION']}-{profile}-{digest[:12]}"
+    )
+
+
+def build_bundle():
+    """Build a golden-image bundle on a host provisioned by deploy_all."""
+    os.environ["RESINKIT_BUNDLE_NAME"] = bundle_name()
+    run_script(
+        "resinkit_byoc/scripts/build_bundle.sh",
+        name=f"Build bundle {os.environ['RESINKIT_BUNDLE_NAME']}",
+        envs=["RESINKIT_BUNDLE_NAME", "RESINKIT_BUNDLE_DIR", "RESINKIT_ARTIFACT_CACHE"],
+    )
+
+
+@stage(requires=["install_00_prep"])
+def install_bundle():
+    """Extract the golden-image bundle, if RESINKIT_BUNDLE_URL is set."""
+    load_dotenvs()
+    if not os.getenv("RESINKIT_BUNDLE_URL"):
+        return
+
+    os.environ["RESINKIT_BUNDLE_NAME"] = bundle_name()
+    run_script(
+        "resinkit_byoc/scripts/install_bundle.sh",
+        name=f"Install bundle {os.environ['RESINKIT_BUNDLE_NAME']}",
+        envs=[
+            "RESINKIT_BUNDLE_URL",
+            "RESINKIT_BUNDLE_NAME",
+            "RESINKIT_BUNDLE_FALLBACK",
+            "RESINKIT_ARTIFACT_CACHE",
+        ],
+    )
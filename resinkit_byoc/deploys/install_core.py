@@ -1,22 +1,42 @@
 """Install Java deployment for resinkit-byoc."""
 
 import os
-from pyinfra.operations import files, server
+from pyinfra.operations import files
 
 from resinkit_byoc.core.config import load_dotenvs
-from resinkit_byoc.core.deploy_utils import run_script
-from resinkit_byoc.core.find_root import find_project_root
+from resinkit_byoc.core.deploy_utils import run_script, run_shell
+from resinkit_byoc.core.scheduler import stage
 
 
+@stage(requires=["install_00_prep", "install_bundle"], packages=["nginx"])
 def install_01_core():
     """Install Java JDK 17 and Maven."""
     run_script(
         "resinkit_byoc/scripts/install_core.sh",
         name="Install core components: Java, gosu, nginx, kafka",
-        envs=["ROOT_DIR", "RESINKIT_API_GITHUB_TOKEN"],
+        envs=[
+            "ROOT_DIR",
+            "RESINKIT_API_GITHUB_TOKEN",
+            "KAFKA_VERSION",
+            "KAFKA_SCALA_VERSION",
+            "KAFKA_TUNING_PROFILE",
+            "KAFKA_CONF_OVERRIDES",
+            "RESINKIT_METRICS_PORT",
+        ],
+        inputs=[
+            "resources/nginx",
+            "resources/kafka",
+            "resinkit_byoc/core/hardware.py",
+            "resinkit_byoc/core/kafka_config.py",
+            "resinkit_byoc/core/num_utils.py",
+        ],
     )
 
 
+@stage(
+    requires=["install_00_prep"],
+    packages=["openjdk-17-jdk", "openjdk-17-jre", "maven"],
+)
 def install_02_core_su():
     """Install core components for su user."""
 
@@ -30,9 +50,14 @@ def install_02_core_su():
             "FLINK_CDC_VER",
             "FLINK_VER_MINOR",
         ],
+        inputs=[],
     )
 
 
+@stage(
+    requires=["install_02_core_su", "install_bundle"],
+    packages=["gpg", "libsnappy1v5", "gettext-base", "libjemalloc-dev"],
+)
 def install_03_flink():
     """Install Apache Flink."""
 
@@ -44,25 +69,35 @@ def install_03_flink():
             "HADOOP_VERSION",
             "APACHE_HADOOP_URL",
             "FLINK_CDC_VER",
+            "FLINK_VER_MAJOR",
             "FLINK_VER_MINOR",
+            "FLINK_PAIMON_VER",
+            "FLINK_CONNECTOR_PROFILE",
+            "FLINK_RESERVED_MEMORY",
+            "FLINK_MANAGED_FRACTION",
+            "FLINK_STATE_PROFILE",
+            "FLINK_CONF_OVERRIDES",
+        ],
+        inputs=[
+            "resources/flink",
+            "resinkit_byoc/core/artifacts.py",
+            "resinkit_byoc/core/connectors.py",
+            "resinkit_byoc/core/flink_config.py",
+            "resinkit_byoc/core/hardware.py",
+            "resinkit_byoc/core/num_utils.py",
         ],
     )
 
 
+@stage(requires=["install_00_prep"])
 def install_011_core_jupyter():
     """Install Jupyter components."""
     load_dotenvs()
     ROOT_DIR = os.getenv("ROOT_DIR")
     RESINKIT_ID = os.getenv("RESINKIT_ID")
-    
-    server.shell(
-        name="Copy resinkit_sample_project to /home/resinkit/",
-        commands=[
-            f"cp -r {ROOT_DIR}/resources/jupyter/resinkit_sample_project /home/resinkit/",
-        ],
-    )
-    
-    # Render and install jupyter_entrypoint.sh from template
+
+    # Render and install jupyter_entrypoint.sh from template; pyinfra operations go
+    # before the run_shell steps, which a parallel wave runs after them
     files.template(
         name="Render jupyter_entrypoint.sh from template",
         src="resources/jupyter/jupyter_entrypoint.sh.j2",
@@ -73,14 +108,25 @@ def install_011_core_jupyter():
         create_remote_dir=True,
         RESINKIT_ID=RESINKIT_ID,
     )
-    
+
+    run_shell(
+        name="Copy resinkit_sample_project to /home/resinkit/",
+        commands=[
+            f"cp -r {ROOT_DIR}/resources/jupyter/resinkit_sample_project /home/resinkit/",
+        ],
+    )
+
     # Change ownership of resinkit_sample_project to resinkit:resinkit
-    server.shell(
+    run_shell(
         name="Change ownership of resinkit_sample_project to resinkit:resinkit",
-        commands=["chown -R resinkit:resinkit /home/resinkit/resinkit_sample_project"],
+        commands=[
+            f"PYTHONPATH={ROOT_DIR} python3 -m resinkit_byoc.core.ownership"
+            " --user resinkit --group resinkit /home/resinkit/resinkit_sample_project"
+        ],
     )
 
 
+@stage(requires=["install_00_prep"])
 def install_012_core_resinkit_api():
     """Install resinkit-api."""
     run_script(
@@ -1,10 +1,10 @@
 """Install MariaDB deployment for resinkit-byoc."""
 
-from pyinfra.operations import apt
-
 from resinkit_byoc.core.deploy_utils import run_script
+from resinkit_byoc.core.scheduler import stage
 
 
+@stage(requires=["install_00_prep"], packages=["mariadb-server", "mariadb-client"])
 def install_mariadb():
     """Install MariaDB server."""
 
@@ -12,34 +12,33 @@ def install_mariadb():
         "resinkit_byoc/scripts/install_mariadb.sh",
         name="Install MariaDB",
         envs=["ROOT_DIR", "MYSQL_RESINKIT_PASSWORD"],
+        inputs=["resources/test-mysql"],
     )
 
 
+# Admin tools; not every distribution ships all of them
+ADMIN_PACKAGES = [
+    "htop",
+    "tree",
+    "jq",
+    "unzip",
+    "zip",
+    "rsync",
+    "tcpdump",
+    "netstat-nat",
+    "lsof",
+    "strace",
+]
+
+
+@stage(requires=["install_00_prep"], optional_packages=ADMIN_PACKAGES)
 def install_admin_tools():
     """Install administrative and debugging tools."""
-
-    # Install admin tools
-    admin_packages = [
-        "htop",
-        "tree",
-        "jq",
-        "unzip",
-        "zip",
-        "rsync",
-        "tcpdump",
-        "netstat-nat",
-        "lsof",
-        "strace",
-    ]
-
-    apt.packages(
-        name="Install admin tools",
-        packages=admin_packages,
-        present=True,
-        success_exit_codes=[0, 100],  # Allow some packages to fail
-    )
+    # The tools are installed from the stage's package plan, nothing else to do
 
 
+# mount-s3 is installed from a downloaded .deb inside its script
+@stage(locks=["apt"])
 def install_mount_s3():
     """Install mount-s3."""
 
@@ -2,11 +2,21 @@
 
 import os
 
-from pyinfra.operations import files, server
+from pyinfra.operations import files
 
 from resinkit_byoc.core.config import load_dotenvs
+from resinkit_byoc.core.deploy_utils import run_script, run_shell
+from resinkit_byoc.core.scheduler import stage
 
 
+@stage(
+    requires=[
+        "install_01_core",
+        "install_011_core_jupyter",
+        "install_012_core_resinkit_api",
+        "install_03_flink",
+    ]
+)
 def post_install():
     """Post install tasks."""
     load_dotenvs()
@@ -21,10 +31,29 @@ def post_install():
         "HADOOP_VERSION",
         "MYSQL_RESINKIT_PASSWORD",
         "ENV",
+        "RESINKIT_APPCDS",
+        "RESINKIT_APPCDS_DIR",
+        "RESINKIT_START_TIMEOUT",
+        "RESINKIT_STOP_TIMEOUT",
+        "RESINKIT_METRICS_PORT",
+        "RESINKIT_METRICS_INTERVAL",
+        "RESINKIT_METRICS_KAFKA_INTERVAL",
     ]:
         if k in os.environ:
             exp_vars[k] = os.getenv(k)
 
+    metrics_enabled = os.getenv("RESINKIT_METRICS_ENABLED", "1") == "1"
+    if metrics_enabled:
+        files.template(
+            src="resources/metrics/metrics_entrypoint.sh.j2",
+            dest="/home/resinkit/.local/bin/metrics_entrypoint.sh",
+            user="resinkit",
+            group="resinkit",
+            mode="755",
+            root_dir=os.getenv("ROOT_DIR"),
+            name="Install metrics_entrypoint.sh from template",
+        )
+
     # Render and install entrypoint.sh template
     files.template(
         src="resources/entrypoint.sh.j2",
@@ -34,10 +63,12 @@ def post_install():
         mode="755",
         jupyter_enabled=True,
         kafka_enabled=True,
+        metrics_enabled=metrics_enabled,
         exp_vars=exp_vars,
+        root_dir=os.getenv("ROOT_DIR"),
         name="Install entrypoint.sh from template",
     )
-    
+
     files.template(
         src="resources/env.exports.j2",
         dest="/home/resinkit/env.exports",
@@ -50,6 +81,8 @@ def post_install():
 
     folders_to_chown = [
         "/opt/flink",
+        "/opt/flink-cdc",
+        "/opt/hadoop",
         "/opt/kafka",
         "/opt/resinkit",
         "/opt/resinkit/api",
@@ -57,16 +90,29 @@ def post_install():
         "/var/log/resinkit",
     ]
 
-    for folder in folders_to_chown:
-        files.directory(
-            path=folder,
-            user="resinkit",
-            group="resinkit",
-            recursive=True,
-            present=True,
-            name=f"Create directory {folder}",
-        )
-        server.shell(
-            commands=[f"chown -R resinkit:resinkit {folder}"],
-            name=f"Change ownership of {folder} to resinkit:resinkit",
-        )
+    # Walk every tree once and only touch inodes whose owner or mode differs
+    run_shell(
+        commands=[
+            f"PYTHONPATH={os.getenv('ROOT_DIR')} python3 -m resinkit_byoc.core.ownership"
+            f" --user resinkit --group resinkit --dir-mode 700 --file-mode 600"
+            f" --create {' '.join(folders_to_chown)}"
+        ],
+        name="Reconcile ownership of resinkit directories",
+    )
+
+
+@stage(requires=["post_install"])
+def install_appcds():
+    """Record AppCDS class-data archives for the Flink and Kafka JVMs."""
+    # Not fingerprinted: the script compares the archives with the installed classpath
+    # itself, which changes with stages this one does not see
+    run_script(
+        "resinkit_byoc/scripts/install_appcds.sh",
+        name="Record AppCDS archives for Flink and Kafka",
+        envs=[
+            "ROOT_DIR",
+            "RESINKIT_APPCDS",
+            "RESINKIT_APPCDS_DIR",
+            "RESINKIT_APPCDS_MEASURE",
+        ],
+    )
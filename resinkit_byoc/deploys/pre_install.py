@@ -2,64 +2,53 @@
 
 import os
 
-from pyinfra.operations import apt, files, server
+from pyinfra.operations import files, server
 from resinkit_byoc.core.deploy_utils import run_script
+from resinkit_byoc.core.scheduler import stage
 
+# Basic packages
+BASIC_PACKAGES = [
+    "vim",
+    "wget",
+    "gnupg",
+    "nginx",
+    "iputils-ping",
+    "mariadb-client",
+    "telnet",
+    "ca-certificates",
+    "git",
+    "git-lfs",
+    "make",
+    "curl",
+    "zsh",
+    "zip",
+    # zstd compresses and stream-extracts golden-image bundles
+    "zstd",
+    # python3 runs resinkit_byoc.core.artifacts/connectors on the node
+    "python3",
+    "python3-yaml",
+]
 
-def install_00_prep():
-    """Install common packages and prepare for installation."""
-
-    # Check if already installed
-    # Update package list
-    apt.update(name="Update package list")
-
-    # Install basic packages
-    basic_packages = [
-        "vim",
-        "wget",
-        "gnupg",
-        "nginx",
-        "iputils-ping",
-        "mariadb-client",
-        "telnet",
-        "ca-certificates",
-        "git",
-        "git-lfs",
-        "make",
-        "curl",
-        "zsh",
-        "zip",
-    ]
-
-    apt.packages(
-        name="Install basic packages",
-        packages=basic_packages,
-        present=True,
-        extra_install_args="--no-install-recommends",
-    )
+# Development packages
+DEV_PACKAGES = [
+    "build-essential",
+    "zlib1g-dev",
+    "libncurses5-dev",
+    "libgdbm-dev",
+    "libnss3-dev",
+    "libssl-dev",
+    "libreadline-dev",
+    "libffi-dev",
+    "libsqlite3-dev",
+    "libbz2-dev",
+    "pkg-config",
+    "liblzma-dev",
+]
 
-    # Install development packages
-    dev_packages = [
-        "build-essential",
-        "zlib1g-dev",
-        "libncurses5-dev",
-        "libgdbm-dev",
-        "libnss3-dev",
-        "libssl-dev",
-        "libreadline-dev",
-        "libffi-dev",
-        "libsqlite3-dev",
-        "libbz2-dev",
-        "pkg-config",
-        "liblzma-dev",
-    ]
 
-    apt.packages(
-        name="Install development packages",
-        packages=dev_packages,
-        present=True,
-        extra_install_args="--no-install-recommends",
-    )
+@stage(packages=BASIC_PACKAGES + DEV_PACKAGES)
+def install_00_prep():
+    """Install common packages and prepare for installation."""
 
     # add resinkit user
     resinkit_role = os.getenv("RESINKIT_ROLE", "resinkit")
@@ -69,7 +58,7 @@ def install_00_prep():
         home=f"/home/{resinkit_role}",
         create_home=True,
     )
-    
+
     # create /var/log/resinkit directory
     files.directory(
         name="Create /var/log/resinkit directory",
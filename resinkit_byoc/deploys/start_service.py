@@ -2,10 +2,14 @@
 
 from pyinfra.operations import server
 
+from resinkit_byoc.core.scheduler import stage
+
+
+@stage(requires=["post_install", "install_appcds"])
 def start_service():
-    """Start service."""
+    """Start the services and wait until their readiness probes pass."""
     server.shell(
-        name="Start service",
+        name="Start services and wait until they are ready",
         commands=[
             "bash /home/resinkit/.local/bin/entrypoint.sh start",
             "bash /home/resinkit/.local/bin/entrypoint.sh status",
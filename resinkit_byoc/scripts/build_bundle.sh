@@ -0,0 +1,60 @@
+#!/bin/bash
+# shellcheck disable=SC1091,SC2086,SC2046
+# Build a golden-image bundle from a node provisioned by deploy.deploy_all.
+#
+# The bundle is a single zstd-compressed tar of the installed distributions with
+# ownership and configuration already applied, plus the artifact cache objects the
+# connector jars are hardlinked to and the install state of each distribution, so
+# install scripts on the target node find everything in place.
+
+: "${RESINKIT_BUNDLE_NAME:?}"
+
+set -eo pipefail
+
+RESINKIT_BUNDLE_DIR="${RESINKIT_BUNDLE_DIR:-/opt/resinkit/bundles}"
+RESINKIT_ARTIFACT_CACHE="${RESINKIT_ARTIFACT_CACHE:-/opt/resinkit/artifact-cache}"
+
+function build_bundle() {
+    local bundle="$RESINKIT_BUNDLE_DIR/$RESINKIT_BUNDLE_NAME.tar.zst"
+    local paths=(opt/flink opt/flink-cdc opt/hadoop opt/kafka)
+    local path
+
+    for path in "${paths[@]}"; do
+        if [ ! -d "/$path" ]; then
+            echo "[RESINKIT] Error: /$path not found, run deploy.deploy_all on this host first"
+            return 1
+        fi
+    done
+
+    # Connector jars are hardlinks into the artifact cache; archiving both keeps them
+    # linked on the target, where the artifact installer then sees them as present
+    for path in objects index; do
+        if [ -d "$RESINKIT_ARTIFACT_CACHE/$path" ]; then
+            paths+=("${RESINKIT_ARTIFACT_CACHE#/}/$path")
+        fi
+    done
+    for path in flink_dist flink_cdc_dist hadoop kafka_dist; do
+        if [ -f "$RESINKIT_STATE_DIR/$path" ]; then
+            paths+=("${RESINKIT_STATE_DIR#/}/$path")
+        fi
+    done
+
+    mkdir -p "$RESINKIT_BUNDLE_DIR/.tmp"
+    printf '{"name": "%s", "built": "%s", "host": "%s"}\n' \
+        "$RESINKIT_BUNDLE_NAME" "$(date -u +%Y-%m-%dT%H:%M:%SZ)" "$(hostname)" \
+        >"$RESINKIT_BUNDLE_DIR/.tmp/.resinkit-bundle.json"
+
+    echo "[RESINKIT] Building $bundle from: ${paths[*]}"
+    local started=$SECONDS
+    tar -C / --numeric-owner -cf - "${paths[@]}" \
+        -C "$RESINKIT_BUNDLE_DIR/.tmp" .resinkit-bundle.json |
+        zstd -q -T0 -10 -o "$bundle.part" -f
+    mv "$bundle.part" "$bundle"
+    rm -rf "$RESINKIT_BUNDLE_DIR/.tmp"
+
+    (cd "$RESINKIT_BUNDLE_DIR" && sha256sum "$RESINKIT_BUNDLE_NAME.tar.zst" >"$RESINKIT_BUNDLE_NAME.tar.zst.sha256")
+    echo "[RESINKIT] Built $bundle ($(du -h "$bundle" | cut -f1)) in $((SECONDS - started))s"
+    echo "[RESINKIT] Publish it under RESINKIT_BUNDLE_URL to provision nodes from it"
+}
+
+build_bundle
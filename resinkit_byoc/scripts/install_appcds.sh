@@ -0,0 +1,147 @@
+#!/bin/bash
+# shellcheck disable=SC1091
+set -eo pipefail
+: "${ROOT_DIR:?}"
+
+# Record AppCDS class-data archives for Flink (JobManager, TaskManager, SQL Gateway) and
+# Kafka (Zookeeper, broker) with one training start of each service, so the first start
+# after the deploy already maps them. The entrypoints record new archives by themselves
+# when the classpath changes later (see resources/jvm/appcds.sh).
+
+ARCH=$(dpkg --print-architecture)
+export JAVA_HOME=/usr/lib/jvm/java-17-openjdk-${ARCH}
+export KAFKA_HOME=/opt/kafka
+export RESINKIT_APPCDS="${RESINKIT_APPCDS:-1}"
+export RESINKIT_APPCDS_DIR="${RESINKIT_APPCDS_DIR:-/opt/resinkit/cds}"
+BIN_DIR=/home/resinkit/.local/bin
+# Seconds a training start may take to become ready
+TRAIN_TIMEOUT="${RESINKIT_APPCDS_TRAIN_TIMEOUT:-120}"
+
+mkdir -p "$BIN_DIR"
+cp -v "$ROOT_DIR/resources/jvm/appcds.sh" "$BIN_DIR/appcds.sh"
+source "$BIN_DIR/appcds.sh"
+
+if ! appcds_enabled; then
+    echo "[RESINKIT] AppCDS disabled (RESINKIT_APPCDS=$RESINKIT_APPCDS), removing archives"
+    rm -f "$RESINKIT_APPCDS_DIR"/*.jsa
+    exit 0
+fi
+
+# Dynamic archives are layered on the JDK's default archive, which some packages leave out
+if ! "$JAVA_HOME/bin/java" -Xshare:on -version >/dev/null 2>&1; then
+    echo "[RESINKIT] Generating the default CDS archive of the JDK"
+    "$JAVA_HOME/bin/java" -Xshare:dump >/dev/null
+fi
+
+mkdir -p "$RESINKIT_APPCDS_DIR"
+PYTHONPATH="$ROOT_DIR" python3 -m resinkit_byoc.core.ownership --user resinkit --group resinkit "$RESINKIT_APPCDS_DIR" "$BIN_DIR/appcds.sh"
+
+as_resinkit() {
+    if [ "$(id -u)" = 0 ]; then
+        gosu resinkit "$@"
+    else
+        "$@"
+    fi
+}
+
+# Seconds, to 0.01, since process $1 started
+process_age() {
+    awk -v tck="$(getconf CLK_TCK)" -v start="$(awk '{print $22}' "/proc/$1/stat")" \
+        '{ printf "%.2f", $1 - start / tck }' /proc/uptime
+}
+
+# Wait until command $2 succeeds, then print the age of the process matching pattern $1,
+# i.e. how long that JVM took to become ready
+wait_ready() {
+    local pattern=$1 check=$2 deadline=$((SECONDS + TRAIN_TIMEOUT)) pid
+    until eval "$check" >/dev/null 2>&1; do
+        if [ "$SECONDS" -ge "$deadline" ]; then
+            echo "timeout"
+            return 1
+        fi
+        sleep 0.2
+    done
+    pid=$(pgrep -f "$pattern" | head -1)
+    if [ -n "$pid" ]; then process_age "$pid"; else echo "?"; fi
+}
+
+# Missing archives among service names $2... for the inputs in array $1
+missing_archives() {
+    local -n inputs=$1
+    shift
+    local name
+    for name in "$@"; do
+        [ -s "$(appcds_archive "$name" "${inputs[@]}")" ] || echo "$name"
+    done
+}
+
+JM_READY='curl -sf http://localhost:8081/taskmanagers | grep -q "\"id\""'
+GATEWAY_READY='curl -sf http://localhost:8083/info'
+KAFKA_READY='(exec 3<>/dev/tcp/localhost/9092)'
+
+# Start Flink, exercise the SQL Gateway and stop it again; prints the readiness times
+run_flink() {
+    local jm gateway handle
+    as_resinkit "$BIN_DIR/flink_entrypoint.sh" start >/dev/null &
+    jm=$(wait_ready "StandaloneSessionClusterEntrypoint" "$JM_READY") || true
+    gateway=$(wait_ready "org.apache.flink.table.gateway.SqlGateway" "$GATEWAY_READY") || true
+    wait || true
+    # Load the planner classes a session needs
+    handle=$(curl -sf -X POST http://localhost:8083/v1/sessions -H 'Content-Type: application/json' -d '{}' |
+        sed -n 's/.*"sessionHandle":"\([^"]*\)".*/\1/p') || true
+    if [ -n "$handle" ]; then
+        curl -sf -X POST "http://localhost:8083/v1/sessions/$handle/statements" \
+            -H 'Content-Type: application/json' -d '{"statement": "SHOW CATALOGS"}' >/dev/null || true
+        sleep 2
+    fi
+    as_resinkit "$BIN_DIR/flink_entrypoint.sh" stop >/dev/null
+    echo "JobManager ready in ${jm}s, SQL Gateway ready in ${gateway}s"
+}
+
+# Start Zookeeper and Kafka and stop them again; prints the readiness time
+run_kafka() {
+    local kafka
+    as_resinkit "$BIN_DIR/kafka_entrypoint.sh" start >/dev/null &
+    kafka=$(wait_ready "kafka.Kafka" "$KAFKA_READY") || true
+    wait || true
+    as_resinkit "$BIN_DIR/kafka_entrypoint.sh" stop >/dev/null
+    echo "Kafka ready in ${kafka}s"
+}
+
+# Train the archives of group $1 (flink or kafka) if any is missing
+train() {
+    local group=$1 is_running=$2 inputs_var=$3
+    shift 3
+    local missing
+    missing=$(missing_archives "$inputs_var" "$@")
+    if [ -z "$missing" ]; then
+        echo "[RESINKIT] AppCDS archives of $group are up to date"
+        return 0
+    fi
+    if [ ! -x "$BIN_DIR/${group}_entrypoint.sh" ]; then
+        echo "[RESINKIT] $group is not installed, skipping its AppCDS archives"
+        return 0
+    fi
+    if as_resinkit "$BIN_DIR/${group}_entrypoint.sh" status 2>/dev/null | grep -q "$is_running"; then
+        echo "[RESINKIT] $group is running, its AppCDS archives are recorded at its next restart"
+        return 0
+    fi
+
+    if [ "${RESINKIT_APPCDS_MEASURE:-0}" = "1" ]; then
+        echo "[RESINKIT] $group without AppCDS: $(RESINKIT_APPCDS=0 "run_$group")"
+    fi
+    echo "[RESINKIT] Recording AppCDS archives of $group: $(echo $missing)"
+    echo "[RESINKIT] $group recording run: $("run_$group")"
+    missing=$(missing_archives "$inputs_var" "$@")
+    if [ -n "$missing" ]; then
+        echo "[RESINKIT] Warning: no AppCDS archive recorded for: $(echo $missing)"
+    fi
+    if [ "${RESINKIT_APPCDS_MEASURE:-0}" = "1" ]; then
+        echo "[RESINKIT] $group with AppCDS: $("run_$group")"
+    fi
+}
+
+train flink "Flink cluster is running" APPCDS_FLINK_INPUTS jobmanager taskmanager sql-gateway
+train kafka "Kafka is running" APPCDS_KAFKA_INPUTS zookeeper kafka
+
+ls -l "$RESINKIT_APPCDS_DIR"
@@ -0,0 +1,81 @@
+#!/bin/bash
+# shellcheck disable=SC1091,SC2086,SC2046
+# Provision Flink, Flink CDC, Hadoop and Kafka from a golden-image bundle built by
+# build_bundle.sh. The bundle is streamed straight into tar (no temporary archive);
+# zstd verifies its content checksum while decompressing.
+
+: "${RESINKIT_BUNDLE_URL:?}" "${RESINKIT_BUNDLE_NAME:?}"
+
+set -eo pipefail
+
+RESINKIT_ARTIFACT_CACHE="${RESINKIT_ARTIFACT_CACHE:-/opt/resinkit/artifact-cache}"
+BUNDLE_PATHS=(opt/flink opt/flink-cdc opt/hadoop opt/kafka)
+
+function _bundle_exists() {
+    case "$1" in
+    http://* | https://*) curl -fsSI "$1" >/dev/null ;;
+    *) [ -f "${1#file://}" ] ;;
+    esac
+}
+
+function _open_bundle() {
+    case "$1" in
+    http://* | https://*) curl -fsSL ${RESINKIT_DOWNLOAD_RATE_LIMIT:+--limit-rate "$RESINKIT_DOWNLOAD_RATE_LIMIT"} "$1" ;;
+    *) cat "${1#file://}" ;;
+    esac
+}
+
+function install_bundle() {
+    local src="${RESINKIT_BUNDLE_URL%/}/$RESINKIT_BUNDLE_NAME.tar.zst"
+    local staging=/opt/.resinkit-bundle-staging
+    local path
+
+    if [ -d "/opt/flink" ] && state_matches bundle "$RESINKIT_BUNDLE_NAME"; then
+        echo "[RESINKIT] Bundle $RESINKIT_BUNDLE_NAME already installed, skipping"
+        return 0
+    fi
+
+    if ! _bundle_exists "$src"; then
+        echo "[RESINKIT] Error: bundle $RESINKIT_BUNDLE_NAME not found at $src" >&2
+        if [ "${RESINKIT_BUNDLE_FALLBACK:-0}" = "1" ]; then
+            echo "[RESINKIT] Error: RESINKIT_BUNDLE_FALLBACK=1, installing from upstream downloads instead" >&2
+            return 0
+        fi
+        return 1
+    fi
+
+    echo "[RESINKIT] Extracting bundle $src"
+    local started=$SECONDS
+    # Extract next to the install directories so moving them into place is a rename
+    rm -rf "$staging"
+    mkdir -p "$staging"
+    _open_bundle "$src" | zstd -dcq | tar -x -C "$staging" --numeric-owner -p
+
+    if ! grep -q "\"$RESINKIT_BUNDLE_NAME\"" "$staging/.resinkit-bundle.json" 2>/dev/null; then
+        echo "[RESINKIT] Error: $src is not bundle $RESINKIT_BUNDLE_NAME"
+        rm -rf "$staging"
+        return 1
+    fi
+
+    for path in "${BUNDLE_PATHS[@]}"; do
+        rm -rf "/${path:?}"
+        mv "$staging/$path" "/$path"
+    done
+
+    # Hardlink the cached connector jars into this node's artifact cache, keeping them
+    # linked with the jars in /opt/flink/lib and /opt/flink-cdc/lib
+    if [ -d "$staging/${RESINKIT_ARTIFACT_CACHE#/}" ]; then
+        mkdir -p "$RESINKIT_ARTIFACT_CACHE"
+        cp -alf "$staging/${RESINKIT_ARTIFACT_CACHE#/}/." "$RESINKIT_ARTIFACT_CACHE/"
+    fi
+    if [ -d "$staging/${RESINKIT_STATE_DIR#/}" ]; then
+        mkdir -p "$RESINKIT_STATE_DIR"
+        cp -af "$staging/${RESINKIT_STATE_DIR#/}/." "$RESINKIT_STATE_DIR/"
+    fi
+    rm -rf "$staging"
+
+    state_save bundle "$RESINKIT_BUNDLE_NAME"
+    echo "[RESINKIT] Installed bundle $RESINKIT_BUNDLE_NAME in $((SECONDS - started))s"
+}
+
+install_bundle
@@ -93,7 +93,6 @@ function install_gosu() {
 
     # Grab gosu for easy step-down from root
     export GOSU_VERSION=1.17
-    rm -rf /var/lib/apt/lists/*
     dpkgArch="$(dpkg --print-architecture | awk -F- '{ print $NF }')"
     wget --retry-connrefused --waitretry=1 --tries=3 -O /usr/local/bin/gosu "https://github.com/tianon/gosu/releases/download/$GOSU_VERSION/gosu-$dpkgArch"
     wget --retry-connrefused --waitretry=1 --tries=3 -O /usr/local/bin/gosu.asc "https://github.com/tianon/gosu/releases/download/$GOSU_VERSION/gosu-$dpkgArch.asc"
@@ -108,20 +107,22 @@ function install_gosu() {
 
 
 function install_nginx() {
-    # Check if nginx is already setup
-    if [ -f "/opt/setup/.nginx_installed" ]; then
+    local conf_hash metrics_port="${RESINKIT_METRICS_PORT:-9108}"
+    conf_hash="$(state_hash_files "$ROOT_DIR/resources/nginx/default" "$ROOT_DIR/resources/nginx/resinkit_locations.conf")"
+
+    # Check if nginx is already setup with the current configuration
+    if command -v nginx >/dev/null 2>&1 && state_matches nginx "$conf_hash" "$metrics_port"; then
         echo "[RESINKIT] Nginx already setup, skipping"
         return 0
     fi
 
-    apt-get update && apt-get install --no-install-recommends -y nginx
-
     # Copy the Nginx configuration files
     # Install the main default site configuration
     cp -v "$ROOT_DIR/resources/nginx/default" /etc/nginx/sites-available/default
 
-    # Install the reusable locations configuration
-    cp -v "$ROOT_DIR/resources/nginx/resinkit_locations.conf" /etc/nginx/sites-available/resinkit_locations.conf
+    # Install the reusable locations configuration, proxying /metrics to the exporter's port
+    sed "s/127\.0\.0\.1:9108/127.0.0.1:$metrics_port/" "$ROOT_DIR/resources/nginx/resinkit_locations.conf" \
+        >/etc/nginx/sites-available/resinkit_locations.conf
 
     # Enable the default site (create symlink if it doesn't exist)
     ln -sf /etc/nginx/sites-available/default /etc/nginx/sites-enabled/default
@@ -141,39 +142,41 @@ function install_nginx() {
     service nginx reload || true
     service nginx status || true
 
-    # Create marker file
-    mkdir -p /opt/setup
-    touch /opt/setup/.nginx_installed
+    state_save nginx "$conf_hash" "$metrics_port"
 }
 
 function install_kafka() {
-    # Check if Kafka is already installed by checking if /opt/kafka exists and /opt/kafka/config/server.properties exists
-    if [ -d "/opt/kafka" ] && [ -f "/opt/kafka/config/server.properties" ]; then
-        echo "[RESINKIT] Kafka already installed (1/2)"
-        # check if kafka_entrypoint.sh is installed
-        if [ -f "/home/resinkit/.local/bin/kafka_entrypoint.sh" ]; then
-            echo "[RESINKIT] Kafka entrypoint already installed (2/2)"
-            return 0
-        fi
-    fi
+    local kafka_dist="kafka_${KAFKA_SCALA_VERSION:-2.12}-${KAFKA_VERSION:-3.4.0}"
+    local kafka_url="https://archive.apache.org/dist/kafka/${KAFKA_VERSION:-3.4.0}/${kafka_dist}.tgz"
 
-    wget https://archive.apache.org/dist/kafka/3.4.0/kafka_2.12-3.4.0.tgz -O /tmp/kafka.tgz &&
-        tar -xzf /tmp/kafka.tgz -C /opt &&
-        mv /opt/kafka_2.12-3.4.0 /opt/kafka &&
-        rm /tmp/kafka.tgz
+    # Download Kafka only if this distribution is not installed yet; the configuration
+    # below is copied on every run so config changes are picked up
+    if [ -d "/opt/kafka/bin" ] && state_matches kafka_dist "$kafka_url"; then
+        echo "[RESINKIT] Kafka already installed, skipping download"
+    else
+        rm -rf /opt/kafka/bin /opt/kafka/libs
+        wget ${RESINKIT_DOWNLOAD_RATE_LIMIT:+--limit-rate=$RESINKIT_DOWNLOAD_RATE_LIMIT} "$kafka_url" -O /tmp/kafka.tgz &&
+            tar -xzf /tmp/kafka.tgz -C /opt &&
+            mkdir -p /opt/kafka &&
+            cp -a "/opt/${kafka_dist}/." /opt/kafka/ &&
+            rm -rf "/opt/${kafka_dist}" /tmp/kafka.tgz &&
+            state_save kafka_dist "$kafka_url"
+    fi
 
     # tar -xzf "$ROOT_DIR/resources/kafka/kafka.tgz" -C /opt
     # mv /opt/kafka_2.12-3.4.0 /opt/kafka
 
-    # copy properties and entrypoint
-    cp -v "$ROOT_DIR/resources/kafka/server.properties" "/opt/kafka/config/server.properties"
+    # render broker properties sized for this host, then copy the entrypoint
+    PYTHONPATH="$ROOT_DIR" python3 -m resinkit_byoc.core.kafka_config \
+        --base "$ROOT_DIR/resources/kafka/server.properties" \
+        --output "/opt/kafka/config/server.properties" --explain
     mkdir -p /home/resinkit/.local/bin
     cp -v "$ROOT_DIR/resources/kafka/kafka_entrypoint.sh" "/home/resinkit/.local/bin/kafka_entrypoint.sh"
     chmod +x /home/resinkit/.local/bin/kafka_entrypoint.sh
+    cp -v "$ROOT_DIR/resources/jvm/lifecycle.sh" "/home/resinkit/.local/bin/lifecycle.sh"
 
     mkdir -p /opt/kafka/logs
-    chown -R resinkit:resinkit /opt/kafka
-    chmod -R 755 /opt/kafka/logs
+    PYTHONPATH="$ROOT_DIR" python3 -m resinkit_byoc.core.ownership --user resinkit --group resinkit --dir-mode 755 /opt/kafka
 }
 
 install_gosu
@@ -25,22 +25,15 @@ function install_java() {
     ARCH=$(dpkg --print-architecture)
     export ARCH
 
-    # Check if Java is already installed by checking /usr/lib/jvm/java-17-openjdk-amd64/bin/java
-    if [ -f "/usr/lib/jvm/java-17-openjdk-${ARCH}/bin/java" ]; then
-        echo "[RESINKIT] Java already installed, skipping"
-        return 0
+    # openjdk-17 and maven come from the package plan of the install_02_core_su stage
+    if [ ! -f "/usr/lib/jvm/java-17-openjdk-${ARCH}/bin/java" ]; then
+        echo "[RESINKIT] Error: Java 17 is not installed, expected package openjdk-17-jdk"
+        return 1
     fi
-    apt-get update
-    apt-get install -y openjdk-17-jdk openjdk-17-jre
     update-alternatives --set java "/usr/lib/jvm/java-17-openjdk-${ARCH}/bin/java"
     update-alternatives --set javac "/usr/lib/jvm/java-17-openjdk-${ARCH}/bin/javac"
     export JAVA_HOME=/usr/lib/jvm/java-17-openjdk-${ARCH}
-    apt-get install -y --no-install-recommends maven
     mvn --version
-
-    # Create marker file
-    mkdir -p /opt/setup
-    touch /opt/setup/.java_installed
 }
 
 
@@ -4,22 +4,21 @@
 : "${ROOT_DIR:?}" "${HADOOP_VERSION:?}" "${APACHE_HADOOP_URL:?}" "${FLINK_CDC_VER:?}" "${FLINK_VER_MINOR:?}" 
 
 function _install_hadoop() {
-    # Check if Hadoop is already installed
-    if [ -d "/opt/hadoop" ] && [ -f "/opt/setup/.hadoop_installed" ]; then
-        echo "[RESINKIT] Hadoop already installed, skipping"
+    # Check if this Hadoop version is already installed
+    if [ -d "/opt/hadoop" ] && state_matches hadoop "$HADOOP_VERSION" "$APACHE_HADOOP_URL"; then
+        echo "[RESINKIT] Hadoop $HADOOP_VERSION already installed, skipping"
         return 0
     fi
 
     echo "[RESINKIT] Installing Hadoop $HADOOP_VERSION for Iceberg integration (following official guide)"
 
     # Download and extract Hadoop as per Iceberg guide
-    wget ${APACHE_HADOOP_URL}/common/hadoop-${HADOOP_VERSION}/hadoop-${HADOOP_VERSION}.tar.gz -O /tmp/hadoop-${HADOOP_VERSION}.tar.gz
+    wget ${RESINKIT_DOWNLOAD_RATE_LIMIT:+--limit-rate=$RESINKIT_DOWNLOAD_RATE_LIMIT} ${APACHE_HADOOP_URL}/common/hadoop-${HADOOP_VERSION}/hadoop-${HADOOP_VERSION}.tar.gz -O /tmp/hadoop-${HADOOP_VERSION}.tar.gz
     tar xzvf /tmp/hadoop-${HADOOP_VERSION}.tar.gz -C /opt/
+    rm -rf /opt/hadoop
     mv /opt/hadoop-${HADOOP_VERSION} /opt/hadoop
     rm /tmp/hadoop-${HADOOP_VERSION}.tar.gz
 
-    # Ensure proper permissions and ownership
-    chown -R resinkit:resinkit /opt/hadoop 2>/dev/null || true
     chmod +x /opt/hadoop/bin/hadoop
 
     # Verify installation
@@ -31,51 +30,39 @@ function _install_hadoop() {
         return 1
     fi
 
-    # Create marker file
-    mkdir -p /opt/setup
-    touch /opt/setup/.hadoop_installed
+    state_save hadoop "$HADOOP_VERSION" "$APACHE_HADOOP_URL"
 }
 
 
 function _install_flink_jars() {
-    # Check if Flink jars are already installed
-    if [ -d "/opt/flink-cdc" ] && [ -f "/opt/setup/.flink_jars_installed" ]; then
-        echo "[RESINKIT] Flink jars already installed, skipping"
-        return 0
-    fi
-
     FLINK_CDC_VER=${FLINK_CDC_VER:-3.4.0}
-    # Download and extract Flink CDC if not already done
-    if [ ! -d "/opt/flink-cdc" ]; then
-        wget https://dlcdn.apache.org/flink/flink-cdc-${FLINK_CDC_VER}/flink-cdc-${FLINK_CDC_VER}-bin.tar.gz -O /tmp/flink-cdc-${FLINK_CDC_VER}-bin.tar.gz &&
-            tar -xzf /tmp/flink-cdc-${FLINK_CDC_VER}-bin.tar.gz -C /opt/ &&
-            mv /opt/flink-cdc-${FLINK_CDC_VER} /opt/flink-cdc &&
-            rm /tmp/flink-cdc-${FLINK_CDC_VER}-bin.tar.gz
+    # Download and extract Flink CDC unless this version is already in place
+    if [ -d "/opt/flink-cdc" ] && state_matches flink_cdc_dist "$FLINK_CDC_VER"; then
+        echo "[RESINKIT] Flink CDC $FLINK_CDC_VER already extracted, skipping"
     else
-        echo "[RESINKIT] Flink CDC directory already exists, skipping extraction"
-    fi
-
-    # Download required JAR files if needed
-    if [ $(find "/opt/flink/lib/" -name "*.jar" | wc -l) -lt 15 ]; then
-        echo "[RESINKIT] 15 or fewer jars in /opt/flink/lib/, downloading"
-        (
-            cd "$ROOT_DIR/resources/flink/lib" || exit 1
-            bash download.sh
-            cp -v $ROOT_DIR/resources/flink/lib/flink/*.jar "/opt/flink/lib/"
-        )
-    else
-        echo "[RESINKIT] 15 or more jars found in /opt/flink/lib/, skipping download"
+        # Keep connector jars so the artifact cache only has to relink changed ones
+        rm -rf /opt/flink-cdc/bin /opt/flink-cdc/conf
+        wget ${RESINKIT_DOWNLOAD_RATE_LIMIT:+--limit-rate=$RESINKIT_DOWNLOAD_RATE_LIMIT} https://dlcdn.apache.org/flink/flink-cdc-${FLINK_CDC_VER}/flink-cdc-${FLINK_CDC_VER}-bin.tar.gz -O /tmp/flink-cdc-${FLINK_CDC_VER}-bin.tar.gz &&
+            tar -xzf /tmp/flink-cdc-${FLINK_CDC_VER}-bin.tar.gz -C /opt/ &&
+            mkdir -p /opt/flink-cdc &&
+            cp -a /opt/flink-cdc-${FLINK_CDC_VER}/. /opt/flink-cdc/ &&
+            rm -rf /opt/flink-cdc-${FLINK_CDC_VER} /tmp/flink-cdc-${FLINK_CDC_VER}-bin.tar.gz &&
+            state_save flink_cdc_dist "$FLINK_CDC_VER"
     fi
 
-    if [ $(find "/opt/flink-cdc/lib/" -name "*.jar" | wc -l) -lt 15 ]; then
-        echo "[RESINKIT] 15 or fewer jars in /opt/flink-cdc/lib/, downloading"
-        (
-            cd "$ROOT_DIR/resources/flink/lib" || exit 1
-            bash download.sh
-            cp -v $ROOT_DIR/resources/flink/lib/cdc/*.jar "/opt/flink-cdc/lib/"
-        )
-    else
-        echo "[RESINKIT] 15 or more jars found in /opt/flink-cdc/lib/, skipping download"
+    # Download the connector jars of the node's profile through the shared artifact cache
+    # and link them into place, removing manifest jars the profile no longer needs
+    FLINK_CONNECTOR_PROFILE=${FLINK_CONNECTOR_PROFILE:-full}
+    echo "[RESINKIT] Installing Flink connectors for profile: $FLINK_CONNECTOR_PROFILE"
+    mkdir -p "/opt/flink/lib/" "/opt/flink-cdc/lib/"
+    PYTHONPATH="$ROOT_DIR" python3 -m resinkit_byoc.core.connectors prune --profile "$FLINK_CONNECTOR_PROFILE"
+    if ! PYTHONPATH="$ROOT_DIR" python3 -m resinkit_byoc.core.connectors list --profile "$FLINK_CONNECTOR_PROFILE" |
+        PYTHONPATH="$ROOT_DIR" python3 -m resinkit_byoc.core.artifacts install \
+            --dest flink=/opt/flink/lib \
+            --dest cdc=/opt/flink-cdc/lib \
+            --allow-missing; then
+        echo "[RESINKIT] Error: Failed to install Flink connector jars"
+        return 1
     fi
 
     # Copy plugins jars
@@ -89,38 +76,25 @@ function _install_flink_jars() {
 
     # Copy configuration files
     mkdir -p "/opt/flink/conf/" "/opt/flink-cdc/conf/"
-    cp -v "$ROOT_DIR/resources/flink/conf/conf.yaml" "/opt/flink/conf/config.yaml"
+    # Size memory, slots and parallelism for this host's cores, memory and cgroup limits
+    PYTHONPATH="$ROOT_DIR" python3 -m resinkit_byoc.core.flink_config \
+        --base "$ROOT_DIR/resources/flink/conf/conf.yaml" \
+        --output "/opt/flink/conf/config.yaml" --explain
     cp -v "$ROOT_DIR/resources/flink/conf/log4j.properties" "/opt/flink/conf/log4j.properties"
     cp -rv "$ROOT_DIR/resources/flink/cdc/" "/opt/flink-cdc/conf/"
-    chown -R resinkit:resinkit /opt/flink-cdc
 
     # Set up /opt/flink/data/catalog-store
     mkdir -p "/opt/flink/data/catalog-store"
     cp -v "$ROOT_DIR/resources/flink/data/catalog-store/paimon_example.yaml" "/opt/flink/data/catalog-store/paimon_example.yaml"
-
-    # Create marker file
-    mkdir -p /opt/setup
-    touch /opt/setup/.flink_jars_installed
 }
 
 function _install_flink_entrypoint() {
     cp -v "$ROOT_DIR/resources/flink/flink_entrypoint.sh" "/home/resinkit/.local/bin/"
     chmod +x "/home/resinkit/.local/bin/flink_entrypoint.sh"
+    cp -v "$ROOT_DIR/resources/jvm/lifecycle.sh" "/home/resinkit/.local/bin/lifecycle.sh"
 }
 
 function install_flink() {
-    # Check if Flink is already installed
-    if [ -d "/opt/flink" ] && [ $(find "/opt/flink/lib/" -name "*.jar" | wc -l) -gt 5 ]; then
-        echo "[RESINKIT] Flink folder installed and jars are not empty"
-        if  [ -d "/opt/flink-cdc/conf/" ]; then
-            echo "[RESINKIT] Flink CDC folder installed"
-            if [ -f "/home/resinkit/.local/bin/flink_entrypoint.sh" ]; then
-                echo "[RESINKIT] Flink entrypoint already installed"
-                return 0
-            fi
-        fi
-    fi
-
     ARCH=$(dpkg --print-architecture)
     export ARCH
 
@@ -132,8 +106,6 @@ function install_flink() {
 
     export JAVA_HOME=/usr/lib/jvm/java-17-openjdk-${ARCH}
 
-    apt-get -y install gpg libsnappy1v5 gettext-base libjemalloc-dev
-    rm -rf /var/lib/apt/lists/*
     FLINK_VER_MINOR=${FLINK_VER_MINOR:-1.20.1}
     echo "[RESINKIT] FLINK_VER_MINOR: $FLINK_VER_MINOR"
     # https://dlcdn.apache.org/flink/flink-1.20.1/flink-1.20.1-bin-scala_2.12.tgz
@@ -146,12 +118,18 @@ function install_flink() {
 
     cd "$FLINK_HOME" || exit 1
 
-    wget -nv -O flink.tgz "$FLINK_TGZ_URL"
-
-    tar -xf flink.tgz --strip-components=1
-    rm flink.tgz
-
-    
+    # Download the Flink distribution only when the version changed; config and jars below
+    # are refreshed on every run
+    if [ -x "$FLINK_HOME/bin/flink" ] && state_matches flink_dist "$FLINK_TGZ_URL"; then
+        echo "[RESINKIT] Flink $FLINK_VER_MINOR distribution already installed, skipping download"
+    else
+        # Drop the previous distribution's jars and scripts before extracting a new one
+        rm -rf "$FLINK_HOME/bin" "$FLINK_HOME/opt" "$FLINK_HOME/lib"
+        wget ${RESINKIT_DOWNLOAD_RATE_LIMIT:+--limit-rate=$RESINKIT_DOWNLOAD_RATE_LIMIT} -nv -O flink.tgz "$FLINK_TGZ_URL"
+        tar -xf flink.tgz --strip-components=1
+        rm flink.tgz
+        state_save flink_dist "$FLINK_TGZ_URL"
+    fi
 
     # Copy rs_flink.sh to FLINK_HOME/bin/rs_flink.sh
     cp -v "$ROOT_DIR/resources/flink/bin/rs_flink.sh" "/opt/flink/bin/rs_flink.sh"
@@ -197,7 +175,8 @@ function install_flink() {
     _install_flink_jars
     _install_flink_entrypoint
 
-    chown -R resinkit:resinkit /opt/flink
+    # One pass over all Flink trees, only changing files whose owner differs
+    PYTHONPATH="$ROOT_DIR" python3 -m resinkit_byoc.core.ownership --user resinkit --group resinkit /opt/flink /opt/flink-cdc /opt/hadoop
 }
 
 install_flink
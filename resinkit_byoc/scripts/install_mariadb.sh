@@ -4,20 +4,25 @@
 : "${ROOT_DIR:?}"
 
 function install_mariadb() {
-    # Check if MariaDB is already installed
-    if [ -d "/var/lib/mysql" ] && [ -f "/opt/setup/.mariadb_installed" ]; then
+    # Inputs: this script's configuration, the table setup SQL and the resinkit password
+    local sql_file="$ROOT_DIR/resources/test-mysql/create_tables.sql"
+    local inputs=("$(declare -f install_mariadb | sha256sum)" "${MYSQL_RESINKIT_PASSWORD:-}")
+    if [ -f "$sql_file" ]; then
+        inputs+=("$(state_hash_files "$sql_file")")
+    fi
+
+    # Check if MariaDB is already installed with the same inputs
+    if [ -d "/var/lib/mysql" ] && state_matches mariadb "${inputs[@]}"; then
         echo "[RESINKIT] MariaDB already installed, skipping"
         return 0
     fi
 
-    echo "[RESINKIT] Installing MariaDB server..."
+    echo "[RESINKIT] Setting up MariaDB server..."
 
     # Set debconf selections to avoid interactive prompts
     export DEBIAN_FRONTEND=noninteractive
 
-    # Install MariaDB server and client
-    apt-get update
-    apt-get install -y mariadb-server mariadb-client
+    # mariadb-server and mariadb-client come from the package plan of the install_mariadb stage
 
     # Start MariaDB service - check for available service management tools
     if ls -la /run/systemd/system/ >/dev/null 2>&1; then
@@ -62,6 +67,8 @@ default-time-zone = '+00:00'
 bind-address=0.0.0.0
 character-set-server=utf8mb4
 collation-server=utf8mb4_unicode_ci
+# generate_data.py --method load-data sends rows with LOAD DATA LOCAL INFILE
+local-infile=1
 
 # Performance settings
 innodb_buffer_pool_size=256M
@@ -117,9 +124,7 @@ EOF
         echo "[RESINKIT] Warning: Cannot check MariaDB status - neither systemctl nor service command available"
     fi
 
-    # Create marker file
-    mkdir -p /opt/setup
-    touch /opt/setup/.mariadb_installed
+    state_save mariadb "${inputs[@]}"
 
     echo "[RESINKIT] ✅ MariaDB installation completed successfully"
 }
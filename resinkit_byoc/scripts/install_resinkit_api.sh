@@ -36,8 +36,7 @@ function install_resinkit_api() {
     cp -v "$ROOT_DIR/resources/resinkit-api/resinkit-api-entrypoint.sh" "/home/resinkit/.local/bin/resinkit-api-entrypoint.sh"
     echo "[RESINKIT] Entrypoint script copied to /home/resinkit/.local/bin/resinkit-api-entrypoint.sh"
     chmod +x /home/resinkit/.local/bin/resinkit-api-entrypoint.sh
-    chown -R resinkit:resinkit /opt/resinkit/api
-    chown -R resinkit:resinkit /home/resinkit/.local/bin/resinkit-api-entrypoint.sh
+    PYTHONPATH="$ROOT_DIR" python3 -m resinkit_byoc.core.ownership --user resinkit --group resinkit /opt/resinkit/api /home/resinkit/.local/bin/resinkit-api-entrypoint.sh
 }
 
 install_resinkit_api
@@ -0,0 +1,44 @@
+#!/bin/bash
+# Fingerprint-based install state for resinkit-byoc scripts.
+#
+# run_script prepends this file to every script it uploads, so install steps can
+# skip work only while their inputs are unchanged:
+#
+#     if state_matches hadoop "$HADOOP_VERSION" "$APACHE_HADOOP_URL"; then
+#         echo "[RESINKIT] Hadoop $HADOOP_VERSION already installed, skipping"
+#     else
+#         ... install ...
+#         state_save hadoop "$HADOOP_VERSION" "$APACHE_HADOOP_URL"
+#     fi
+#
+# Set RESINKIT_FORCE=1 to make state_matches always fail.
+
+RESINKIT_STATE_DIR="${RESINKIT_STATE_DIR:-/opt/setup/state}"
+
+# Print the sha256 fingerprint of the given input values
+state_fingerprint() {
+    printf '%s\0' "$@" | sha256sum | cut -d' ' -f1
+}
+
+# Print a single sha256 over the content of the given files
+state_hash_files() {
+    cat "$@" | sha256sum | cut -d' ' -f1
+}
+
+# Succeed if step $1 was last completed with the same input values
+state_matches() {
+    local name="$1"
+    shift
+    if [[ "${RESINKIT_FORCE:-}" == "1" ]]; then
+        return 1
+    fi
+    [[ "$(cat "$RESINKIT_STATE_DIR/$name" 2>/dev/null)" == "$(state_fingerprint "$@")" ]]
+}
+
+# Record that step $1 completed with the given input values
+state_save() {
+    local name="$1"
+    shift
+    mkdir -p "$RESINKIT_STATE_DIR"
+    state_fingerprint "$@" >"$RESINKIT_STATE_DIR/$name"
+}
@@ -4,6 +4,14 @@
 # Exit on any error
 set -e
 
+# wait_for_exit and wait_until_ready, see lifecycle.sh
+source "$(dirname "$0")/lifecycle.sh"
+
+# AppCDS class-data archives, see appcds.sh
+if [[ -f "$(dirname "$0")/appcds.sh" ]]; then
+    source "$(dirname "$0")/appcds.sh"
+fi
+
 # Function to display usage
 usage() {
     echo "Usage: $0 {start|stop|status}"
@@ -35,6 +43,23 @@ is_flink_sql_gateway_running() {
     fi
 }
 
+# Export the AppCDS options of the JobManager and TaskManager and set GATEWAY_JVM_ARGS
+set_appcds_opts() {
+    GATEWAY_JVM_ARGS="${JVM_ARGS:-}"
+    if ! declare -F appcds_opts >/dev/null; then
+        return 0
+    fi
+    # Options already set in the environment take precedence over env.java.opts.* in
+    # config.yaml, so only set them when the caller has not
+    if [[ -z "${FLINK_ENV_JAVA_OPTS_JM:-}" ]]; then
+        export FLINK_ENV_JAVA_OPTS_JM="$(appcds_opts jobmanager "${APPCDS_FLINK_INPUTS[@]}")"
+    fi
+    if [[ -z "${FLINK_ENV_JAVA_OPTS_TM:-}" ]]; then
+        export FLINK_ENV_JAVA_OPTS_TM="$(appcds_opts taskmanager "${APPCDS_FLINK_INPUTS[@]}")"
+    fi
+    GATEWAY_JVM_ARGS="$GATEWAY_JVM_ARGS $(appcds_opts sql-gateway "${APPCDS_FLINK_INPUTS[@]}")"
+}
+
 # Function to stop Flink cluster and SQL gateway
 stop_flink() {
     echo "[RESINKIT] Stopping Flink cluster and SQL gateway..."
@@ -43,7 +68,7 @@ stop_flink() {
     if is_flink_sql_gateway_running; then
         echo "[RESINKIT] Stopping Flink SQL Gateway..."
         "/opt/flink/bin/sql-gateway.sh" stop
-        sleep 3
+        wait_for_exit "org.apache.flink.table.gateway.SqlGateway"
         
         # Force kill if still running
         local remaining_gateway_pids
@@ -62,7 +87,8 @@ stop_flink() {
     if is_flink_running; then
         echo "[RESINKIT] Stopping Flink cluster..."
         "/opt/flink/bin/stop-cluster.sh"
-        sleep 5
+        wait_for_exit "org.apache.flink.runtime.taskexecutor.TaskManagerRunner"
+        wait_for_exit "org.apache.flink.runtime.entrypoint.StandaloneSessionClusterEntrypoint"
         
         # Force kill remaining processes if any
         local remaining_tm_pids
@@ -107,17 +133,17 @@ start_flink() {
         echo "[RESINKIT] Warning: Hadoop not found or HADOOP_HOME not set, Iceberg integration may not work properly"
     fi
 
+    set_appcds_opts
+
     # Start Flink cluster
     if ! is_flink_running; then
         echo "[RESINKIT] Starting Flink cluster..."
         "/opt/flink/bin/start-cluster.sh"
         
-        # Wait for cluster to start
+        # Wait for the REST endpoint of the cluster
         echo "[RESINKIT] Waiting for Flink cluster to start..."
-        sleep 5
-        
-        # Verify Flink cluster started
-        if ! is_flink_running; then
+        if ! wait_until_ready "org.apache.flink.runtime.entrypoint.StandaloneSessionClusterEntrypoint" \
+            "curl -sf http://localhost:8081/overview" || ! is_flink_running; then
             echo "[RESINKIT] Error: Failed to start Flink cluster"
             exit 1
         fi
@@ -129,14 +155,12 @@ start_flink() {
     # Start SQL Gateway
     if ! is_flink_sql_gateway_running; then
         echo "[RESINKIT] Starting Flink SQL Gateway..."
-        "/opt/flink/bin/sql-gateway.sh" start -Dsql-gateway.endpoint.rest.address=localhost
+        JVM_ARGS="$GATEWAY_JVM_ARGS" "/opt/flink/bin/sql-gateway.sh" start -Dsql-gateway.endpoint.rest.address=localhost
         
-        # Wait for SQL Gateway to start
+        # Wait for the REST endpoint of the SQL Gateway
         echo "[RESINKIT] Waiting for Flink SQL Gateway to start..."
-        sleep 5
-        
-        # Verify SQL Gateway started
-        if ! is_flink_sql_gateway_running; then
+        if ! wait_until_ready "org.apache.flink.table.gateway.SqlGateway" \
+            "curl -sf http://localhost:8083/info"; then
             echo "[RESINKIT] Error: Failed to start Flink SQL Gateway"
             exit 1
         fi
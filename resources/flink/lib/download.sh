@@ -61,162 +61,35 @@ download_and_extract() {
 }
 
 ########################################################
-FLINK_CDC_VER=${FLINK_CDC_VER:-3.4.0}
-FLINK_PAIMON_VER=${FLINK_PAIMON_VER:-1.0.1}
-FLINK_VER_MAJOR=${FLINK_VER_MAJOR:-1.20}
-FLINK_VER_MINOR=${FLINK_VER_MINOR:-1.20.1}
-FLINK_ICEBERG_VER=${FLINK_ICEBERG_VER:-1.9.1}
+# Connector jars are declared in connectors.yaml next to this script, grouped
+# into profiles (FLINK_CONNECTOR_PROFILE, default: full). Jars of the "flink"
+# group are downloaded into ./flink, jars of the "cdc" group into ./cdc.
 ########################################################
-
-# See: https://flink.apache.org/downloads/
-# Regular Connector JARs (flink-connector-*):
-# - Primarily used as dependencies in Flink **applications**
-# - For standalone applications, include them in your application's JAR dependencies
-FLINK_CONNECTOR_URLS=(
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-aws-kinesis-firehose/5.0.0-$FLINK_VER_MAJOR/flink-connector-aws-kinesis-firehose-5.0.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-aws-kinesis-streams/5.0.0-$FLINK_VER_MAJOR/flink-connector-aws-kinesis-streams-5.0.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-kinesis/5.0.0-$FLINK_VER_MAJOR/flink-connector-kinesis-5.0.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-dynamodb/5.0.0-$FLINK_VER_MAJOR/flink-connector-dynamodb-5.0.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-sqs/5.0.0-$FLINK_VER_MAJOR/flink-connector-sqs-5.0.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-cassandra_2.12/3.2.0-$FLINK_VER_MAJOR/flink-connector-cassandra_2.12-3.2.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-gcp-pubsub/3.1.0-$FLINK_VER_MAJOR/flink-connector-gcp-pubsub-3.1.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-hbase-base/4.0.0-$FLINK_VER_MAJOR/flink-connector-hbase-base-4.0.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-jdbc/3.3.0-$FLINK_VER_MAJOR/flink-connector-jdbc-3.3.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-kafka/3.3.0-$FLINK_VER_MAJOR/flink-connector-kafka-3.3.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-mongodb/2.0.0-$FLINK_VER_MAJOR/flink-connector-mongodb-2.0.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-opensearch2/2.0.0-$FLINK_VER_MAJOR/flink-connector-opensearch2-2.0.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-prometheus/1.0.0-$FLINK_VER_MAJOR/flink-connector-prometheus-1.0.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-pulsar/4.1.0-1.18/flink-connector-pulsar-4.1.0-1.18.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-files/$FLINK_VER_MINOR/flink-connector-files-$FLINK_VER_MINOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-datagen/$FLINK_VER_MINOR/flink-connector-datagen-$FLINK_VER_MINOR.jar
-)
-
-# SQL Connector JARs (flink-sql-connector-*):
-# - Should be placed in /opt/flink/lib directory
-# - Enable SQL statements to interact with external systems
-# - Needed for Flink SQL Client, SQL Gateway, and SQL API usage
-FLINK_SQL_CONNECTOR_URLS=(
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-dynamodb/5.0.0-$FLINK_VER_MAJOR/flink-sql-connector-dynamodb-5.0.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-aws-kinesis-firehose/5.0.0-$FLINK_VER_MAJOR/flink-sql-connector-aws-kinesis-firehose-5.0.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-aws-kinesis-streams/5.0.0-$FLINK_VER_MAJOR/flink-sql-connector-aws-kinesis-streams-5.0.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-kinesis/5.0.0-$FLINK_VER_MAJOR/flink-sql-connector-kinesis-5.0.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-elasticsearch6_2.12/1.9.1/flink-sql-connector-elasticsearch6_2.12-1.9.1.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-hbase-2.2/4.0.0-1.19/flink-sql-connector-hbase-2.2-4.0.0-1.19.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-hive-3.1.3_2.12/$FLINK_VER_MINOR/flink-sql-connector-hive-3.1.3_2.12-$FLINK_VER_MINOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-kafka/3.3.0-$FLINK_VER_MAJOR/flink-sql-connector-kafka-3.3.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-mongodb/2.0.0-$FLINK_VER_MAJOR/flink-sql-connector-mongodb-2.0.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-opensearch/1.2.0-1.19/flink-sql-connector-opensearch-1.2.0-1.19.jar
-)
-
-# https://github.com/apache/flink-cdc/releases/tag/release-$FLINK_CDC_VER
-FLINK_CDC_PIPELINE_CONNECTOR_3_2_1=(
-    https://repo1.maven.org/maven2/org/apache/flink/flink-cdc-pipeline-connector-mysql/$FLINK_CDC_VER/flink-cdc-pipeline-connector-mysql-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-cdc-pipeline-connector-doris/$FLINK_CDC_VER/flink-cdc-pipeline-connector-doris-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-cdc-pipeline-connector-starrocks/$FLINK_CDC_VER/flink-cdc-pipeline-connector-starrocks-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-cdc-pipeline-connector-kafka/$FLINK_CDC_VER/flink-cdc-pipeline-connector-kafka-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-cdc-pipeline-connector-paimon/$FLINK_CDC_VER/flink-cdc-pipeline-connector-paimon-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-cdc-pipeline-connector-elasticsearch/$FLINK_CDC_VER/flink-cdc-pipeline-connector-elasticsearch-$FLINK_CDC_VER.jar
-)
-
-FLINK_CONNECTOR_CDC_3_2_1=(
-    # https://repo1.maven.org/maven2/org/apache/flink/flink-connector-debezium/$FLINK_CDC_VER/flink-connector-debezium-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-db2-cdc/$FLINK_CDC_VER/flink-connector-db2-cdc-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-mongodb-cdc/$FLINK_CDC_VER/flink-connector-mongodb-cdc-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-mysql-cdc/$FLINK_CDC_VER/flink-connector-mysql-cdc-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-oracle-cdc/$FLINK_CDC_VER/flink-connector-oracle-cdc-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-postgres-cdc/$FLINK_CDC_VER/flink-connector-postgres-cdc-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-sqlserver-cdc/$FLINK_CDC_VER/flink-connector-sqlserver-cdc-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-tidb-cdc/$FLINK_CDC_VER/flink-connector-tidb-cdc-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-connector-oceanbase-cdc/$FLINK_CDC_VER/flink-connector-oceanbase-cdc-$FLINK_CDC_VER.jar
-)
-
-FLINK_SQL_CONNECTOR_CDC_3_2_1=(
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-db2-cdc/$FLINK_CDC_VER/flink-sql-connector-db2-cdc-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-mongodb-cdc/$FLINK_CDC_VER/flink-sql-connector-mongodb-cdc-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-mysql-cdc/$FLINK_CDC_VER/flink-sql-connector-mysql-cdc-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-oceanbase-cdc/$FLINK_CDC_VER/flink-sql-connector-oceanbase-cdc-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-oracle-cdc/$FLINK_CDC_VER/flink-sql-connector-oracle-cdc-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-postgres-cdc/$FLINK_CDC_VER/flink-sql-connector-postgres-cdc-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-sqlserver-cdc/$FLINK_CDC_VER/flink-sql-connector-sqlserver-cdc-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-tidb-cdc/$FLINK_CDC_VER/flink-sql-connector-tidb-cdc-$FLINK_CDC_VER.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-sql-connector-vitess-cdc/$FLINK_CDC_VER/flink-sql-connector-vitess-cdc-$FLINK_CDC_VER.jar
-)
-
-# PAIMON $PAIMON_VER
-PAIMON_JARS=(
-    https://repo.maven.apache.org/maven2/org/apache/paimon/paimon-flink-$FLINK_VER_MAJOR/$FLINK_PAIMON_VER/paimon-flink-$FLINK_VER_MAJOR-$FLINK_PAIMON_VER.jar
-    https://repo.maven.apache.org/maven2/org/apache/paimon/paimon-flink-action/$FLINK_PAIMON_VER/paimon-flink-action-$FLINK_PAIMON_VER.jar
-    https://repo.maven.apache.org/maven2/org/apache/paimon/paimon-bundle/$FLINK_PAIMON_VER/paimon-bundle-$FLINK_PAIMON_VER.jar
-    https://repo.maven.apache.org/maven2/org/apache/paimon/paimon-s3/$FLINK_PAIMON_VER/paimon-s3-$FLINK_PAIMON_VER.jar
-    https://repo.maven.apache.org/maven2/org/apache/paimon/paimon-oss/$FLINK_PAIMON_VER/paimon-oss-$FLINK_PAIMON_VER.jar
-    https://repo.maven.apache.org/maven2/org/apache/paimon/paimon-azure/1.1.1/paimon-azure-1.1.1.jar
-    https://repo.maven.apache.org/maven2/org/apache/paimon/paimon-gs/1.1.1/paimon-gs-1.1.1.jar
-)
-
-# https://nightlies.apache.org/flink/flink-docs-release-$FLINK_VER_MAJOR/docs/connectors/table/jdbc/#dependencies
-FLINK_MISC_JARS=(
-    https://jdbc.postgresql.org/download/postgresql-42.7.5.jar
-    https://repo.maven.apache.org/maven2/org/apache/flink/flink-connector-jdbc/3.3.0-$FLINK_VER_MAJOR/flink-connector-jdbc-3.3.0-$FLINK_VER_MAJOR.jar
-    https://repo1.maven.org/maven2/mysql/mysql-connector-java/8.0.27/mysql-connector-java-8.0.27.jar
-    https://repo1.maven.org/maven2/org/apache/kafka/kafka-clients/3.4.1/kafka-clients-3.4.1.jar
-)
-
-# Needed for access object storage
-# iceberg: https://iceberg.apache.org/docs/nightly/flink/#preparation-when-using-flink-sql-client
-FLINK_FILES_JARS=(
-    https://repo.maven.apache.org/maven2/org/apache/flink/flink-shaded-hadoop-2-uber/2.8.3-10.0/flink-shaded-hadoop-2-uber-2.8.3-10.0.jar
-    https://repo1.maven.org/maven2/org/apache/iceberg/iceberg-flink-runtime-$FLINK_VER_MAJOR/$FLINK_ICEBERG_VER/iceberg-flink-runtime-$FLINK_VER_MAJOR-$FLINK_ICEBERG_VER.jar
-    https://repo1.maven.org/maven2/org/apache/hadoop/hadoop-aws/3.3.6/hadoop-aws-3.3.6.jar
-    https://repo1.maven.org/maven2/com/amazonaws/aws-java-sdk-bundle/1.12.787/aws-java-sdk-bundle-1.12.787.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-s3-fs-hadoop/$FLINK_VER_MINOR/flink-s3-fs-hadoop-$FLINK_VER_MINOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-s3-fs-presto/$FLINK_VER_MINOR/flink-s3-fs-presto-$FLINK_VER_MINOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-azure-fs-hadoop/$FLINK_VER_MINOR/flink-azure-fs-hadoop-$FLINK_VER_MINOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-gs-fs-hadoop/$FLINK_VER_MINOR/flink-gs-fs-hadoop-$FLINK_VER_MINOR.jar
-    https://repo1.maven.org/maven2/org/apache/flink/flink-oss-fs-hadoop/$FLINK_VER_MINOR/flink-oss-fs-hadoop-$FLINK_VER_MINOR.jar
-)
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+ROOT_DIR="${ROOT_DIR:-$(cd "$SCRIPT_DIR/../../.." && pwd)}"
+FLINK_CONNECTOR_PROFILE=${FLINK_CONNECTOR_PROFILE:-full}
+
+# Print "<group> <url>" for every artifact of the profile, the input format of
+# python3 -m resinkit_byoc.core.artifacts
+function list_all {
+    PYTHONPATH="$ROOT_DIR" python3 -m resinkit_byoc.core.connectors list --profile "$FLINK_CONNECTOR_PROFILE"
+}
 
 # Note:
 #   - sql connectors are needed for SQL Gateway which is started as flink sql gateway service
 #   - jar connectors can be added when running flink standalone application (aka we can download then on the fly)
 function download_all {
-
-    mkdir -p flink
-    (
-        cd flink
-        echo "Downloading flink and flink connectors"
-        for url in "${FLINK_SQL_CONNECTOR_URLS[@]}"; do
-            download_and_extract "$url"
-        done
-
-        echo "Downloading misc drivers"
-        for url in "${FLINK_MISC_JARS[@]}"; do
-            download_and_extract "$url"
-        done
-
-        echo "Downloading paimon jars"
-        for url in "${PAIMON_JARS[@]}"; do
+    local artifacts group url
+    artifacts="$(list_all)"
+
+    echo "Downloading connectors for profile $FLINK_CONNECTOR_PROFILE"
+    while read -r group url; do
+        mkdir -p "$group"
+        (
+            cd "$group"
             download_and_extract "$url"
-        done
-
-        echo "Downloading flink files jars"
-        for url in "${FLINK_FILES_JARS[@]}"; do
-            download_and_extract "$url"
-        done
-    )
-
-    mkdir -p cdc
-    (
-        cd cdc
-        echo "Downloading flink pipeline connectors"
-        for url in "${FLINK_CDC_PIPELINE_CONNECTOR_3_2_1[@]}"; do
-            download_and_extract "$url"
-        done
-
-        echo "Downloading flink-cdc connectors"
-        for url in "${FLINK_SQL_CONNECTOR_CDC_3_2_1[@]}"; do
-            download_and_extract "$url"
-        done
-    )
+        )
+    done <<<"$artifacts"
 
     echo "All downloads and extractions completed"
 }
@@ -229,6 +102,10 @@ Downloads and extracts Flink connectors and related dependencies.
 
 Options:
     -h, --help      Show this help message and exit
+    -l, --list      Print "<group> <url>" for every artifact instead of downloading
+
+Environment:
+    FLINK_CONNECTOR_PROFILE   Comma separated connector profiles from connectors.yaml (default: full)
 
 If no options are provided, the script will download and extract all files.
 EOF
@@ -240,6 +117,9 @@ case "$1" in
     show_help
     exit 0
     ;;
+-l | --list)
+    list_all
+    ;;
 "")
     # No arguments provided, run download_all
     download_all
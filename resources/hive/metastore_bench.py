@@ -0,0 +1,697 @@
+#!/usr/bin/env python3
+"""
+Concurrent latency benchmark for the Hive Metastore and HiveServer2.
+
+> pip install hive-metastore-client pyhive thrift-sasl
+> python3 metastore_bench.py --host hive-metastore --clients 8 --rate 200 --duration 60
+> python3 metastore_bench.py --target hiveserver2 --host hiveserver2 --clients 4
+> python3 metastore_bench.py --standin --clients 16 --duration 30
+
+``--clients`` threads each keep one connection open for the whole run (and
+reopen it after a transport error) and issue a weighted mix of metadata calls,
+``--rate`` calls per second in total (0: as fast as they can). Against the
+Metastore (port 9083) the calls are ``get_all_databases``, ``get_all_tables``,
+``get_table``, ``get_partitions`` and ``get_partition_names`` on the tables found
+at startup; against HiveServer2 (port 10000) they are the equivalent ``SHOW`` and
+``DESCRIBE`` statements. Latency percentiles and throughput per call are printed
+every ``--report-interval`` seconds and for the whole run, excluding ``--warmup``.
+
+``--serve`` runs a stand-in Metastore: a Thrift server answering the calls above
+from a synthetic catalog, with ``--standin-latency`` added to each call to stand
+in for the backing database. ``--standin`` starts one in a subprocess and
+benchmarks it, to check the harness or compare client settings without Hive.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Shared with the other load scripts; resources/ sits next to resinkit_byoc/
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from resinkit_byoc.core.num_utils import RateLimiter, percentile  # noqa: E402
+
+HOST_METASTORE = os.getenv("HOST_METASTORE") or "localhost"
+HOST_HIVE_SERVER2 = os.getenv("HOST_HIVE_SERVER2") or "localhost"
+
+METASTORE_OPS = {
+    "get_all_databases": 1,
+    "get_all_tables": 2,
+    "get_table": 5,
+    "get_partitions": 2,
+    "get_partition_names": 2,
+}
+HIVESERVER2_OPS = {
+    "show_databases": 1,
+    "show_tables": 2,
+    "describe_table": 5,
+    "show_partitions": 2,
+}
+# Calls that need a partitioned table
+PARTITION_OPS = {"get_partitions", "get_partition_names", "show_partitions"}
+
+
+class Stats:
+    """Latencies (ms) and errors per call, for the window and the whole run."""
+
+    def __init__(self, ops):
+        self.lock = threading.Lock()
+        self.window = {op: [] for op in ops}
+        self.total = {op: [] for op in ops}
+        self.errors = {op: 0 for op in ops}
+        self.window_errors = {op: 0 for op in ops}
+        self.recording = True
+
+    def record(self, op, latency_ms, error):
+        with self.lock:
+            if error:
+                self.window_errors[op] += 1
+                if self.recording:
+                    self.errors[op] += 1
+                return
+            self.window[op].append(latency_ms)
+            if self.recording:
+                self.total[op].append(latency_ms)
+
+    def reset(self):
+        """Drop what was recorded so far, e.g. at the end of the warmup."""
+        with self.lock:
+            self.total = {op: [] for op in self.total}
+            self.errors = {op: 0 for op in self.errors}
+
+    def snapshot(self):
+        with self.lock:
+            window, self.window = self.window, {op: [] for op in self.window}
+            errors, self.window_errors = self.window_errors, {
+                op: 0 for op in self.window_errors
+            }
+        return window, errors
+
+
+def summarize(latencies, errors, seconds):
+    """Rows of per-call and overall latency percentiles and throughput."""
+    rows = []
+    everything = []
+    for op in latencies:
+        values = sorted(latencies[op])
+        everything += values
+        rows.append(_row(op, values, errors[op], seconds))
+    rows.append(_row("all", sorted(everything), sum(errors.values()), seconds))
+    return rows
+
+
+def _row(op, values, errors, seconds):
+    return {
+        "op": op,
+        "calls": len(values),
+        "errors": errors,
+        "per_sec": len(values) / seconds if seconds else 0.0,
+        "p50_ms": percentile(values, 0.5),
+        "p95_ms": percentile(values, 0.95),
+        "p99_ms": percentile(values, 0.99),
+        "max_ms": values[-1] if values else 0.0,
+    }
+
+
+def format_rows(rows):
+    lines = [
+        f"{'call':<20} {'calls':>8} {'errors':>6} {'calls/s':>9}"
+        f" {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    ]
+    for r in rows:
+        if not r["calls"] and not r["errors"]:
+            continue
+        lines.append(
+            f"{r['op']:<20} {r['calls']:>8,} {r['errors']:>6,} {r['per_sec']:>9,.1f}"
+            f" {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f}"
+            f" {r['max_ms']:>8.1f}"
+        )
+    return "\n".join(lines)
+
+
+# Clients
+
+
+class MetastoreClient:
+    """One Thrift connection to the Metastore, reopened after transport errors."""
+
+    def __init__(self, host, port, timeout):
+        self.host, self.port, self.timeout = host, port, timeout
+        self.transport = None
+        self.client = None
+
+    def connect(self):
+        # The generated bindings ship with hive-metastore-client
+        from thrift.protocol import TBinaryProtocol
+        from thrift.transport import TSocket, TTransport
+        from thrift_files.libraries.thrift_hive_metastore_client.ThriftHiveMetastore import (
+            Client,
+        )
+
+        sock = TSocket.TSocket(self.host, self.port)
+        sock.setTimeout(self.timeout * 1000)
+        transport = TTransport.TBufferedTransport(sock)
+        transport.open()
+        self.transport = transport
+        self.client = Client(TBinaryProtocol.TBinaryProtocol(transport))
+
+    def close(self):
+        if self.client is not None:
+            self.transport.close()
+            self.client = None
+
+    def call(self, op, table, max_parts):
+        from thrift.transport.TTransport import TTransportException
+
+        if self.client is None:
+            self.connect()
+        db, name = table if table else ("default", None)
+        try:
+            if op == "get_all_databases":
+                return self.client.get_all_databases()
+            if op == "get_all_tables":
+                return self.client.get_all_tables(db)
+            if op == "get_table":
+                return self.client.get_table(db, name)
+            if op == "get_partitions":
+                return self.client.get_partitions(db, name, max_parts)
+            if op == "get_partition_names":
+                return self.client.get_partition_names(db, name, max_parts)
+        except (TTransportException, OSError):
+            self.close()
+            raise
+        raise ValueError(f"Unknown call {op}")
+
+    def discover(self, database_pattern, max_tables):
+        """``(db, table)`` pairs to query, and which of them are partitioned."""
+        self.connect()
+        tables, partitioned = [], set()
+        for db in self.client.get_all_databases():
+            if not re.fullmatch(database_pattern, db):
+                continue
+            for name in self.client.get_all_tables(db):
+                if len(tables) >= max_tables:
+                    return tables, partitioned
+                tables.append((db, name))
+                if self.client.get_table(db, name).partitionKeys:
+                    partitioned.add((db, name))
+        return tables, partitioned
+
+
+class HiveServer2Client:
+    """One PyHive connection to HiveServer2, reopened after errors."""
+
+    def __init__(self, host, port, username):
+        self.host, self.port, self.username = host, port, username
+        self.connection = None
+
+    def connect(self):
+        from pyhive import hive
+
+        self.connection = hive.Connection(
+            host=self.host, port=self.port, username=self.username
+        )
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+    def query(self, statement):
+        if self.connection is None:
+            self.connect()
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(statement)
+            return cursor.fetchall()
+        except Exception:
+            self.close()
+            raise
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+    def call(self, op, table, max_parts):
+        db, name = table if table else ("default", None)
+        if op == "show_databases":
+            return self.query("SHOW DATABASES")
+        if op == "show_tables":
+            return self.query(f"SHOW TABLES IN `{db}`")
+        if op == "describe_table":
+            return self.query(f"DESCRIBE FORMATTED `{db}`.`{name}`")
+        if op == "show_partitions":
+            return self.query(f"SHOW PARTITIONS `{db}`.`{name}`")[:max_parts]
+        raise ValueError(f"Unknown call {op}")
+
+    def discover(self, database_pattern, max_tables):
+        tables, partitioned = [], set()
+        for (db,) in self.query("SHOW DATABASES"):
+            if not re.fullmatch(database_pattern, db):
+                continue
+            for row in self.query(f"SHOW TABLES IN `{db}`"):
+                if len(tables) >= max_tables:
+                    return tables, partitioned
+                name = row[-1]
+                tables.append((db, name))
+                described = self.query(f"DESCRIBE FORMATTED `{db}`.`{name}`")
+                if any("# Partition Information" in str(r[0]) for r in described if r):
+                    partitioned.add((db, name))
+        return tables, partitioned
+
+
+def make_client(args):
+    if args.target == "hiveserver2":
+        return HiveServer2Client(args.host, args.port, args.username)
+    return MetastoreClient(args.host, args.port, args.timeout)
+
+
+def client_worker(index, args, ops, tables, partitioned, limiter, stats, stop):
+    rng = random.Random(f"{args.seed}:{index}")
+    names = list(ops)
+    weights = [ops[op] for op in names]
+    client = make_client(args)
+    try:
+        while not stop.is_set():
+            if limiter:
+                limiter.acquire()
+                if stop.is_set():
+                    break
+            op = rng.choices(names, weights)[0]
+            pool = partitioned if op in PARTITION_OPS else tables
+            table = rng.choice(pool) if pool else None
+            started = time.perf_counter()
+            error = False
+            try:
+                client.call(op, table, args.max_parts)
+            except Exception as e:
+                error = True
+                if args.verbose:
+                    print(f"Error in {op} {table}: {e}", flush=True)
+                # Do not spin on a server that refuses connections
+                stop.wait(0.1)
+            stats.record(op, (time.perf_counter() - started) * 1000, error)
+    finally:
+        client.close()
+
+
+# Stand-in Metastore
+
+
+class StandinHandler:
+    """Answers Metastore calls from a synthetic catalog."""
+
+    def __init__(self, databases, tables, partitions, latency_ms):
+        from thrift_files.libraries.thrift_hive_metastore_client import ttypes
+
+        self.t = ttypes
+        self.latency = latency_ms / 1000
+        self.catalog = {
+            f"db{d}": [f"t{t}" for t in range(tables)] for d in range(databases)
+        }
+        self.partitions = partitions
+
+    def _delay(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _check(self, db_name, tbl_name=None):
+        if db_name not in self.catalog or (
+            tbl_name is not None and tbl_name not in self.catalog[db_name]
+        ):
+            target = db_name if tbl_name is None else f"{db_name}.{tbl_name}"
+            raise self.t.NoSuchObjectException(message=f"{target} does not exist")
+
+    def _partitioned(self, tbl_name):
+        # Every other table is partitioned by dt
+        return int(tbl_name[1:]) % 2 == 0
+
+    def _sd(self, db_name, tbl_name, location=""):
+        return self.t.StorageDescriptor(
+            cols=[
+                self.t.FieldSchema(name="id", type="bigint"),
+                self.t.FieldSchema(name="name", type="string"),
+                self.t.FieldSchema(name="amount", type="decimal(10,2)"),
+            ],
+            location=f"file:/warehouse/{db_name}.db/{tbl_name}{location}",
+            inputFormat="org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat",
+            outputFormat="org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat",
+            serdeInfo=self.t.SerDeInfo(
+                serializationLib="org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe",
+                parameters={},
+            ),
+            parameters={},
+        )
+
+    def _partition_values(self, tbl_name, max_parts):
+        if not self._partitioned(tbl_name):
+            return []
+        count = self.partitions if max_parts < 0 else min(self.partitions, max_parts)
+        return [f"2024-01-01+{day}" for day in range(count)]
+
+    def get_all_databases(self):
+        self._delay()
+        return list(self.catalog)
+
+    def get_database(self, name):
+        self._delay()
+        self._check(name)
+        return self.t.Database(
+            name=name, locationUri=f"file:/warehouse/{name}.db", parameters={}
+        )
+
+    def get_all_tables(self, db_name):
+        self._delay()
+        self._check(db_name)
+        return self.catalog[db_name]
+
+    def get_table(self, dbname, tbl_name):
+        self._delay()
+        self._check(dbname, tbl_name)
+        keys = [self.t.FieldSchema(name="dt", type="string")]
+        return self.t.Table(
+            tableName=tbl_name,
+            dbName=dbname,
+            owner="hive",
+            sd=self._sd(dbname, tbl_name),
+            partitionKeys=keys if self._partitioned(tbl_name) else [],
+            parameters={"numFiles": "10", "totalSize": "1048576"},
+            tableType="EXTERNAL_TABLE",
+        )
+
+    def get_partitions(self, db_name, tbl_name, max_parts):
+        self._delay()
+        self._check(db_name, tbl_name)
+        return [
+            self.t.Partition(
+                values=[value],
+                dbName=db_name,
+                tableName=tbl_name,
+                sd=self._sd(db_name, tbl_name, f"/dt={value}"),
+                parameters={},
+            )
+            for value in self._partition_values(tbl_name, max_parts)
+        ]
+
+    def get_partition_names(self, db_name, tbl_name, max_parts):
+        self._delay()
+        self._check(db_name, tbl_name)
+        return [f"dt={v}" for v in self._partition_values(tbl_name, max_parts)]
+
+
+def serve(args):
+    from thrift.protocol import TBinaryProtocol
+    from thrift.server import TServer
+    from thrift.transport import TSocket, TTransport
+    from thrift_files.libraries.thrift_hive_metastore_client import (
+        ThriftHiveMetastore,
+    )
+
+    handler = StandinHandler(
+        args.standin_databases,
+        args.standin_tables,
+        args.standin_partitions,
+        args.standin_latency,
+    )
+    server = TServer.TThreadedServer(
+        ThriftHiveMetastore.Processor(handler),
+        TSocket.TServerSocket(host="127.0.0.1", port=args.port),
+        TTransport.TBufferedTransportFactory(),
+        TBinaryProtocol.TBinaryProtocolFactory(),
+        daemon=True,
+    )
+    print(f"Stand-in Metastore listening on 127.0.0.1:{args.port}", flush=True)
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def start_standin(args):
+    """Run ``--serve`` in a subprocess on a free port and wait until it accepts."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    command = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--serve",
+        "--port",
+        str(port),
+        "--standin-databases",
+        str(args.standin_databases),
+        "--standin-tables",
+        str(args.standin_tables),
+        "--standin-partitions",
+        str(args.standin_partitions),
+        "--standin-latency",
+        str(args.standin_latency),
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("the stand-in Metastore exited")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("the stand-in Metastore did not start within 10s")
+
+
+# Main
+
+
+def parse_ops(text, defaults):
+    """Parse ``call[:weight],...``; an empty value selects ``defaults``."""
+    if not text:
+        return dict(defaults)
+    ops = {}
+    for item in text.split(","):
+        name, _, weight = item.strip().partition(":")
+        if name not in defaults:
+            raise ValueError(
+                f"Unknown call {name!r}, expected one of: {', '.join(defaults)}"
+            )
+        ops[name] = float(weight) if weight else 1.0
+    return ops
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--target", choices=["metastore", "hiveserver2"], default="metastore"
+    )
+    parser.add_argument("--host", help="default: HOST_METASTORE / HOST_HIVE_SERVER2")
+    parser.add_argument("--port", type=int, help="default: 9083 / 10000")
+    parser.add_argument("--username", default="root", help="HiveServer2 user")
+    parser.add_argument(
+        "--clients", type=int, default=4, help="concurrent connections (default: 4)"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=0,
+        help="calls per second across all clients; 0 is unlimited (default: 0)",
+    )
+    parser.add_argument("--duration", type=float, default=60, help="seconds to run")
+    parser.add_argument(
+        "--warmup", type=float, default=5, help="seconds left out of the summary"
+    )
+    parser.add_argument(
+        "--report-interval", type=float, default=10, help="seconds between reports"
+    )
+    parser.add_argument(
+        "--ops",
+        help="weighted call mix, e.g. get_table:5,get_partitions:1"
+        " (default: a mix of all calls)",
+    )
+    parser.add_argument(
+        "--database", default=".*", help="regular expression of databases to query"
+    )
+    parser.add_argument(
+        "--max-tables", type=int, default=200, help="tables discovered at startup"
+    )
+    parser.add_argument(
+        "--max-parts", type=int, default=1000, help="partitions fetched per call"
+    )
+    parser.add_argument("--timeout", type=float, default=30, help="socket timeout (s)")
+    parser.add_argument("--seed", default="metastore-bench")
+    parser.add_argument("--output", help="JSON file with the summary")
+    parser.add_argument("--verbose", action="store_true", help="print every error")
+
+    standin = parser.add_argument_group("stand-in Metastore")
+    standin.add_argument(
+        "--serve", action="store_true", help="serve a stand-in Metastore on --port"
+    )
+    standin.add_argument(
+        "--standin",
+        action="store_true",
+        help="benchmark a stand-in Metastore started in a subprocess",
+    )
+    standin.add_argument("--standin-databases", type=int, default=4)
+    standin.add_argument("--standin-tables", type=int, default=50)
+    standin.add_argument("--standin-partitions", type=int, default=100)
+    standin.add_argument(
+        "--standin-latency",
+        type=float,
+        default=2,
+        help="milliseconds added to every call (default: 2)",
+    )
+    args = parser.parse_args(argv)
+    if args.standin and args.target != "metastore":
+        parser.error("--standin only serves the Metastore API")
+    metastore = args.target == "metastore"
+    args.host = args.host or (HOST_METASTORE if metastore else HOST_HIVE_SERVER2)
+    args.port = args.port or (9083 if metastore else 10000)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.serve:
+        return serve(args)
+    try:
+        ops = parse_ops(
+            args.ops, METASTORE_OPS if args.target == "metastore" else HIVESERVER2_OPS
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+
+    standin = None
+    if args.standin:
+        try:
+            standin, args.port = start_standin(args)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            return 1
+        args.host = "127.0.0.1"
+
+    try:
+        return run(args, ops)
+    finally:
+        if standin is not None:
+            standin.terminate()
+            standin.wait()
+
+
+def run(args, ops):
+    client = make_client(args)
+    try:
+        tables, partitioned = client.discover(args.database, args.max_tables)
+    except ImportError as e:
+        print(f"Error: {e}. Install with: pip install hive-metastore-client pyhive")
+        return 1
+    except Exception as e:
+        print(f"Error connecting to {args.target} at {args.host}:{args.port}: {e}")
+        return 1
+    finally:
+        client.close()
+    partitioned = sorted(partitioned)
+    if not tables:
+        ops = {
+            op: w
+            for op, w in ops.items()
+            if op in ("get_all_databases", "show_databases")
+        }
+    elif not partitioned:
+        ops = {op: w for op, w in ops.items() if op not in PARTITION_OPS}
+    if not ops:
+        print("Error: no tables to run the selected calls against")
+        return 1
+    print(
+        f"Benchmarking {args.target} at {args.host}:{args.port} with {args.clients}"
+        f" clients, {len(tables)} tables ({len(partitioned)} partitioned),"
+        f" {f'{args.rate:g} calls/s' if args.rate else 'unlimited rate'}:"
+        f" {', '.join(f'{op}:{w:g}' for op, w in ops.items())}",
+        flush=True,
+    )
+
+    stats = Stats(ops)
+    stop = threading.Event()
+    limiter = RateLimiter(args.rate) if args.rate else None
+    workers = [
+        threading.Thread(
+            target=client_worker,
+            args=(i, args, ops, tables, partitioned, limiter, stats, stop),
+            daemon=True,
+        )
+        for i in range(args.clients)
+    ]
+    started = time.monotonic()
+    for worker in workers:
+        worker.start()
+
+    warm = args.warmup <= 0
+    measured_from = started
+    last_report = started
+    try:
+        while time.monotonic() - started < args.duration:
+            now = time.monotonic()
+            if not warm and now - started >= args.warmup:
+                stats.reset()
+                warm, measured_from = True, now
+            wake = min(
+                last_report + args.report_interval,
+                started + args.duration,
+                started + args.warmup if not warm else float("inf"),
+            )
+            time.sleep(max(0.0, wake - time.monotonic()))
+            now = time.monotonic()
+            if now - last_report >= args.report_interval:
+                window, errors = stats.snapshot()
+                rows = summarize(window, errors, now - last_report)
+                total = rows[-1]
+                print(
+                    f"[{now - started:6.0f}s{'' if warm else ' warmup'}]"
+                    f" {total['per_sec']:,.1f} calls/s, p50 {total['p50_ms']:.1f} ms"
+                    f" p95 {total['p95_ms']:.1f} ms p99 {total['p99_ms']:.1f} ms,"
+                    f" {total['errors']:,} errors",
+                    flush=True,
+                )
+                last_report = now
+    except KeyboardInterrupt:
+        pass
+    stats.recording = False
+    seconds = time.monotonic() - measured_from
+    stop.set()
+    for worker in workers:
+        worker.join(timeout=args.timeout)
+
+    rows = summarize(stats.total, stats.errors, seconds)
+    print(f"\nSummary over {seconds:.0f}s ({args.clients} clients):")
+    print(format_rows(rows))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "target": args.target,
+                    "host": f"{args.host}:{args.port}",
+                    "clients": args.clients,
+                    "rate": args.rate,
+                    "seconds": seconds,
+                    "calls": rows,
+                },
+                f,
+                indent=2,
+            )
+    return 1 if rows[-1]["errors"] and not rows[-1]["calls"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,7 @@
 Test Hive Metastore using PyHive
 Install: pip install pyhive thrift-sasl
 Run: HOST_HIVE_SERVER2=hiveserver2 HOST_METASTORE=hive-metastore uv run python3 test_metastore_direct.py
+For latency under concurrent load see metastore_bench.py
 """
 
 import os
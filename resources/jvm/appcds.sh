@@ -0,0 +1,64 @@
+#!/bin/bash
+# AppCDS class-data archives for the resinkit JVMs, sourced by flink_entrypoint.sh and
+# kafka_entrypoint.sh and installed next to them by install_appcds.sh.
+#
+# Each service gets a dynamic archive of the classes it loaded while starting, named after
+# a digest of the java version and of its classpath (path, size and mtime of every jar):
+#
+#   appcds_opts NAME INPUT...   JVM options for service NAME, where INPUT are the classpath
+#                               directories and the configuration files the archive depends on
+#
+# If the archive of the current classpath exists the service maps it
+# (-XX:SharedArchiveFile); otherwise stale archives of the service are removed and the
+# service records a new one when it exits (-XX:ArchiveClassesAtExit). A changed classpath
+# therefore costs one slower start, after which restarts use the new archive.
+#
+# RESINKIT_APPCDS=0 disables the archives, RESINKIT_APPCDS_DIR moves them
+# (default /opt/resinkit/cds).
+
+# Inputs of the archives of each group of services
+APPCDS_FLINK_INPUTS=(/opt/flink/lib /opt/hadoop/share/hadoop /opt/flink/conf/config.yaml)
+APPCDS_KAFKA_INPUTS=(/opt/kafka/libs)
+
+appcds_enabled() {
+    [ "${RESINKIT_APPCDS:-1}" = "1" ]
+}
+
+appcds_dir() {
+    echo "${RESINKIT_APPCDS_DIR:-/opt/resinkit/cds}"
+}
+
+# Digest of the java version and of the jars and files in INPUT...
+appcds_key() {
+    local java="${JAVA_HOME:+$JAVA_HOME/bin/}java" input
+    {
+        "$java" -version 2>&1
+        for input in "$@"; do
+            if [ -d "$input" ]; then
+                find -L "$input" -name '*.jar' -printf '%p %s %T@\n' | LC_ALL=C sort
+            elif [ -f "$input" ]; then
+                sha256sum "$input"
+            fi
+        done
+    } | sha256sum | cut -c1-16
+}
+
+# Path of the archive of service NAME for the current INPUT...
+appcds_archive() {
+    local name=$1
+    shift
+    echo "$(appcds_dir)/$name-$(appcds_key "$@").jsa"
+}
+
+appcds_opts() {
+    local name=$1 archive dir
+    appcds_enabled || return 0
+    archive=$(appcds_archive "$@")
+    dir=$(appcds_dir)
+    if [ -s "$archive" ]; then
+        echo "-XX:SharedArchiveFile=$archive"
+    elif mkdir -p "$dir" 2>/dev/null && [ -w "$dir" ]; then
+        rm -f "$dir/$name"-*.jsa
+        echo "-XX:ArchiveClassesAtExit=$archive"
+    fi
+}
@@ -0,0 +1,35 @@
+#!/bin/bash
+# Start and stop helpers of the resinkit JVM services, sourced by flink_entrypoint.sh and
+# kafka_entrypoint.sh and installed next to them.
+#
+#   wait_for_exit PATTERN           wait for the processes matching PATTERN to exit
+#   wait_until_ready PATTERN CHECK  wait until command CHECK succeeds
+#
+# RESINKIT_STOP_TIMEOUT (default 30) and RESINKIT_START_TIMEOUT (default 180) bound the
+# waits in seconds.
+
+# Wait up to RESINKIT_STOP_TIMEOUT seconds (default 30) for processes matching $1 to exit,
+# so JVMs recording a class-data archive can finish writing it
+wait_for_exit() {
+    local deadline=$((SECONDS + ${RESINKIT_STOP_TIMEOUT:-30}))
+    while pgrep -f "$1" >/dev/null && [[ $SECONDS -lt $deadline ]]; do
+        sleep 1
+    done
+}
+
+# Wait up to RESINKIT_START_TIMEOUT seconds (default 180) until command $2 succeeds,
+# giving up early if the process matching $1 exits
+wait_until_ready() {
+    local deadline=$((SECONDS + ${RESINKIT_START_TIMEOUT:-180})) seen=""
+    until eval "$2" >/dev/null 2>&1; do
+        if pgrep -f "$1" >/dev/null; then
+            seen=1
+        elif [[ -n "$seen" ]]; then
+            return 1
+        fi
+        if [[ $SECONDS -ge $deadline ]]; then
+            return 1
+        fi
+        sleep 0.5
+    done
+}
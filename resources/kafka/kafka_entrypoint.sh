@@ -3,6 +3,14 @@
 # Exit on any error
 set -e
 
+# wait_for_exit and wait_until_ready, see lifecycle.sh
+source "$(dirname "$0")/lifecycle.sh"
+
+# AppCDS class-data archives, see appcds.sh
+if [[ -f "$(dirname "$0")/appcds.sh" ]]; then
+    source "$(dirname "$0")/appcds.sh"
+fi
+
 # Function to display usage
 usage() {
     echo "Usage: $0 {start|stop|status}"
@@ -59,6 +67,15 @@ is_zookeeper_running() {
     fi
 }
 
+# KAFKA_OPTS of service $1 (kafka or zookeeper) with its AppCDS options
+kafka_opts() {
+    local opts="${KAFKA_OPTS:-}"
+    if declare -F appcds_opts >/dev/null; then
+        opts="$opts $(appcds_opts "$1" "${APPCDS_KAFKA_INPUTS[@]}")"
+    fi
+    echo "$opts"
+}
+
 # Function to stop Kafka and Zookeeper
 stop_kafka_zookeeper() {
     echo "[RESINKIT] Stopping Kafka and Zookeeper..."
@@ -68,7 +85,7 @@ stop_kafka_zookeeper() {
         echo "[RESINKIT] Stopping Kafka..."
         "${KAFKA_HOME}/bin/kafka-server-stop.sh"
         # Wait for Kafka to stop
-        sleep 5
+        wait_for_exit "kafka.Kafka"
         
         # Force kill if still running
         local remaining_kafka_pids
@@ -88,7 +105,7 @@ stop_kafka_zookeeper() {
         echo "[RESINKIT] Stopping Zookeeper..."
         "${KAFKA_HOME}/bin/zookeeper-server-stop.sh"
         # Wait for Zookeeper to stop
-        sleep 5
+        wait_for_exit "org.apache.zookeeper.server.quorum.QuorumPeerMain"
         
         # Force kill if still running
         local remaining_zk_pids
@@ -119,14 +136,12 @@ start_kafka_zookeeper() {
     # Start Zookeeper first
     if ! is_zookeeper_running; then
         echo "[RESINKIT] Starting Zookeeper..."
-        nohup "${KAFKA_HOME}/bin/zookeeper-server-start.sh" "${KAFKA_HOME}/config/zookeeper.properties" >/dev/null 2>&1 &
+        KAFKA_OPTS="$(kafka_opts zookeeper)" nohup "${KAFKA_HOME}/bin/zookeeper-server-start.sh" "${KAFKA_HOME}/config/zookeeper.properties" >/dev/null 2>&1 &
         
-        # Wait for Zookeeper to start
+        # Wait for Zookeeper to accept connections
         echo "[RESINKIT] Waiting for Zookeeper to start..."
-        sleep 10
-        
-        # Verify Zookeeper started
-        if ! is_zookeeper_running; then
+        if ! wait_until_ready "org.apache.zookeeper.server.quorum.QuorumPeerMain" \
+            "(exec 3<>/dev/tcp/localhost/2181)"; then
             echo "[RESINKIT] Error: Failed to start Zookeeper"
             exit 1
         fi
@@ -138,14 +153,11 @@ start_kafka_zookeeper() {
     # Start Kafka
     if ! is_kafka_running; then
         echo "[RESINKIT] Starting Kafka..."
-        nohup "${KAFKA_HOME}/bin/kafka-server-start.sh" "${KAFKA_HOME}/config/server.properties" >/dev/null 2>&1 &
+        KAFKA_OPTS="$(kafka_opts kafka)" nohup "${KAFKA_HOME}/bin/kafka-server-start.sh" "${KAFKA_HOME}/config/server.properties" >/dev/null 2>&1 &
         
-        # Wait for Kafka to start
+        # Wait for the broker to accept connections
         echo "[RESINKIT] Waiting for Kafka to start..."
-        sleep 10
-        
-        # Verify Kafka started
-        if ! is_kafka_running; then
+        if ! wait_until_ready "kafka.Kafka" "(exec 3<>/dev/tcp/localhost/9092)"; then
             echo "[RESINKIT] Error: Failed to start Kafka"
             exit 1
         fi
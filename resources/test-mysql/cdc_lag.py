@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Measures how far a CDC pipeline's sink lags behind MySQL.
+
+> pip install mysql-connector-python confluent-kafka
+> python3 resources/test-mysql/cdc_lag.py --sink kafka --duration 600
+> python3 resources/test-mysql/cdc_lag.py --sink mysql --sink-host doris --sink-port 9030 --sink-user root --sink-password ''
+
+Heartbeat rows are inserted into ``t_cdc_heartbeat`` (see ``create_tables.sql``)
+every ``--interval`` seconds, each carrying the time it was written. The harness
+reads them back from the sink side, either from the Kafka topic written by
+``resources/flink/cdc/mysql_2_kafka.yaml`` or by polling the replicated table
+over the MySQL protocol (Doris FE, or a MySQL/MariaDB stand-in for
+``mysql_2_doris.yaml``), and reports lag percentiles every
+``--report-interval`` seconds.
+
+Heartbeats read back before the lag first drops below ``--steady-lag`` count
+towards the catch-up phase (a snapshot, or a backlog after a restart), later
+ones towards steady state; the final summary reports both. Run it while
+``generate_data.py --stream`` drives load to compare ``pipeline.parallelism``
+or other tuning changes. The database connection uses the same ``MYSQL_*``
+environment variables as ``generate_data.py``.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Shared with the other load scripts; resources/ sits next to resinkit_byoc/
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from resinkit_byoc.core.num_utils import percentile  # noqa: E402
+
+# Database configuration
+DB_CONFIG = {
+    "host": os.environ.get("MYSQL_HOST", "localhost"),
+    "user": os.environ.get("MYSQL_RESINKIT_USER", "resinkit"),
+    "password": os.environ.get("MYSQL_RESINKIT_PASSWORD", "resinkit_mysql_password"),
+    "database": os.environ.get("MYSQL_RESINKIT_DATABASE", "mydatabase"),
+    "port": int(os.environ.get("MYSQL_TCP_PORT", 3306)),
+}
+
+HEARTBEAT_TABLE = "t_cdc_heartbeat"
+
+
+def now_us():
+    return time.time_ns() // 1000
+
+
+def describe(lags_ms):
+    lags_ms = sorted(lags_ms)
+    if not lags_ms:
+        return "no heartbeats"
+    return (
+        f"{len(lags_ms):,} heartbeats, lag p50 {percentile(lags_ms, 0.5):,.0f} ms"
+        f" p95 {percentile(lags_ms, 0.95):,.0f} ms p99 {percentile(lags_ms, 0.99):,.0f} ms"
+        f" max {lags_ms[-1]:,.0f} ms"
+    )
+
+
+class Tracker:
+    """Heartbeats written and read back, and the phase each was read in."""
+
+    def __init__(self, steady_lag_ms):
+        self.steady_lag_ms = steady_lag_ms
+        self.lock = threading.Lock()
+        self.written = {}
+        self.lags = {}
+        self.phases = {}
+        self.steady_since = None
+        self.window = []
+
+    def write(self, seq, written_at):
+        with self.lock:
+            self.written[seq] = written_at
+
+    def forget(self, seq):
+        """Drop a heartbeat whose insert failed."""
+        with self.lock:
+            self.written.pop(seq, None)
+
+    def seen(self, seq, seen_at):
+        with self.lock:
+            if seq in self.lags or seq not in self.written:
+                return
+            lag_ms = (seen_at - self.written[seq]) / 1000
+            if self.steady_since is None and lag_ms < self.steady_lag_ms:
+                self.steady_since = seen_at
+            self.lags[seq] = lag_ms
+            self.phases[seq] = "catch-up" if self.steady_since is None else "steady"
+            self.window.append(lag_ms)
+
+    def unseen(self):
+        with self.lock:
+            return sorted(set(self.written) - set(self.lags))
+
+    def report(self):
+        """Lags read since the previous report and the oldest unseen heartbeat."""
+        with self.lock:
+            window, self.window = self.window, []
+            pending = [at for seq, at in self.written.items() if seq not in self.lags]
+            phase = "catch-up" if self.steady_since is None else "steady"
+        oldest = (now_us() - min(pending)) / 1e6 if pending else 0
+        return window, len(pending), oldest, phase
+
+
+def connect(config):
+    import mysql.connector
+    from mysql.connector import Error
+
+    try:
+        connection = mysql.connector.connect(**config, autocommit=True)
+        if connection.is_connected():
+            return connection
+    except Error as e:
+        print(f"Error connecting to {config['host']}:{config['port']}: {e}")
+    return None
+
+
+def write_heartbeats(connection, run, interval, tracker, stop):
+    """
+    Insert one heartbeat every ``interval`` seconds until ``stop`` is set.
+
+    Each heartbeat is registered before its insert, since a fast sink may deliver
+    it before ``execute`` returns. A failed insert is forgotten again and its
+    ``seq`` is not reused.
+    """
+    from mysql.connector import Error
+
+    cursor = connection.cursor()
+    seq = 0
+    next_at = time.monotonic()
+    while not stop.is_set():
+        written_at = now_us()
+        tracker.write(seq, written_at)
+        try:
+            cursor.execute(
+                f"INSERT INTO `{HEARTBEAT_TABLE}` (`run`, `seq`, `writtenAt`)"
+                " VALUES (%s, %s, %s)",
+                (run, seq, written_at),
+            )
+        except Error as e:
+            tracker.forget(seq)
+            print(f"Error writing heartbeat: {e}", flush=True)
+        seq += 1
+        next_at += interval
+        stop.wait(max(0.0, next_at - time.monotonic()))
+    cursor.close()
+
+
+def heartbeat_row(message):
+    """The heartbeat row of a debezium-json, canal-json or plain JSON record."""
+    try:
+        value = json.loads(message)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(value, dict):
+        return None
+    if "payload" in value and isinstance(value["payload"], dict):
+        value = value["payload"]
+    if "after" in value or "op" in value:
+        return value.get("after")
+    if isinstance(value.get("data"), list):
+        return (
+            value["data"][0]
+            if value["data"] and value.get("type") != "DELETE"
+            else None
+        )
+    return value
+
+
+def read_kafka(args, run, tracker, stop):
+    from confluent_kafka import Consumer
+
+    consumer = Consumer(
+        {
+            "bootstrap.servers": args.kafka_bootstrap,
+            "group.id": f"resinkit-cdc-lag-{run}",
+            "auto.offset.reset": "earliest",
+            "enable.auto.commit": False,
+        }
+    )
+    consumer.subscribe([args.topic])
+    try:
+        while not stop.is_set():
+            message = consumer.poll(0.1)
+            if message is None:
+                continue
+            seen_at = now_us()
+            if message.error():
+                print(f"Error reading {args.topic}: {message.error()}", flush=True)
+                continue
+            row = heartbeat_row(message.value())
+            if row and row.get("run") == run:
+                tracker.seen(int(row["seq"]), seen_at)
+    finally:
+        consumer.close()
+
+
+def read_mysql(args, run, tracker, stop):
+    from mysql.connector import Error
+
+    config = {
+        "host": args.sink_host,
+        "port": args.sink_port,
+        "user": args.sink_user,
+        "password": args.sink_password,
+        "database": args.sink_database,
+    }
+    connection = connect(config)
+    if connection is None:
+        stop.set()
+        return
+    cursor = connection.cursor()
+    while not stop.is_set():
+        unseen = tracker.unseen()
+        if unseen:
+            try:
+                cursor.execute(
+                    f"SELECT `seq` FROM `{HEARTBEAT_TABLE}` WHERE `run` = %s AND `seq` >= %s",
+                    (run, unseen[0]),
+                )
+                seen_at = now_us()
+                for (seq,) in cursor.fetchall():
+                    tracker.seen(int(seq), seen_at)
+            except Error as e:
+                print(f"Error reading {HEARTBEAT_TABLE}: {e}", flush=True)
+        stop.wait(args.poll_interval)
+    connection.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--sink", choices=["kafka", "mysql"], default="kafka")
+    parser.add_argument(
+        "--interval", type=float, default=0.1, help="seconds between heartbeats"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=0, help="seconds to run; 0 runs until Ctrl-C"
+    )
+    parser.add_argument(
+        "--drain",
+        type=float,
+        default=30,
+        help="seconds to wait for outstanding heartbeats at the end (default: 30)",
+    )
+    parser.add_argument(
+        "--steady-lag",
+        type=float,
+        default=5000,
+        help="lag in ms below which the pipeline counts as caught up (default: 5000)",
+    )
+    parser.add_argument(
+        "--report-interval", type=float, default=10, help="seconds between reports"
+    )
+    parser.add_argument("--output", help="JSON lines file with every heartbeat's lag")
+    parser.add_argument(
+        "--keep", action="store_true", help="keep this run's heartbeat rows"
+    )
+
+    kafka = parser.add_argument_group("kafka sink")
+    kafka.add_argument("--kafka-bootstrap", default="localhost:9092")
+    kafka.add_argument(
+        "--topic",
+        default=f"{DB_CONFIG['database']}.{HEARTBEAT_TABLE}",
+        help="topic the pipeline writes the heartbeat table to",
+    )
+
+    sink = parser.add_argument_group("mysql sink (Doris FE or a MySQL stand-in)")
+    sink.add_argument("--sink-host", default="localhost")
+    sink.add_argument("--sink-port", type=int, default=9030)
+    sink.add_argument("--sink-user", default="root")
+    sink.add_argument("--sink-password", default="")
+    sink.add_argument("--sink-database", default=DB_CONFIG["database"])
+    sink.add_argument(
+        "--poll-interval", type=float, default=0.1, help="seconds between sink queries"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    connection = connect(DB_CONFIG)
+    if connection is None:
+        return 1
+
+    run = f"{os.uname().nodename}-{os.getpid()}-{int(time.time())}"
+    tracker = Tracker(args.steady_lag)
+    stop_writer = threading.Event()
+    stop_reader = threading.Event()
+    reader = threading.Thread(
+        target=read_kafka if args.sink == "kafka" else read_mysql,
+        args=(args, run, tracker, stop_reader),
+        daemon=True,
+    )
+    writer = threading.Thread(
+        target=write_heartbeats,
+        args=(connection, run, args.interval, tracker, stop_writer),
+        daemon=True,
+    )
+    print(
+        f"Writing heartbeats (run {run}) every {args.interval:g}s and reading them"
+        f" back from {args.topic if args.sink == 'kafka' else args.sink_host}"
+    )
+    started = time.monotonic()
+    reader.start()
+    writer.start()
+    try:
+        while not args.duration or time.monotonic() - started < args.duration:
+            if stop_reader.wait(args.report_interval):
+                break
+            window, pending, oldest, phase = tracker.report()
+            print(
+                f"[{time.monotonic() - started:6.0f}s {phase}] {describe(window)};"
+                f" {pending:,} outstanding, oldest {oldest:,.1f}s",
+                flush=True,
+            )
+    except KeyboardInterrupt:
+        pass
+    stop_writer.set()
+    writer.join()
+
+    # Give the pipeline time to deliver the last heartbeats
+    deadline = time.monotonic() + args.drain
+    while tracker.unseen() and time.monotonic() < deadline and reader.is_alive():
+        time.sleep(0.2)
+    stop_reader.set()
+    reader.join()
+
+    if not args.keep:
+        cursor = connection.cursor()
+        cursor.execute(f"DELETE FROM `{HEARTBEAT_TABLE}` WHERE `run` = %s", (run,))
+        cursor.close()
+    connection.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            for seq, written_at in sorted(tracker.written.items()):
+                record = {
+                    "seq": seq,
+                    "written_at": written_at / 1e6,
+                    "lag_ms": tracker.lags.get(seq),
+                    "phase": tracker.phases.get(seq),
+                }
+                f.write(json.dumps(record) + "\n")
+
+    for phase in ("catch-up", "steady"):
+        lags = [
+            lag for seq, lag in tracker.lags.items() if tracker.phases[seq] == phase
+        ]
+        print(f"{phase}: {describe(lags)}")
+    lost = len(tracker.unseen())
+    print(
+        f"{len(tracker.written):,} heartbeats written, {lost:,} not read back"
+        f" within {args.drain:g}s"
+    )
+    return 1 if lost or not tracker.lags else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,8 @@ USE mydatabase;
 -- Create the resinkit user first, then grant privileges
 CREATE USER IF NOT EXISTS 'resinkit'@'%' IDENTIFIED BY 'resinkit_mysql_password';
 GRANT SELECT, RELOAD, SHOW DATABASES, REPLICATION SLAVE, REPLICATION CLIENT ON *.* TO 'resinkit'@'%';
+-- generate_data.py and cdc_lag.py load, change and truncate (DROP) the test tables
+GRANT SELECT, INSERT, UPDATE, DELETE, DROP ON mydatabase.* TO 'resinkit'@'%';
 FLUSH PRIVILEGES;
 
 -- MySQL doesn't support ENUM types as PostgreSQL does, so we'll define the ENUM directly in the tables
@@ -235,3 +237,12 @@ CREATE TABLE IF NOT EXISTS `t_flink_cdc_config` (
 
     PRIMARY KEY (`id`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Heartbeats of resources/test-mysql/cdc_lag.py, replicated by the CDC pipelines
+CREATE TABLE IF NOT EXISTS `t_cdc_heartbeat` (
+    `run` VARCHAR(64) NOT NULL,
+    `seq` BIGINT NOT NULL,
+    `writtenAt` BIGINT NOT NULL,
+
+    PRIMARY KEY (`run`, `seq`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
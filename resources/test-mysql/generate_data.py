@@ -5,20 +5,72 @@ Generates data for the MySQL database.
 > pip install mysql-connector-python faker
 > MYSQL_RESINKIT_PASSWORD=resinkit_mysql_password MYSQL_RESINKIT_USER=resinkit MYSQL_RESINKIT_DATABASE=mydatabase MYSQL_TCP_PORT=3306 MYSQL_HOST=localhost python3 resources/test-mysql/generate_data.py
 
+Row counts grow linearly with ``--scale``: the default of 0.001 creates a few
+dozen rows, ``--scale 1`` about 22 thousand and ``--scale 100`` about 2.2
+million, which is what CDC snapshot phases should be sized against:
+
+> python3 resources/test-mysql/generate_data.py --scale 100 --processes 8 --truncate
+
+Rows are generated in chunks across a process pool. Every chunk is seeded from
+``--seed``, the table and the chunk's position, and row ids are derived from
+the same values, so a run is reproducible and foreign keys (``TeamMember`` to
+``User``/``Team``, ``t_flink_cdc_config`` to ``t_data_connection_config``, ...)
+always point at rows of the same run without sharing state between processes.
+Each chunk is inserted in one transaction, with batched ``executemany`` or, with
+``--method load-data``, ``LOAD DATA LOCAL INFILE`` (needs ``local_infile=ON`` on
+the server, which ``my.cnf`` and ``install_mariadb.sh`` set). ``create_tables.sql``
+grants the ``resinkit`` user the writes this script and ``cdc_lag.py`` need on
+``mydatabase``; other schemas need the same grants or the root credentials.
+
+``--sink`` sends the same rows elsewhere instead of the database, to drive
+Flink SQL jobs or ``LOAD DATA INFILE`` without MySQL in the loop. ``jsonl``,
+``csv`` and ``tsv`` write one file per chunk to ``--output-dir/<table>/``, and
+``kafka`` produces JSON records keyed by row id to ``--topic-prefix<table>``
+(needs ``pip install confluent-kafka``). These sinks do not need the MySQL
+driver. A chunk counts as loaded once all its
+records are delivered, and fails after ``--kafka-timeout`` seconds. Memory stays
+bounded by the chunk size:
+
+> python3 resources/test-mysql/generate_data.py --scale 10 --sink kafka --kafka-option compression.type=zstd
+> python3 resources/test-mysql/generate_data.py --scale 10 --sink csv --output-dir /var/lib/mysql-files/gen
+
+CSV files have a header row and ``\\N`` for NULL; load them with
+``LOAD DATA INFILE '<file>' INTO TABLE <table> FIELDS TERMINATED BY ','
+OPTIONALLY ENCLOSED BY '"' IGNORE 1 LINES``. TSV files use the default
+``LOAD DATA`` format.
+
+With ``--stream`` the script instead keeps changing the rows of a bulk load,
+for measuring CDC pipelines under steady state. Inserts, updates and deletes
+are applied at ``--rate`` ops/s in the ``--update-ratio``/``--delete-ratio``
+mix by worker threads sharing ``--connections`` connections; achieved and
+target rates and transaction latencies are reported every ``--report-interval``
+seconds:
+
+> python3 resources/test-mysql/generate_data.py --scale 100 --stream --rate 5000 --duration 600
 """
 
+import argparse
+import contextlib
+import csv
 import json
+import multiprocessing
 import os
+import queue
 import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
 import uuid
 from datetime import datetime, timedelta
-from os import system
+from pathlib import Path
 
-import mysql.connector
 from faker import Faker
-from mysql.connector import Error
 
-fake = Faker()
+# Shared with the other load scripts; resources/ sits next to resinkit_byoc/
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from resinkit_byoc.core.num_utils import RateLimiter, percentile  # noqa: E402
 
 # Database configuration
 DB_CONFIG = {
@@ -29,163 +81,214 @@ DB_CONFIG = {
     "port": int(os.environ.get("MYSQL_TCP_PORT", 3306)),
 }
 
+# Timestamps are spread over the year after ANCHOR, so they do not depend on the
+# day the data is generated
+ANCHOR = datetime(2024, 1, 1)
+YEAR_SECONDS = 365 * 24 * 3600
 
-# Table generators
-def generate_user():
+ROLES = ["ADMIN", "OWNER", "MEMBER"]
+
+# mysql.connector.errorcode.ER_DUP_ENTRY
+ER_DUP_ENTRY = 1062
+
+ID_NAMESPACE = uuid.UUID("6f1c3a52-8d0e-4b8f-9a57-2f0c7e4d5b10")
+
+# Set per process by init_worker
+SEED = 0
+
+
+def row_id(table, index):
+    """Id of row ``index`` of ``table``; lets any process reference any row."""
+    return str(uuid.uuid5(ID_NAMESPACE, f"{SEED}:{table}:{index}"))
+
+
+def past_time(rng):
+    return ANCHOR + timedelta(seconds=rng.randrange(YEAR_SECONDS))
+
+
+def future_time(rng):
+    return ANCHOR + timedelta(seconds=YEAR_SECONDS + rng.randrange(YEAR_SECONDS))
+
+
+# Table generators. Each builds row ``i`` of its table; ``counts`` holds the row
+# counts of all tables of the run, for picking referenced rows.
+
+
+def generate_user(fake, rng, i, counts):
     return {
-        "id": str(uuid.uuid4()),
+        "id": row_id("User", i),
         "name": fake.name(),
         "email": fake.email(),
-        "emailVerified": fake.date_time_this_year(),
+        "emailVerified": past_time(rng),
         "password": fake.password(),
         "image": fake.image_url(),
-        "createdAt": fake.date_time_this_year(),
-        "updatedAt": fake.date_time_this_year(),
-        "invalid_login_attempts": random.randint(0, 5),
-        "lockedAt": fake.date_time_this_year() if random.random() < 0.1 else None,
+        "createdAt": past_time(rng),
+        "updatedAt": past_time(rng),
+        "invalid_login_attempts": rng.randint(0, 5),
+        "lockedAt": past_time(rng) if rng.random() < 0.1 else None,
     }
 
 
-def generate_team():
+def generate_team(fake, rng, i, counts):
     return {
-        "id": str(uuid.uuid4()),
+        "id": row_id("Team", i),
         "name": fake.company(),
         "slug": fake.slug(),
         "domain": fake.domain_name(),
-        "defaultRole": random.choice(["ADMIN", "OWNER", "MEMBER"]),
-        "billingId": str(uuid.uuid4()),
-        "billingProvider": random.choice(["stripe", "paypal"]),
-        "createdAt": fake.date_time_this_year(),
-        "updatedAt": fake.date_time_this_year(),
+        "defaultRole": rng.choice(ROLES),
+        "billingId": row_id("TeamBilling", i),
+        "billingProvider": rng.choice(["stripe", "paypal"]),
+        "createdAt": past_time(rng),
+        "updatedAt": past_time(rng),
     }
 
 
-def generate_team_member(team_id, user_id):
+def generate_team_member(fake, rng, i, counts):
     return {
-        "id": str(uuid.uuid4()),
-        "teamId": team_id,
-        "userId": user_id,
-        "role": random.choice(["ADMIN", "OWNER", "MEMBER"]),
-        "createdAt": fake.date_time_this_year(),
-        "updatedAt": fake.date_time_this_year(),
+        "id": row_id("TeamMember", i),
+        "teamId": row_id("Team", i % counts["Team"]),
+        "userId": row_id("User", rng.randrange(counts["User"])),
+        "role": rng.choice(ROLES),
+        "createdAt": past_time(rng),
+        "updatedAt": past_time(rng),
     }
 
 
-def generate_invitation(team_id, invited_by):
+def generate_invitation(fake, rng, i, counts):
     return {
-        "id": str(uuid.uuid4()),
-        "teamId": team_id,
+        "id": row_id("Invitation", i),
+        "teamId": row_id("Team", rng.randrange(counts["Team"])),
         "email": fake.email(),
-        "role": random.choice(["ADMIN", "OWNER", "MEMBER"]),
+        "role": rng.choice(ROLES),
         "token": fake.uuid4(),
-        "expires": fake.future_datetime(),
-        "invitedBy": invited_by,
-        "createdAt": fake.date_time_this_year(),
-        "updatedAt": fake.date_time_this_year(),
-        "sentViaEmail": random.choice([True, False]),
-        # Convert list to JSON
-        "allowedDomains": json.dumps(
-            [fake.domain_name() for _ in range(random.randint(0, 3))]
-        ),
+        "expires": future_time(rng),
+        "invitedBy": row_id("User", rng.randrange(counts["User"])),
+        "createdAt": past_time(rng),
+        "updatedAt": past_time(rng),
+        "sentViaEmail": rng.choice([True, False]),
+        "allowedDomains": [fake.domain_name() for _ in range(rng.randint(0, 3))],
     }
 
 
-def generate_api_key(team_id):
+def generate_api_key(fake, rng, i, counts):
     return {
-        "id": str(uuid.uuid4()),
+        "id": row_id("ApiKey", i),
         "name": fake.word(),
-        "teamId": team_id,
+        "teamId": row_id("Team", i % counts["Team"]),
         "hashedKey": fake.sha256(),
-        "createdAt": fake.date_time_this_year(),
-        "updatedAt": fake.date_time_this_year(),
-        "expiresAt": fake.future_datetime(),
-        "lastUsedAt": fake.date_time_this_year(),
+        "createdAt": past_time(rng),
+        "updatedAt": past_time(rng),
+        "expiresAt": future_time(rng),
+        "lastUsedAt": past_time(rng),
     }
 
 
-def generate_subscription():
+def generate_subscription(fake, rng, i, counts):
     return {
-        "id": str(uuid.uuid4()),
-        "customerId": str(uuid.uuid4()),
-        "priceId": str(uuid.uuid4()),
-        "active": random.choice([True, False]),
-        "startDate": fake.date_time_this_year(),
-        "endDate": fake.future_datetime(),
-        "cancelAt": fake.future_datetime() if random.random() < 0.2 else None,
-        "createdAt": fake.date_time_this_year(),
-        "updatedAt": fake.date_time_this_year(),
+        "id": row_id("Subscription", i),
+        "customerId": row_id("TeamBilling", rng.randrange(counts["Team"])),
+        "priceId": row_id("Price", rng.randrange(counts["Price"])),
+        "active": rng.choice([True, False]),
+        "startDate": past_time(rng),
+        "endDate": future_time(rng),
+        "cancelAt": future_time(rng) if rng.random() < 0.2 else None,
+        "createdAt": past_time(rng),
+        "updatedAt": past_time(rng),
     }
 
 
-def generate_service():
+def generate_service(fake, rng, i, counts):
     return {
-        "id": str(uuid.uuid4()),
+        "id": row_id("Service", i),
         "description": fake.text(),
-        "features": [fake.word() for _ in range(random.randint(1, 5))],
+        "features": [fake.word() for _ in range(rng.randint(1, 5))],
         "image": fake.image_url(),
         "name": fake.company(),
-        "created": fake.date_time_this_year(),
-        "createdAt": fake.date_time_this_year(),
-        "updatedAt": fake.date_time_this_year(),
+        "created": past_time(rng),
+        "createdAt": past_time(rng),
+        "updatedAt": past_time(rng),
     }
 
 
-def generate_price(service_id):
+def generate_price(fake, rng, i, counts):
     return {
-        "id": str(uuid.uuid4()),
-        "billingScheme": random.choice(["per_unit", "tiered"]),
+        "id": row_id("Price", i),
+        "billingScheme": rng.choice(["per_unit", "tiered"]),
         "currency": fake.currency_code(),
-        "serviceId": service_id,
-        "amount": random.randint(100, 10000),
-        "metadata": json.dumps({"key": fake.word()}),
-        "type": random.choice(["one_time", "recurring"]),
-        "created": fake.date_time_this_year(),
+        "serviceId": row_id("Service", i % counts["Service"]),
+        "amount": rng.randint(100, 10000),
+        "metadata": {"key": fake.word()},
+        "type": rng.choice(["one_time", "recurring"]),
+        "created": past_time(rng),
     }
 
 
-def generate_data_connection_config(team_id):
+def generate_data_connection_config(fake, rng, i, counts):
     return {
-        "id": str(uuid.uuid4()),
-        "ownerTeamId": team_id,
+        "id": row_id("t_data_connection_config", i),
+        "ownerTeamId": row_id("Team", i % counts["Team"]),
         "name": fake.word(),
-        "type": random.choice(["mysql", "postgresql", "mongodb"]),
-        "details": json.dumps(
-            {
-                "host": fake.ipv4(),
-                "port": random.randint(1000, 9999),
-                "username": fake.user_name(),
-                "password": fake.password(),
-            }
-        ),
-        "createdBy": str(uuid.uuid4()),
-        "updatedBy": str(uuid.uuid4()),
-        "updatedAt": fake.date_time_this_year(),
+        "type": rng.choice(["mysql", "postgresql", "mongodb"]),
+        "details": {
+            "host": fake.ipv4(),
+            "port": rng.randint(1000, 9999),
+            "username": fake.user_name(),
+            "password": fake.password(),
+        },
+        "createdBy": row_id("User", rng.randrange(counts["User"])),
+        "updatedBy": row_id("User", rng.randrange(counts["User"])),
+        "updatedAt": past_time(rng),
     }
 
 
-def generate_flink_cdc_config(team_id, source_conn_id, sink_conn_id):
+def generate_flink_cdc_config(fake, rng, i, counts):
+    connections = counts["t_data_connection_config"]
     return {
-        "id": str(uuid.uuid4()),
-        "ownerTeamId": team_id,
+        "id": row_id("t_flink_cdc_config", i),
+        "ownerTeamId": row_id("Team", rng.randrange(counts["Team"])),
         "name": fake.word(),
-        "sourceConnId": source_conn_id,
-        "sourceTables": ",".join([fake.word() for _ in range(random.randint(1, 3))]),
-        "sinkConnId": sink_conn_id,
-        "transform": json.dumps({"operation": "transform_data"}),
-        "route": json.dumps({"path": "/data/route"}),
-        "pipeline": json.dumps({"steps": ["extract", "transform", "load"]}),
-        "createdBy": str(uuid.uuid4()),
-        "updatedBy": str(uuid.uuid4()),
-        "updatedAt": fake.date_time_this_year(),
+        "sourceConnId": row_id("t_data_connection_config", rng.randrange(connections)),
+        "sourceTables": ",".join([fake.word() for _ in range(rng.randint(1, 3))]),
+        "sinkConnId": row_id("t_data_connection_config", rng.randrange(connections)),
+        "transform": {"operation": "transform_data"},
+        "route": {"path": "/data/route"},
+        "pipeline": {"steps": ["extract", "transform", "load"]},
+        "createdBy": row_id("User", rng.randrange(counts["User"])),
+        "updatedBy": row_id("User", rng.randrange(counts["User"])),
+        "updatedAt": past_time(rng),
     }
 
 
+# Tables in load order (referenced tables first) with their rows per unit of scale
+TABLES = [
+    ("User", 10_000, generate_user),
+    ("Team", 1_000, generate_team),
+    ("TeamMember", 3_000, generate_team_member),
+    ("Invitation", 1_000, generate_invitation),
+    ("ApiKey", 2_000, generate_api_key),
+    ("Service", 10, generate_service),
+    ("Price", 30, generate_price),
+    ("Subscription", 2_000, generate_subscription),
+    ("t_data_connection_config", 2_000, generate_data_connection_config),
+    ("t_flink_cdc_config", 1_000, generate_flink_cdc_config),
+]
+GENERATORS = {table: generator for table, _, generator in TABLES}
+
+
+def row_counts(scale):
+    return {table: max(1, round(per_scale * scale)) for table, per_scale, _ in TABLES}
+
+
 # Database operations
 
 
-def connect_to_database():
+def connect_to_database(**options):
+    # Only the mysql sink and --stream need the driver
+    import mysql.connector
+    from mysql.connector import Error
+
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
+        connection = mysql.connector.connect(**DB_CONFIG, **options)
         if connection.is_connected():
             return connection
     except Error as e:
@@ -193,95 +296,683 @@ def connect_to_database():
     return None
 
 
-def insert_data(connection, table_name, data):
+def sql_value(value):
+    # Convert lists/dicts to JSON
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def tsv_value(value):
+    """Encode a value for the default ``LOAD DATA`` field format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    text = str(sql_value(value))
+    return (
+        text.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return value
+
+
+def csv_value(value):
+    """Encode a value for ``LOAD DATA ... FIELDS TERMINATED BY ','``."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return 1 if value else 0
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    value = sql_value(value)
+    if isinstance(value, str):
+        # Backslash is the default ESCAPED BY character of LOAD DATA
+        return value.replace("\\", "\\\\")
+    return value
+
+
+# Sinks. Every worker process writes the chunks it generates to one sink.
+
+FILE_FORMATS = {"jsonl", "csv", "tsv"}
+
+
+class SinkError(Exception):
+    pass
+
+
+def write_rows_file(table, start, rows):
+    """Write a chunk to ``<output-dir>/<table>/part-<start>.<format>``."""
+    file_format = _options["sink"]
+    directory = os.path.join(_options["output_dir"], table)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"part-{start:010d}.{file_format}")
+    # Written under a temporary name so readers never see a partial chunk
+    with open(path + ".tmp", "w", encoding="utf-8", newline="") as f:
+        if file_format == "jsonl":
+            for row in rows:
+                f.write(json.dumps({k: json_value(v) for k, v in row.items()}))
+                f.write("\n")
+        elif file_format == "csv":
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(rows[0].keys())
+            for row in rows:
+                writer.writerow([csv_value(value) for value in row.values()])
+        else:
+            for row in rows:
+                f.write("\t".join(tsv_value(value) for value in row.values()))
+                f.write("\n")
+    os.replace(path + ".tmp", path)
+
+
+def produce_rows(table, rows):
+    """
+    Produce a chunk to ``<topic-prefix><table>``, keyed by row id.
+
+    The chunk is only done once every record is delivered; anything that keeps
+    it from being delivered within ``--kafka-timeout`` raises SinkError.
+    """
+    from confluent_kafka import KafkaException
+
+    topic = _options["topic_prefix"] + table
+    timeout = _options["kafka_timeout"]
+    deadline = time.monotonic() + timeout
+    failures = []
+
+    def delivered(error, message):
+        if error is not None:
+            failures.append(error)
+
     try:
-        cursor = connection.cursor()
-        columns = ", ".join(data.keys())
-        values = ", ".join(["%s"] * len(data))
-        query = f"INSERT INTO {table_name} ({columns}) VALUES ({values})"
-
-        # Convert lists/dicts to JSON and prepare the final values
-        final_values = [
-            json.dumps(value) if isinstance(value, (list, dict)) else value
-            for value in data.values()
-        ]
-
-        # Print the SQL query and the actual values being inserted
-        print(f"Executing SQL: {query}")
-        print(f"With values: {final_values}")
-
-        # Execute the query
-        cursor.execute(query, final_values)
-        connection.commit()
-    except Error as e:
-        print(f"Error inserting data into {table_name}: {e}")
+        for row in rows:
+            value = json.dumps({k: json_value(v) for k, v in row.items()})
+            while True:
+                try:
+                    _producer.produce(
+                        topic, value=value, key=row["id"], on_delivery=delivered
+                    )
+                    break
+                except BufferError:
+                    # The local queue is full; wait for batches to be delivered
+                    if time.monotonic() > deadline:
+                        raise SinkError(
+                            f"producer queue for {topic} still full after {timeout:g}s"
+                        )
+                    _producer.poll(0.1)
+            _producer.poll(0)
+        undelivered = _producer.flush(max(0.0, deadline - time.monotonic()))
+    except KafkaException as e:
+        raise SinkError(f"cannot produce to {topic}: {e}") from e
+    if undelivered:
+        raise SinkError(
+            f"{undelivered} records not delivered to {topic} within {timeout:g}s"
+        )
+    if failures:
+        raise SinkError(
+            f"{len(failures)} records not delivered to {topic}: {failures[0]}"
+        )
+
+
+# Worker processes
+
+_fake = None
+_connection = None
+_producer = None
+_options = {}
+
+
+def init_worker(seed, options):
+    global SEED, _fake, _connection, _producer, _options
+    SEED = seed
+    _fake = Faker()
+    _options = options
+    if options["sink"] == "mysql":
+        connect = (
+            {"allow_local_infile": True} if options["method"] == "load-data" else {}
+        )
+        _connection = connect_to_database(**connect)
+    elif options["sink"] == "kafka":
+        from confluent_kafka import Producer
+
+        _producer = Producer(options["kafka_config"])
+
+
+def generate_chunk(table, start, count, counts):
+    """Build rows ``start`` to ``start + count`` of ``table``."""
+    chunk_seed = f"{SEED}:{table}:{start}"
+    _fake.seed_instance(chunk_seed)
+    rng = random.Random(chunk_seed)
+    generator = GENERATORS[table]
+    return [generator(_fake, rng, i, counts) for i in range(start, start + count)]
+
+
+def insert_rows(table, rows):
+    columns = list(rows[0])
+    column_list = ", ".join(f"`{column}`" for column in columns)
+    cursor = _connection.cursor()
+    if _options["method"] == "load-data":
+        with tempfile.NamedTemporaryFile("w", suffix=".tsv", encoding="utf-8") as f:
+            for row in rows:
+                f.write("\t".join(tsv_value(value) for value in row.values()))
+                f.write("\n")
+            f.flush()
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE `{table}`"
+                f" CHARACTER SET utf8mb4 ({column_list})",
+                (f.name,),
+            )
+    else:
+        values = ", ".join(["%s"] * len(columns))
+        query = f"INSERT INTO `{table}` ({column_list}) VALUES ({values})"
+        batch_rows = _options["batch_rows"]
+        for i in range(0, len(rows), batch_rows):
+            # executemany sends each batch as one multi-row INSERT
+            cursor.executemany(
+                query,
+                [
+                    [sql_value(value) for value in row.values()]
+                    for row in rows[i : i + batch_rows]
+                ],
+            )
+    _connection.commit()
+    cursor.close()
+
+
+def load_chunk(task):
+    """Load one chunk; returns the rows loaded and the error, if any."""
+    table, start, count, counts = task
+    sink = _options["sink"]
+    if sink == "mysql" and _connection is None:
+        return 0, "no database connection", None
+    rows = generate_chunk(table, start, count, counts)
+    try:
+        if sink == "mysql":
+            from mysql.connector import Error
+
+            try:
+                insert_rows(table, rows)
+            except Error as e:
+                _connection.rollback()
+                return 0, str(e), e.errno
+        elif sink == "kafka":
+            produce_rows(table, rows)
+        else:
+            write_rows_file(table, start, rows)
+    except (OSError, SinkError) as e:
+        return 0, str(e), None
+    return count, None, None
+
+
+# Streaming change load
+
+# Tables that receive changes in --stream mode, weighted by their row counts
+STREAM_TABLES = [
+    "User",
+    "Team",
+    "TeamMember",
+    "Invitation",
+    "ApiKey",
+    "Subscription",
+    "t_data_connection_config",
+    "t_flink_cdc_config",
+]
+
+
+class ConnectionPool:
+    """A fixed set of connections shared by the stream threads."""
+
+    def __init__(self, size):
+        self.connections = queue.Queue()
+        for _ in range(size):
+            connection = connect_to_database(autocommit=False)
+            if connection is None:
+                raise ConnectionError("cannot open the connection pool")
+            self.connections.put(connection)
+
+    @contextlib.contextmanager
+    def connection(self):
+        connection = self.connections.get()
+        try:
+            yield connection
+        finally:
+            self.connections.put(connection)
+
+    def close(self):
+        while not self.connections.empty():
+            self.connections.get().close()
+
+
+class LiveRows:
+    """
+    Ids of the rows of one table that exist, for picking update and delete targets.
+
+    Starts with the rows a bulk load of the same ``--scale`` and ``--seed``
+    created, kept as indexes until they are used.
+    """
+
+    def __init__(self, table, count):
+        self.table = table
+        self.keys = list(range(count))
+        self.lock = threading.Lock()
+
+    def _id(self, key):
+        return row_id(self.table, key) if isinstance(key, int) else key
+
+    def add(self, row_id_):
+        with self.lock:
+            self.keys.append(row_id_)
+
+    def pick(self, rng):
+        with self.lock:
+            if not self.keys:
+                return None
+            return self._id(self.keys[rng.randrange(len(self.keys))])
+
+    def take(self, rng):
+        with self.lock:
+            if not self.keys:
+                return None
+            i = rng.randrange(len(self.keys))
+            # Swap with the last key so removal is O(1)
+            self.keys[i], self.keys[-1] = self.keys[-1], self.keys[i]
+            return self._id(self.keys.pop())
+
+
+class StreamStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ops = {"insert": 0, "update": 0, "delete": 0}
+        self.missed = 0
+        self.errors = 0
+        self.latencies = []
+
+    def record(self, ops, missed, latency):
+        with self.lock:
+            for op in ops:
+                self.ops[op] += 1
+            self.missed += missed
+            self.latencies.append(latency)
+
+    def snapshot(self):
+        """Counts and transaction latencies since the previous snapshot."""
+        with self.lock:
+            ops, self.ops = self.ops, {op: 0 for op in self.ops}
+            latencies, self.latencies = self.latencies, []
+            missed, self.missed = self.missed, 0
+        return ops, sorted(latencies), missed
+
+
+def stream_worker(index, args, counts, pool, limiter, live, stats, stop):
+    from mysql.connector import Error
+
+    fake = Faker()
+    fake.seed_instance(f"{SEED}:stream:{index}")
+    rng = random.Random(f"{SEED}:stream:{index}")
+    tables = list(live)
+    weights = [counts[table] for table in tables]
+    run = f"{SEED}:{os.getpid()}:{index}:{int(time.time())}"
+    inserted = 0
+
+    while not stop.is_set():
+        limiter.acquire(args.ops_per_txn)
+        if stop.is_set():
+            break
+        started = time.monotonic()
+        ops, missed = [], 0
+        # Live rows change only once the transaction commits
+        taken, added = [], []
+        with pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                for _ in range(args.ops_per_txn):
+                    table = rng.choices(tables, weights)[0]
+                    draw = rng.random()
+                    if draw < args.delete_ratio:
+                        op, target = "delete", live[table].take(rng)
+                        taken.append((table, target))
+                        cursor.execute(
+                            f"DELETE FROM `{table}` WHERE id = %s", (target,)
+                        )
+                    elif draw < args.delete_ratio + args.update_ratio:
+                        op, target = "update", live[table].pick(rng)
+                        row = GENERATORS[table](fake, rng, 0, counts)
+                        del row["id"]
+                        assignments = ", ".join(f"`{column}` = %s" for column in row)
+                        cursor.execute(
+                            f"UPDATE `{table}` SET {assignments} WHERE id = %s",
+                            [sql_value(value) for value in row.values()] + [target],
+                        )
+                    else:
+                        op = "insert"
+                        row = GENERATORS[table](
+                            fake, rng, counts[table] + inserted, counts
+                        )
+                        row["id"] = row_id(table, f"{run}:{inserted}")
+                        inserted += 1
+                        columns = ", ".join(f"`{column}`" for column in row)
+                        values = ", ".join(["%s"] * len(row))
+                        cursor.execute(
+                            f"INSERT INTO `{table}` ({columns}) VALUES ({values})",
+                            [sql_value(value) for value in row.values()],
+                        )
+                        added.append((table, row["id"]))
+                    if op != "insert" and cursor.rowcount == 0:
+                        missed += 1
+                    ops.append(op)
+                connection.commit()
+            except Error as e:
+                connection.rollback()
+                for table, target in taken:
+                    if target is not None:
+                        live[table].add(target)
+                with stats.lock:
+                    stats.errors += 1
+                print(f"Error in change transaction: {e}", flush=True)
+                continue
+            finally:
+                cursor.close()
+        for table, target in added:
+            live[table].add(target)
+        stats.record(ops, missed, time.monotonic() - started)
+
+
+def stream(args, counts):
+    """Apply inserts, updates and deletes at ``--rate`` ops/s until ``--duration``."""
+    global SEED
+    SEED = args.seed
+    live = {table: LiveRows(table, counts[table]) for table in STREAM_TABLES}
+    try:
+        pool = ConnectionPool(args.connections)
+    except ConnectionError as e:
+        print(f"Error: {e}")
+        return 1
+    limiter = RateLimiter(args.rate)
+    stats = StreamStats()
+    stop = threading.Event()
+    threads = [
+        threading.Thread(
+            target=stream_worker,
+            args=(i, args, counts, pool, limiter, live, stats, stop),
+            daemon=True,
+        )
+        for i in range(args.threads)
+    ]
+    print(
+        f"Streaming changes at {args.rate:,.0f} ops/s"
+        f" (update {args.update_ratio:.0%}, delete {args.delete_ratio:.0%},"
+        f" {args.ops_per_txn} ops per transaction) with {args.threads} threads"
+        f" and {args.connections} connections"
+    )
+    started = last = time.monotonic()
+    totals = {"insert": 0, "update": 0, "delete": 0}
+    for thread in threads:
+        thread.start()
+    try:
+        while not args.duration or time.monotonic() - started < args.duration:
+            remaining = args.duration - (time.monotonic() - started)
+            time.sleep(
+                max(0.0, min(args.report_interval, remaining))
+                if args.duration
+                else args.report_interval
+            )
+            now = time.monotonic()
+            ops, latencies, missed = stats.snapshot()
+            for op, count in ops.items():
+                totals[op] += count
+            achieved = sum(ops.values()) / max(now - last, 1e-6)
+            last = now
+            print(
+                f"{achieved:,.0f}/{args.rate:,.0f} ops/s"
+                f" (insert {ops['insert']:,}, update {ops['update']:,},"
+                f" delete {ops['delete']:,}, missed {missed:,}),"
+                f" transaction p50 {percentile(latencies, 0.5) * 1000:.1f} ms"
+                f" p99 {percentile(latencies, 0.99) * 1000:.1f} ms",
+                flush=True,
+            )
+    except KeyboardInterrupt:
+        pass
+    stop.set()
+    for thread in threads:
+        thread.join()
+    pool.close()
+
+    elapsed = time.monotonic() - started
+    ops, _, _ = stats.snapshot()
+    for op, count in ops.items():
+        totals[op] += count
+    total = sum(totals.values())
+    print(
+        f"Change stream complete: {total:,} ops in {elapsed:.1f}s,"
+        f" {total / max(elapsed, 1e-6):,.0f} ops/s achieved of {args.rate:,.0f} target"
+        f" ({stats.errors} failed transactions)"
+    )
+    return 1 if stats.errors else 0
 
 
 # Main execution
 
 
-def main():
-    connection = connect_to_database()
-    if not connection:
-        return
-
-    # Generate and insert data
-    num_users = 10
-    num_teams = 5
-
-    users = [generate_user() for _ in range(num_users)]
-    teams = [generate_team() for _ in range(num_teams)]
-
-    for user in users:
-        insert_data(connection, "User", user)
-
-    for team in teams:
-        insert_data(connection, "Team", team)
-
-    for team in teams:
-        for _ in range(random.randint(1, 3)):
-            user = random.choice(users)
-            team_member = generate_team_member(team["id"], user["id"])
-            insert_data(connection, "TeamMember", team_member)
-
-        for _ in range(random.randint(0, 2)):
-            invitation = generate_invitation(team["id"], random.choice(users)["id"])
-            insert_data(connection, "Invitation", invitation)
-
-        for _ in range(random.randint(1, 3)):
-            api_key = generate_api_key(team["id"])
-            insert_data(connection, "ApiKey", api_key)
-
-    for _ in range(num_teams * 2):
-        subscription = generate_subscription()
-        insert_data(connection, "Subscription", subscription)
-
-    services = [generate_service() for _ in range(5)]
-    for service in services:
-        insert_data(connection, "Service", service)
-        for _ in range(random.randint(1, 3)):
-            price = generate_price(service["id"])
-            insert_data(connection, "Price", price)
-
-    data_connections = []
-    for team in teams:
-        for _ in range(random.randint(1, 3)):
-            data_connection = generate_data_connection_config(team["id"])
-            insert_data(connection, "t_data_connection_config", data_connection)
-            data_connections.append(data_connection)
-
-    for team in teams:
-        for _ in range(random.randint(0, 2)):
-            source_conn = random.choice(data_connections)
-            sink_conn = random.choice(data_connections)
-            flink_cdc_config = generate_flink_cdc_config(
-                team["id"], source_conn["id"], sink_conn["id"]
-            )
-            insert_data(connection, "t_flink_cdc_config", flink_cdc_config)
+def truncate_tables(connection, tables):
+    cursor = connection.cursor()
+    for table in tables:
+        cursor.execute(f"TRUNCATE TABLE `{table}`")
+    cursor.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=0.001,
+        help="scale factor; 1 is about 22 thousand rows (default: 0.001)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the run")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="generator processes, each with its own connection",
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=20_000,
+        help="rows per chunk; each chunk is one transaction",
+    )
+    parser.add_argument(
+        "--batch-rows",
+        type=int,
+        default=1_000,
+        help="rows per INSERT statement with --method executemany",
+    )
+    parser.add_argument(
+        "--method", choices=["executemany", "load-data"], default="executemany"
+    )
+    parser.add_argument(
+        "--truncate",
+        action="store_true",
+        help="empty the tables (or output directories) first; needed to rerun"
+        " with the same --seed",
+    )
+    parser.add_argument(
+        "--sink",
+        choices=["mysql", "kafka", *sorted(FILE_FORMATS)],
+        default="mysql",
+        help="where rows go: the database, Kafka topics or files (default: mysql)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default="generated-data",
+        help="directory of the jsonl, csv and tsv sinks, one subdirectory per table",
+    )
+    parser.add_argument(
+        "--kafka-bootstrap",
+        default="localhost:9092",
+        help="bootstrap servers of the kafka sink",
+    )
+    parser.add_argument(
+        "--topic-prefix",
+        default="generated.",
+        help="prefix of the kafka sink's topics, followed by the table name",
+    )
+    parser.add_argument(
+        "--kafka-option",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="librdkafka producer setting, e.g. compression.type=zstd",
+    )
+    parser.add_argument(
+        "--kafka-timeout",
+        type=float,
+        default=120,
+        help="seconds a chunk may take to be delivered to kafka before it fails",
+    )
+
+    group = parser.add_argument_group(
+        "stream mode",
+        "apply a steady mix of inserts, updates and deletes to the rows a bulk"
+        " load with the same --scale and --seed created",
+    )
+    group.add_argument("--stream", action="store_true", help="run in stream mode")
+    group.add_argument(
+        "--rate", type=float, default=1000, help="target ops/s (default: 1000)"
+    )
+    group.add_argument(
+        "--update-ratio",
+        type=float,
+        default=0.3,
+        help="share of updates (default: 0.3)",
+    )
+    group.add_argument(
+        "--delete-ratio",
+        type=float,
+        default=0.1,
+        help="share of deletes (default: 0.1)",
+    )
+    group.add_argument(
+        "--ops-per-txn", type=int, default=10, help="changes per transaction"
+    )
+    group.add_argument("--threads", type=int, default=8, help="worker threads")
+    group.add_argument(
+        "--connections", type=int, default=4, help="connections shared by the threads"
+    )
+    group.add_argument(
+        "--duration", type=float, default=0, help="seconds to run; 0 runs until Ctrl-C"
+    )
+    group.add_argument(
+        "--report-interval", type=float, default=10, help="seconds between reports"
+    )
+    args = parser.parse_args(argv)
+    if args.update_ratio < 0 or args.delete_ratio < 0:
+        parser.error("--update-ratio and --delete-ratio must not be negative")
+    if args.update_ratio + args.delete_ratio > 1:
+        parser.error("--update-ratio and --delete-ratio add up to more than 1")
+    if args.rate <= 0:
+        parser.error("--rate must be positive")
+    if args.stream and args.sink != "mysql":
+        parser.error("--stream only supports --sink mysql")
+    if any("=" not in option for option in args.kafka_option):
+        parser.error("--kafka-option takes KEY=VALUE")
+    return args
+
+
+def sink_options(args):
+    """Options of the worker processes' sink."""
+    kafka_config = {
+        "bootstrap.servers": args.kafka_bootstrap,
+        # Few, large, compressed batches; produce() only blocks when the local
+        # queue holds more than queue.buffering.max.kbytes
+        "linger.ms": 50,
+        "batch.size": 1024 * 1024,
+        "compression.type": "lz4",
+        "acks": "1",
+    }
+    kafka_config.update(option.split("=", 1) for option in args.kafka_option)
+    return {
+        "sink": args.sink,
+        "method": args.method,
+        "batch_rows": args.batch_rows,
+        "output_dir": args.output_dir,
+        "topic_prefix": args.topic_prefix,
+        "kafka_config": kafka_config,
+        "kafka_timeout": args.kafka_timeout,
+    }
+
 
-    connection.close()
-    print("Data generation and insertion complete.")
+def main(argv=None):
+    args = parse_args(argv)
+    counts = row_counts(args.scale)
+    if args.stream:
+        return stream(args, counts)
+    tables = [table for table, _, _ in TABLES]
+    total = sum(counts.values())
+    print(
+        f"Generating {total:,} rows (scale {args.scale:g}, seed {args.seed})"
+        f" with {args.processes} processes into {args.sink}"
+    )
+
+    if args.sink == "mysql":
+        connection = connect_to_database()
+        if not connection:
+            return 1
+        if args.truncate:
+            truncate_tables(connection, tables)
+        connection.close()
+    elif args.sink in FILE_FORMATS and args.truncate:
+        for table in tables:
+            shutil.rmtree(os.path.join(args.output_dir, table), ignore_errors=True)
+
+    started = time.monotonic()
+    with multiprocessing.Pool(
+        args.processes,
+        initializer=init_worker,
+        initargs=(args.seed, sink_options(args)),
+    ) as pool:
+        # Referenced tables are loaded before the tables pointing at them
+        for table in tables:
+            tasks = [
+                (table, start, min(args.chunk_rows, counts[table] - start), counts)
+                for start in range(0, counts[table], args.chunk_rows)
+            ]
+            table_started = time.monotonic()
+            last_report = table_started
+            done = 0
+            for rows, error, errno in pool.imap_unordered(load_chunk, tasks):
+                if error:
+                    print(f"Error inserting data into {table}: {error}")
+                    if errno == ER_DUP_ENTRY:
+                        print(
+                            "Rows of this seed exist, rerun with --truncate or another --seed"
+                        )
+                    return 1
+                done += rows
+                now = time.monotonic()
+                if now - last_report >= 5 or done == counts[table]:
+                    last_report = now
+                    rate = done / max(now - table_started, 1e-6)
+                    print(
+                        f"{table}: {done:,}/{counts[table]:,} rows, {rate:,.0f} rows/s",
+                        flush=True,
+                    )
+
+    elapsed = time.monotonic() - started
+    print(
+        f"Data generation and insertion complete: {total:,} rows in {elapsed:.1f}s"
+        f" ({total / max(elapsed, 1e-6):,.0f} rows/s)"
+    )
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parents[1] / "resources/jvm/appcds.sh"
+
+pytestmark = pytest.mark.skipif(shutil.which("bash") is None, reason="needs bash")
+
+
+@pytest.fixture
+def appcds(tmp_path):
+    """Run a function of appcds.sh with a fake java and an archive dir in tmp_path."""
+    java_home = tmp_path / "jdk"
+    (java_home / "bin").mkdir(parents=True)
+    java = java_home / "bin" / "java"
+    java.write_text(
+        '#!/bin/bash\necho "openjdk version \\"$(cat ${0}.version)\\"" >&2\n'
+    )
+    java.chmod(0o755)
+    Path(f"{java}.version").write_text("17.0.9")
+    env = dict(
+        os.environ,
+        JAVA_HOME=str(java_home),
+        RESINKIT_APPCDS_DIR=str(tmp_path / "cds"),
+        RESINKIT_APPCDS="1",
+    )
+
+    def run(*command, **overrides):
+        result = subprocess.run(
+            ["bash", "-c", f'source "{SCRIPT}" && "$@"', "appcds", *command],
+            env=dict(env, **overrides),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return result.stdout.strip()
+
+    run.java_version = Path(f"{java}.version")
+    return run
+
+
+@pytest.fixture
+def classpath(tmp_path):
+    lib = tmp_path / "lib"
+    (lib / "nested").mkdir(parents=True)
+    for jar in ("flink-dist.jar", "nested/hadoop-common.jar"):
+        (lib / jar).write_bytes(b"classes")
+        os.utime(lib / jar, (1_700_000_000, 1_700_000_000))
+    config = tmp_path / "config.yaml"
+    config.write_text("taskmanager.numberOfTaskSlots: 2\n")
+    return lib, config
+
+
+def test_key_changes_with_the_jars_config_and_java(appcds, classpath):
+    lib, config = classpath
+    key = appcds("appcds_key", str(lib), str(config))
+    assert len(key) == 16
+    assert appcds("appcds_key", str(lib), str(config)) == key
+
+    jar = lib / "nested" / "hadoop-common.jar"
+    os.utime(jar, (1_700_000_100, 1_700_000_100))
+    touched = appcds("appcds_key", str(lib), str(config))
+    assert touched != key
+
+    jar.write_bytes(b"more classes")
+    os.utime(jar, (1_700_000_100, 1_700_000_100))
+    resized = appcds("appcds_key", str(lib), str(config))
+    assert resized not in (key, touched)
+
+    (lib / "new-connector.jar").write_bytes(b"classes")
+    added = appcds("appcds_key", str(lib), str(config))
+    assert added != resized
+    # Files that are not jars are not on the classpath
+    (lib / "README.txt").write_text("notes")
+    assert appcds("appcds_key", str(lib), str(config)) == added
+
+    config.write_text("taskmanager.numberOfTaskSlots: 4\n")
+    reconfigured = appcds("appcds_key", str(lib), str(config))
+    assert reconfigured != added
+
+    appcds.java_version.write_text("21.0.2")
+    assert appcds("appcds_key", str(lib), str(config)) != reconfigured
+
+
+def test_opts_record_a_missing_archive_and_map_an_existing_one(
+    appcds, classpath, tmp_path
+):
+    lib, config = classpath
+    cds = tmp_path / "cds"
+    archive = appcds("appcds_archive", "taskmanager", str(lib), str(config))
+    assert Path(archive).parent == cds
+    assert Path(archive).name.startswith("taskmanager-")
+
+    # No archive yet: stale archives of this service go, others stay
+    cds.mkdir()
+    (cds / "taskmanager-0123456789abcdef.jsa").write_bytes(b"old")
+    (cds / "jobmanager-0123456789abcdef.jsa").write_bytes(b"other")
+    opts = appcds("appcds_opts", "taskmanager", str(lib), str(config))
+    assert opts == f"-XX:ArchiveClassesAtExit={archive}"
+    assert sorted(p.name for p in cds.iterdir()) == ["jobmanager-0123456789abcdef.jsa"]
+
+    # An archive cut off while being written is empty and is recorded again
+    Path(archive).touch()
+    opts = appcds("appcds_opts", "taskmanager", str(lib), str(config))
+    assert opts == f"-XX:ArchiveClassesAtExit={archive}"
+
+    Path(archive).write_bytes(b"archive")
+    opts = appcds("appcds_opts", "taskmanager", str(lib), str(config))
+    assert opts == f"-XX:SharedArchiveFile={archive}"
+
+    # A changed classpath falls back to recording a new archive
+    (lib / "flink-dist.jar").write_bytes(b"upgraded classes")
+    opts = appcds("appcds_opts", "taskmanager", str(lib), str(config))
+    assert opts.startswith("-XX:ArchiveClassesAtExit=")
+    assert opts != f"-XX:ArchiveClassesAtExit={archive}"
+    assert not Path(archive).exists()
+
+
+def test_opts_are_empty_when_disabled_or_unwritable(appcds, classpath, tmp_path):
+    lib, config = classpath
+    assert appcds("appcds_opts", "kafka", str(lib), RESINKIT_APPCDS="0") == ""
+
+    blocked = tmp_path / "file"
+    blocked.write_text("")
+    opts = appcds(
+        "appcds_opts", "kafka", str(lib), RESINKIT_APPCDS_DIR=f"{blocked}/cds"
+    )
+    assert opts == ""
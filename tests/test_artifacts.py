@@ -0,0 +1,114 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from resinkit_byoc.core.artifacts import (
+    Artifact,
+    ArtifactCache,
+    ArtifactError,
+    ArtifactNotFound,
+)
+
+JAR = bytes(range(256)) * 4096
+
+
+class Repository(BaseHTTPRequestHandler):
+    """Serves ``files`` by path and honours single ``bytes=N-`` ranges."""
+
+    files = {}
+    ranges = []
+
+    def do_GET(self):
+        body = self.files.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        offset = 0
+        header = self.headers.get("Range")
+        if header:
+            self.ranges.append(header)
+            offset = int(header[len("bytes=") :].rstrip("-"))
+        self.send_response(206 if offset else 200)
+        self.send_header("Content-Length", str(len(body) - offset))
+        self.end_headers()
+        self.wfile.write(body[offset:])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def repo():
+    Repository.files = {}
+    Repository.ranges = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Repository)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_port}/maven2"
+
+    def publish(name, body=JAR, sha512=None):
+        path = f"/maven2/{name}"
+        Repository.files[path] = body
+        digest = sha512 or hashlib.sha512(body).hexdigest()
+        Repository.files[f"{path}.sha512"] = f"{digest}  {name}\n".encode()
+        return f"{base}/{name}"
+
+    yield publish
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_resumes_a_partial_download(repo, tmp_path):
+    url = repo("flink-connector.jar")
+    cache = ArtifactCache(cache_dir=str(tmp_path / "cache"), retries=1)
+    part = cache._partial_path(url)
+    part.parent.mkdir(parents=True)
+    part.write_bytes(JAR[:1000])
+
+    path = cache.fetch(url)
+
+    assert Repository.ranges == ["bytes=1000-"]
+    assert path.read_bytes() == JAR
+    assert path.name == hashlib.sha256(JAR).hexdigest()
+    assert not part.exists()
+    assert cache.fetch(url) == path
+
+
+def test_fetch_rejects_a_sha512_mismatch(repo, tmp_path):
+    url = repo("tampered.jar", sha512="0" * 128)
+    cache = ArtifactCache(cache_dir=str(tmp_path / "cache"), retries=1)
+    with pytest.raises(ArtifactError, match="sha512 mismatch"):
+        cache.fetch(url)
+    assert not cache._partial_path(url).exists()
+    assert cache.lookup(url) is None
+
+
+def test_install_allows_missing_artifacts_when_asked(repo, tmp_path):
+    found = repo("found.jar")
+    missing = found.replace("found.jar", "missing.jar")
+    cache = ArtifactCache(cache_dir=str(tmp_path / "cache"), retries=1)
+    artifacts = [Artifact(found, "lib"), Artifact(missing, "lib")]
+    dests = {"lib": str(tmp_path / "lib")}
+
+    with pytest.raises(ArtifactError, match="Not found"):
+        cache.install(artifacts, dests)
+    with pytest.raises(ArtifactNotFound):
+        cache.fetch(missing)
+
+    assert cache.install(artifacts, dests, allow_missing=True) == {"hardlink": 1}
+    assert sorted(p.name for p in (tmp_path / "lib").iterdir()) == ["found.jar"]
+
+
+def test_install_hardlinks_the_cached_object(repo, tmp_path):
+    url = repo("flink-connector.jar")
+    cache = ArtifactCache(cache_dir=str(tmp_path / "cache"), retries=1)
+    dests = {"lib": str(tmp_path / "lib"), "other": str(tmp_path / "other")}
+    artifacts = [Artifact(url, "lib"), Artifact(url, "unused")]
+
+    assert cache.install(artifacts, dests) == {"hardlink": 1}
+    installed = tmp_path / "lib" / "flink-connector.jar"
+    assert installed.stat().st_ino == cache.lookup(url).stat().st_ino
+    assert not (tmp_path / "other").exists()
+    assert cache.install(artifacts, dests) == {"present": 1}
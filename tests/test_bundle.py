@@ -0,0 +1,56 @@
+import shutil
+import subprocess
+
+import pytest
+
+from resinkit_byoc.deploys import bundle
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+
+
+def checkout(path, extra_jar=False):
+    for name in bundle.BUNDLE_INPUTS:
+        target = path / name
+        if name.endswith(".sh"):
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(f"# {name}\n")
+        else:
+            target.mkdir(parents=True, exist_ok=True)
+            (target / "conf.yaml").write_text(f"# {name}\n")
+    (path / ".gitignore").write_text("resources/flink/lib/flink/\n")
+    subprocess.run(["git", "init", "-q", str(path)], check=True)
+    subprocess.run(["git", "-C", str(path), "add", "."], check=True)
+    if extra_jar:
+        jars = path / "resources" / "flink" / "lib" / "flink"
+        jars.mkdir(parents=True)
+        (jars / "connector.jar").write_bytes(b"jar")
+        (path / "resources" / "kafka" / "scratch.txt").write_text("untracked\n")
+    return path
+
+
+@pytest.fixture
+def name_in(monkeypatch):
+    monkeypatch.setattr(bundle, "load_dotenvs", lambda: None)
+    for env in bundle.BUNDLE_VERSION_ENVS:
+        monkeypatch.setenv(env, "1.0")
+    monkeypatch.setenv("FLINK_CONNECTOR_PROFILE", "cdc-mysql-doris,kafka")
+
+    def name_in(root):
+        monkeypatch.setattr(bundle, "find_project_root", lambda: root)
+        return bundle.bundle_name()
+
+    return name_in
+
+
+def test_bundle_name_matches_across_checkouts(tmp_path, name_in):
+    a = name_in(checkout(tmp_path / "ci-runner"))
+    b = name_in(checkout(tmp_path / "node" / "resinkit", extra_jar=True))
+    assert a == b
+    assert "-cdc-mysql-doris+kafka-" in a
+
+
+def test_bundle_name_follows_tracked_content(tmp_path, name_in):
+    root = checkout(tmp_path / "repo")
+    before = name_in(root)
+    (root / "resources" / "kafka" / "conf.yaml").write_text("changed\n")
+    assert name_in(root) != before
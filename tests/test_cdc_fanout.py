@@ -0,0 +1,138 @@
+from pathlib import Path
+
+import pytest
+
+from resinkit_byoc.core.cdc_fanout import (
+    FanoutError,
+    Pipeline,
+    derived_job,
+    flink_type,
+    group_by_source,
+    parse_columns,
+    reader_pipeline,
+)
+from resinkit_byoc.core.cdc_planner import parse_table_patterns
+
+COLUMNS = "\n".join(
+    "\t".join(str(v) for v in row)
+    for row in [
+        ("shop", "order_items", "order_id", "bigint", "bigint", "NO", 19, 0, 0, 1),
+        ("shop", "order_items", "line", "int", "int unsigned", "NO", 10, 0, 0, 2),
+        ("shop", "order_items", "amt", "decimal", "decimal(10,2)", "YES", 10, 2, 0, 0),
+        ("shop", "orders", "id", "bigint", "bigint", "NO", 19, 0, 0, 1),
+        ("shop", "orders", "paid", "tinyint", "tinyint(1)", "YES", 3, 0, 0, 0),
+        ("shop", "events", "payload", "json", "json", "YES", 0, 0, 0, 0),
+        ("crm", "users", "id", "int", "int", "NO", 10, 0, 0, 1),
+    ]
+)
+
+
+def pipeline(name, tables, sink, host="localhost", parallelism=1, **source):
+    return Pipeline(
+        Path(f"{name}.yaml"),
+        {
+            "source": {"type": "mysql", "hostname": host, "tables": tables, **source},
+            "sink": sink,
+            "pipeline": {"parallelism": parallelism},
+        },
+    )
+
+
+DORIS = {"type": "doris", "fenodes": "localhost:8030"}
+KAFKA = {"type": "kafka", "properties.bootstrap.servers": "broker:9092"}
+
+
+@pytest.fixture
+def group():
+    pipelines = [
+        pipeline(
+            "orders", "shop.order.*", DORIS, parallelism=2, **{"server-id": "5600"}
+        ),
+        pipeline("audit", r"shop.\.*,crm.users", KAFKA, host="127.0.0.1"),
+    ]
+    (group,) = group_by_source(pipelines)
+    group.tables = parse_columns(COLUMNS)
+    return group
+
+
+def test_group_by_source_merges_local_aliases():
+    groups = group_by_source(
+        [
+            pipeline("a", "shop.a", DORIS),
+            pipeline("b", "shop.b", DORIS, host="127.0.0.1"),
+            pipeline("c", "shop.c", DORIS, host="db", port=3307),
+        ]
+    )
+    assert [(g.key, [p.name for p in g.pipelines]) for g in groups] == [
+        ("mysql://localhost:3306", ["a", "b"]),
+        ("mysql://db:3307", ["c"]),
+    ]
+
+
+@pytest.mark.parametrize(
+    "data_type,column_type,precision,scale,fraction,expected",
+    [
+        ("tinyint", "tinyint(1)", 3, 0, 0, "BOOLEAN"),
+        ("tinyint", "tinyint(3) unsigned", 3, 0, 0, "SMALLINT"),
+        ("int", "int unsigned", 10, 0, 0, "BIGINT"),
+        ("bigint", "bigint unsigned", 20, 0, 0, "DECIMAL(20, 0)"),
+        ("decimal", "decimal(65,30)", 65, 30, 0, "DECIMAL(38, 30)"),
+        ("datetime", "datetime(3)", 0, 0, 3, "TIMESTAMP(3)"),
+        ("bit", "bit(8)", 8, 0, 0, "BYTES"),
+        ("mediumblob", "mediumblob", 0, 0, 0, "BYTES"),
+        ("enum", "enum('a','b')", 0, 0, 0, "STRING"),
+    ],
+)
+def test_flink_type(data_type, column_type, precision, scale, fraction, expected):
+    assert flink_type(data_type, column_type, precision, scale, fraction) == expected
+
+
+def test_reader_covers_every_pipeline_and_routes_each_table(group):
+    reader = reader_pipeline(group, "localhost:9092", "cdc")
+    assert reader["source"]["tables"] == r"shop.order.*,shop.\.*,crm.users"
+    assert reader["source"]["server-id"] == "5600-5601"
+    assert reader["pipeline"]["parallelism"] == 2
+
+    routes = {r["source-table"]: r["sink-table"] for r in reader["route"]}
+    assert routes == {r"crm.\.*": "cdc_crm.<>", r"shop.\.*": "cdc_shop.<>"}
+    # Flink CDC reads source-table like the tables option
+    for schema, table in group.tables:
+        matching = [
+            sink
+            for pattern, sink in routes.items()
+            for s, p in parse_table_patterns(pattern)
+            if s == schema and p.fullmatch(table)
+        ]
+        assert matching == [f"cdc_{schema}.<>"]
+
+
+def test_derived_doris_job_declares_the_primary_key(group):
+    sql = derived_job(group.pipelines[0], group, "localhost:9092", "cdc")
+    assert "`src_shop_orders`" in sql and "`sink_shop_order_items`" in sql
+    assert "events" not in sql and "crm" not in sql
+    assert sql.count("PRIMARY KEY (`order_id`, `line`) NOT ENFORCED") == 2
+    assert "'topic' = 'cdc_shop.order_items'" in sql
+    assert "'connector' = 'doris'" in sql
+    assert "'key.fields'" not in sql
+    assert sql.rstrip().endswith("END;")
+
+
+def test_derived_kafka_job_keys_records_by_the_primary_key(group):
+    sql = derived_job(group.pipelines[1], group, "localhost:9092", "cdc")
+    assert "'key.fields' = 'order_id;line'" in sql
+    assert "'key.fields' = 'id'" in sql
+    assert "-- shop.events has no primary key" in sql
+    assert sql.count("INSERT INTO") == 4
+
+
+def test_derived_job_without_captured_tables_fails(group):
+    lonely = pipeline("lonely", "other.t", DORIS)
+    with pytest.raises(FanoutError):
+        derived_job(lonely, group, "localhost:9092", "cdc")
+
+
+def test_columns_without_key_positions_are_unkeyed():
+    old = "\n".join("\t".join(line.split("\t")[:9]) for line in COLUMNS.splitlines())
+    tables = parse_columns(old)
+    assert all(c.key == 0 for columns in tables.values() for c in columns)
+    assert tables[("shop", "orders")][1].type == "BOOLEAN"
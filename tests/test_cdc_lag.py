@@ -0,0 +1,93 @@
+import json
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def cdc_lag(load_script):
+    return load_script("resources/test-mysql/cdc_lag.py")
+
+
+ROW = {"run": "r1", "seq": 7, "writtenAt": 1}
+
+
+def test_heartbeat_row_reads_debezium_canal_and_plain_records(cdc_lag):
+    debezium = {"before": None, "after": ROW, "op": "c"}
+    assert cdc_lag.heartbeat_row(json.dumps(debezium)) == ROW
+    assert cdc_lag.heartbeat_row(json.dumps({"payload": debezium})) == ROW
+    delete = {"before": ROW, "after": None, "op": "d"}
+    assert cdc_lag.heartbeat_row(json.dumps(delete)) is None
+
+    canal = {"data": [ROW], "type": "INSERT", "table": "t_cdc_heartbeat"}
+    assert cdc_lag.heartbeat_row(json.dumps(canal).encode()) == ROW
+    assert cdc_lag.heartbeat_row(json.dumps({**canal, "type": "DELETE"})) is None
+
+    assert cdc_lag.heartbeat_row(json.dumps(ROW)) == ROW
+    for message in (None, b"not json", b"[1, 2]"):
+        assert cdc_lag.heartbeat_row(message) is None
+
+
+def test_tracker_splits_catch_up_from_steady_state(cdc_lag):
+    tracker = cdc_lag.Tracker(steady_lag_ms=100)
+    for seq in range(5):
+        tracker.write(seq, seq * 1_000_000)
+    # 500 ms, 300 ms behind, then caught up for good even if lag grows again
+    tracker.seen(0, 500_000)
+    tracker.seen(1, 1_300_000)
+    tracker.seen(2, 2_050_000)
+    tracker.seen(3, 3_400_000)
+    tracker.seen(3, 3_000_000)
+    tracker.seen(99, 1)
+
+    assert tracker.lags == {0: 500, 1: 300, 2: 50, 3: 400}
+    assert tracker.phases == {
+        0: "catch-up",
+        1: "catch-up",
+        2: "steady",
+        3: "steady",
+    }
+    assert tracker.unseen() == [4]
+    window, pending, _, phase = tracker.report()
+    assert (window, pending, phase) == ([500, 300, 50, 400], 1, "steady")
+    assert tracker.report()[0] == []
+
+
+class FastSinkCursor:
+    """A cursor whose sink delivers each heartbeat before execute() returns."""
+
+    def __init__(self, tracker, stop, fail_seq):
+        self.tracker = tracker
+        self.stop = stop
+        self.fail_seq = fail_seq
+
+    def execute(self, query, params):
+        from mysql.connector import Error
+
+        _, seq, written_at = params
+        if seq == self.fail_seq:
+            raise Error("lost connection")
+        self.tracker.seen(seq, written_at + 1000)
+        if seq == 3:
+            self.stop.set()
+
+    def close(self):
+        pass
+
+
+def test_heartbeats_read_back_before_the_insert_returns_count(cdc_lag, capsys):
+    pytest.importorskip("mysql.connector")
+    tracker = cdc_lag.Tracker(steady_lag_ms=100)
+    stop = threading.Event()
+    cursor = FastSinkCursor(tracker, stop, fail_seq=1)
+
+    class Connection:
+        def cursor(self):
+            return cursor
+
+    cdc_lag.write_heartbeats(Connection(), "r1", 0, tracker, stop)
+
+    assert sorted(tracker.written) == [0, 2, 3]
+    assert tracker.lags == {0: 1.0, 2: 1.0, 3: 1.0}
+    assert tracker.unseen() == []
+    assert "Error writing heartbeat: lost connection" in capsys.readouterr().out
@@ -0,0 +1,83 @@
+import pytest
+
+from resinkit_byoc.core.cdc_planner import (
+    GB,
+    MAX_CHUNKS_PER_TABLE,
+    MIN_CHUNK_ROWS,
+    CdcPlanError,
+    TableStats,
+    parse_stats,
+    parse_table_patterns,
+    plan_pipelines,
+    render_pipeline,
+    select_tables,
+)
+
+
+def table(name, gb, rows=1_000_000, has_primary_key=True):
+    return TableStats("db", name, rows, int(gb * GB), has_primary_key)
+
+
+TABLES = [table("a", 1), table("big", 60), table("b", 3), table("c", 1)]
+
+
+def test_large_and_named_tables_get_their_own_pipelines():
+    plans = plan_pipelines(
+        "sync", TABLES, "doris", max_parallelism=8, split_tables=("db.c",)
+    )
+    assert [p.name for p in plans] == ["sync", "sync (db.big)", "sync (db.c)"]
+    assert [[t.name for t in p.tables] for p in plans] == [["a", "b"], ["big"], ["c"]]
+    assert [p.split for p in plans] == [False, True, True]
+    assert [p.parallelism for p in plans] == [2, 8, 1]
+
+
+def test_server_id_ranges_do_not_overlap():
+    plans = plan_pipelines(
+        "sync",
+        TABLES,
+        "kafka",
+        max_parallelism=8,
+        split_tables=("db.c",),
+        server_id_base=6000,
+    )
+    assert [p.source["server-id"] for p in plans] == ["6000-6001", "6002-6009", "6010"]
+
+
+def test_capped_parallelism_and_missing_primary_keys_warn():
+    plans = plan_pipelines(
+        "sync", [table("big", 60), table("log", 1, has_primary_key=False)], "doris", 8
+    )
+    big = next(p for p in plans if p.split)
+    assert big.parallelism == 8
+    assert any("maximum parallelism" in w for w in big.warnings)
+    rest = next(p for p in plans if not p.split)
+    assert any("db.log has no primary key" in w for w in rest.warnings)
+
+
+def test_chunks_stay_within_budget_and_chunk_count():
+    wide = plan_pipelines("s", [table("wide", 10, rows=1_000_000)], "doris", 8)[0]
+    assert wide.source["scan.incremental.snapshot.chunk.size"] == MIN_CHUNK_ROWS
+    many = plan_pipelines("s", [table("narrow", 10, rows=2 * 10**11)], "doris", 8)[0]
+    assert many.source["scan.incremental.snapshot.chunk.size"] == (
+        2 * 10**11 // MAX_CHUNKS_PER_TABLE
+    )
+
+
+def test_no_tables_is_an_error():
+    with pytest.raises(CdcPlanError):
+        plan_pipelines("sync", [], "doris", 8)
+
+
+def test_patterns_select_tables_and_render_them_escaped():
+    stats = parse_stats("db\torders\t10\t100\t1\ndb\torder_items\t5\t50\t0\n")
+    assert stats[1].has_primary_key is False
+    patterns = parse_table_patterns(r"db.order.*, other.\.*")
+    assert [t.name for t in select_tables(stats, patterns)] == [
+        "orders",
+        "order_items",
+    ]
+
+    plan = plan_pipelines("sync", stats[:1], "doris", 4)[0]
+    config = render_pipeline({"source": {"tables": "db.order.*"}}, plan, False)
+    assert config["source"]["tables"] == "db.orders"
+    assert config["pipeline"] == {"name": "sync", "parallelism": 1}
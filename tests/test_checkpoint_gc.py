@@ -0,0 +1,119 @@
+import os
+import time
+
+from resinkit_byoc.core.checkpoint_gc import (
+    INCOMPLETE_GRACE,
+    JOB_DIR,
+    plan_checkpoints,
+    plan_savepoints,
+    remove,
+)
+
+NOW = time.time()
+DAY = 86400
+
+ACTIVE = "a" * 32
+STOPPED = "b" * 32
+RESTORED = "c" * 32
+RECENT = "d" * 32
+
+
+def make_dir(path, age, metadata=None, files=("data",)):
+    path.mkdir(parents=True)
+    for name in files:
+        (path / name).write_bytes(b"x" * 100)
+    if metadata is not None:
+        (path / "_metadata").write_bytes(metadata)
+    # The job directory is written whenever one of its checkpoints is
+    job = [path.parent] if JOB_DIR.match(path.parent.name) else []
+    for p in [path, *path.rglob("*"), *job]:
+        os.utime(p, (NOW - age, NOW - age))
+    return path
+
+
+def test_stopped_jobs_past_retention_are_removed(tmp_path):
+    make_dir(tmp_path / STOPPED / "chk-3", 10 * DAY, metadata=b"meta")
+    make_dir(tmp_path / RECENT / "chk-1", DAY, metadata=b"meta")
+    make_dir(tmp_path / ACTIVE / "chk-9", 30 * DAY, metadata=b"meta")
+    (tmp_path / "not-a-job").mkdir()
+
+    candidates, _ = plan_checkpoints(tmp_path, {ACTIVE}, 7 * DAY, now=NOW)
+
+    assert [(c.path.name, c.kind) for c in candidates] == [(STOPPED, "job")]
+    freed, errors = remove(candidates)
+    assert (freed, errors) == (candidates[0].size, [])
+    assert sorted(p.name for p in tmp_path.iterdir()) == [ACTIVE, RECENT, "not-a-job"]
+
+
+def test_active_jobs_are_untouched(tmp_path):
+    for n in (1, 2, 3):
+        make_dir(tmp_path / ACTIVE / f"chk-{n}", 30 * DAY, metadata=b"meta")
+    make_dir(tmp_path / ACTIVE / "chk-4", 30 * DAY)
+
+    candidates, kept = plan_checkpoints(tmp_path, {ACTIVE}, 7 * DAY, now=NOW)
+
+    assert candidates == []
+    assert kept == 4 * 100 + 3 * 4
+
+
+def test_jobs_restored_from_by_a_kept_job_are_kept(tmp_path):
+    metadata = f"file:///opt/flink/data/checkpoints/{RESTORED}/shared/x".encode()
+    make_dir(tmp_path / RECENT / "chk-1", DAY, metadata=b"old")
+    make_dir(tmp_path / RECENT / "chk-2", DAY, metadata=metadata)
+    make_dir(tmp_path / RESTORED / "chk-5", 30 * DAY, metadata=b"meta")
+    make_dir(tmp_path / STOPPED / "chk-5", 30 * DAY, metadata=b"meta")
+
+    candidates, _ = plan_checkpoints(tmp_path, {RECENT}, 7 * DAY, now=NOW)
+
+    assert [c.path.name for c in candidates if c.kind == "job"] == [STOPPED]
+    assert (tmp_path / RESTORED) not in [c.path for c in candidates]
+
+
+def test_superseded_and_incomplete_checkpoints_of_stopped_jobs_are_removed(tmp_path):
+    make_dir(tmp_path / RECENT / "chk-1", DAY, metadata=b"meta")
+    make_dir(tmp_path / RECENT / "chk-2", DAY, metadata=b"meta")
+    make_dir(tmp_path / RECENT / "chk-3", DAY)
+    make_dir(tmp_path / RECENT / "shared", DAY)
+
+    candidates, kept = plan_checkpoints(tmp_path, {ACTIVE}, 7 * DAY, now=NOW)
+
+    assert [(c.path.name, c.reason) for c in candidates] == [
+        ("chk-1", "superseded by chk-2"),
+        ("chk-3", "incomplete"),
+    ]
+    assert kept == 100 + 4 + 100
+
+
+def test_offline_pruning_only_removes_whole_jobs(tmp_path):
+    make_dir(tmp_path / RECENT / "chk-1", DAY, metadata=b"meta")
+    make_dir(tmp_path / RECENT / "chk-2", DAY, metadata=b"meta")
+    make_dir(tmp_path / STOPPED / "chk-1", 10 * DAY, metadata=b"meta")
+
+    candidates, _ = plan_checkpoints(tmp_path, None, 7 * DAY, now=NOW)
+
+    assert [(c.path.name, c.kind) for c in candidates] == [(STOPPED, "job")]
+
+
+def test_savepoints_keep_the_newest_and_honor_the_grace_period(tmp_path):
+    for n, age in enumerate((40, 35, 32, 31, 1)):
+        make_dir(tmp_path / f"savepoint-{n}", age * DAY, metadata=b"meta")
+    make_dir(tmp_path / "savepoint-old-incomplete", 2 * INCOMPLETE_GRACE)
+    make_dir(tmp_path / "savepoint-in-progress", INCOMPLETE_GRACE / 2)
+
+    candidates, _ = plan_savepoints(tmp_path, None, keep=3, now=NOW)
+    assert [(c.path.name, c.reason) for c in candidates] == [
+        ("savepoint-old-incomplete", "incomplete")
+    ]
+
+    candidates, _ = plan_savepoints(tmp_path, 30 * DAY, keep=3, now=NOW)
+    assert sorted(c.path.name for c in candidates) == [
+        "savepoint-0",
+        "savepoint-1",
+        "savepoint-old-incomplete",
+    ]
+
+    candidates, _ = plan_savepoints(tmp_path, 36 * DAY, keep=1, now=NOW)
+    assert sorted(c.path.name for c in candidates) == [
+        "savepoint-0",
+        "savepoint-old-incomplete",
+    ]
@@ -0,0 +1,162 @@
+import pytest
+
+from resinkit_byoc.core.connectors import ConnectorManifest, ManifestError, main
+
+MANIFEST = """
+defaults:
+  FLINK_VER_MAJOR: "1.20"
+  MAVEN: https://repo.example/maven2
+flink_versions:
+  "1.20":
+    KAFKA_VER: 3.3.0-1.20
+  "1.19":
+    KAFKA_VER: 3.3.0-1.19
+connectors:
+  kafka:
+    group: flink
+    sql: [kafka, upsert-kafka]
+    pipeline: [kafka]
+    jars:
+      - ${MAVEN}/flink-sql-connector-kafka-${KAFKA_VER}.jar
+  mysql-cdc:
+    group: flink
+    sql: [mysql-cdc]
+    jars:
+      - ${MAVEN}/flink-sql-connector-mysql-cdc.jar
+  pipeline-mysql:
+    group: cdc
+    pipeline: [mysql]
+    jars:
+      - ${MAVEN}/flink-cdc-pipeline-connector-mysql.jar
+  paimon:
+    group: flink
+    sql: [paimon]
+    pipeline: [paimon]
+    jars:
+      - ${MAVEN}/paimon-flink.jar
+profiles:
+  cdc-mysql: [mysql-cdc, pipeline-mysql]
+  streaming: [cdc-mysql, kafka]
+  full: [streaming, paimon, kafka]
+  loop-a: [kafka, loop-b]
+  loop-b: [loop-a]
+"""
+
+
+@pytest.fixture
+def manifest_path(tmp_path, monkeypatch):
+    monkeypatch.delenv("FLINK_VER_MAJOR", raising=False)
+    monkeypatch.delenv("KAFKA_VER", raising=False)
+    path = tmp_path / "connectors.yaml"
+    path.write_text(MANIFEST)
+    return path
+
+
+@pytest.fixture
+def dests(tmp_path):
+    flink, cdc = tmp_path / "flink-lib", tmp_path / "cdc-lib"
+    flink.mkdir()
+    cdc.mkdir()
+    return flink, cdc
+
+
+def run(manifest_path, dests, *args):
+    flink, cdc = dests
+    return main(
+        ["--manifest", str(manifest_path), "--dest", f"flink={flink}"]
+        + ["--dest", f"cdc={cdc}", *args]
+    )
+
+
+def test_nested_profiles_expand_in_order_without_duplicates(manifest_path):
+    manifest = ConnectorManifest.load(manifest_path, env={})
+    assert manifest.profile("streaming") == ["mysql-cdc", "pipeline-mysql", "kafka"]
+    assert manifest.profile("full") == [
+        "mysql-cdc",
+        "pipeline-mysql",
+        "kafka",
+        "paimon",
+    ]
+    assert manifest.profiles_connectors(["cdc-mysql", "streaming"]) == [
+        "mysql-cdc",
+        "pipeline-mysql",
+        "kafka",
+    ]
+
+
+def test_profile_cycles_and_unknown_names_fail(manifest_path):
+    manifest = ConnectorManifest.load(manifest_path, env={})
+    with pytest.raises(ManifestError, match="includes itself"):
+        manifest.profile("loop-a")
+    with pytest.raises(ManifestError, match="Unknown profile: nope"):
+        manifest.profile("nope")
+
+
+def test_variables_follow_the_flink_release_line(manifest_path):
+    (kafka,) = ConnectorManifest.load(manifest_path, env={}).artifacts(["kafka"])
+    assert (
+        kafka.url
+        == "https://repo.example/maven2/flink-sql-connector-kafka-3.3.0-1.20.jar"
+    )
+    assert kafka.group == "flink"
+
+    older = ConnectorManifest.load(manifest_path, env={"FLINK_VER_MAJOR": "1.19"})
+    assert older.artifacts(["kafka"])[0].filename.endswith("-3.3.0-1.19.jar")
+    with pytest.raises(ManifestError, match="FLINK_VER_MAJOR=1.17"):
+        ConnectorManifest.load(manifest_path, env={"FLINK_VER_MAJOR": "1.17"})
+
+
+def test_prune_removes_only_manifest_jars_outside_the_profiles(
+    manifest_path, dests, capsys
+):
+    flink, cdc = dests
+    jars = [
+        flink / "flink-sql-connector-kafka-3.3.0-1.20.jar",
+        flink / "flink-sql-connector-mysql-cdc.jar",
+        flink / "paimon-flink.jar",
+        cdc / "flink-cdc-pipeline-connector-mysql.jar",
+        flink / "my-udf.jar",
+    ]
+    for jar in jars:
+        jar.write_bytes(b"jar")
+
+    assert run(manifest_path, dests, "prune", "--profile", "cdc-mysql") == 0
+
+    assert [jar.exists() for jar in jars] == [False, True, False, True, True]
+    assert "Pruned 2 jars not in profile cdc-mysql" in capsys.readouterr().out
+
+
+def test_resolve_maps_pipeline_yaml_and_sql_to_connectors(
+    manifest_path, dests, tmp_path, capsys
+):
+    pipeline = tmp_path / "mysql_to_kafka.yaml"
+    pipeline.write_text(
+        "source:\n  type: mysql\n  hostname: db\n"
+        "sink:\n  type: kafka\n"
+        "pipeline:\n  parallelism: 1\n"
+    )
+    job = tmp_path / "job.sql"
+    job.write_text(
+        "CREATE TABLE src (id INT) WITH ('connector' = 'mysql-cdc');\n"
+        'CREATE TABLE gen (id INT) WITH ("connector" = "datagen");\n'
+        "CREATE CATALOG lake WITH ('type' = 'PAIMON', 'warehouse' = 's3://w');\n"
+    )
+
+    assert run(manifest_path, dests, "resolve", str(pipeline), str(job)) == 1
+    out = capsys.readouterr().out
+    missing = sorted(line for line in out.splitlines() if line.startswith("Missing:"))
+    assert missing == [
+        "Missing: cdc https://repo.example/maven2/flink-cdc-pipeline-connector-mysql.jar",
+        "Missing: flink https://repo.example/maven2/flink-sql-connector-kafka-3.3.0-1.20.jar",
+        "Missing: flink https://repo.example/maven2/flink-sql-connector-mysql-cdc.jar",
+        "Missing: flink https://repo.example/maven2/paimon-flink.jar",
+    ]
+    assert f"{job}: no manifest connector provides sql type 'datagen'" in out
+
+    flink, cdc = dests
+    for name in ("flink-sql-connector-mysql-cdc.jar", "paimon-flink.jar"):
+        (flink / name).write_bytes(b"jar")
+    (flink / "flink-sql-connector-kafka-3.3.0-1.20.jar").write_bytes(b"jar")
+    (cdc / "flink-cdc-pipeline-connector-mysql.jar").write_bytes(b"jar")
+    assert run(manifest_path, dests, "resolve", str(pipeline), str(job)) == 0
+    assert "All referenced connectors are installed" in capsys.readouterr().out
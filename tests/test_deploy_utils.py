@@ -0,0 +1,163 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from resinkit_byoc.core import deploy_utils
+from resinkit_byoc.core.deploy_utils import (
+    PendingScript,
+    PendingShell,
+    parallel_job,
+    parallel_scripts,
+    render_batch_runner,
+    render_parallel_runner,
+    run_shell,
+)
+from resinkit_byoc.core.timing import parse_step_timings
+
+
+@pytest.fixture(autouse=True)
+def remote_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(deploy_utils, "SCRIPT_CACHE_DIR", str(tmp_path / "scripts"))
+    monkeypatch.setattr(deploy_utils, "STATE_DIR", str(tmp_path / "state"))
+    return tmp_path
+
+
+def script(name, body, **kwargs):
+    content = f"#!/bin/bash\n{body}\n"
+    return PendingScript(
+        name, Path(f"{name}.sh"), {"GREETING": "hi"}, content, **kwargs
+    )
+
+
+def run(runner):
+    return subprocess.run(["bash", "-c", runner], capture_output=True, text=True)
+
+
+def test_parallel_runner_runs_scripts_concurrently(remote_dirs):
+    scripts = [
+        script("first", 'sleep 0.5; echo "$GREETING first"'),
+        script("second", 'sleep 0.5; echo "$GREETING second"'),
+        script("third", "exit 3"),
+    ]
+    result = run(render_parallel_runner([[s] for s in scripts], 3, set()))
+
+    assert result.returncode == 1
+    # Output is grouped by script, in order, under its step line
+    lines = result.stdout.splitlines()
+    assert lines.index("hi first") < lines.index("hi second")
+    steps = {s["name"]: s for s in parse_step_timings(lines)}
+    assert [steps[n]["status"] for n in ("first", "second", "third")] == [
+        "ok",
+        "ok",
+        "error",
+    ]
+    # Both sleeps started before either finished
+    assert steps["second"]["offset"] < steps["first"]["offset"] + 0.5
+    assert len(list((remote_dirs / "scripts").glob("*.sh"))) == 3
+
+
+def test_parallel_runner_respects_max_jobs():
+    scripts = [script(f"s{i}", "sleep 0.3") for i in range(3)]
+    result = run(render_parallel_runner([[s] for s in scripts], 1, set()))
+    steps = parse_step_timings(result.stdout.splitlines())
+    assert result.returncode == 0
+    assert steps[2]["offset"] >= 0.6
+
+
+def test_cached_scripts_are_not_embedded(remote_dirs):
+    cached = script("cached", "echo cached")
+    fresh = script("fresh", "echo fresh")
+    runner = render_parallel_runner([[cached], [fresh]], 2, {cached.digest})
+    assert f"RESINKIT_{fresh.digest}" in runner
+    assert f"RESINKIT_{cached.digest}" not in runner
+    assert f"touch {remote_dirs}/scripts/{cached.digest}.sh" in runner
+
+
+def test_state_is_saved_only_when_the_script_succeeds(remote_dirs):
+    ok_state = remote_dirs / "state" / "ok"
+    failed_state = remote_dirs / "state" / "failed"
+    steps = [
+        script("ok", "true", state_file=str(ok_state), fingerprint="abc"),
+        script("failed", "false", state_file=str(failed_state), fingerprint="def"),
+    ]
+    result = run(render_batch_runner(steps, set()))
+    assert result.returncode == 1
+    assert ok_state.read_text().strip() == "abc"
+    assert not failed_state.exists()
+
+
+def test_batch_runner_mixes_scripts_and_shell_steps():
+    steps = [
+        script("greet", 'echo "$GREETING script"'),
+        PendingShell("shell", ["echo 'quoted \"shell\"'", "echo second"]),
+    ]
+    result = run(render_batch_runner(steps, set()))
+    assert result.returncode == 0
+    output = [l for l in result.stdout.splitlines() if not l.startswith("[RESINKIT]")]
+    assert output == ["hi script", 'quoted "shell"', "second"]
+
+
+def test_parallel_runner_runs_the_steps_of_a_job_in_order():
+    jobs = [
+        [script("a1", "sleep 0.3; echo a1"), PendingShell("a2", ["echo a2"])],
+        [script("b1", "exit 2"), PendingShell("b2", ["echo b2"])],
+        [PendingShell("c", ["sleep 0.1; echo c"])],
+    ]
+    result = run(render_parallel_runner(jobs, 3, set()))
+
+    assert result.returncode == 1
+    steps = {s["name"]: s for s in parse_step_timings(result.stdout.splitlines())}
+    assert steps["a2"]["offset"] >= steps["a1"]["offset"] + 0.3
+    assert steps["c"]["offset"] < 0.3
+    assert steps["b1"]["status"] == "error"
+    assert "[RESINKIT] ===== b2 (skipped) =====" in result.stdout
+    assert "b2" not in steps and "\nb2\n" not in result.stdout
+
+
+@pytest.fixture
+def wave(monkeypatch):
+    """Run parallel_scripts without a host; ``operations`` stands in for pyinfra's."""
+    operations = []
+    runners = []
+    monkeypatch.setattr(deploy_utils, "_operation_count", lambda: len(operations))
+    monkeypatch.setattr(deploy_utils, "_load_remote_inventory", lambda: None)
+    monkeypatch.setattr(
+        deploy_utils,
+        "run_payload",
+        lambda render, name: runners.append(render(set())),
+    )
+    return operations, runners
+
+
+def test_wave_runs_the_shell_steps_of_a_stage_with_its_scripts(wave):
+    operations, runners = wave
+    with parallel_scripts(2):
+        with parallel_job("jupyter"):
+            operations.append("files.template")
+            run_shell(["sleep 0.3", "echo copied"], name="copy")
+            run_shell(["echo chowned"], name="chown")
+        with parallel_job("api"):
+            run_shell(["echo api"], name="api")
+
+    (runner,) = runners
+    result = run(runner)
+    assert result.returncode == 0
+    steps = {s["name"]: s for s in parse_step_timings(result.stdout.splitlines())}
+    assert steps["chown"]["offset"] >= steps["copy"]["offset"] + 0.3
+    assert steps["api"]["offset"] < 0.3
+    assert deploy_utils._wave is None
+
+
+@pytest.mark.parametrize("between", [True, False])
+def test_wave_rejects_operations_after_a_deferred_step(wave, between):
+    operations, runners = wave
+    with pytest.raises(RuntimeError, match="jupyter adds an operation after 'copy'"):
+        with parallel_scripts(2):
+            with parallel_job("jupyter"):
+                run_shell(["echo copied"], name="copy")
+                operations.append("files.template")
+                if between:
+                    run_shell(["echo chowned"], name="chown")
+    assert not runners
+    assert deploy_utils._wave is None
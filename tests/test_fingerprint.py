@@ -0,0 +1,131 @@
+import shutil
+import subprocess
+
+import pytest
+
+from resinkit_byoc.core.cmd_utils import idempotent_by
+from resinkit_byoc.core.fingerprint import compute_fingerprint, list_files
+
+
+def make_tree(root):
+    (root / "resources" / "flink" / "conf").mkdir(parents=True)
+    (root / "resources" / "flink" / "conf" / "conf.yaml").write_text("a: 1\n")
+    (root / "scripts").mkdir()
+    (root / "scripts" / "install.sh").write_text("echo install\n")
+    return root
+
+
+def test_same_inputs_in_different_checkouts_match(tmp_path):
+    a = make_tree(tmp_path / "fpA")
+    b = make_tree(tmp_path / "fpB")
+    inputs = ["resources/flink", "scripts/install.sh", "missing.txt"]
+    assert compute_fingerprint(inputs, root=a) == compute_fingerprint(inputs, root=b)
+
+
+def test_absolute_paths_below_root_hash_like_relative_ones(tmp_path):
+    root = make_tree(tmp_path / "repo")
+    assert compute_fingerprint(
+        [root / "scripts" / "install.sh"], root=root
+    ) == compute_fingerprint(["scripts/install.sh"], root=root)
+
+
+def test_content_name_env_and_values_change_the_digest(tmp_path):
+    root = make_tree(tmp_path / "repo")
+    base = compute_fingerprint(["resources"], env={"V": "1"}, root=root)
+    assert compute_fingerprint(["resources"], env={"V": "2"}, root=root) != base
+    assert (
+        compute_fingerprint(["resources"], env={"V": "1"}, values=["x"], root=root)
+        != base
+    )
+
+    (root / "resources" / "flink" / "conf" / "conf.yaml").write_text("a: 2\n")
+    changed = compute_fingerprint(["resources"], env={"V": "1"}, root=root)
+    assert changed != base
+
+    conf = root / "resources" / "flink" / "conf"
+    (conf / "conf.yaml").rename(conf / "other.yaml")
+    assert compute_fingerprint(["resources"], env={"V": "1"}, root=root) != changed
+
+
+def test_large_files_are_hashed_completely(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "big").write_bytes(b"x" * (3 * 1024 * 1024))
+    before = compute_fingerprint(["big"], root=root)
+    (root / "big").write_bytes(b"x" * (3 * 1024 * 1024 - 1) + b"y")
+    assert compute_fingerprint(["big"], root=root) != before
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+def test_git_ignored_files_are_skipped(tmp_path):
+    root = make_tree(tmp_path / "repo")
+    subprocess.run(["git", "init", "-q", str(root)], check=True)
+    (root / ".gitignore").write_text("resources/flink/lib/\n")
+    before = compute_fingerprint(["resources/flink"], root=root)
+
+    lib = root / "resources" / "flink" / "lib"
+    lib.mkdir()
+    (lib / "connector.jar").write_bytes(b"jar")
+    assert compute_fingerprint(["resources/flink"], root=root) == before
+    assert lib / "connector.jar" not in list_files(root / "resources", root)
+
+    # Untracked files that are not ignored are inputs
+    (root / "resources" / "flink" / "conf" / "new.yaml").write_text("b: 1\n")
+    assert compute_fingerprint(["resources/flink"], root=root) != before
+
+
+def test_without_git_jars_and_caches_are_skipped(tmp_path, monkeypatch):
+    root = make_tree(tmp_path / "repo")
+    monkeypatch.setenv("GIT_DIR", str(tmp_path / "no-such-git-dir"))
+    before = compute_fingerprint(["resources"], root=root)
+    (root / "resources" / "flink" / "x.jar").write_bytes(b"jar")
+    (root / "resources" / "__pycache__").mkdir()
+    (root / "resources" / "__pycache__" / "m.pyc").write_bytes(b"pyc")
+    assert compute_fingerprint(["resources"], root=root) == before
+
+
+def test_idempotent_by_reruns_only_when_inputs_change(tmp_path, monkeypatch):
+    root = make_tree(tmp_path / "repo")
+    conf = root / "resources" / "flink" / "conf"
+    state = tmp_path / "state" / "flink_conf"
+    monkeypatch.setenv("FLINK_VER_MINOR", "1.20.1")
+    monkeypatch.delenv("RESINKIT_FORCE", raising=False)
+    calls = []
+
+    @idempotent_by(state, inputs=[conf], envs=["FLINK_VER_MINOR"])
+    def install_flink_conf(fail=False):
+        calls.append(fail)
+        if fail:
+            raise RuntimeError("install failed")
+        return "installed"
+
+    assert install_flink_conf() == "installed"
+    assert install_flink_conf() is None
+    assert len(calls) == 1
+    assert len(state.read_text().strip()) == 64
+
+    (conf / "conf.yaml").write_text("a: 2\n")
+    install_flink_conf()
+    install_flink_conf()
+    monkeypatch.setenv("FLINK_VER_MINOR", "1.19.2")
+    install_flink_conf()
+    assert len(calls) == 3
+
+    monkeypatch.setenv("RESINKIT_FORCE", "1")
+    install_flink_conf()
+    assert len(calls) == 4
+
+    # A failed run keeps the previous fingerprint, so the next run retries
+    monkeypatch.delenv("RESINKIT_FORCE")
+    (conf / "conf.yaml").write_text("a: 3\n")
+    recorded = state.read_text()
+    with pytest.raises(RuntimeError):
+        install_flink_conf(fail=True)
+    assert state.read_text() == recorded
+    install_flink_conf()
+    assert len(calls) == 6
+
+
+def test_idempotent_by_inputs_need_a_state_file():
+    with pytest.raises(ValueError):
+        idempotent_by(func=lambda: False, envs=["FLINK_VER_MINOR"])
@@ -0,0 +1,84 @@
+import json
+import textwrap
+
+import pytest
+
+from resinkit_byoc.core.fleet import FleetRollout, plan_rollout, resolve_count
+
+DEPLOYS = textwrap.dedent("""
+    import os
+
+    from pyinfra.operations import server
+
+    MARKER = os.environ["FLEET_MARKER"]
+
+
+    def first():
+        server.shell(name="first", commands=[f"echo first >> {MARKER}"])
+
+
+    def second():
+        server.shell(name="second", commands=[f"echo second >> {MARKER}"])
+
+
+    def fail():
+        server.shell(name="fail", commands=["exit 3"])
+    """)
+
+
+def test_resolve_count():
+    assert resolve_count("3", 10) == 3
+    assert resolve_count("10%", 25) == 3
+    with pytest.raises(ValueError):
+        resolve_count("150%", 10)
+
+
+def test_plan_rollout_repeats_last_wave():
+    hosts = [f"h{i}" for i in range(7)]
+    assert plan_rollout(hosts, "1,3") == [
+        ["h0"],
+        ["h1", "h2", "h3"],
+        ["h4", "h5", "h6"],
+    ]
+
+
+def test_command_passes_one_deploy(tmp_path):
+    rollout = FleetRollout(["deploy.a", "deploy.b"], tmp_path, pyinfra_args=["--sudo"])
+    command = rollout.command("@local", "deploy.b")
+    assert command[-3:] == ["--sudo", "@local", "deploy.b"]
+    assert "deploy.a" not in command
+
+
+@pytest.fixture
+def local_rollout(tmp_path):
+    pytest.importorskip("pyinfra")
+    (tmp_path / "fleetdeploys.py").write_text(DEPLOYS)
+    marker = tmp_path / "marker"
+
+    def make(deploys):
+        return FleetRollout(
+            deploys,
+            tmp_path / "logs",
+            env={"FLEET_MARKER": str(marker)},
+            host_timeout=120,
+            cwd=tmp_path,
+        )
+
+    return make, marker
+
+
+def test_local_runs_deploys_in_order(local_rollout):
+    make, marker = local_rollout
+    rollout = make(["fleetdeploys.first", "fleetdeploys.second"])
+    assert rollout.run([["@local"]])
+    assert marker.read_text().split() == ["first", "second"]
+    summary = json.loads((rollout.log_dir / "summary.json").read_text())
+    assert summary["counts"] == {"ok": 1, "failed": 0, "skipped": 0}
+
+
+def test_local_stops_host_at_first_failure(local_rollout):
+    make, marker = local_rollout
+    rollout = make(["fleetdeploys.fail", "fleetdeploys.second"])
+    assert not rollout.run([["@local"]])
+    assert not marker.exists()
+    assert rollout.results[0].status == "failed"
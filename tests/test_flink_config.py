@@ -0,0 +1,108 @@
+import pytest
+
+from resinkit_byoc.core.flink_config import (
+    FRAMEWORK_HEAP_MB,
+    FRAMEWORK_OFF_HEAP_MB,
+    MIN_JOBMANAGER_MB,
+    MIN_TASKMANAGER_MB,
+    FlinkConfigError,
+    plan_flink,
+    render_config,
+)
+from resinkit_byoc.core.hardware import MB, Resources
+
+
+def host(cpus, memory_gb):
+    return Resources(cpus=cpus, memory=memory_gb * 1024 * MB)
+
+
+def components(plan):
+    return (
+        plan.task_heap
+        + plan.managed
+        + plan.network
+        + FRAMEWORK_HEAP_MB
+        + FRAMEWORK_OFF_HEAP_MB
+        + plan.jvm_metaspace
+        + plan.jvm_overhead
+    )
+
+
+def test_plan_sizes_processes_within_host_memory():
+    plan = plan_flink(host(8, 16))
+    assert plan.reserved == 4915
+    assert plan.jobmanager_process == 1720
+    assert plan.taskmanager_process == 9749
+    assert plan.reserved + plan.jobmanager_process + plan.taskmanager_process == 16384
+    assert (plan.task_heap, plan.managed, plan.network) == (3876, 3305, 826)
+    assert (plan.jvm_metaspace, plan.jvm_overhead) == (512, 974)
+    assert (plan.slots, plan.parallelism) == (8, 8)
+    assert components(plan) == plan.taskmanager_process
+    assert not plan.warnings
+
+
+@pytest.mark.parametrize("cpus,memory_gb", [(1, 4), (2, 4), (4, 8), (16, 64)])
+def test_components_add_up_to_the_taskmanager(cpus, memory_gb):
+    plan = plan_flink(host(cpus, memory_gb))
+    assert components(plan) == plan.taskmanager_process
+    assert plan.task_heap >= 128
+
+
+def test_reserved_memory_is_at_least_1_5_gb_and_at_most_half():
+    assert plan_flink(host(2, 4)).reserved == 1536
+    assert (
+        plan_flink(host(1, 2), jobmanager_mb=512, taskmanager_mb=1024).reserved == 1024
+    )
+    assert plan_flink(host(8, 16), reserved_mb=2048).reserved == 2048
+
+
+def test_slots_follow_cores_unless_memory_is_short():
+    assert plan_flink(host(4, 16)).slots == 4
+    plan = plan_flink(host(32, 4))
+    assert plan.slots == (plan.task_heap + plan.managed) // 256
+    assert plan.slots < 32
+    assert plan_flink(host(8, 16), slots=2, parallelism=6).parallelism == 6
+
+
+@pytest.mark.parametrize("memory_gb", [1, 2, 3])
+def test_small_host_fails_instead_of_squeezing_other_services(memory_gb):
+    with pytest.raises(FlinkConfigError, match="lower the reserved memory"):
+        plan_flink(host(1, memory_gb))
+
+
+def test_small_host_plans_within_a_lower_reservation():
+    plan = plan_flink(host(1, 2), reserved_mb=256)
+    assert plan.jobmanager_process == MIN_JOBMANAGER_MB
+    assert plan.taskmanager_process == 2048 - 256 - MIN_JOBMANAGER_MB
+    assert plan.taskmanager_process >= MIN_TASKMANAGER_MB
+    assert not plan.warnings
+
+
+def test_given_process_sizes_over_the_budget_only_warn():
+    plan = plan_flink(host(1, 2), jobmanager_mb=768, taskmanager_mb=MIN_TASKMANAGER_MB)
+    assert plan.taskmanager_process == MIN_TASKMANAGER_MB
+    assert plan.warnings == [
+        "Flink processes (1792m) exceed the 1024m left after reserving 1024m of"
+        " 2048m for other services"
+    ]
+
+
+def test_invalid_managed_fraction_is_rejected():
+    with pytest.raises(FlinkConfigError):
+        plan_flink(host(8, 16), managed_fraction=1.0)
+
+
+def test_rocksdb_profile_keeps_state_within_managed_memory():
+    plan = plan_flink(host(8, 16), state_profile="rocksdb")
+    assert plan.state["state.backend.rocksdb.memory.managed"] is True
+    assert plan.state["state.backend.rocksdb.thread.num"] == 2
+    with pytest.raises(FlinkConfigError):
+        plan_flink(host(8, 16), managed_fraction=0.0, state_profile="rocksdb")
+
+
+def test_overrides_replace_the_planned_option_group():
+    plan = plan_flink(host(8, 16))
+    config = render_config({}, plan, {"taskmanager.memory.managed.fraction": 0.2})
+    managed = config["taskmanager"]["memory"]["managed"]
+    assert managed == {"fraction": 0.2}
+    assert config["taskmanager"]["numberOfTaskSlots"] == 8
@@ -0,0 +1,122 @@
+import csv
+import json
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("faker")
+
+SCRIPT = Path(__file__).resolve().parents[1] / "resources/test-mysql/generate_data.py"
+
+USER_COLUMNS = [
+    "id",
+    "name",
+    "email",
+    "emailVerified",
+    "password",
+    "image",
+    "createdAt",
+    "updatedAt",
+    "invalid_login_attempts",
+    "lockedAt",
+]
+
+# Runs the script with the MySQL driver hidden, as on a host without it
+WITHOUT_MYSQL = (
+    "import runpy, sys; sys.modules['mysql'] = None; sys.argv = sys.argv[1:];"
+    " runpy.run_path(sys.argv[0], run_name='__main__')"
+)
+
+
+def generate(tmp_path, sink, *args):
+    out = tmp_path / sink
+    command = [sys.executable, "-c", WITHOUT_MYSQL, str(SCRIPT), "--scale", "0.01"]
+    command += ["--sink", sink, "--output-dir", str(out), "--processes", "2", *args]
+    result = subprocess.run(command, capture_output=True, text=True, check=False)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return out
+
+
+def test_file_sinks_need_no_mysql_driver(tmp_path):
+    out = generate(tmp_path, "csv")
+    with open(out / "User" / "part-0000000000.csv", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == USER_COLUMNS
+    assert len(rows) == 1 + 100
+
+    out = generate(tmp_path, "tsv")
+    lines = (out / "User" / "part-0000000000.tsv").read_text().splitlines()
+    fields = [line.split("\t") for line in lines]
+    assert len(fields) == 100
+    assert all(len(row) == len(USER_COLUMNS) for row in fields)
+    locked = [row[-1] for row in fields]
+    assert "\\N" in locked
+    assert "None" not in locked
+
+
+def read_parts(out):
+    """Chunk files by path relative to ``out``."""
+    return {
+        path.relative_to(out).as_posix(): path.read_text()
+        for path in sorted(out.rglob("*.jsonl"))
+    }
+
+
+def read_rows(parts, table):
+    return [
+        json.loads(line)
+        for name, text in parts.items()
+        if name.startswith(f"{table}/")
+        for line in text.splitlines()
+    ]
+
+
+def test_rows_do_not_depend_on_the_worker_processes(tmp_path):
+    chunks = ("--chunk-rows", "30")
+    one = read_parts(generate(tmp_path / "one", "jsonl", "--processes", "1", *chunks))
+    many = read_parts(generate(tmp_path / "many", "jsonl", "--processes", "4", *chunks))
+    assert "User/part-0000000090.jsonl" in one
+    assert one == many
+
+    other = read_parts(generate(tmp_path / "other", "jsonl", "--seed", "1", *chunks))
+    assert other.keys() == one.keys() and other != one
+
+    # Rows reference rows that other processes generated
+    users = {row["id"] for row in read_rows(one, "User")}
+    teams = {row["id"] for row in read_rows(one, "Team")}
+    members = read_rows(one, "TeamMember")
+    assert len(users) == 100 and len(members) == 30
+    assert all(row["userId"] in users for row in members)
+    assert all(row["teamId"] in teams for row in members)
+
+
+@pytest.fixture
+def generate_data(load_script):
+    return load_script("resources/test-mysql/generate_data.py")
+
+
+def test_row_ids_depend_only_on_seed_table_and_index(generate_data, monkeypatch):
+    monkeypatch.setattr(generate_data, "SEED", 3)
+    first = generate_data.row_id("User", 42)
+    assert generate_data.row_id("User", 42) == first
+    assert generate_data.row_id("Team", 42) != first
+    monkeypatch.setattr(generate_data, "SEED", 4)
+    assert generate_data.row_id("User", 42) != first
+
+
+def test_tsv_and_csv_encoders(generate_data):
+    when = datetime(2024, 1, 2, 3, 4, 5)
+    tsv = generate_data.tsv_value
+    assert [tsv(None), tsv(True), tsv(False), tsv(7)] == ["\\N", "1", "0", "7"]
+    assert tsv(when) == "2024-01-02 03:04:05"
+    assert tsv("a\tb\nc\\d\r") == "a\\tb\\nc\\\\d\\r"
+    assert tsv({"k": [1]}) == '{"k": [1]}'
+
+    value = generate_data.csv_value
+    assert [value(None), value(True), value(3)] == ["\\N", 1, 3]
+    assert value(when) == "2024-01-02 03:04:05"
+    assert value("C:\\tmp") == "C:\\\\tmp"
+    assert value(["a", "b"]) == '["a", "b"]'
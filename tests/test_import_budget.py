@@ -0,0 +1,50 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from resinkit_byoc.deploys import DEPLOY_MODULES
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Imported only once a deploy runs
+HEAVY_PACKAGES = {"pyinfra", "gevent", "dotenv", "click"}
+
+# Generous, so slow CI machines pass; the import takes ~25 ms
+BUDGET_SECONDS = 0.5
+
+
+def import_times(module):
+    """Cumulative import time in seconds of every module ``module`` imports."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+@pytest.mark.parametrize("module", ["deploy", "resinkit_byoc.cli"])
+def test_entry_points_import_fast(module):
+    times = import_times(module)
+    heavy = sorted(name for name in times if name.split(".")[0] in HEAVY_PACKAGES)
+    assert heavy == []
+    assert times[module] < BUDGET_SECONDS
+
+
+def test_deploy_exports_every_deploy():
+    sys.path.insert(0, str(ROOT))
+    try:
+        import deploy
+    finally:
+        sys.path.remove(str(ROOT))
+    assert set(DEPLOY_MODULES) <= set(deploy.__all__)
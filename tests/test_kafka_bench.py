@@ -0,0 +1,89 @@
+import json
+
+from resinkit_byoc.core import kafka_bench
+
+FAKE_TOPICS = """#!/bin/sh
+case "$*" in
+  *--delete*) echo "broker went away" >&2; exit 1 ;;
+esac
+"""
+
+# Fails the cases with 1024 byte records
+FAKE_PRODUCER = """#!/bin/sh
+case "$*" in
+  *"--record-size 1024"*) echo "TimeoutException" >&2; exit 1 ;;
+esac
+echo "1000 records sent, 5000.0 records/sec (4.77 MB/sec), 3.10 ms avg latency, \
+20.00 ms max latency, 2 ms 50th, 8 ms 95th, 12 ms 99th, 19 ms 99.9th."
+"""
+
+
+def fake_kafka_home(tmp_path):
+    bin_dir = tmp_path / "kafka" / "bin"
+    bin_dir.mkdir(parents=True)
+    for name, body in (
+        ("kafka-topics.sh", FAKE_TOPICS),
+        ("kafka-producer-perf-test.sh", FAKE_PRODUCER),
+    ):
+        (bin_dir / name).write_text(body)
+        (bin_dir / name).chmod(0o755)
+    return tmp_path / "kafka"
+
+
+def run(tmp_path, *extra):
+    results = tmp_path / "results.jsonl"
+    code = kafka_bench.main(
+        [
+            "run",
+            "--kafka-home",
+            str(fake_kafka_home(tmp_path)),
+            "--record-size",
+            "1024,100",
+            "--linger-ms",
+            "0",
+            "--compression",
+            "none",
+            "--no-consumer",
+            "--results",
+            str(results),
+            *extra,
+        ]
+    )
+    return code, kafka_bench.load_results(results)
+
+
+def test_sweep_records_failed_cases_and_goes_on(tmp_path, capsys):
+    code, runs = run(tmp_path)
+    assert code == 1
+    assert len(runs) == 1
+    cases = runs[0]["cases"]
+    assert [("error" in c, c["case"]["record_size"]) for c in cases] == [
+        (True, 1024),
+        (False, 100),
+    ]
+    assert cases[1]["producer"]["p99_ms"] == 12
+    assert "cannot delete topic" in capsys.readouterr().out
+
+
+def test_sweep_stops_at_first_failure_when_asked(tmp_path):
+    code, runs = run(tmp_path, "--stop-on-error")
+    assert code == 1
+    assert [c["key"] for c in runs[0]["cases"]] == [runs[0]["cases"][0]["key"]]
+
+
+def test_results_file_keeps_one_line_per_run(tmp_path):
+    results = kafka_bench.ResultsFile(tmp_path / "results.jsonl")
+    (tmp_path / "results.jsonl").write_text(json.dumps({"cases": []}) + "\n")
+    results.write({"cases": [1]})
+    results.write({"cases": [1, 2]})
+    assert kafka_bench.load_results(tmp_path / "results.jsonl") == [
+        {"cases": []},
+        {"cases": [1, 2]},
+    ]
+
+
+def test_compare_skips_failed_cases():
+    ok = {"producer": {"records_per_sec": 100.0, "p99_ms": 5}}
+    current = {"cases": [{"key": "a", "error": "boom"}, {"key": "b", **ok}]}
+    baseline = {"cases": [{"key": "a", **ok}, {"key": "b", **ok}]}
+    assert kafka_bench.compare_runs(current, baseline, 0.1, 2) == []
@@ -0,0 +1,71 @@
+import pytest
+
+from resinkit_byoc.core.hardware import MB, Resources
+from resinkit_byoc.core.kafka_config import (
+    KafkaConfigError,
+    parse_properties,
+    plan_broker,
+    render_properties,
+)
+
+
+def host(cpus, memory_gb):
+    return Resources(cpus=cpus, memory=memory_gb * 1024 * MB)
+
+
+def test_small_host_keeps_kafka_defaults_as_floor():
+    settings = plan_broker(host(2, 4), "balanced").settings
+    assert settings["num.network.threads"] == "3"
+    assert settings["num.io.threads"] == "8"
+    assert settings["num.recovery.threads.per.data.dir"] == "1"
+    assert settings["socket.send.buffer.bytes"] == str(128 * 1024)
+    assert settings["num.partitions"] == "1"
+    assert settings["compression.type"] == "producer"
+
+
+def test_cdc_fanout_favours_network_threads_and_bounded_flushes():
+    settings = plan_broker(host(16, 64), "cdc-fanout").settings
+    assert settings["num.network.threads"] == "8"
+    assert settings["num.io.threads"] == "16"
+    assert settings["socket.receive.buffer.bytes"] == str(MB)
+    assert settings["log.flush.interval.messages"] == "10000"
+    assert settings["compression.type"] == "lz4"
+
+
+def test_ingest_scales_io_and_recovery_with_disks():
+    settings = plan_broker(host(32, 64), "ingest", disks=4).settings
+    assert settings["num.network.threads"] == "10"
+    assert settings["num.io.threads"] == "64"
+    assert settings["num.recovery.threads.per.data.dir"] == "4"
+    assert settings["socket.send.buffer.bytes"] == str(2 * MB)
+    assert settings["num.partitions"] == "32"
+    assert "log.flush.interval.ms" not in settings
+
+
+def test_io_threads_cover_eight_per_disk():
+    assert plan_broker(host(8, 16), "balanced", disks=6).settings[
+        "num.io.threads"
+    ] == str(48)
+    assert plan_broker(host(8, 16), "balanced", disks=0).disks == 1
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(KafkaConfigError):
+        plan_broker(host(4, 8), "fast")
+
+
+def test_render_sets_keys_in_place_and_appends_the_rest():
+    template = "num.network.threads=3\n#log.segment.bytes=1073741824\nlog.dirs=/d\n"
+    text = render_properties(
+        template,
+        {"num.network.threads": "8", "log.segment.bytes": "1", "num.partitions": "4"},
+        "generated",
+    )
+    assert text.startswith("# generated\n")
+    assert parse_properties(text) == {
+        "num.network.threads": "8",
+        "log.segment.bytes": "1",
+        "log.dirs": "/d",
+        "num.partitions": "4",
+    }
+    assert text.index("log.segment.bytes=1") < text.index("log.dirs=/d")
@@ -0,0 +1,44 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("hive_metastore_client")
+
+SCRIPT = Path(__file__).resolve().parents[1] / "resources/hive/metastore_bench.py"
+
+
+def test_bench_against_the_standin_metastore(tmp_path):
+    output = tmp_path / "summary.json"
+    command = [sys.executable, str(SCRIPT), "--standin", "--clients", "4"]
+    command += ["--duration", "3", "--warmup", "1", "--output", str(output)]
+    command += ["--standin-databases", "2", "--standin-tables", "5"]
+    command += ["--standin-partitions", "10", "--standin-latency", "5"]
+    result = subprocess.run(
+        command, capture_output=True, text=True, timeout=60, check=False
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Summary over 2s (4 clients):" in result.stdout
+
+    summary = json.loads(output.read_text())
+    assert summary["clients"] == 4 and summary["host"].startswith("127.0.0.1:")
+    rows = {row["op"]: row for row in summary["calls"]}
+    assert list(rows) == [
+        "get_all_databases",
+        "get_all_tables",
+        "get_table",
+        "get_partitions",
+        "get_partition_names",
+        "all",
+    ]
+    for row in rows.values():
+        assert row["calls"] > 0 and row["errors"] == 0
+        assert 5 <= row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"] <= row["max_ms"]
+    assert rows["all"]["calls"] == sum(
+        row["calls"] for op, row in rows.items() if op != "all"
+    )
+    # Four clients each waiting 5 ms per call: at most 800 calls a second
+    assert 0 < rows["all"]["per_sec"] <= 800
+    assert rows["get_table"]["calls"] > rows["get_all_databases"]["calls"]
@@ -0,0 +1,74 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from resinkit_byoc.core.metrics import poll_flink
+
+VERTEX_DELAY = 0.2
+
+RESPONSES = {
+    "/jobs/overview": {
+        "jobs": [
+            {"jid": "j1", "name": "cdc", "state": "RUNNING"},
+            {"jid": "j2", "name": "old", "state": "CANCELED"},
+        ]
+    },
+    "/jobs/j1": {
+        "vertices": [
+            {"id": f"v{i}", "name": f"Vertex {i}", "parallelism": 2} for i in range(4)
+        ]
+    },
+    "/jobs/j1/checkpoints": {
+        "counts": {"completed": 5, "failed": 1},
+        "latest": {"completed": {"end_to_end_duration": 1500, "state_size": 1024}},
+    },
+}
+
+
+class FlinkStandIn(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if "/vertices/" in path:
+            time.sleep(VERTEX_DELAY)
+            body = [{"id": "numRecordsInPerSecond", "sum": 10.0}]
+        else:
+            body = RESPONSES[path]
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def flink_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlinkStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_poll_flink_fetches_vertices_concurrently(flink_url):
+    start = time.monotonic()
+    samples = poll_flink(flink_url)
+    elapsed = time.monotonic() - start
+
+    by_name = {}
+    for name, labels, value in samples:
+        by_name.setdefault(name, []).append((dict(labels), value))
+    assert sorted(v for _, v in by_name["resinkit_flink_job_up"]) == [0.0, 1.0]
+    assert len(by_name["resinkit_flink_vertex_parallelism"]) == 4
+    assert len(by_name["resinkit_flink_vertex_records_in_per_second"]) == 4
+    assert by_name["resinkit_flink_checkpoints_completed_total"][0][1] == 5
+    assert by_name["resinkit_flink_checkpoint_duration_seconds"][0][1] == 1.5
+    # Four vertices at 0.2s each would take 0.8s one after the other
+    assert elapsed < 4 * VERTEX_DELAY
@@ -0,0 +1,27 @@
+import time
+
+from resinkit_byoc.core.num_utils import RateLimiter, bounded, percentile
+
+
+def test_bounded_clamps_and_truncates():
+    assert bounded(0.5, 1, 8) == 1
+    assert bounded(5.9, 1, 8) == 5
+    assert bounded(100, 1, 8) == 8
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 51
+    assert percentile(values, 0.99) == 100
+    assert percentile(values, 1.0) == 100
+    assert percentile([], 0.5) == 0.0
+
+
+def test_rate_limiter_spaces_operations():
+    limiter = RateLimiter(100)
+    start = time.monotonic()
+    for _ in range(20):
+        limiter.acquire()
+    limiter.acquire(ops=10)
+    # 30 operations at 100/s, the first one immediately
+    assert time.monotonic() - start >= 0.19
@@ -0,0 +1,84 @@
+import os
+import stat
+
+from resinkit_byoc.core.ownership import OwnershipFixer
+
+
+def make_tree(root):
+    # root, a/, a/b/, a/b/f1, a/f2, c/, c/f3, top -> 8 inodes
+    (root / "a" / "b").mkdir(parents=True)
+    (root / "c").mkdir()
+    for path in ("a/b/f1", "a/f2", "c/f3", "top"):
+        (root / path).write_text("x")
+    return root
+
+
+def mode(path):
+    return stat.S_IMODE(os.lstat(path).st_mode)
+
+
+def test_counts_scanned_and_changed_inodes(tmp_path):
+    root = make_tree(tmp_path / "tree")
+    fixer = OwnershipFixer(os.getuid(), os.getgid(), dry_run=True)
+    counts = fixer.fix_trees([str(root)])
+    assert (counts.scanned, counts.owner_changed, counts.mode_changed) == (8, 0, 0)
+
+    other = OwnershipFixer(os.getuid() + 1, os.getgid(), dry_run=True)
+    counts = other.fix_trees([str(root)])
+    assert (counts.scanned, counts.owner_changed, counts.errors) == (8, 8, 0)
+    assert os.lstat(root / "top").st_uid == os.getuid()
+
+
+def test_nested_roots_are_walked_once(tmp_path):
+    root = make_tree(tmp_path / "tree")
+    fixer = OwnershipFixer(os.getuid(), os.getgid(), dry_run=True)
+    counts = fixer.fix_trees(
+        [
+            str(root / "a" / "b"),
+            str(root),
+            str(root / "a") + "/",
+            str(tmp_path / "gone"),
+        ]
+    )
+    assert counts.scanned == 8
+
+
+def test_symlinks_are_not_followed(tmp_path):
+    root = make_tree(tmp_path / "tree")
+    outside = tmp_path / "outside"
+    outside.mkdir(mode=0o700)
+    (outside / "secret").write_text("x")
+    (outside / "secret").chmod(0o600)
+    (root / "a" / "link").symlink_to(outside)
+
+    fixer = OwnershipFixer(os.getuid(), os.getgid(), dir_mode=0o755, file_mode=0o644)
+    counts = fixer.fix_trees([str(root)])
+
+    assert counts.scanned == 9
+    assert mode(outside) == 0o700
+    assert mode(outside / "secret") == 0o600
+    assert os.path.islink(root / "a" / "link")
+
+
+def test_mode_bits_are_only_added(tmp_path):
+    root = make_tree(tmp_path / "tree")
+    (root / "top").chmod(0o755)
+    (root / "c" / "f3").chmod(0o600)
+    (root / "a" / "f2").chmod(0o640)
+    (root / "c").chmod(0o700)
+
+    fixer = OwnershipFixer(os.getuid(), os.getgid(), dir_mode=0o750, file_mode=0o604)
+    before = {p: mode(p) for p in [root, *root.rglob("*")]}
+    counts = fixer.fix_trees([str(root)])
+
+    assert mode(root / "top") == 0o755
+    assert mode(root / "c" / "f3") == 0o604
+    assert mode(root / "a" / "f2") == 0o644
+    assert mode(root / "c") == 0o750
+    for path, old in before.items():
+        assert mode(path) & old == old
+    changed = sum(1 for path, old in before.items() if mode(path) != old)
+    assert counts.mode_changed == changed
+
+    again = fixer.fix_trees([str(root)])
+    assert (again.scanned, again.mode_changed) == (8, 0)
@@ -0,0 +1,50 @@
+import os
+import subprocess
+
+from resinkit_byoc.core.packages import optional_install_command
+
+FAKE_APT_CACHE = """#!/bin/sh
+case "$2" in
+  missing*) printf '%s:\\n  Installed: (none)\\n  Candidate: (none)\\n' "$2" ;;
+  *) printf '%s:\\n  Installed: (none)\\n  Candidate: 1.0-1\\n' "$2" ;;
+esac
+"""
+
+FAKE_APT_GET = """#!/bin/sh
+echo "$@" > "$APT_LOG"
+"""
+
+
+def test_optional_install_skips_unavailable_packages(tmp_path):
+    for name, body in (("apt-cache", FAKE_APT_CACHE), ("apt-get", FAKE_APT_GET)):
+        (tmp_path / name).write_text(body)
+        (tmp_path / name).chmod(0o755)
+    log = tmp_path / "apt.log"
+    env = dict(os.environ, PATH=f"{tmp_path}:{os.environ['PATH']}", APT_LOG=str(log))
+
+    command = optional_install_command(
+        ["netcat", "missing-pkg", "zstd"], "--no-install-recommends"
+    )
+    result = subprocess.run(
+        ["sh", "-c", command], env=env, capture_output=True, text=True, check=True
+    )
+
+    assert "Skipping optional package missing-pkg" in result.stdout
+    assert log.read_text().split() == [
+        "install",
+        "-y",
+        "--no-install-recommends",
+        "netcat",
+        "zstd",
+    ]
+
+
+def test_optional_install_without_available_packages_installs_nothing(tmp_path):
+    (tmp_path / "apt-cache").write_text(FAKE_APT_CACHE)
+    (tmp_path / "apt-cache").chmod(0o755)
+    env = dict(os.environ, PATH=f"{tmp_path}:{os.environ['PATH']}")
+    command = optional_install_command(["missing-a"], "")
+    result = subprocess.run(
+        ["sh", "-c", command], env=env, capture_output=True, text=True, check=True
+    )
+    assert "Skipping optional package missing-a" in result.stdout
@@ -0,0 +1,143 @@
+import shutil
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from resinkit_byoc.core.supervisor import Probe, Service, Supervisor
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("pkill") is None, reason="needs pgrep/pkill"
+)
+
+LISTENER = """
+import signal, socket, sys, time
+
+port, delay, log = int(sys.argv[1]), float(sys.argv[2]), sys.argv[3]
+if "--ignore-term" in sys.argv:
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+time.sleep(delay)
+server = socket.create_server(("127.0.0.1", port))
+with open(log, "a") as f:
+    f.write(f"ready {port} {time.time()}\\n")
+while True:
+    server.accept()[0].close()
+"""
+
+ENTRYPOINT = """#!/bin/bash
+case "$1" in
+start)
+    echo "start {name} $(date +%s.%N)" >> {log}
+    nohup {python} {listener} {port} {delay} {log} {extra} >/dev/null 2>&1 &
+    ;;
+stop)
+    {stop}
+    ;;
+esac
+"""
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def standin(tmp_path):
+    listener = tmp_path / "listener.py"
+    listener.write_text(LISTENER)
+    log = tmp_path / "events.log"
+    patterns = []
+
+    def make(name, delay=0.0, requires=(), ignore_term=False, graceful=True):
+        port = free_port()
+        pattern = f"{listener} {port}"
+        entrypoint = tmp_path / f"{name}.sh"
+        entrypoint.write_text(
+            ENTRYPOINT.format(
+                name=name,
+                log=log,
+                python=sys.executable,
+                listener=listener,
+                port=port,
+                delay=delay,
+                extra="--ignore-term" if ignore_term else "",
+                stop=f'pkill -f "{pattern}" || true' if graceful else "true",
+            )
+        )
+        patterns.append(pattern)
+        return Service(
+            name=name,
+            entrypoint=str(entrypoint),
+            probes=(Probe(f"{name} port", host="127.0.0.1", port=port),),
+            processes=(pattern,),
+            requires=tuple(requires),
+        )
+
+    def events():
+        lines = [line.split() for line in log.read_text().splitlines()]
+        return {(kind, key): float(at) for kind, key, at in lines}
+
+    yield make, events
+    for pattern in patterns:
+        subprocess.run(["pkill", "-9", "-f", pattern], check=False)
+
+
+def running(service):
+    result = subprocess.run(
+        ["pgrep", "-f", service.processes[0]], capture_output=True, check=False
+    )
+    return result.returncode == 0
+
+
+def test_start_waits_for_required_services(standin):
+    make, events = standin
+    flink = make("flink", delay=1.0)
+    api = make("api", requires=["flink"])
+    supervisor = Supervisor({"api": api, "flink": flink}, start_timeout=20)
+
+    assert supervisor.start()
+
+    times = events()
+    flink_port = flink.probes[0].port
+    assert times[("start", "api")] >= times[("ready", str(flink_port))]
+    supervisor.stop()
+    assert not running(flink) and not running(api)
+
+
+def test_independent_services_start_in_parallel(standin):
+    make, _ = standin
+    services = {name: make(name, delay=1.0) for name in ("a", "b", "c")}
+    supervisor = Supervisor(services, start_timeout=20)
+
+    started = time.monotonic()
+    assert supervisor.start()
+    assert time.monotonic() - started < 2.5
+    supervisor.stop()
+
+
+def test_dependents_are_not_started_when_a_requirement_fails(standin, capsys):
+    make, events = standin
+    flink = make("flink", delay=30)
+    api = make("api", requires=["flink"])
+
+    assert not Supervisor({"flink": flink, "api": api}, start_timeout=0.5).start()
+    assert ("start", "api") not in events()
+    assert "Not starting api: flink is not ready" in capsys.readouterr().out
+
+
+def test_stop_escalates_to_kill_after_the_timeout(standin, capsys):
+    make, _ = standin
+    stubborn = make("stubborn", ignore_term=True, graceful=False)
+    supervisor = Supervisor({"stubborn": stubborn}, start_timeout=20, stop_timeout=0.5)
+    assert supervisor.start()
+
+    started = time.monotonic()
+    supervisor.stop()
+
+    assert time.monotonic() - started >= 0.5
+    assert not running(stubborn)
+    assert "Terminating remaining stubborn processes" in capsys.readouterr().out
@@ -0,0 +1,66 @@
+import subprocess
+
+from resinkit_byoc.core import deploy_utils
+from resinkit_byoc.core.deploy_utils import PendingShell, render_batch_runner
+from resinkit_byoc.core.timing import aggregate, parse_step_timings, to_chrome_trace
+
+
+def run_batch(steps, tmp_path, monkeypatch):
+    monkeypatch.setattr(deploy_utils, "SCRIPT_CACHE_DIR", str(tmp_path))
+    script = render_batch_runner(steps, set())
+    return subprocess.run(["bash", "-c", script], capture_output=True, text=True)
+
+
+def test_batch_runner_reports_each_step_and_stops_at_first_failure(
+    tmp_path, monkeypatch
+):
+    result = run_batch(
+        [
+            PendingShell("Say 'hi'", ["echo hi"]),
+            PendingShell("Fail", ["exit 4"]),
+            PendingShell("Never", ["echo never"]),
+        ],
+        tmp_path,
+        monkeypatch,
+    )
+    assert result.returncode == 4
+    assert "never" not in result.stdout
+    assert "[RESINKIT] ===== Never (skipped) =====" in result.stdout
+
+    steps = parse_step_timings(result.stdout.splitlines())
+    assert [(s["name"], s["status"]) for s in steps] == [
+        ("Say 'hi'", "ok"),
+        ("Fail", "error"),
+    ]
+    assert steps[0]["offset"] <= steps[1]["offset"]
+
+
+def span(name, kind, start, end, stage="install", **extra):
+    return {
+        "host": "h1",
+        "name": name,
+        "stage": stage,
+        "kind": kind,
+        "start": start,
+        "end": end,
+        "status": "ok",
+        **extra,
+    }
+
+
+def test_batched_operations_are_reported_by_their_steps():
+    spans = [
+        span("install", "planning", 0, 0.1),
+        span("Batch: a, b", "operation", 1, 4, steps=2),
+        span("a", "step", 1, 2),
+        span("b", "step", 2, 4),
+        span("apt.packages", "operation", 4, 5, stage="packages"),
+    ]
+    result = aggregate(spans)
+    assert result["operations"] == {"a": 1, "b": 2, "apt.packages": 1}
+    assert result["stages"] == {"install": 3, "packages": 1}
+    assert result["total"] == 4
+
+    events = to_chrome_trace(spans)["traceEvents"]
+    tids = {e["name"]: e["tid"] for e in events if e["ph"] == "X"}
+    assert tids["Batch: a, b"] == 1 and tids["a"] == 3 and tids["install"] == 2